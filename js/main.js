@@ -5,27 +5,15 @@ import * as THREE from 'three';
 import { OrbitControls } from 'three/addons/controls/OrbitControls.js';
 import { GLTFLoader } from 'three/addons/loaders/GLTFLoader.js';
 import * as Primitives from './shapes/primitives.js';
-import * as Wireframes from './shapes/wireframes.js';
-import * as Variations from './shapes/variations.js';
-import * as BasicCombinations from './shapes/combinations_basic.js';
-import * as SeparatedCombinations from './shapes/combinations_separated.js';
-import * as RingsArrays from './shapes/rings_arrays.js';
-import * as StaticFigures from './shapes/figures_static.js';
-import * as DynamicPeople from './shapes/figures_dynamic_people.js';
-import * as DynamicAnimals from './shapes/figures_dynamic_animals.js';
-import * as Objects from './shapes/objects.js';
-import * as Abstract from './shapes/abstract.js';
-
-// --- EXPANDED CONSTANT ---
-// List of models that should be controllable by poser.html
-const POSEABLE_MODELS = [
-    'models/femalebase0.glb',           // Pose pack female (A-Pose)
-    'models/malebase0.glb',             // Pose pack male (A-Pose)
-    'models/male_base1.glb',            // Added
-    'models/male_base2.glb',            // Added
-    'models/game_character_base.glb',   // Added
-    'models/jumping_man.glb',           // Added
-];
+import { loadRegistry, getShapeFunction, addResourceHint } from './shape_registry.js';
+import { createPackedShape } from './shape_pack.js';
+import { listPoseNames, getPose } from './pose_store.js';
+import { listCompatiblePoses, getLibraryPose, LIBRARY_VALUE_PREFIX } from './pose_library.js';
+
+// --- Poseable Models ---
+// Models that should be controllable by poser.html: every skinned GLB in
+// js/registry.json (scripts/build_registry.py). Filled by populateShapeDropdown().
+let POSEABLE_MODELS = [];
 
 // --- ADDED CONSTANT for Interaction Layer ---
 const INTERACTION_LAYER = 1;
@@ -95,7 +83,7 @@ let floorBaseMaterial;
 let originalShapeOptions = [];
 let openPoserBtn;
 let poseSelect;
-let refreshPosesBtn; // Button to refresh pose list from localStorage
+let refreshPosesBtn; // Button to refresh pose list from the pose store
 let focusCameraBtn;
 let decoupleCameraBtn;
 let isCameraDecoupled = false;
@@ -131,179 +119,24 @@ let poserControlsDiv;
 let boneHierarchyContainer;
 
 
-// --- Shape Creation Mapping (Unchanged) ---
-const shapeFunctionMap = {
-    // Primitives
-    'sphere': Primitives.createSphereGeometry,
-    'cube': Primitives.createCubeGeometry,
-    'cylinder': Primitives.createCylinderGeometry,
-    'torus': Primitives.createTorusGeometry,
-    'cone': Primitives.createConeGeometry,
-    'pyramid': Primitives.createPyramidGeometry, // Alias
-    'capsule': Primitives.createCapsuleGeometry,
-    'dodecahedron': Primitives.createDodecahedronGeometry,
-    'icosahedron': Primitives.createIcosahedronGeometry,
-    'octahedron': Primitives.createOctahedronGeometry,
-    'tetrahedron': Primitives.createTetrahedronGeometry,
-    // Variations
-    'tall_box': Variations.createTallBoxGeometry,
-    'flat_box': Variations.createFlatBoxGeometry,
-    'thin_cylinder': Variations.createThinCylinderGeometry,
-    'thick_torus': Variations.createThickTorusGeometry,
-    'thin_torus': Variations.createThinTorusGeometry,
-    'squashed_sphere': Variations.createSquashedSphereGroup, // Returns Group
-    'stretched_cube': Variations.createStretchedCubeGroup,   // Returns Group
-    'lowpoly_sphere': Variations.createLowPolySphereGeometry,
-    'open_cylinder': Variations.createOpenCylinderGeometry,
-    'half_sphere': Variations.createHalfSphereGeometry,
-    // Basic Combinations (Return Groups)
-    'stacked_cubes': BasicCombinations.createStackedCubesGroup,
-    'stacked_cylinders': BasicCombinations.createStackedCylindersGroup,
-    'stacked_spheres': BasicCombinations.createStackedSpheresGroup,
-    'snowman': BasicCombinations.createSnowmanGroup, // Alias
-    'stacked_tori': BasicCombinations.createStackedToriGroup,
-    'sphere_on_cube': BasicCombinations.createSphereOnCubeGroup,
-    'cube_on_sphere': BasicCombinations.createCubeOnSphereGroup,
-    'cone_on_cylinder': BasicCombinations.createConeOnCylinderGroup,
-    'offset_cubes': BasicCombinations.createOffsetCubesGroup,
-    'offset_spheres': BasicCombinations.createOffsetSpheresGroup,
-    'offset_capsules': BasicCombinations.createOffsetCapsulesGroup,
-    'cube_pyramid_stack': BasicCombinations.createCubePyramidStackGroup,
-    'three_spheres_line': BasicCombinations.createThreeSpheresLineGroup,
-    'three_cubes_line': BasicCombinations.createThreeCubesLineGroup,
-    'three_spheres_triangle': BasicCombinations.createThreeSpheresTriangleGroup,
-    'three_cubes_triangle': BasicCombinations.createThreeCubesTriangleGroup,
-    'linked_tori': BasicCombinations.createLinkedToriGroup,
-    'intersecting_cube_sphere': BasicCombinations.createIntersectingCubeSphereGroup,
-    'intersecting_cylinders': BasicCombinations.createIntersectingCylindersGroup,
-    'intersecting_tori': BasicCombinations.createIntersectingToriGroup,
-    'cylinder_thru_torus': BasicCombinations.createCylinderThruTorusGroup,
-    'sphere_thru_torus': BasicCombinations.createSphereThruTorusGroup,
-    'cube_thru_torus': BasicCombinations.createCubeThruTorusGroup,
-    // Separated Combinations (Return Groups)
-    'two_cubes_apart': SeparatedCombinations.createTwoCubesApartGroup,
-    'two_spheres_apart': SeparatedCombinations.createTwoSpheresApartGroup,
-    'sphere_cube_apart': SeparatedCombinations.createSphereCubeApartGroup,
-    'four_corners_cubes': SeparatedCombinations.createFourCornersCubesGroup,
-    'line_of_cubes': SeparatedCombinations.createLineOfCubesGroup,
-    // Rings & Arrays (Return Groups)
-    'box_with_poles': RingsArrays.createBoxWithPolesGroup,
-    'cylinder_ring': RingsArrays.createCylinderRingGroup,
-    'sphere_ring': RingsArrays.createSphereRingGroup,
-    'cube_ring': RingsArrays.createCubeRingGroup,
-    'cube_grid_flat': RingsArrays.createCubeGridFlatGroup,
-    'sphere_grid_flat': RingsArrays.createSphereGridFlatGroup,
-    'random_cubes_cluster': RingsArrays.createRandomCubesClusterGroup,
-    'random_spheres_cluster': RingsArrays.createRandomSpheresClusterGroup,
-    'random_mixed_cluster': RingsArrays.createRandomMixedClusterGroup,
-    // Static Figures (Return Groups)
-    'simple_person': StaticFigures.createSimplePersonGroup,
-    'person_box': StaticFigures.createPersonBoxGroup,
-    'person_spheres': StaticFigures.createPersonSpheresGroup,
-    'person_mixed': StaticFigures.createPersonMixedGroup,
-    'person_abstract': StaticFigures.createPersonAbstractGroup, // Keep GLB loading logic separate
-    'basic_robot': StaticFigures.createBasicRobotGroup,
-    'basic_dog': StaticFigures.createBasicDogGroup,
-    'basic_cat': StaticFigures.createBasicCatGroup,
-    // Dynamic People (Return Groups)
-    'person_running': DynamicPeople.createPersonRunningGroup,
-    'person_jumping': DynamicPeople.createPersonJumpingGroup,
-    'person_sitting': DynamicPeople.createPersonSittingGroup,
-    'person_waving': DynamicPeople.createPersonWavingGroup,
-    'person_reaching': DynamicPeople.createPersonReachingGroup,
-    'person_fighting_stance': DynamicPeople.createPersonFightingStanceGroup,
-    'person_yoga_tree': DynamicPeople.createPersonYogaTreeGroup,
-    'person_thinking': DynamicPeople.createPersonThinkingGroup,
-    'person_dancing_1': DynamicPeople.createPersonDancing1Group,
-    'person_dancing_2': DynamicPeople.createPersonDancing2Group,
-    'person_kneeling': DynamicPeople.createPersonKneelingGroup,
-    'person_lying_down': DynamicPeople.createPersonLyingDownGroup,
-    'person_pointing': DynamicPeople.createPersonPointingGroup,
-    'person_superhero_pose': DynamicPeople.createPersonSuperheroPoseGroup,
-    'person_walking': DynamicPeople.createPersonWalkingGroup,
-    'person_cartwheel_prep': DynamicPeople.createPersonCartwheelPrepGroup,
-    'person_pushup': DynamicPeople.createPersonPushupGroup,
-    'person_reading_seated': DynamicPeople.createPersonReadingSeatedGroup,
-    'person_shrugging': DynamicPeople.createPersonShruggingGroup,
-    'person_bowing': DynamicPeople.createPersonBowingGroup,
-    'person_tiptoe': DynamicPeople.createPersonTiptoeGroup,
-    'person_carrying_box': DynamicPeople.createPersonCarryingBoxGroup,
-    'person_looking_up': DynamicPeople.createPersonLookingUpGroup,
-    'person_crouching': DynamicPeople.createPersonCrouchingGroup,
-    'person_balancing_one_leg': DynamicPeople.createPersonBalancingOneLegGroup,
-     // Dynamic Animals (Return Groups)
-    'dog_running': DynamicAnimals.createDogRunningGroup,
-    'dog_sitting': DynamicAnimals.createDogSittingGroup,
-    'dog_playing_bow': DynamicAnimals.createDogPlayingBowGroup,
-    'dog_begging': DynamicAnimals.createDogBeggingGroup,
-    'dog_lying_down': DynamicAnimals.createDogLyingDownGroup,
-    'cat_stretching': DynamicAnimals.createCatStretchingGroup,
-    'cat_playing': DynamicAnimals.createCatPlayingGroup,
-    'cat_sleeping_curled': DynamicAnimals.createCatSleepingCurledGroup,
-    'cat_walking_tail_up': DynamicAnimals.createCatWalkingTailUpGroup,
-    'cat_crouching_low': DynamicAnimals.createCatCrouchingLowGroup,
-    'bird_flying': DynamicAnimals.createBirdFlyingGroup,
-    'bird_perched': DynamicAnimals.createBirdPerchedGroup,
-    'bird_taking_off': DynamicAnimals.createBirdTakingOffGroup,
-    'bird_pecking': DynamicAnimals.createBirdPeckingGroup,
-    'bird_wings_folded': DynamicAnimals.createBirdWingsFoldedGroup,
-    'horse_galloping': DynamicAnimals.createHorseGallopingGroup,
-    'horse_rearing': DynamicAnimals.createHorseRearingGroup,
-    'horse_trotting': DynamicAnimals.createHorseTrottingGroup,
-    'horse_grazing': DynamicAnimals.createHorseGrazingGroup,
-    'horse_standing': DynamicAnimals.createHorseStandingGroup,
-    'fish_swimming': DynamicAnimals.createFishSwimmingGroup,
-    'snake_coiled': DynamicAnimals.createSnakeCoiledGroup,
-    'snake_slithering': DynamicAnimals.createSnakeSlitheringGroup,
-    'frog_jumping': DynamicAnimals.createFrogJumpingGroup,
-    'deer_leaping': DynamicAnimals.createDeerLeapingGroup,
-    'elephant_walking': DynamicAnimals.createElephantWalkingGroup,
-    'monkey_hanging': DynamicAnimals.createMonkeyHangingGroup,
-    'bear_standing': DynamicAnimals.createBearStandingGroup,
-    'bear_walking_4legs': DynamicAnimals.createBearWalking4LegsGroup,
-    'rabbit_sitting': DynamicAnimals.createRabbitSittingGroup,
-    // Objects (Return Groups)
-    'table_chair': Objects.createTableChairGroup,
-    'archway': Objects.createArchwayGroup,
-    'simple_house': Objects.createSimpleHouseGroup,
-    'dumbbell': Objects.createDumbbellGroup,
-    'mushroom': Objects.createMushroomGroup,
-    'simple_tree': Objects.createSimpleTreeGroup,
-    'stylized_tree': Objects.createStylizedTreeGroup,
-    'rocket_basic': Objects.createRocketBasicGroup,
-    'lamp_simple': Objects.createLampSimpleGroup,
-    'bridge_simple': Objects.createBridgeSimpleGroup,
-    'simple_car': Objects.createSimpleCarGroup,
-    'bench_simple': Objects.createBenchSimpleGroup,
-    'tower_basic': Objects.createTowerBasicGroup,
-    'stairs_simple': Objects.createStairsSimpleGroup,
-    'plant_pot': Objects.createPlantPotGroup,
-    // Abstract (Return Geometry or Group)
-    'leaning_tower_cubes': Abstract.createLeaningTowerCubesGroup,
-    'spiral_cubes': Abstract.createSpiralCubesGroup,
-    'spiral_spheres': Abstract.createSpiralSpheresGroup,
-    'abstract_sculpture_1': Abstract.createAbstractSculpture1Group,
-    'abstract_sculpture_2': Abstract.createAbstractSculpture2Group,
-    'abstract_sculpture_3': Abstract.createAbstractSculpture3Group,
-    'abstract_sculpture_4': Abstract.createAbstractSculpture4Group,
-    'saturn_like': Abstract.createSaturnLikeGroup,
-    'wireframe_cube_nested': Wireframes.createWireframeCubeNestedBase, // Base structure
-    'wireframe_icosahedron_in_sphere': Wireframes.createIcosahedronInSphereBase // Base structure
-};
-
 // --- Shape Handling Functions ---
-function createObject(shapeType, s, matClone) {
-    const creationFunc = shapeFunctionMap[shapeType];
+async function createObject(shapeType, s, matClone) {
+    let creationFunc = null;
+    try {
+        creationFunc = await getShapeFunction(shapeType); // Imports only this shape's module
+    } catch (error) {
+        logToPage(`Shape module load error (${shapeType}): ${error.message}`, 'error');
+    }
 
     if (creationFunc) {
         try {
-            return creationFunc(s, matClone);
+            return await creationFunc(s, matClone);
         } catch (error) {
             logToPage(`Shape Creation Error (${shapeType}): ${error.message}\n${error.stack}`, 'error');
             return Primitives.createSphereGeometry(s);
         }
     } else {
-        logToPage(`Unknown shape type in map: ${shapeType}`, 'error');
+        logToPage(`Unknown shape type in registry: ${shapeType}`, 'error');
         return Primitives.createSphereGeometry(s);
     }
 }
@@ -503,8 +336,16 @@ function applyPoseData(modelGroup, poseDataArray) {
 }
 
 
-// --- populatePoseDropdown (Reads from localStorage) ---
-function populatePoseDropdown(sceneObjectData) {
+// --- Pose Sources (pose store + compatibility-filtered pose library) ---
+/** Pose data for a dropdown value: a library pose ('library:<id>') or a pose saved in the store. */
+async function getDropdownPose(modelPath, value) {
+    if (value.startsWith(LIBRARY_VALUE_PREFIX)) return getLibraryPose(value.slice(LIBRARY_VALUE_PREFIX.length));
+    return getPose(modelPath, value);
+}
+
+
+// --- populatePoseDropdown (Saved poses from the IndexedDB pose store, library poses from pose_compatibility.json) ---
+async function populatePoseDropdown(sceneObjectData) {
     if (!poseSelect || !sceneObjectData || !sceneObjectData.isPoseable || !sceneObjectData.initialBoneState) {
         if(poseSelect) {
              poseSelect.innerHTML = '<option value="" disabled>Pose N/A</option>';
@@ -514,8 +355,7 @@ function populatePoseDropdown(sceneObjectData) {
     }
 
     const modelPath = sceneObjectData.originalType;
-    const localStorageKey = `poses_${modelPath}`;
-    logToPage(`Populating pose dropdown for ${modelPath} from localStorage key: ${localStorageKey}`);
+    logToPage(`Populating pose dropdown for ${modelPath} from the pose store`);
     poseSelect.innerHTML = '';
 
     const defaultOption = document.createElement('option');
@@ -523,18 +363,12 @@ function populatePoseDropdown(sceneObjectData) {
     defaultOption.textContent = 'A-Pose / Default';
     poseSelect.appendChild(defaultOption);
 
-    let savedPoses = null;
+    let poseNames = null;
     try {
-        const savedPosesJSON = localStorage.getItem(localStorageKey);
-        if (savedPosesJSON) savedPoses = JSON.parse(savedPosesJSON);
-        if (typeof savedPoses !== 'object' || savedPoses === null) {
-            logToPage(`Invalid data in localStorage for ${localStorageKey}. Resetting.`, 'warn');
-            savedPoses = null; localStorage.removeItem(localStorageKey);
-        }
-    } catch (error) { logToPage(`Error reading poses from localStorage ${localStorageKey}: ${error.message}`, 'error'); savedPoses = null; }
+        poseNames = await listPoseNames(modelPath); // keys only; payloads are read when a pose is applied
+    } catch (error) { logToPage(`Error reading pose names for ${modelPath}: ${error.message}`, 'error'); }
 
-    if (savedPoses) {
-        const poseNames = Object.keys(savedPoses).sort((a, b) => a.localeCompare(b));
+    if (poseNames) {
         if (poseNames.length > 0) {
             const optgroup = document.createElement('optgroup');
             optgroup.label = 'User Saved Poses';
@@ -545,9 +379,28 @@ function populatePoseDropdown(sceneObjectData) {
             });
             poseSelect.appendChild(optgroup);
             logToPage(`Added ${poseNames.length} saved poses to dropdown.`);
-        } else logToPage(`No saved poses found in localStorage for ${modelPath}.`);
+        } else logToPage(`No saved poses found for ${modelPath}.`);
     }
 
+    let libraryPoses = null;
+    try {
+        libraryPoses = await listCompatiblePoses(modelPath); // only poses the index marks as fitting this skeleton
+    } catch (error) { logToPage(`Error reading the pose compatibility index: ${error.message}`, 'error'); }
+
+    if (libraryPoses && libraryPoses.length > 0) {
+        const optgroup = document.createElement('optgroup');
+        optgroup.label = 'Pose Library (compatible)';
+        libraryPoses.forEach(pose => {
+            const option = document.createElement('option');
+            option.value = LIBRARY_VALUE_PREFIX + pose.id;
+            option.textContent = pose.coverage < 1 ? `${pose.name} (${Math.round(pose.coverage * 100)}% bones)` : pose.name;
+            option.title = pose.id;
+            optgroup.appendChild(option);
+        });
+        poseSelect.appendChild(optgroup);
+        logToPage(`Added ${libraryPoses.length} compatible library poses to dropdown.`);
+    } else if (libraryPoses) logToPage(`No library poses in pose_compatibility.json fit ${modelPath}.`);
+
     poseSelect.value = sceneObjectData.appliedPoseName || '';
     poseSelect.disabled = false;
 }
@@ -614,6 +467,7 @@ async function updateObject(requestedShapeType) {
             const loadedData = await loadGLBModel(requestedShapeType);
             if (!loadedData || !loadedData.modelGroup) throw new Error(`Failed to load or process GLB: ${requestedShapeType}`);
             newObject = loadedData.modelGroup; baseScale = loadedData.baseScale; isPoseable = loadedData.isPoseable; initialBoneState = loadedData.initialBoneState;
+            prefetchNextModel(requestedShapeType);
         } else {
             createdObjectType = 'primitive';
             logToPage(`Creating geometric shape: ${requestedShapeType}`);
@@ -623,7 +477,10 @@ async function updateObject(requestedShapeType) {
             const randomHue = Math.random();
             primitiveMaterial.color.setHSL(randomHue, 0.8, parseFloat(objectBrightnessSlider?.value || 0.5));
             logToPage(`Randomized primitive hue: ${Math.round(randomHue * 360)}°`);
-            let createdItem = createObject(baseShapeType, s, () => primitiveMaterial);
+            // Prebuilt geometry from models/shapes.glb when available; otherwise build it procedurally.
+            let createdItem = await createPackedShape(baseShapeType, s, () => primitiveMaterial).catch(error => { logToPage(`Shape pack load failed for ${baseShapeType}: ${error.message}. Building procedurally.`, 'warn'); return null; });
+            if (createdItem) logToPage(`Loaded ${baseShapeType} from the shape pack.`);
+            else createdItem = await createObject(baseShapeType, s, () => primitiveMaterial);
             if (!createdItem) throw new Error(`Shape creation function for ${baseShapeType} returned null!`);
             if (createdItem instanceof THREE.BufferGeometry) {
                 if (isWireframe) primitiveMaterial.wireframe = true;
@@ -649,7 +506,37 @@ async function updateObject(requestedShapeType) {
 // --- DOM & Control Setup ---
 function getDOMElements() { /* ... unchanged, assigns all DOM element vars ... */ logToPage("Getting DOM elements..."); sceneContainer = document.getElementById('scene-container'); controlsContainer = document.getElementById('controls-container'); toggleControlsBtn = document.getElementById('toggleControlsBtn'); shapeSelect = document.getElementById('shapeSelect'); shapeSearchInput = document.getElementById('shapeSearch'); refreshShapeListBtn = document.getElementById('refreshShapeListBtn'); copyLogBtn = document.getElementById('copyLogBtn'); cameraLockBtn = document.getElementById('cameraLockBtn'); gridHelperToggle = document.getElementById('gridHelperToggle'); resetObjectBtn = document.getElementById('resetObjectBtn'); saveStateBtn = document.getElementById('saveStateBtn'); loadStateBtn = document.getElementById('loadStateBtn'); resetSceneBtn = document.getElementById('resetSceneBtn'); wallHueSlider = document.getElementById('wallHue'); wallHueValueSpan = document.getElementById('wallHueValue'); wallSaturationSlider = document.getElementById('wallSaturation'); wallSaturationValueSpan = document.getElementById('wallSaturationValue'); wallBrightnessSlider = document.getElementById('wallBrightness'); wallBrightnessValueSpan = document.getElementById('wallBrightnessValue'); floorHueSlider = document.getElementById('floorHue'); floorHueValueSpan = document.getElementById('floorHueValue'); floorSaturationSlider = document.getElementById('floorSaturation'); floorSaturationValueSpan = document.getElementById('floorSaturationValue'); floorBrightnessSlider = document.getElementById('floorBrightness'); floorBrightnessValueSpan = document.getElementById('floorBrightnessValue'); modelYOffsetSlider = document.getElementById('modelYOffset'); modelYOffsetValueSpan = document.getElementById('modelYOffsetValue'); objectXPositionSlider = document.getElementById('objectXPosition'); objectXPositionValueSpan = document.getElementById('objectXPositionValue'); objectZPositionSlider = document.getElementById('objectZPosition'); objectZPositionValueSpan = document.getElementById('objectZPositionValue'); objectRotationXSlider = document.getElementById('objectRotationX'); objectRotationXValueSpan = document.getElementById('objectRotationXValue'); objectRotationYSlider = document.getElementById('objectRotationY'); objectRotationYValueSpan = document.getElementById('objectRotationYValue'); objectRotationZSlider = document.getElementById('objectRotationZ'); objectRotationZValueSpan = document.getElementById('objectRotationZValue'); objectScaleSlider = document.getElementById('objectScale'); objectScaleValueSpan = document.getElementById('objectScaleValue'); modelColorHueSlider = document.getElementById('modelColorHue'); modelColorHueValueSpan = document.getElementById('modelColorHueValue'); objectBrightnessSlider = document.getElementById('objectBrightness'); objectBrightnessValueSpan = document.getElementById('objectBrightnessValue'); objectRoughnessSlider = document.getElementById('objectRoughness'); objectRoughnessValueSpan = document.getElementById('objectRoughnessValue'); objectMetalnessSlider = document.getElementById('objectMetalness'); objectMetalnessValueSpan = document.getElementById('objectMetalnessValue'); lightIntensitySlider = document.getElementById('lightIntensity'); lightIntensityValueSpan = document.getElementById('lightIntensityValue'); lightAngleSlider = document.getElementById('lightAngle'); lightAngleValueSpan = document.getElementById('lightAngleValue'); lightPenumbraSlider = document.getElementById('lightPenumbra'); lightPenumbraValueSpan = document.getElementById('lightPenumbraValue'); lightXSlider = document.getElementById('lightX'); lightXValueSpan = document.getElementById('lightXValue'); lightYSlider = document.getElementById('lightY'); lightYValueSpan = document.getElementById('lightYValue'); lightZSlider = document.getElementById('lightZ'); lightZValueSpan = document.getElementById('lightZValue'); openPoserBtn = document.getElementById('openPoserBtn'); poseSelect = document.getElementById('poseSelect'); refreshPosesBtn = document.getElementById('refreshPosesBtn'); objectListElement = document.getElementById('objectList'); focusCameraBtn = document.getElementById('focusCameraBtn'); decoupleCameraBtn = document.getElementById('decoupleCameraBtn'); logToPage("DOM elements assigned."); if (!sceneContainer || !controlsContainer || !shapeSelect || !objectListElement || !poseSelect) throw new Error("Essential DOM elements missing!"); }
 
-// --- Shape Dropdown Handling (Unchanged) ---
+// --- Shape Dropdown Handling ---
+// Builds the dropdown from js/registry.json: models first, then one group per shape category.
+async function populateShapeDropdown() {
+    if (!shapeSelect) return;
+    try {
+        const registry = await loadRegistry();
+        POSEABLE_MODELS = registry.models.filter(model => model.poseable).map(model => model.path);
+        const groups = new Map();
+        const addOption = (category, value, label) => { if (!groups.has(category)) groups.set(category, []); groups.get(category).push(new Option(label, value)); };
+        registry.models.forEach(model => addOption(model.category, model.path, model.label));
+        registry.shapes.forEach(shape => addOption(shape.category, shape.key, shape.label));
+        shapeSelect.innerHTML = '';
+        for (const [category, options] of groups) {
+            const optgroup = document.createElement('optgroup');
+            optgroup.label = category;
+            optgroup.append(...options);
+            shapeSelect.appendChild(optgroup);
+        }
+        logToPage(`Shape list built from registry: ${registry.shapes.length} shapes, ${registry.models.length} models (${POSEABLE_MODELS.length} poseable).`);
+    } catch (error) {
+        logToPage(`Could not load js/registry.json (${error.message}). Using the fallback shape list.`, 'error');
+    }
+}
+// Prefetches the model after `currentValue` in list order (the likely next pick) at idle priority.
+function prefetchNextModel(currentValue) {
+    const models = originalShapeOptions.map(opt => opt.value).filter(value => value.toLowerCase().endsWith('.glb'));
+    if (models.length === 0) return;
+    const index = models.indexOf(currentValue);
+    const next = models[(index + 1) % models.length];
+    if (next !== currentValue) addResourceHint(next);
+}
 function storeOriginalOptions() { /* ... */ if (!shapeSelect) return; logToPage("Storing original shape options..."); try { originalShapeOptions = Array.from(shapeSelect.options).map(opt => ({ value: opt.value, text: opt.text, styleDisplay: opt.style.display || '' })); logToPage(`Stored ${originalShapeOptions.length} options.`); } catch (e) { logToPage(`Error storing options: ${e.message}`, 'error'); } }
 function filterShapeDropdown() { /* ... */ if (!shapeSelect || !shapeSearchInput || !originalShapeOptions) return; const searchTerm = shapeSearchInput.value.toLowerCase().trim().replace(/_/g, ' '); const currentSelectedValue = shapeSelect.value; let newSelectedIndex = -1; let firstValidIndex = -1; shapeSelect.innerHTML = ''; let foundCount = 0; originalShapeOptions.forEach((optData) => { if (optData.styleDisplay === 'none') return; const matches = searchTerm === '' || optData.value.toLowerCase().replace(/_/g, ' ').includes(searchTerm) || optData.text.toLowerCase().includes(searchTerm); if (matches) { const newOption = document.createElement('option'); newOption.value = optData.value; newOption.textContent = optData.text; shapeSelect.appendChild(newOption); const newOptionIndexInDropdown = shapeSelect.options.length - 1; if (firstValidIndex === -1) firstValidIndex = newOptionIndexInDropdown; if (optData.value === currentSelectedValue) newSelectedIndex = newOptionIndexInDropdown; foundCount++; } }); if (shapeSelect.options.length === 0) { const noResultOption = document.createElement('option'); noResultOption.textContent = "No matches found"; noResultOption.disabled = true; shapeSelect.appendChild(noResultOption); } else if (newSelectedIndex !== -1) { shapeSelect.selectedIndex = newSelectedIndex; } else if (firstValidIndex !== -1) { shapeSelect.selectedIndex = firstValidIndex; } else { shapeSelect.selectedIndex = -1; } }
 function resetShapeDropdown() { /* ... */ if (!shapeSearchInput || !shapeSelect) return; logToPage("Resetting shape dropdown."); shapeSearchInput.value = ''; const currentVal = shapeSelect.value; filterShapeDropdown(); shapeSelect.value = currentVal; if (shapeSelect.selectedIndex === -1 && shapeSelect.options.length > 0 && !shapeSelect.options[0].disabled) { shapeSelect.selectedIndex = 0; } }
@@ -679,7 +566,7 @@ function selectObject(uuidToSelect) {
         if (refreshPosesBtn) refreshPosesBtn.disabled = !enablePoseControls;
 
         if (enablePoseControls) {
-            logToPage("Poseable object selected. Populating pose dropdown from localStorage.");
+            logToPage("Poseable object selected. Populating pose dropdown from the pose store.");
             populatePoseDropdown(selectedObjData); // Populate dropdown
         } else {
              logToPage("Non-poseable object selected.");
@@ -709,6 +596,7 @@ async function init() {
     try {
         logToPage("Init started...");
         getDOMElements();
+        await populateShapeDropdown();
         storeOriginalOptions();
 
         scene = new THREE.Scene();
@@ -757,6 +645,7 @@ async function init() {
         lightIntensitySlider.addEventListener('input', onLightIntensityChange); lightAngleSlider.addEventListener('input', onSpotlightParamsChange); lightPenumbraSlider.addEventListener('input', onSpotlightParamsChange);
         lightXSlider.addEventListener('input', onLightPositionChange); lightYSlider.addEventListener('input', onLightPositionChange); lightZSlider.addEventListener('input', onLightPositionChange);
         shapeSelect.addEventListener('change', handleShapeSelectionChange);
+        shapeSelect.addEventListener('focus', () => prefetchNextModel(shapeSelect.value)); // Dropdown about to be used
         shapeSearchInput.addEventListener('input', filterShapeDropdown);
         copyLogBtn.addEventListener('click', () => { try { navigator.clipboard.writeText(debugConsole.innerText).then(() => logToPage('Log copied.', 'success'), () => logToPage('Copy failed.', 'error')); } catch (e) { logToPage(`Copy log error: ${e.message}`, 'error'); } });
         controlsContainer.addEventListener('click', handleSliderReset);
@@ -764,8 +653,8 @@ async function init() {
         loadStateBtn?.addEventListener('click', async () => { await loadSceneState(); }); // Re-enabled
         resetSceneBtn?.addEventListener('click', async () => { await resetSceneToDefaults(); });
 
-        // --- Pose Select Listener (Uses localStorage) ---
-        poseSelect?.addEventListener('change', (event) => {
+        // --- Pose Select Listener (Pose store + pose library) ---
+        poseSelect?.addEventListener('change', async (event) => {
             const selectedObjData = getSelectedObjectData();
             if (selectedObjData && selectedObjData.isPoseable && selectedObjData.initialBoneState) {
                 const selectedPoseName = event.target.value;
@@ -776,21 +665,18 @@ async function init() {
                     applyPoseData(selectedObjData.object3D, selectedObjData.initialBoneState);
                 } else {
                     const modelPath = selectedObjData.originalType;
-                    const localStorageKey = `poses_${modelPath}`;
                     try {
-                        const savedPosesJSON = localStorage.getItem(localStorageKey);
-                        const savedPoses = savedPosesJSON ? JSON.parse(savedPosesJSON) : null;
-                        const poseDataArray = savedPoses ? savedPoses[selectedPoseName] : null;
+                        const poseDataArray = await getDropdownPose(modelPath, selectedPoseName);
                         if (poseDataArray && Array.isArray(poseDataArray)) {
-                            logToPage(`Applying saved pose "${selectedPoseName}" from localStorage to ${selectedObjectUUID}`);
+                            logToPage(`Applying pose "${selectedPoseName}" to ${selectedObjectUUID}`);
                             applyPoseData(selectedObjData.object3D, poseDataArray);
                         } else {
-                            logToPage(`Pose data for "${selectedPoseName}" not found/invalid in localStorage for ${modelPath}. Resetting to default.`, 'error');
+                            logToPage(`Pose data for "${selectedPoseName}" not found/invalid for ${modelPath}. Resetting to default.`, 'error');
                             selectedObjData.appliedPoseName = ''; event.target.value = '';
                             applyPoseData(selectedObjData.object3D, selectedObjData.initialBoneState);
                         }
                     } catch (error) {
-                        logToPage(`Error accessing/applying pose "${selectedPoseName}" from localStorage: ${error.message}. Resetting.`, 'error');
+                        logToPage(`Error accessing/applying pose "${selectedPoseName}": ${error.message}. Resetting.`, 'error');
                         selectedObjData.appliedPoseName = ''; event.target.value = '';
                         applyPoseData(selectedObjData.object3D, selectedObjData.initialBoneState);
                     }
@@ -804,8 +690,8 @@ async function init() {
         refreshPosesBtn?.addEventListener('click', () => {
             const selectedObjData = getSelectedObjectData();
             if (selectedObjData && selectedObjData.isPoseable) {
-                populatePoseDropdown(selectedObjData); // Re-read from localStorage
-                logToPage("Refreshed pose list from localStorage.");
+                populatePoseDropdown(selectedObjData); // Re-read names from the pose store
+                logToPage("Refreshed pose list from the pose store.");
             } else logToPage("Refresh poses ignored: No poseable object selected.", "warn");
         });
 
@@ -870,7 +756,7 @@ function toggleCameraDecoupling() { /* ... unchanged ... */ isCameraDecoupled =
 
 // --- Save/Load State Functions (Unchanged from v3.0 logic) ---
  function saveSceneState() { /* ... same as v3.0 ... */ logToPage("Attempting save scene state (v3.0 - poser)..."); if (!camera || !controls || !spotLight) { logToPage("Cannot save state: Core components not ready.", 'error'); return; } try { const objectsToSave = sceneObjects.map(objData => { const obj3D = objData.object3D; let materialData = null; let representativeMaterial = null; if (obj3D.isMesh && obj3D.material?.isMeshStandardMaterial) representativeMaterial = obj3D.material; else if (obj3D.isGroup) obj3D.traverse(c => { if (!representativeMaterial && c.isMesh && c.material?.isMeshStandardMaterial) representativeMaterial = c.material; }); if (representativeMaterial && !representativeMaterial.map) { const hsl = { h: 0, s: 0, l: 0 }; representativeMaterial.color.getHSL(hsl); materialData = { hue: hsl.h, brightness: hsl.l, roughness: representativeMaterial.roughness, metalness: representativeMaterial.metalness }; } else if (representativeMaterial) { materialData = { hue: null, brightness: null, roughness: representativeMaterial.roughness, metalness: representativeMaterial.metalness }; } const baseScale = objData.baseScale || 1.0; const actualScale = obj3D.scale.x; const relativeScale = baseScale !== 0 ? actualScale / baseScale : 1.0; return { uuid: objData.uuid, originalType: objData.originalType, transform: { position: obj3D.position.toArray(), quaternion: obj3D.quaternion.toArray(), relativeScale: relativeScale }, material: materialData, appliedPoseName: objData.appliedPoseName || '' }; }); const state = { version: 3.0, camera: { position: camera.position.toArray(), target: controls.target.toArray(), quaternion: camera.quaternion.toArray() }, light: { intensity: parseFloat(lightIntensitySlider.value), angle: parseFloat(lightAngleSlider.value), penumbra: parseFloat(lightPenumbraSlider.value), position: spotLight.position.toArray() }, sceneObjects: objectsToSave, selectedObjectUUID: selectedObjectUUID, environment: { wall: { hue: parseFloat(wallHueSlider.value), saturation: parseFloat(wallSaturationSlider.value), brightness: parseFloat(wallBrightnessSlider.value) }, floor: { hue: parseFloat(floorHueSlider.value), saturation: parseFloat(floorSaturationSlider.value), brightness: parseFloat(floorBrightnessSlider.value) } }, helpers: { gridVisible: gridHelperToggle.checked }, ui: { controlsCollapsed: document.body.classList.contains('controls-collapsed'), cameraLocked: !controls.enabled, cameraDecoupled: isCameraDecoupled } }; localStorage.setItem(LOCAL_STORAGE_KEY, JSON.stringify(state)); logToPage("Scene state saved successfully (v3.0 - poser).", "success"); } catch (error) { logToPage(`Error saving state: ${error.message}`, 'error'); console.error("Save State Error:", error); } }
- async function loadSceneState() { /* ... same as v3.0 ... */ logToPage("Attempting load scene state (v3.0 - poser)..."); const savedStateJSON = localStorage.getItem(LOCAL_STORAGE_KEY); if (!savedStateJSON) { logToPage("No saved state found for key: " + LOCAL_STORAGE_KEY); return false; } let loadedState; try { loadedState = JSON.parse(savedStateJSON); if (!loadedState || loadedState.version !== 3.0) { logToPage(`Saved state version mismatch/invalid. Got ${loadedState?.version}, expected 3.0. Ignoring.`, 'warn'); return false; } if (!loadedState.sceneObjects || !Array.isArray(loadedState.sceneObjects)) { logToPage(`Saved state invalid 'sceneObjects'. Ignoring.`, 'error'); return false; } logToPage(`Saved state v${loadedState.version} parsed.`); } catch (error) { logToPage(`Error parsing saved state: ${error.message}. Clearing invalid state.`, 'error'); localStorage.removeItem(LOCAL_STORAGE_KEY); return false; } try { logToPage("Applying loaded state..."); logToPage("Clearing current scene..."); selectObject(null); while (sceneObjects.length > 0) deleteObject(sceneObjects[sceneObjects.length - 1].uuid); logToPage("Current scene cleared."); controls.enabled = !loadedState.ui.cameraLocked; cameraLockBtn.textContent = controls.enabled ? 'Lock Camera' : 'Unlock Camera'; if (loadedState.ui.controlsCollapsed) document.body.classList.add('controls-collapsed'); else document.body.classList.remove('controls-collapsed'); camera.position.fromArray(loadedState.camera.position); controls.target.fromArray(loadedState.camera.target); if (loadedState.camera.quaternion) camera.quaternion.fromArray(loadedState.camera.quaternion); else camera.lookAt(controls.target); camera.updateProjectionMatrix(); lightIntensitySlider.value = loadedState.light.intensity; lightIntensitySlider.dispatchEvent(new Event('input')); lightAngleSlider.value = loadedState.light.angle; lightAngleSlider.dispatchEvent(new Event('input')); lightPenumbraSlider.value = loadedState.light.penumbra; lightPenumbraSlider.dispatchEvent(new Event('input')); lightXSlider.value = loadedState.light.position[0]; lightXSlider.dispatchEvent(new Event('input')); lightYSlider.value = loadedState.light.position[1]; lightYSlider.dispatchEvent(new Event('input')); lightZSlider.value = loadedState.light.position[2]; lightZSlider.dispatchEvent(new Event('input')); wallHueSlider.value = loadedState.environment.wall.hue; wallHueSlider.dispatchEvent(new Event('input')); wallSaturationSlider.value = loadedState.environment.wall.saturation; wallSaturationSlider.dispatchEvent(new Event('input')); wallBrightnessSlider.value = loadedState.environment.wall.brightness; wallBrightnessSlider.dispatchEvent(new Event('input')); floorHueSlider.value = loadedState.environment.floor.hue; floorHueSlider.dispatchEvent(new Event('input')); floorSaturationSlider.value = loadedState.environment.floor.saturation; floorSaturationSlider.dispatchEvent(new Event('input')); floorBrightnessSlider.value = loadedState.environment.floor.brightness; floorBrightnessSlider.dispatchEvent(new Event('input')); gridHelperToggle.checked = loadedState.helpers.gridVisible; gridHelper.visible = loadedState.helpers.gridVisible; axesHelper.visible = false; logToPage(`Recreating ${loadedState.sceneObjects.length} objects...`); let lastSelectedUUID = loadedState.selectedObjectUUID || null; selectedObjectUUID = null; for (const savedObjData of loadedState.sceneObjects) { const result = await updateObject(savedObjData.originalType); if (!result || !result.object3D) { logToPage(`Failed recreate object ${savedObjData.uuid} (${savedObjData.originalType})`, 'error'); continue; } const newObject = result.object3D; newObject.uuid = savedObjData.uuid; newObject.layers.enable(INTERACTION_LAYER); newObject.traverse(child => { child.layers.enable(INTERACTION_LAYER); }); const sceneObjectData = { uuid: savedObjData.uuid, originalType: result.originalType, objectType: result.objectType, object3D: newObject, baseScale: result.baseScale, isPoseable: result.isPoseable, initialBoneState: result.initialBoneState, appliedPoseName: savedObjData.appliedPoseName || '' }; if (savedObjData.transform) { newObject.position.fromArray(savedObjData.transform.position); if (savedObjData.transform.quaternion) newObject.quaternion.fromArray(savedObjData.transform.quaternion); else newObject.rotation.set(0,0,0); const relativeScale = savedObjData.transform.relativeScale || 1.0; const absoluteScale = sceneObjectData.baseScale * relativeScale; newObject.scale.set(absoluteScale, absoluteScale, absoluteScale); newObject.updateMatrixWorld(true); } else { logToPage(`No transform data for ${savedObjData.uuid}, placing at base.`, 'warn'); newObject.updateMatrixWorld(true); const baseY = calculateObjectBaseY(newObject); newObject.position.set(0, baseY, 0); newObject.updateMatrixWorld(true); } if (savedObjData.material) { const applySavedMaterial = (mat, savedMat) => { if (!mat?.isMeshStandardMaterial || !savedMat) return false; if (savedMat.hue !== null && savedMat.brightness !== null) mat.color.setHSL(savedMat.hue, 0.8, savedMat.brightness); mat.roughness = savedMat.roughness ?? mat.roughness; mat.metalness = savedMat.metalness ?? mat.metalness; mat.needsUpdate = true; return true; }; if (newObject.isMesh) applySavedMaterial(newObject.material, savedObjData.material); else if (newObject.isGroup) newObject.traverse(c => { if (c.isMesh) { if(Array.isArray(c.material)) c.material.forEach(m=>applySavedMaterial(m, savedObjData.material)); else applySavedMaterial(c.material, savedObjData.material); } }); } scene.add(newObject); sceneObjects.push(sceneObjectData); } logToPage("Applying saved poses to objects..."); for (const objData of sceneObjects) { if (objData.isPoseable && objData.initialBoneState) { const poseName = objData.appliedPoseName; if (poseName && poseName !== '') { const modelPath = objData.originalType; const localStorageKey = `poses_${modelPath}`; let poseApplied = false; try { const savedPosesJSON = localStorage.getItem(localStorageKey); const savedPoses = savedPosesJSON ? JSON.parse(savedPosesJSON) : null; const poseDataArray = savedPoses ? savedPoses[poseName] : null; if (poseDataArray && Array.isArray(poseDataArray)) { logToPage(`Applying saved pose "${poseName}" to ${objData.uuid} from localStorage.`); applyPoseData(objData.object3D, poseDataArray); poseApplied = true; } } catch (error) { logToPage(`Error applying saved pose "${poseName}" to ${objData.uuid}: ${error.message}`, 'error'); } if (!poseApplied) { logToPage(`Saved pose "${poseName}" for ${objData.uuid} not found or invalid. Applying default pose.`, 'warn'); applyPoseData(objData.object3D, objData.initialBoneState); objData.appliedPoseName = ''; } } else { logToPage(`Applying default pose to ${objData.uuid}.`); applyPoseData(objData.object3D, objData.initialBoneState); } } } if (loadedState.ui.cameraDecoupled !== isCameraDecoupled) toggleCameraDecoupling(); populateObjectList(); controls.update(); if (lastSelectedUUID && sceneObjects.some(o => o.uuid === lastSelectedUUID)) selectObject(lastSelectedUUID); else selectObject(null); logToPage("Scene state loaded successfully.", "success"); return true; } catch (error) { logToPage(`Error applying loaded state: ${error.message}\n${error.stack}`, 'error'); console.error("Apply State Error:", error); await resetSceneToDefaults(); return false; } }
+ async function loadSceneState() { /* ... same as v3.0 ... */ logToPage("Attempting load scene state (v3.0 - poser)..."); const savedStateJSON = localStorage.getItem(LOCAL_STORAGE_KEY); if (!savedStateJSON) { logToPage("No saved state found for key: " + LOCAL_STORAGE_KEY); return false; } let loadedState; try { loadedState = JSON.parse(savedStateJSON); if (!loadedState || loadedState.version !== 3.0) { logToPage(`Saved state version mismatch/invalid. Got ${loadedState?.version}, expected 3.0. Ignoring.`, 'warn'); return false; } if (!loadedState.sceneObjects || !Array.isArray(loadedState.sceneObjects)) { logToPage(`Saved state invalid 'sceneObjects'. Ignoring.`, 'error'); return false; } logToPage(`Saved state v${loadedState.version} parsed.`); } catch (error) { logToPage(`Error parsing saved state: ${error.message}. Clearing invalid state.`, 'error'); localStorage.removeItem(LOCAL_STORAGE_KEY); return false; } try { logToPage("Applying loaded state..."); logToPage("Clearing current scene..."); selectObject(null); while (sceneObjects.length > 0) deleteObject(sceneObjects[sceneObjects.length - 1].uuid); logToPage("Current scene cleared."); controls.enabled = !loadedState.ui.cameraLocked; cameraLockBtn.textContent = controls.enabled ? 'Lock Camera' : 'Unlock Camera'; if (loadedState.ui.controlsCollapsed) document.body.classList.add('controls-collapsed'); else document.body.classList.remove('controls-collapsed'); camera.position.fromArray(loadedState.camera.position); controls.target.fromArray(loadedState.camera.target); if (loadedState.camera.quaternion) camera.quaternion.fromArray(loadedState.camera.quaternion); else camera.lookAt(controls.target); camera.updateProjectionMatrix(); lightIntensitySlider.value = loadedState.light.intensity; lightIntensitySlider.dispatchEvent(new Event('input')); lightAngleSlider.value = loadedState.light.angle; lightAngleSlider.dispatchEvent(new Event('input')); lightPenumbraSlider.value = loadedState.light.penumbra; lightPenumbraSlider.dispatchEvent(new Event('input')); lightXSlider.value = loadedState.light.position[0]; lightXSlider.dispatchEvent(new Event('input')); lightYSlider.value = loadedState.light.position[1]; lightYSlider.dispatchEvent(new Event('input')); lightZSlider.value = loadedState.light.position[2]; lightZSlider.dispatchEvent(new Event('input')); wallHueSlider.value = loadedState.environment.wall.hue; wallHueSlider.dispatchEvent(new Event('input')); wallSaturationSlider.value = loadedState.environment.wall.saturation; wallSaturationSlider.dispatchEvent(new Event('input')); wallBrightnessSlider.value = loadedState.environment.wall.brightness; wallBrightnessSlider.dispatchEvent(new Event('input')); floorHueSlider.value = loadedState.environment.floor.hue; floorHueSlider.dispatchEvent(new Event('input')); floorSaturationSlider.value = loadedState.environment.floor.saturation; floorSaturationSlider.dispatchEvent(new Event('input')); floorBrightnessSlider.value = loadedState.environment.floor.brightness; floorBrightnessSlider.dispatchEvent(new Event('input')); gridHelperToggle.checked = loadedState.helpers.gridVisible; gridHelper.visible = loadedState.helpers.gridVisible; axesHelper.visible = false; logToPage(`Recreating ${loadedState.sceneObjects.length} objects...`); let lastSelectedUUID = loadedState.selectedObjectUUID || null; selectedObjectUUID = null; for (const savedObjData of loadedState.sceneObjects) { const result = await updateObject(savedObjData.originalType); if (!result || !result.object3D) { logToPage(`Failed recreate object ${savedObjData.uuid} (${savedObjData.originalType})`, 'error'); continue; } const newObject = result.object3D; newObject.uuid = savedObjData.uuid; newObject.layers.enable(INTERACTION_LAYER); newObject.traverse(child => { child.layers.enable(INTERACTION_LAYER); }); const sceneObjectData = { uuid: savedObjData.uuid, originalType: result.originalType, objectType: result.objectType, object3D: newObject, baseScale: result.baseScale, isPoseable: result.isPoseable, initialBoneState: result.initialBoneState, appliedPoseName: savedObjData.appliedPoseName || '' }; if (savedObjData.transform) { newObject.position.fromArray(savedObjData.transform.position); if (savedObjData.transform.quaternion) newObject.quaternion.fromArray(savedObjData.transform.quaternion); else newObject.rotation.set(0,0,0); const relativeScale = savedObjData.transform.relativeScale || 1.0; const absoluteScale = sceneObjectData.baseScale * relativeScale; newObject.scale.set(absoluteScale, absoluteScale, absoluteScale); newObject.updateMatrixWorld(true); } else { logToPage(`No transform data for ${savedObjData.uuid}, placing at base.`, 'warn'); newObject.updateMatrixWorld(true); const baseY = calculateObjectBaseY(newObject); newObject.position.set(0, baseY, 0); newObject.updateMatrixWorld(true); } if (savedObjData.material) { const applySavedMaterial = (mat, savedMat) => { if (!mat?.isMeshStandardMaterial || !savedMat) return false; if (savedMat.hue !== null && savedMat.brightness !== null) mat.color.setHSL(savedMat.hue, 0.8, savedMat.brightness); mat.roughness = savedMat.roughness ?? mat.roughness; mat.metalness = savedMat.metalness ?? mat.metalness; mat.needsUpdate = true; return true; }; if (newObject.isMesh) applySavedMaterial(newObject.material, savedObjData.material); else if (newObject.isGroup) newObject.traverse(c => { if (c.isMesh) { if(Array.isArray(c.material)) c.material.forEach(m=>applySavedMaterial(m, savedObjData.material)); else applySavedMaterial(c.material, savedObjData.material); } }); } scene.add(newObject); sceneObjects.push(sceneObjectData); } logToPage("Applying saved poses to objects..."); for (const objData of sceneObjects) { if (objData.isPoseable && objData.initialBoneState) { const poseName = objData.appliedPoseName; if (poseName && poseName !== '') { const modelPath = objData.originalType; let poseApplied = false; try { const poseDataArray = await getDropdownPose(modelPath, poseName); if (poseDataArray && Array.isArray(poseDataArray)) { logToPage(`Applying saved pose "${poseName}" to ${objData.uuid}.`); applyPoseData(objData.object3D, poseDataArray); poseApplied = true; } } catch (error) { logToPage(`Error applying saved pose "${poseName}" to ${objData.uuid}: ${error.message}`, 'error'); } if (!poseApplied) { logToPage(`Saved pose "${poseName}" for ${objData.uuid} not found or invalid. Applying default pose.`, 'warn'); applyPoseData(objData.object3D, objData.initialBoneState); objData.appliedPoseName = ''; } } else { logToPage(`Applying default pose to ${objData.uuid}.`); applyPoseData(objData.object3D, objData.initialBoneState); } } } if (loadedState.ui.cameraDecoupled !== isCameraDecoupled) toggleCameraDecoupling(); populateObjectList(); controls.update(); if (lastSelectedUUID && sceneObjects.some(o => o.uuid === lastSelectedUUID)) selectObject(lastSelectedUUID); else selectObject(null); logToPage("Scene state loaded successfully.", "success"); return true; } catch (error) { logToPage(`Error applying loaded state: ${error.message}\n${error.stack}`, 'error'); console.error("Apply State Error:", error); await resetSceneToDefaults(); return false; } }
 
 // --- Animation Loop (Simple Render Loop) ---
 function animate() {
@@ -0,0 +1,74 @@
+// --- START OF FILE pose_library.js ---
+// Runtime side of models/pose_compatibility.json (written by
+// scripts/pose_compatibility.py from every pose in poses/ and
+// models/saved_poses/ against every GLB skeleton).
+//
+// main.js lists only the library poses the index marks as compatible with the
+// selected model (coverage >= the index's minCoverage), so poses built for a
+// different rig never reach applyPoseData(). Pose ids are repo-relative file
+// paths, plus '#poseName' for multi-pose files; a pose file is fetched only
+// when one of its poses is applied. Without an index the library is empty.
+
+// --- Configuration ---
+export const POSE_COMPAT_FORMAT = 'shadow-room-pose-compat/1';
+export const LIBRARY_VALUE_PREFIX = 'library:'; // Dropdown values of library poses (store poses use the bare name)
+const POSE_COMPAT_URL = new URL('../models/pose_compatibility.json', import.meta.url);
+
+let indexPromise = null;
+const poseFilePromises = new Map(); // file path -> Promise<parsed JSON>
+
+// --- Index ---
+function loadCompatibilityIndex() {
+    if (!indexPromise) {
+        // no-cache revalidates, so a regenerated index is picked up on the next load
+        indexPromise = fetch(POSE_COMPAT_URL, { cache: 'no-cache' })
+            .then(response => (response.ok ? response.json() : null))
+            .then(index => {
+                if (!index) return null;
+                if (index.format !== POSE_COMPAT_FORMAT) {
+                    console.warn(`pose_library: pose_compatibility.json has format ${index.format}, expected ${POSE_COMPAT_FORMAT} (rerun scripts/pose_compatibility.py).`);
+                    return null;
+                }
+                index.modelColumn = new Map(index.models.map((model, j) => [model.path, j]));
+                index.poseRow = new Map(index.poses.map((pose, i) => [pose.id, i]));
+                return index;
+            })
+            .catch(() => null);
+    }
+    return indexPromise;
+}
+
+/** Library poses compatible with `modelPath`: [{ id, name, coverage }] sorted by name, or null without an index. */
+export async function listCompatiblePoses(modelPath) {
+    const index = await loadCompatibilityIndex();
+    if (!index) return null;
+    const column = index.modelColumn.get(modelPath);
+    if (column === undefined) return [];
+    return (index.byModel[modelPath] || [])
+        .map(id => {
+            const row = index.poseRow.get(id);
+            return { id, name: index.poses[row].name, coverage: index.matrix.coverage[row][column] };
+        })
+        .sort((a, b) => a.name.localeCompare(b.name));
+}
+
+// --- Pose Data ---
+/** One library pose as [{name, position, quaternion, scale}], or null if its file doesn't hold it. */
+export async function getLibraryPose(id) {
+    const hash = id.indexOf('#');
+    const path = hash < 0 ? id : id.slice(0, hash);
+    if (!poseFilePromises.has(path)) {
+        const promise = fetch(new URL(`../${path}`, import.meta.url)).then(response => {
+            if (!response.ok) throw new Error(`HTTP ${response.status} fetching ${path}`);
+            return response.json();
+        });
+        promise.catch(() => poseFilePromises.delete(path)); // Allow a retry
+        poseFilePromises.set(path, promise);
+    }
+    const data = await poseFilePromises.get(path);
+    const stem = path.slice(path.lastIndexOf('/') + 1).replace(/\.[^.]*$/, ''); // A multi-pose file's pose named like the file has no '#name'
+    const poseArray = hash >= 0 ? data?.[id.slice(hash + 1)] : (Array.isArray(data) ? data : data?.[stem]);
+    return Array.isArray(poseArray) ? poseArray : null;
+}
+
+// --- END OF FILE pose_library.js ---
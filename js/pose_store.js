@@ -0,0 +1,291 @@
+// --- START OF FILE pose_store.js ---
+// IndexedDB-backed pose library shared by main.js and poser.html.
+//
+// Each saved pose is its own record in the 'poses' store, keyed by
+// [modelPath, poseName] - that compound key is the name index, so listing a
+// model's poses is a key-only range read and applying one pose reads one
+// record. Payloads are binary: a Float32Array of bones x 10 values
+// (position xyz, quaternion xyzw, scale xyz) plus the id of a shared bone-name
+// list in 'boneSets', so the names aren't repeated in every pose.
+//
+// The old localStorage['poses_<modelPath>'] blobs are moved into IndexedDB the
+// first time a model's poses are listed. Without IndexedDB (some private
+// browsing modes) everything falls back to the legacy localStorage blob.
+//
+// Bundles (importPoseBundle / exportPoseBundle) are the JSON exchange format
+// with scripts/pose_bundle.py:
+//   { format: 'shadow-room-pose-bundle', version: 1,
+//     boneSets: { <id>: [boneName, ...] },
+//     poses: [{ model, name, boneSet, trs: <base64 little-endian float32> }] }
+
+const DB_NAME = 'shadow_room_poses';
+const DB_VERSION = 1;
+const POSES_STORE = 'poses';
+const BONE_SETS_STORE = 'boneSets';
+const LEGACY_PREFIX = 'poses_';
+export const POSE_BUNDLE_FORMAT = 'shadow-room-pose-bundle';
+export const POSE_BUNDLE_VERSION = 1;
+
+let dbPromise = null;
+const boneSetCache = new Map();   // boneSet id -> [names]
+const migratedModels = new Set(); // models whose legacy blob was already checked this session
+
+// --- Helpers ---
+function requestResult(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+function transactionDone(tx) {
+    return new Promise((resolve, reject) => {
+        tx.oncomplete = () => resolve();
+        tx.onerror = () => reject(tx.error);
+        tx.onabort = () => reject(tx.error || new Error('Transaction aborted'));
+    });
+}
+
+/** Stable id for a bone-name list: '<count>-<FNV-1a 32 of the UTF-8 names joined by \n>' (same as pose_bundle.py). */
+export function boneSetId(names) {
+    let hash = 0x811c9dc5;
+    for (const byte of new TextEncoder().encode(names.join('\n'))) {
+        hash ^= byte;
+        hash = Math.imul(hash, 0x01000193) >>> 0;
+    }
+    return `${names.length}-${hash.toString(16).padStart(8, '0')}`;
+}
+
+function packPose(poseArray) {
+    const names = poseArray.map(b => b.name);
+    const trs = new Float32Array(poseArray.length * 10);
+    poseArray.forEach((b, i) => {
+        trs.set(b.position || [0, 0, 0], i * 10);
+        trs.set(b.quaternion || [0, 0, 0, 1], i * 10 + 3);
+        trs.set(b.scale || [1, 1, 1], i * 10 + 7);
+    });
+    return { names, trs };
+}
+
+function unpackPose(names, buffer) {
+    const trs = new Float32Array(buffer);
+    return names.map((name, i) => ({
+        name,
+        position: Array.from(trs.subarray(i * 10, i * 10 + 3)),
+        quaternion: Array.from(trs.subarray(i * 10 + 3, i * 10 + 7)),
+        scale: Array.from(trs.subarray(i * 10 + 7, i * 10 + 10)),
+    }));
+}
+
+function bufferToBase64(buffer) {
+    const bytes = new Uint8Array(buffer);
+    let binary = '';
+    for (let i = 0; i < bytes.length; i += 0x8000) binary += String.fromCharCode(...bytes.subarray(i, i + 0x8000));
+    return btoa(binary);
+}
+
+function base64ToBuffer(text) {
+    const binary = atob(text);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+    return bytes.buffer;
+}
+
+/** Model paths that still have a poses_<model> localStorage blob. */
+function legacyModelPaths() {
+    const keys = Array.from({ length: localStorage.length }, (_, i) => localStorage.key(i));
+    return keys.filter(k => k && k.startsWith(LEGACY_PREFIX)).map(k => k.slice(LEGACY_PREFIX.length));
+}
+
+function readLegacyBlob(modelPath) {
+    try {
+        const parsed = JSON.parse(localStorage.getItem(LEGACY_PREFIX + modelPath) || 'null');
+        return parsed && typeof parsed === 'object' ? parsed : null;
+    } catch (error) {
+        console.warn(`pose_store: unreadable localStorage blob for ${modelPath}:`, error);
+        return null;
+    }
+}
+
+// --- Database ---
+/** Opens (and on first use creates) the pose database. Resolves to null when IndexedDB is unavailable. */
+export function openPoseStore() {
+    if (dbPromise) return dbPromise;
+    if (typeof indexedDB === 'undefined') return (dbPromise = Promise.resolve(null));
+    dbPromise = new Promise((resolve) => {
+        const request = indexedDB.open(DB_NAME, DB_VERSION);
+        request.onupgradeneeded = () => {
+            const db = request.result;
+            if (!db.objectStoreNames.contains(POSES_STORE)) {
+                const poses = db.createObjectStore(POSES_STORE, { keyPath: ['model', 'name'] });
+                poses.createIndex('model', 'model', { unique: false });
+            }
+            if (!db.objectStoreNames.contains(BONE_SETS_STORE)) db.createObjectStore(BONE_SETS_STORE, { keyPath: 'id' });
+        };
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => { console.warn('pose_store: IndexedDB unavailable, using localStorage.', request.error); resolve(null); };
+        request.onblocked = () => console.warn('pose_store: database upgrade blocked by another open tab.');
+    });
+    return dbPromise;
+}
+
+function putRecords(tx, records, boneSets) {
+    const boneStore = tx.objectStore(BONE_SETS_STORE);
+    for (const [id, names] of boneSets) {
+        if (!boneSetCache.has(id)) boneStore.put({ id, names });
+    }
+    const poseStore = tx.objectStore(POSES_STORE);
+    for (const record of records) poseStore.put(record);
+}
+
+function makeRecord(modelPath, name, poseArray, boneSets) {
+    const { names, trs } = packPose(poseArray);
+    const id = boneSetId(names);
+    boneSets.set(id, names);
+    return { model: modelPath, name, boneSet: id, trs: trs.buffer, savedAt: Date.now() };
+}
+
+async function getBoneSet(db, id) {
+    if (boneSetCache.has(id)) return boneSetCache.get(id);
+    const entry = await requestResult(db.transaction(BONE_SETS_STORE).objectStore(BONE_SETS_STORE).get(id));
+    if (entry) boneSetCache.set(id, entry.names);
+    return entry ? entry.names : null;
+}
+
+/** Moves localStorage['poses_<modelPath>'] into IndexedDB (once per session). Returns the number of poses moved. */
+export async function migrateLegacyPoses(modelPath) {
+    const db = await openPoseStore();
+    if (!db || migratedModels.has(modelPath)) return 0;
+    migratedModels.add(modelPath);
+    const legacy = readLegacyBlob(modelPath);
+    if (!legacy) return 0;
+    const boneSets = new Map();
+    const records = Object.entries(legacy)
+        .filter(([, poseArray]) => Array.isArray(poseArray) && poseArray.length > 0)
+        .map(([name, poseArray]) => makeRecord(modelPath, name, poseArray, boneSets));
+    const tx = db.transaction([POSES_STORE, BONE_SETS_STORE], 'readwrite');
+    putRecords(tx, records, boneSets);
+    await transactionDone(tx);
+    boneSets.forEach((names, id) => boneSetCache.set(id, names));
+    localStorage.removeItem(LEGACY_PREFIX + modelPath);
+    console.log(`pose_store: moved ${records.length} pose(s) for ${modelPath} from localStorage to IndexedDB.`);
+    return records.length;
+}
+
+// --- Public API ---
+/** Sorted pose names saved for a model (keys only - no payloads are read). */
+export async function listPoseNames(modelPath) {
+    const db = await openPoseStore();
+    if (!db) return Object.keys(readLegacyBlob(modelPath) || {}).sort((a, b) => a.localeCompare(b));
+    await migrateLegacyPoses(modelPath);
+    const range = IDBKeyRange.bound([modelPath, ''], [modelPath, []]); // arrays sort after every string
+    const keys = await requestResult(db.transaction(POSES_STORE).objectStore(POSES_STORE).getAllKeys(range));
+    return keys.map(key => key[1]).sort((a, b) => a.localeCompare(b));
+}
+
+/** One pose as [{name, position, quaternion, scale}], or null if it isn't saved. */
+export async function getPose(modelPath, name) {
+    const db = await openPoseStore();
+    if (!db) {
+        const poseArray = readLegacyBlob(modelPath)?.[name];
+        return Array.isArray(poseArray) ? poseArray : null;
+    }
+    await migrateLegacyPoses(modelPath); // Saved scenes load poses before any list call
+    const record = await requestResult(db.transaction(POSES_STORE).objectStore(POSES_STORE).get([modelPath, name]));
+    if (!record) return null;
+    const names = await getBoneSet(db, record.boneSet);
+    if (!names) throw new Error(`Bone list ${record.boneSet} for pose "${name}" is missing.`);
+    return unpackPose(names, record.trs);
+}
+
+/** Saves (or overwrites) one pose for a model. */
+export async function savePose(modelPath, name, poseArray) {
+    const db = await openPoseStore();
+    if (!db) {
+        const legacy = readLegacyBlob(modelPath) || {};
+        legacy[name] = poseArray;
+        localStorage.setItem(LEGACY_PREFIX + modelPath, JSON.stringify(legacy));
+        return;
+    }
+    await migrateLegacyPoses(modelPath);
+    const boneSets = new Map();
+    const tx = db.transaction([POSES_STORE, BONE_SETS_STORE], 'readwrite');
+    putRecords(tx, [makeRecord(modelPath, name, poseArray, boneSets)], boneSets);
+    await transactionDone(tx);
+    boneSets.forEach((names, id) => boneSetCache.set(id, names));
+}
+
+/** Deletes one saved pose. */
+export async function deletePose(modelPath, name) {
+    const db = await openPoseStore();
+    if (!db) {
+        const legacy = readLegacyBlob(modelPath) || {};
+        delete legacy[name];
+        localStorage.setItem(LEGACY_PREFIX + modelPath, JSON.stringify(legacy));
+        return;
+    }
+    await migrateLegacyPoses(modelPath); // Otherwise a later migration would bring the pose back
+    const tx = db.transaction(POSES_STORE, 'readwrite');
+    tx.objectStore(POSES_STORE).delete([modelPath, name]);
+    await transactionDone(tx);
+}
+
+/** Imports a bundle (object or JSON text) in one transaction. Returns {poses, models}. */
+export async function importPoseBundle(bundle) {
+    if (typeof bundle === 'string') bundle = JSON.parse(bundle);
+    if (!bundle || bundle.format !== POSE_BUNDLE_FORMAT || bundle.version !== POSE_BUNDLE_VERSION) {
+        throw new Error(`Not a ${POSE_BUNDLE_FORMAT} v${POSE_BUNDLE_VERSION} file.`);
+    }
+    const boneSets = new Map(Object.entries(bundle.boneSets || {}));
+    const models = new Set();
+    const records = [];
+    for (const pose of bundle.poses || []) {
+        const names = boneSets.get(pose.boneSet);
+        const trs = base64ToBuffer(pose.trs);
+        if (!names || trs.byteLength !== names.length * 40) throw new Error(`Pose "${pose.name}" has a bad payload.`);
+        records.push({ model: pose.model, name: pose.name, boneSet: pose.boneSet, trs, savedAt: Date.now() });
+        models.add(pose.model);
+    }
+    const db = await openPoseStore();
+    if (!db) {
+        for (const model of models) {
+            const legacy = readLegacyBlob(model) || {};
+            records.filter(r => r.model === model).forEach(r => { legacy[r.name] = unpackPose(boneSets.get(r.boneSet), r.trs); });
+            localStorage.setItem(LEGACY_PREFIX + model, JSON.stringify(legacy));
+        }
+        return { poses: records.length, models: [...models] };
+    }
+    const tx = db.transaction([POSES_STORE, BONE_SETS_STORE], 'readwrite');
+    putRecords(tx, records, boneSets);
+    await transactionDone(tx);
+    boneSets.forEach((names, id) => boneSetCache.set(id, names));
+    return { poses: records.length, models: [...models] };
+}
+
+/** Builds a bundle of every saved pose for `modelPath` (or for all models when null). */
+export async function exportPoseBundle(modelPath = null) {
+    const bundle = { format: POSE_BUNDLE_FORMAT, version: POSE_BUNDLE_VERSION, boneSets: {}, poses: [] };
+    const db = await openPoseStore();
+    if (!db) {
+        const models = modelPath ? [modelPath] : legacyModelPaths();
+        for (const model of models) {
+            for (const [name, poseArray] of Object.entries(readLegacyBlob(model) || {})) {
+                const { names, trs } = packPose(poseArray);
+                const id = boneSetId(names);
+                bundle.boneSets[id] = names;
+                bundle.poses.push({ model, name, boneSet: id, trs: bufferToBase64(trs.buffer) });
+            }
+        }
+        return bundle;
+    }
+    for (const model of modelPath ? [modelPath] : legacyModelPaths()) await migrateLegacyPoses(model);
+    const store = db.transaction(POSES_STORE).objectStore(POSES_STORE);
+    const records = await requestResult(modelPath ? store.index('model').getAll(modelPath) : store.getAll());
+    for (const record of records) {
+        if (!bundle.boneSets[record.boneSet]) bundle.boneSets[record.boneSet] = await getBoneSet(db, record.boneSet);
+        bundle.poses.push({ model: record.model, name: record.name, boneSet: record.boneSet, trs: bufferToBase64(record.trs) });
+    }
+    return bundle;
+}
+
+// --- END OF FILE pose_store.js ---
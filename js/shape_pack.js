@@ -0,0 +1,239 @@
+// --- START OF FILE shape_pack.js ---
+// Prebuilt geometry pack for the procedural shapes listed in js/registry.json.
+//
+// Build:   bake_shapes.html runs dumpShapes() over every registered shape and
+//          downloads shapes.dump.json (raw vertex/index buffers + mesh
+//          matrices); scripts/pack_shapes.py dedupes identical primitives and
+//          writes models/shapes.glb plus models/shapes.index.json.
+// Runtime: createPackedShape() reads the small index once, then fetches only
+//          the byte ranges of the meshes a shape uses (HTTP Range requests,
+//          adjacent ranges merged) and wraps them in BufferGeometry - no
+//          procedural geometry construction on selection. Meshes already
+//          fetched for an earlier shape are reused. Shapes missing from the
+//          pack (or a missing pack) return null so main.js falls back to the
+//          creation functions.
+// Per-mesh state the creators set (mesh name and visibility, material side
+// and wireframe, or a mesh built without matClone()) is baked alongside the
+// matrices and restored at runtime, so a packed shape renders like a built one.
+
+import * as THREE from 'three';
+
+// --- Configuration ---
+export const SHAPE_DUMP_FORMAT = 'shadow-room-shape-dump';
+export const SHAPE_PACK_VERSION = 2; // 2: per-mesh state (name, visible, side, wireframe, material)
+const SHAPE_PACK_INDEX_URL = 'models/shapes.index.json';
+const RANGE_MERGE_GAP = 16 * 1024; // Ranges closer than this are fetched in one request
+const ATTRIBUTE_NAMES = ['position', 'normal', 'uv']; // Index keys; pack_shapes.py maps them to glTF names
+const COMPONENT_ARRAYS = { f32: Float32Array, u16: Uint16Array, u32: Uint32Array };
+
+// --- Base64 Helpers ---
+function bytesToBase64(bytes) {
+    let binary = '';
+    for (let i = 0; i < bytes.length; i += 0x8000) binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+    return btoa(binary);
+}
+
+function typedArrayToBase64(array) {
+    return bytesToBase64(new Uint8Array(array.buffer, array.byteOffset, array.byteLength));
+}
+
+// --- Bake ---
+/**
+ * Builds every shape in `shapeMap` at size `s` and returns the dump consumed by
+ * scripts/pack_shapes.py. Shapes whose creator calls Math.random() stay
+ * procedural (listed in `procedural`) so every selection still varies.
+ */
+export function dumpShapes(shapeMap, s = 1.5, onProgress = null) {
+    const dump = { format: SHAPE_DUMP_FORMAT, version: SHAPE_PACK_VERSION, size: s, geometries: [], shapes: {}, procedural: [], failed: {} };
+    const geometryIds = new Map(); // BufferGeometry -> dump index (creators reuse geometry via clone())
+    const handedOut = new Set(); // A fresh material per call, so one mesh's changes don't leak into others
+    const matClone = () => { const material = new THREE.MeshStandardMaterial(); handedOut.add(material); return material; };
+    const realRandom = Math.random;
+    const keys = Object.keys(shapeMap);
+
+    const addGeometry = (geometry) => {
+        if (geometryIds.has(geometry)) return geometryIds.get(geometry);
+        const entry = { attributes: {}, index: null };
+        for (const name of ATTRIBUTE_NAMES) {
+            const attribute = geometry.getAttribute(name);
+            if (!attribute || attribute.isInterleavedBufferAttribute) continue;
+            entry.attributes[name] = { itemSize: attribute.itemSize, data: typedArrayToBase64(new Float32Array(attribute.array)) };
+        }
+        if (geometry.index) {
+            const type = geometry.index.array instanceof Uint32Array ? 'u32' : 'u16';
+            entry.index = { type, data: typedArrayToBase64(new COMPONENT_ARRAYS[type](geometry.index.array)) };
+        }
+        dump.geometries.push(entry);
+        geometryIds.set(geometry, dump.geometries.length - 1);
+        return dump.geometries.length - 1;
+    };
+
+    // Only what differs from a plain matClone() mesh is stored.
+    const meshState = (mesh) => {
+        const state = {};
+        const material = Array.isArray(mesh.material) ? mesh.material[0] : mesh.material;
+        if (mesh.name) state.name = mesh.name;
+        if (!mesh.visible) state.visible = false;
+        if (material && !handedOut.has(material)) state.material = material.type; // e.g. a Mesh built without a material
+        if (material && material.side !== THREE.FrontSide) state.side = material.side;
+        if (material?.wireframe) state.wireframe = true;
+        return state;
+    };
+
+    keys.forEach((key, i) => {
+        if (onProgress) onProgress(key, i, keys.length);
+        const creator = shapeMap[key];
+        if (typeof creator !== 'function') { dump.failed[key] = 'no creation function'; return; }
+        let usedRandom = false;
+        Math.random = () => { usedRandom = true; return realRandom(); };
+        let created;
+        try {
+            created = creator(s, matClone);
+        } catch (error) {
+            dump.failed[key] = error.message;
+            return;
+        } finally {
+            Math.random = realRandom;
+        }
+        if (usedRandom) { dump.procedural.push(key); return; }
+
+        if (created instanceof THREE.BufferGeometry) {
+            dump.shapes[key] = { kind: 'geometry', meshes: [{ geometry: addGeometry(created), matrix: null }] };
+        } else if (created instanceof THREE.Group) {
+            // Mesh matrices are stored relative to the group; the group's own
+            // transform is kept separately so the app can still reset it.
+            created.updateMatrixWorld(true);
+            const toGroup = created.matrixWorld.clone().invert();
+            const meshes = [];
+            created.traverse(child => {
+                if (!child.isMesh || !child.geometry) return;
+                const matrix = child.matrixWorld.clone().premultiply(toGroup);
+                meshes.push({ geometry: addGeometry(child.geometry), matrix: matrix.equals(new THREE.Matrix4()) ? null : matrix.toArray(), ...meshState(child) });
+            });
+            dump.shapes[key] = {
+                kind: 'group', meshes,
+                root: { position: created.position.toArray(), quaternion: created.quaternion.toArray(), scale: created.scale.toArray() },
+            };
+        } else {
+            dump.failed[key] = `unexpected result type ${created?.type || typeof created}`;
+        }
+    });
+    return dump;
+}
+
+// --- Runtime Loading ---
+let packIndexPromise = null;
+const meshCache = new Map(); // mesh index -> Promise<{ attributes, index }>
+let wholeFilePromise = null; // Set when the server ignores Range and sends the whole file
+
+async function loadPackIndex() {
+    if (!packIndexPromise) {
+        packIndexPromise = fetch(SHAPE_PACK_INDEX_URL)
+            .then(response => (response.ok ? response.json() : null))
+            .then(index => {
+                if (!index || index.version !== SHAPE_PACK_VERSION) {
+                    if (index) console.warn(`shape_pack: ${SHAPE_PACK_INDEX_URL} has version ${index.version}, expected ${SHAPE_PACK_VERSION}; using procedural shapes.`);
+                    return null;
+                }
+                return index;
+            })
+            .catch(() => null);
+    }
+    return packIndexPromise;
+}
+
+/** Fetches bytes [start, end) of the pack; returns { buffer, start } where buffer holds at least that range. */
+async function fetchRange(url, start, end) {
+    if (wholeFilePromise) return { buffer: await wholeFilePromise, start: 0 };
+    const response = await fetch(url, { headers: { Range: `bytes=${start}-${end - 1}` } });
+    if (!response.ok) throw new Error(`HTTP ${response.status} fetching ${url}`);
+    if (response.status === 206) return { buffer: await response.arrayBuffer(), start };
+    // Server without Range support: keep the whole file for the following shapes.
+    wholeFilePromise = response.arrayBuffer();
+    return { buffer: await wholeFilePromise, start: 0 };
+}
+
+function readMesh(meshInfo, buffer, bufferStart) {
+    const view = ([offset, length], ArrayType) => new ArrayType(buffer, offset - bufferStart, length / ArrayType.BYTES_PER_ELEMENT);
+    const attributes = {};
+    for (const [name, attribute] of Object.entries(meshInfo.attributes)) {
+        attributes[name] = { array: view(attribute.range, Float32Array), itemSize: attribute.itemSize };
+    }
+    const index = meshInfo.index ? view(meshInfo.index.range, COMPONENT_ARRAYS[meshInfo.index.type]) : null;
+    return { attributes, index };
+}
+
+/** Loads the listed meshes, merging nearby byte ranges into single requests. */
+function loadMeshes(index, meshIndices) {
+    const missing = [...new Set(meshIndices)].filter(m => !meshCache.has(m)).sort((a, b) => index.meshes[a].range[0] - index.meshes[b].range[0]);
+    const batches = [];
+    for (const m of missing) {
+        const [start, end] = index.meshes[m].range;
+        const last = batches[batches.length - 1];
+        if (last && start - last.end <= RANGE_MERGE_GAP) { last.end = Math.max(last.end, end); last.meshes.push(m); }
+        else batches.push({ start, end, meshes: [m] });
+    }
+    for (const batch of batches) {
+        const request = fetchRange(index.glb, batch.start, batch.end);
+        for (const m of batch.meshes) {
+            const promise = request.then(({ buffer, start }) => readMesh(index.meshes[m], buffer, start));
+            promise.catch(() => meshCache.delete(m)); // Allow a retry after a failed fetch
+            meshCache.set(m, promise);
+        }
+    }
+    return Promise.all(meshIndices.map(m => meshCache.get(m)));
+}
+
+function buildGeometry(meshData, meshInfo) {
+    const geometry = new THREE.BufferGeometry();
+    for (const [name, { array, itemSize }] of Object.entries(meshData.attributes)) {
+        geometry.setAttribute(name, new THREE.BufferAttribute(array, itemSize));
+    }
+    if (meshData.index) geometry.setIndex(new THREE.BufferAttribute(meshData.index, 1));
+    // Bounds come from the pack so three.js never has to scan the vertices.
+    geometry.boundingBox = new THREE.Box3(new THREE.Vector3().fromArray(meshInfo.min), new THREE.Vector3().fromArray(meshInfo.max));
+    geometry.boundingSphere = geometry.boundingBox.getBoundingSphere(new THREE.Sphere());
+    return geometry;
+}
+
+/**
+ * Returns the prebuilt version of a shape - a BufferGeometry or a Group, like
+ * the creation functions - or null when the pack doesn't cover it (pack not
+ * built, shape kept procedural, or baked at a different size).
+ */
+export async function createPackedShape(shapeKey, s, matClone) {
+    const index = await loadPackIndex();
+    const shape = index?.shapes[shapeKey];
+    if (!shape || index.size !== s) return null;
+    const meshDataList = await loadMeshes(index, shape.nodes.map(node => node.mesh));
+
+    // Within one shape, repeated primitives share a single BufferGeometry.
+    const geometries = new Map();
+    const geometryFor = (m, data) => {
+        if (!geometries.has(m)) geometries.set(m, buildGeometry(data, index.meshes[m]));
+        return geometries.get(m);
+    };
+    if (shape.kind === 'geometry') return geometryFor(shape.nodes[0].mesh, meshDataList[0]);
+
+    const group = new THREE.Group();
+    shape.nodes.forEach((node, i) => {
+        // Same material calls as the creator: its own material type, or matClone() with the creator's side/wireframe
+        const material = node.material && THREE[node.material] ? new THREE[node.material]() : matClone();
+        if (node.side !== undefined && material.side !== node.side) { material.side = node.side; material.needsUpdate = true; }
+        if (node.wireframe && !material.wireframe) { material.wireframe = true; material.needsUpdate = true; }
+        const mesh = new THREE.Mesh(geometryFor(node.mesh, meshDataList[i]), material);
+        if (node.matrix) new THREE.Matrix4().fromArray(node.matrix).decompose(mesh.position, mesh.quaternion, mesh.scale);
+        if (node.name) mesh.name = node.name;
+        if (node.visible === false) mesh.visible = false;
+        mesh.castShadow = true;
+        group.add(mesh);
+    });
+    if (shape.root) {
+        group.position.fromArray(shape.root.position);
+        group.quaternion.fromArray(shape.root.quaternion);
+        group.scale.fromArray(shape.root.scale);
+    }
+    return group;
+}
+
+// --- END OF FILE shape_pack.js ---
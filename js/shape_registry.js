@@ -0,0 +1,87 @@
+// --- START OF FILE shape_registry.js ---
+// Runtime side of js/registry.json (generated by scripts/build_registry.py from
+// the js/shapes/*.js exports and models/*.glb).
+//
+// The app builds its shape/model dropdown from the manifest and only import()s
+// the module that holds the chosen shape, so startup no longer parses every
+// shape module. Modules are cached once loaded. Creation functions return a
+// BufferGeometry or a Group of Meshes (or a Promise of one).
+
+// --- Configuration ---
+export const REGISTRY_VERSION = 1;
+const REGISTRY_URL = new URL('./registry.json', import.meta.url);
+
+let registryPromise = null;
+const modulePromises = new Map(); // module path -> Promise<module namespace>
+
+// --- Manifest ---
+/** Loads (once) and returns the manifest: { version, models, modules, shapes }. */
+export function loadRegistry() {
+    if (!registryPromise) {
+        // no-cache revalidates, so a regenerated manifest is picked up on the next load
+        registryPromise = fetch(REGISTRY_URL, { cache: 'no-cache' })
+            .then(response => {
+                if (!response.ok) throw new Error(`HTTP ${response.status} fetching ${REGISTRY_URL.pathname}`);
+                return response.json();
+            })
+            .then(registry => {
+                if (registry.version !== REGISTRY_VERSION) throw new Error(`registry.json has version ${registry.version}, expected ${REGISTRY_VERSION} (rerun scripts/build_registry.py)`);
+                registry.shapeIndex = new Map(registry.shapes.map(shape => [shape.key, shape]));
+                return registry;
+            });
+        registryPromise.catch(() => { registryPromise = null; }); // Allow a retry
+    }
+    return registryPromise;
+}
+
+function importModule(modulePath) {
+    if (!modulePromises.has(modulePath)) {
+        const promise = import(new URL(`../${modulePath}`, import.meta.url).href);
+        promise.catch(() => modulePromises.delete(modulePath));
+        modulePromises.set(modulePath, promise);
+    }
+    return modulePromises.get(modulePath);
+}
+
+// --- Shape Lookup ---
+/** Returns the creation function for a shape key (importing only its module), or null if unknown. */
+export async function getShapeFunction(shapeKey) {
+    const registry = await loadRegistry();
+    const entry = registry.shapeIndex.get(shapeKey);
+    if (!entry) return null;
+    const module = await importModule(entry.module);
+    const creationFunc = module[entry.export];
+    if (typeof creationFunc !== 'function') throw new Error(`${entry.module} no longer exports ${entry.export} (rerun scripts/build_registry.py)`);
+    return creationFunc;
+}
+
+/** Imports every shape module and returns { shapeKey: creationFunction } (used by bake_shapes.html). */
+export async function loadShapeFunctionMap() {
+    const registry = await loadRegistry();
+    const map = {};
+    for (const entry of registry.shapes) {
+        const module = await importModule(entry.module);
+        map[entry.key] = module[entry.export];
+    }
+    return map;
+}
+
+// --- Preload Hints ---
+const hintedUrls = new Set();
+
+/**
+ * Adds a <link> resource hint once per URL. 'prefetch' (the default) fetches at
+ * idle priority into the HTTP cache, so a later GLTFLoader request for the same
+ * URL is served locally without competing with the current load.
+ */
+export function addResourceHint(url, rel = 'prefetch') {
+    if (!url || hintedUrls.has(url)) return;
+    hintedUrls.add(url);
+    const link = document.createElement('link');
+    link.rel = rel;
+    link.href = url;
+    if (rel === 'preload') { link.as = 'fetch'; link.crossOrigin = 'anonymous'; }
+    document.head.appendChild(link);
+}
+
+// --- END OF FILE shape_registry.js ---
@@ -0,0 +1,415 @@
+# START OF FILE: analyze_glb.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# Load-cost report for the GLBs in models/: where each file's bytes go and
+# roughly what loadGLBModel() (GLTFLoader + processLoadedGltf in js/main.js)
+# allocates for it, checked against size/complexity budgets.
+#
+# Bytes - every byte of the file is attributed to one category (the totals
+# add up to the file size): json, meshes (vertex attributes + indices),
+# morphTargets, skins (JOINTS_n/WEIGHTS_n + inverse bind matrices),
+# animations (sampler keyframes; the app never plays them), images, unused
+# (bufferViews nothing references), padding and container headers. A
+# bufferView shared by several categories (interleaved or packed exports) is
+# split in proportion to its accessors. The chunks are read as zero-copy
+# views of the file (glb_utils.GLBFile); images are only sniffed for their
+# PNG/JPEG/WebP dimensions.
+#
+# Counts - nodes, meshes, primitives, vertices, triangles, accessors,
+# bufferViews, materials, textures, skins, joints, animations, channels,
+# keyframes, JSON objects.
+#
+# Load estimate (three.js r163 GLTFLoader behaviour, coarse by design):
+#   arrayBufferBytes  fetched file + the BIN chunk slice + one slice per
+#                     loaded bufferView (loadBufferView copies)
+#   jsObjects         JSON.parse objects + Object3D/geometry/attribute/
+#                     material/texture/skeleton/track objects + the bone
+#                     state captured by processLoadedGltf
+#   decodedImageBytes RGBA bitmaps; gpuBytes adds vertex/index buffers and
+#                     mipmaps
+#   boundsVertices    vertices Box3.setFromObject walks on every load
+#
+# Budgets: BUDGETS below, optionally overridden per model by a JSON file
+# ({"default": {...}, "models/x.glb": {...}}). The JSON and Markdown reports
+# contain no timestamps, so they diff cleanly; metrics that moved by more
+# than REGRESSION_THRESHOLD since the previous report are listed on the console.
+#
+# Usage:  python scripts/analyze_glb.py [models...] [-o models/glb_report] [--budgets budgets.json]
+#             [--baseline old.json] [--check]
+import argparse
+import fnmatch
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from glb_utils import CHUNK_BIN, CHUNK_JSON, COMPONENT_DTYPES, MODELS_DIR, TYPE_SIZES, list_model_files, load_glb, repo_relative
+
+# --- Configuration ---
+REPORT_VERSION = 1
+DEFAULT_OUTPUT = os.path.join(MODELS_DIR, "glb_report")  # .json and .md
+CATEGORIES = ("json", "meshes", "morphTargets", "skins", "animations", "images", "unused", "padding", "container")
+SKIN_ATTRIBUTES = ("JOINTS_", "WEIGHTS_")
+# Limits per model ("default") - a metric over its budget fails --check.
+BUDGETS = {
+    "default": {
+        "fileBytes": 3_000_000,
+        "bytes.json": 256_000,
+        "bytes.animations": 512_000,
+        "bytes.unused": 0,
+        "counts.nodes": 400,
+        "counts.accessors": 800,
+        "counts.channels": 1_000,
+        "counts.vertices": 150_000,
+        "load.jsObjects": 150_000,
+        "load.gpuBytes": 48_000_000,
+    },
+}
+REGRESSION_THRESHOLD = 0.05  # Report metrics that changed by more than 5% since the baseline
+# Rough three.js r163 object counts (JS objects created) per glTF item.
+OBJECTS_PER_NODE = 12  # Object3D + position/rotation/quaternion/scale/matrix/matrixWorld/... + children/userData
+OBJECTS_PER_PRIMITIVE = 8  # BufferGeometry + attributes/morphAttributes/groups/drawRange/boundingBox/-Sphere/userData
+OBJECTS_PER_ATTRIBUTE = 3  # BufferAttribute + typed array view + updateRanges
+OBJECTS_PER_MATERIAL = 20  # MeshStandard/PhysicalMaterial with its Color/Vector2/uniform objects
+OBJECTS_PER_TEXTURE = 10  # Texture + Source + image/ImageBitmap + Matrix3/Vector2s
+OBJECTS_PER_JOINT = 6  # Bone inverse Matrix4 + elements; processLoadedGltf state record + 3 clones
+OBJECTS_PER_CHANNEL = 4  # KeyframeTrack + times/values views + interpolant
+OBJECTS_PER_ANIMATION = 3  # AnimationClip + tracks array + userData
+AVERAGE_OBJECT_BYTES = 96  # Heap estimate per JS object (V8, small objects + their backing stores)
+MIPMAP_FACTOR = 4 / 3
+
+
+# --- Helper Functions ---
+def image_size(data):
+    """(width, height) from PNG/JPEG/WebP header bytes (a memoryview), or None."""
+    head = bytes(data[:64])
+    if head[:8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack(">II", head[16:24])
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        kind = head[12:16]
+        if kind == b"VP8 ":
+            w, h = struct.unpack("<HH", head[26:30])
+            return w & 0x3FFF, h & 0x3FFF
+        if kind == b"VP8L":
+            bits = int.from_bytes(head[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if kind == b"VP8X":
+            return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+        return None
+    if head[:2] == b"\xff\xd8":
+        offset = 2
+        while offset + 9 < len(data):
+            marker, length = data[offset + 1], struct.unpack(">H", bytes(data[offset + 2:offset + 4]))[0]
+            if data[offset] != 0xFF:
+                return None
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                h, w = struct.unpack(">HH", bytes(data[offset + 5:offset + 9]))
+                return w, h
+            offset += 2 + length
+    return None
+
+
+def count_json_objects(value):
+    """Objects and arrays JSON.parse creates for the document."""
+    if isinstance(value, dict):
+        return 1 + sum(count_json_objects(v) for v in value.values())
+    if isinstance(value, list):
+        return 1 + sum(count_json_objects(v) for v in value)
+    return 0
+
+
+def accessor_bytes(acc):
+    return acc["count"] * np.dtype(COMPONENT_DTYPES[acc["componentType"]]).itemsize * TYPE_SIZES[acc["type"]]
+
+
+def accessor_categories(gltf):
+    """accessor index -> category, from the mesh/skin/animation references."""
+    categories = {}
+    for mesh in gltf.get("meshes", []):
+        for prim in mesh.get("primitives", []):
+            for semantic, acc in prim.get("attributes", {}).items():
+                categories.setdefault(acc, "skins" if semantic.startswith(SKIN_ATTRIBUTES) else "meshes")
+            if "indices" in prim:
+                categories.setdefault(prim["indices"], "meshes")
+            for target in prim.get("targets", []):
+                for acc in target.values():
+                    categories.setdefault(acc, "morphTargets")
+    for skin in gltf.get("skins", []):
+        if "inverseBindMatrices" in skin:
+            categories.setdefault(skin["inverseBindMatrices"], "skins")
+    for anim in gltf.get("animations", []):
+        for sampler in anim.get("samplers", []):
+            categories.setdefault(sampler["input"], "animations")
+            categories.setdefault(sampler["output"], "animations")
+    return categories
+
+
+# --- Analysis ---
+def byte_breakdown(glb):
+    """Bytes per category; sums to the file size."""
+    gltf = glb.gltf
+    out = dict.fromkeys(CATEGORIES, 0)
+    json_length = next((length for kind, _, length in glb.chunks if kind == CHUNK_JSON), 0)
+    bin_length = next((length for kind, _, length in glb.chunks if kind == CHUNK_BIN), 0)
+    out["json"] = json_length
+    out["container"] = 12 + 8 * len(glb.chunks)
+    other_chunks = sum(length for kind, _, length in glb.chunks if kind not in (CHUNK_JSON, CHUNK_BIN))
+    out["unused"] += other_chunks
+
+    # Per bufferView: {category: accessor bytes} (images claim their whole view).
+    view_users = {}
+    categories = accessor_categories(gltf)
+    for index, acc in enumerate(gltf.get("accessors", [])):
+        if "bufferView" in acc:
+            users = view_users.setdefault(acc["bufferView"], {})
+            category = categories.get(index, "unused")
+            users[category] = users.get(category, 0) + accessor_bytes(acc)
+        for part in ("indices", "values"):  # Sparse accessors
+            view = acc.get("sparse", {}).get(part, {}).get("bufferView")
+            if view is not None:
+                users = view_users.setdefault(view, {})
+                users[categories.get(index, "unused")] = users.get(categories.get(index, "unused"), 0) + 1
+    for image in gltf.get("images", []):
+        if "bufferView" in image:
+            view_users[image["bufferView"]] = {"images": 1}
+
+    covered = 0
+    for index, view in enumerate(gltf.get("bufferViews", [])):
+        length = view["byteLength"]
+        if view.get("buffer", 0) == 0:
+            covered += length
+        users = view_users.get(index) or {"unused": 1}
+        total = sum(users.values())
+        assigned = 0
+        for i, (category, weight) in enumerate(sorted(users.items())):
+            share = length - assigned if i == len(users) - 1 else length * weight // total
+            out[category] += share
+            assigned += share
+    out["padding"] = max(bin_length - covered, 0)  # Alignment between views (and any gap)
+    out["unused"] += glb.length - sum(out.values()) if glb.length > sum(out.values()) else 0
+    return out
+
+
+def counts(glb):
+    gltf = glb.gltf
+    accessors = gltf.get("accessors", [])
+    primitives = [p for m in gltf.get("meshes", []) for p in m.get("primitives", [])]
+    vertices = triangles = 0
+    for prim in primitives:
+        position = prim.get("attributes", {}).get("POSITION")
+        count = accessors[position]["count"] if position is not None else 0
+        vertices += count
+        if prim.get("mode", 4) == 4:
+            triangles += (accessors[prim["indices"]]["count"] if "indices" in prim else count) // 3
+    animations = gltf.get("animations", [])
+    return {
+        "nodes": len(gltf.get("nodes", [])),
+        "meshes": len(gltf.get("meshes", [])),
+        "primitives": len(primitives),
+        "vertices": vertices,
+        "triangles": triangles,
+        "morphTargets": sum(len(p.get("targets", [])) for p in primitives),
+        "accessors": len(accessors),
+        "bufferViews": len(gltf.get("bufferViews", [])),
+        "materials": len(gltf.get("materials", [])),
+        "textures": len(gltf.get("textures", [])),
+        "images": len(gltf.get("images", [])),
+        "skins": len(gltf.get("skins", [])),
+        "joints": sum(len(s.get("joints", [])) for s in gltf.get("skins", [])),
+        "animations": len(animations),
+        "channels": sum(len(a.get("channels", [])) for a in animations),
+        "keyframes": sum(accessors[s["input"]]["count"] for a in animations for s in a.get("samplers", [])),
+        "jsonObjects": count_json_objects(gltf),
+    }
+
+
+def load_estimate(glb, c):
+    """Coarse allocation estimate for GLTFLoader + processLoadedGltf (see the header)."""
+    gltf = glb.gltf
+    bin_length = next((length for kind, _, length in glb.chunks if kind == CHUNK_BIN), 0)
+    used_views = {acc["bufferView"] for acc in gltf.get("accessors", []) if "bufferView" in acc}
+    used_views |= {img["bufferView"] for img in gltf.get("images", []) if "bufferView" in img}
+    view_copies = sum(gltf["bufferViews"][v]["byteLength"] for v in used_views)
+
+    attributes = sum(len(p.get("attributes", {})) + ("indices" in p) + sum(len(t) for t in p.get("targets", []))
+                     for m in gltf.get("meshes", []) for p in m.get("primitives", []))
+    # Multi-primitive meshes become a Group plus one Mesh per primitive.
+    extra_objects3d = sum(len(m.get("primitives", [])) for m in gltf.get("meshes", []) if len(m.get("primitives", [])) > 1)
+    loader_objects = ((c["nodes"] + extra_objects3d) * OBJECTS_PER_NODE + c["primitives"] * OBJECTS_PER_PRIMITIVE
+                      + attributes * OBJECTS_PER_ATTRIBUTE + c["materials"] * OBJECTS_PER_MATERIAL
+                      + c["textures"] * OBJECTS_PER_TEXTURE + c["joints"] * OBJECTS_PER_JOINT
+                      + c["channels"] * OBJECTS_PER_CHANNEL + c["animations"] * OBJECTS_PER_ANIMATION)
+    js_objects = c["jsonObjects"] + loader_objects
+
+    decoded_images, unknown_images = 0, 0
+    for image in gltf.get("images", []):
+        size = image_size(glb.buffer_view_bytes(image["bufferView"])) if "bufferView" in image else None
+        if size:
+            decoded_images += size[0] * size[1] * 4
+        else:
+            unknown_images += 1
+    vertex_bytes = sum(accessor_bytes(gltf["accessors"][a]) for a, cat in accessor_categories(gltf).items()
+                       if cat in ("meshes", "skins", "morphTargets"))
+    return {
+        "arrayBufferBytes": glb.length + bin_length + view_copies,
+        "jsObjects": js_objects,
+        "jsHeapBytes": js_objects * AVERAGE_OBJECT_BYTES,
+        "decodedImageBytes": decoded_images,
+        "unknownImages": unknown_images,
+        "gpuBytes": vertex_bytes + int(decoded_images * MIPMAP_FACTOR),
+        "boundsVertices": c["vertices"],
+    }
+
+
+def analyze(path):
+    glb = load_glb(path)
+    c = counts(glb)
+    return {"fileBytes": glb.length, "bytes": byte_breakdown(glb), "counts": c, "load": load_estimate(glb, c),
+            "extensions": sorted(glb.gltf.get("extensionsUsed", []))}
+
+
+# --- Budgets ---
+def flatten(entry):
+    """{'fileBytes': n, 'bytes.json': n, 'counts.nodes': n, ...} for budget checks and diffs."""
+    flat = {"fileBytes": entry["fileBytes"]}
+    for section in ("bytes", "counts", "load"):
+        flat.update((f"{section}.{k}", v) for k, v in entry[section].items())
+    return flat
+
+
+def budgets_for(model, budgets):
+    limits = dict(budgets.get("default", {}))
+    for pattern, overrides in budgets.items():
+        if pattern != "default" and fnmatch.fnmatch(model, pattern):
+            limits.update(overrides)
+    return limits
+
+
+def check_budgets(model, entry, budgets):
+    flat = flatten(entry)
+    return [{"metric": metric, "value": flat[metric], "budget": limit}
+            for metric, limit in sorted(budgets_for(model, budgets).items()) if metric in flat and flat[metric] > limit]
+
+
+def compare(baseline, report):
+    """(model, metric, old, new) for metrics that moved more than REGRESSION_THRESHOLD."""
+    changes = []
+    for model, entry in report["models"].items():
+        old_entry = baseline.get("models", {}).get(model)
+        if not old_entry:
+            changes.append((model, "(new model)", None, entry["fileBytes"]))
+            continue
+        old, new = flatten(old_entry), flatten(entry)
+        for metric, value in new.items():
+            before = old.get(metric)
+            if before != value and (not before or abs(value - before) / before > REGRESSION_THRESHOLD):
+                changes.append((model, metric, before, value))
+    changes.extend((model, "(removed)", None, None) for model in baseline.get("models", {}) if model not in report["models"])
+    return changes
+
+
+# --- Report ---
+def kb(n):
+    return f"{n / 1024:,.1f}"
+
+
+def markdown(report):
+    models = report["models"]
+    lines = ["# GLB load-cost report", "", "Generated by `scripts/analyze_glb.py`; byte columns in KB.", "",
+             "## Bytes by category", "",
+             "| model | file | " + " | ".join(CATEGORIES) + " |", "|---|" + "---:|" * (len(CATEGORIES) + 1)]
+    for model, e in models.items():
+        lines.append(f"| {model} | {kb(e['fileBytes'])} | " + " | ".join(kb(e["bytes"][k]) for k in CATEGORIES) + " |")
+    count_keys = ("nodes", "primitives", "vertices", "triangles", "accessors", "bufferViews", "materials", "joints",
+                  "animations", "channels", "keyframes", "jsonObjects")
+    lines += ["", "## Counts", "", "| model | " + " | ".join(count_keys) + " |", "|---|" + "---:|" * len(count_keys)]
+    for model, e in models.items():
+        lines.append(f"| {model} | " + " | ".join(f"{e['counts'][k]:,}" for k in count_keys) + " |")
+    lines += ["", "## Load estimate", "",
+              "| model | ArrayBuffers KB | JS objects | JS heap KB | decoded images KB | GPU KB | bounds vertices |",
+              "|---|---:|---:|---:|---:|---:|---:|"]
+    for model, e in models.items():
+        ld = e["load"]
+        lines.append(f"| {model} | {kb(ld['arrayBufferBytes'])} | {ld['jsObjects']:,} | {kb(ld['jsHeapBytes'])} | "
+                     f"{kb(ld['decodedImageBytes'])} | {kb(ld['gpuBytes'])} | {ld['boundsVertices']:,} |")
+    lines += ["", "## Budgets", ""]
+    over = [(model, v) for model, e in models.items() for v in e["overBudget"]]
+    if over:
+        lines += ["| model | metric | value | budget |", "|---|---|---:|---:|"]
+        lines += [f"| {model} | {v['metric']} | {v['value']:,} | {v['budget']:,} |" for model, v in over]
+    else:
+        lines.append("All models are within budget.")
+    return "\n".join(lines) + "\n"
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Break GLBs down by byte category, count load work and check budgets.")
+    parser.add_argument("models", nargs="*", help="GLB paths (default: every models/*.glb).")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="Report path without extension; writes .json and .md (default: models/glb_report).")
+    parser.add_argument("--budgets", help="JSON budgets {\"default\": {metric: limit}, \"models/x.glb\": {...}} merged over BUDGETS.")
+    parser.add_argument("--baseline", help="Previous JSON report to compare with (default: the existing output).")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if any model is over budget.")
+    args = parser.parse_args(argv)
+
+    budgets = {k: dict(v) for k, v in BUDGETS.items()}
+    if args.budgets:
+        try:
+            with open(args.budgets, "r", encoding="utf-8") as f:
+                for pattern, limits in json.load(f).items():
+                    budgets.setdefault(pattern, {}).update(limits)
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"ERROR: Could not read budgets '{args.budgets}': {e}")
+            return 1
+    baseline_path = args.baseline or args.output + ".json"
+    try:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = None
+        if args.baseline:
+            print(f"  WARNING: Could not read baseline '{args.baseline}'.")
+
+    report = {"version": REPORT_VERSION, "models": {}}
+    for path in args.models or list_model_files(MODELS_DIR):
+        model = repo_relative(path)
+        try:
+            entry = analyze(path)
+        except (OSError, ValueError, KeyError, IndexError, struct.error) as e:
+            print(f"  WARNING: Skipping '{model}': {e}")
+            continue
+        entry["overBudget"] = check_budgets(model, entry, budgets)
+        report["models"][model] = entry
+    if not report["models"]:
+        print("ERROR: No models to analyze.")
+        return 1
+
+    print(f"{'model':<34} {'KB':>9} {'json':>8} {'meshes':>9} {'skins':>8} {'anim':>8} {'images':>8} {'nodes':>6} {'objects':>8}")
+    for model, e in report["models"].items():
+        b = e["bytes"]
+        print(f"{model:<34} {kb(e['fileBytes']):>9} {kb(b['json']):>8} {kb(b['meshes']):>9} {kb(b['skins']):>8} "
+              f"{kb(b['animations']):>8} {kb(b['images']):>8} {e['counts']['nodes']:>6} {e['load']['jsObjects']:>8}")
+        for v in e["overBudget"]:
+            print(f"  WARNING: {v['metric']} = {v['value']:,} exceeds the budget of {v['budget']:,}")
+    if baseline:
+        changes = compare(baseline, report)
+        print(f"\n{len(changes)} metric(s) changed by more than {REGRESSION_THRESHOLD:.0%} since '{repo_relative(baseline_path)}'.")
+        for model, metric, before, after in changes:
+            print(f"  {model}: {metric} {before if before is not None else '-'} -> {after if after is not None else '-'}")
+
+    with open(args.output + ".json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+        f.write("\n")
+    with open(args.output + ".md", "w", encoding="utf-8") as f:
+        f.write(markdown(report))
+    print(f"Report written to '{repo_relative(args.output)}.json' and '.md'.")
+    over = sum(len(e["overBudget"]) for e in report["models"].values())
+    return 1 if args.check and over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
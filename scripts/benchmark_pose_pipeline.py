@@ -0,0 +1,381 @@
+# START OF FILE: benchmark_pose_pipeline.py
+# Offline tool (plain Python, no Blender needed).
+#
+# Benchmarks the pose pipeline on synthetic data so regressions show up from
+# run to run:
+#   extract/*  - extract_applied_poses.py and extract_poses.py, run unmodified
+#                against the fake_bpy.py stand-in (synthetic skeletons of
+#                62 / 159 / 500 bones, pose packs of N asset actions); per-phase
+#                numbers come from the scripts' own profiler trace. Each
+#                extractor/format is also run once with its background writer
+#                and once synchronously (WRITER_THREADS 2 vs 0): every output
+#                file must be byte-identical (journal lines compared as a set,
+#                since writer threads append them in completion order)
+#   manifest/* - write_manifest() for N entries
+#   encode/*   - pose_writer.encode_pose() per format (pretty/compact/binary)
+#   parse/*    - parsing N synthetic pose files per format, and the real
+#                models/saved_poses/ files through read_pose_file()
+#
+# Each case records a primary metric (usPerItem) plus totals. Cases stop at
+# --budget seconds and extrapolate from the items they got through, so the
+# 100k tiers stay practical; extractor runs are capped by --extract-max-poses
+# and anything that would write more than --max-disk-mb is skipped.
+# Results go to benchmarks/pose_pipeline-<timestamp>.json; the newest earlier
+# result (or --baseline) is compared and cases slower than --threshold are
+# flagged as regressions.
+#
+# Usage:  python scripts/benchmark_pose_pipeline.py [--bones 62 159 500]
+#             [--poses 100 1000 10000] [--full] [--only extract encode ...]
+#             [--budget 20] [--baseline FILE] [--threshold 1.25] [-o FILE]
+import argparse
+import contextlib
+import datetime
+import glob
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import fake_bpy
+from glb_utils import REPO_ROOT, repo_relative
+from pose_utils import SAVED_POSES_DIR, read_pose_file, write_manifest
+from pose_writer import FORMATS, decode_binary_pose, encode_pose, pose_extension
+
+# --- Configuration ---
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks")
+DEFAULT_BONES = (62, 159, 500)
+DEFAULT_POSES = (100, 1000, 10000)
+FULL_POSES = (100, 1000, 10000, 100000)
+SUITES = ("extract", "manifest", "encode", "parse")
+EXTRACTORS = ("extract_applied_poses.py", "extract_poses.py")
+REPEAT_BELOW_S = 0.5  # cases faster than this are repeated and the best run is kept
+
+
+# --- Synthetic Data ---
+def synthetic_pose(names, seed):
+    """One pose in the app's schema (quaternion xyzw) for the given bone names."""
+    v = fake_bpy.synthetic_pose_values(len(names), seed)
+    return [{"name": name, "position": v[i * 10:i * 10 + 3], "quaternion": v[i * 10 + 4:i * 10 + 7] + [v[i * 10 + 3]],
+             "scale": v[i * 10 + 7:i * 10 + 10]} for i, name in enumerate(names)]
+
+
+def pose_bytes(names, fmt):
+    """Encoded size of one synthetic pose - used to estimate disk use before writing."""
+    return len(encode_pose(synthetic_pose(names, 0), fmt))
+
+
+# --- Timing ---
+def run_budgeted(items, work, budget):
+    """Calls work(item) per item, timing only work(); stops once `budget` seconds are spent.
+
+    Returns (done, seconds, extra) where extra is the sum of whatever work() returned (e.g. bytes).
+    """
+    done, spent, extra = 0, 0.0, 0
+    for item in items:
+        t0 = time.perf_counter()
+        result = work(item)
+        spent += time.perf_counter() - t0
+        extra += result or 0
+        done += 1
+        if spent >= budget:
+            break
+    return done, spent, extra
+
+
+def case_result(total, done, seconds, **fields):
+    """Standard case record: usPerItem is the metric compared between runs."""
+    return {"items": total, "measured": done, "extrapolated": done < total, "seconds": round(seconds, 6),
+            "estimatedSeconds": round(seconds / done * total, 4) if done else None,
+            "usPerItem": round(seconds / done * 1e6, 3) if done else None, **fields}
+
+
+def best_of(repeat, fn):
+    """Runs fn() (returning a case record) up to `repeat` times while it stays fast; keeps the fastest."""
+    best = fn()
+    for _ in range(repeat - 1):
+        if best["seconds"] >= REPEAT_BELOW_S:
+            break
+        again = fn()
+        if again["usPerItem"] is not None and again["usPerItem"] < best["usPerItem"]:
+            best = again
+    return best
+
+
+# --- Benchmarks ---
+def run_blender_script(path, pack, overrides):
+    """Runs a Blender script unmodified except for its top-level config constants, against fake_bpy."""
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    for name, value in overrides.items():
+        source, count = re.subn(rf"^{name} = .*$", f"{name} = {value!r}", source, count=1, flags=re.M)
+        if not count:
+            raise ValueError(f"'{os.path.basename(path)}' has no {name} setting to override.")
+    fake_bpy.install(pack)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            exec(compile(source, path, "exec"), {"__name__": "__main__", "__file__": path})
+    finally:
+        fake_bpy.uninstall()
+
+
+def bench_extract(script, bones, poses, fmt, work_dir):
+    """One extractor run over a synthetic pack; returns the case record with the script's phase summary."""
+    pack_dir = os.path.join(work_dir, "pack")
+    shutil.rmtree(pack_dir, ignore_errors=True)
+    os.makedirs(os.path.join(pack_dir, "blend"))
+    pack = fake_bpy.SyntheticPack(bones=bones, poses=poses, blend_path=os.path.join(pack_dir, "blend", "pack.blend"))
+    t0 = time.perf_counter()
+    run_blender_script(os.path.join(SCRIPTS_DIR, script), pack, {"OUTPUT_FORMAT": fmt, "QUIET": True})
+    seconds = time.perf_counter() - t0
+
+    traces = glob.glob(os.path.join(pack_dir, "**", "*.trace.json"), recursive=True)
+    phases = {}
+    if traces:
+        with open(traces[0], "r", encoding="utf-8") as f:
+            phases = json.load(f).get("otherData", {}).get("phases", {})
+    written = glob.glob(os.path.join(pack_dir, "**", "*" + pose_extension(fmt)), recursive=True)
+    files = sum(1 for p in written if os.path.basename(p) != "manifest.json" and not p.endswith(".trace.json"))
+    shutil.rmtree(pack_dir, ignore_errors=True)
+    record = case_result(poses, poses, seconds, files=files)
+    record["phases"] = {name: {k: s[k] for k in ("count", "totalMs", "p50Ms", "p95Ms", "maxMs")}
+                        for name, s in phases.items()}
+    if files != poses:
+        print(f"  WARNING: {script} wrote {files} of {poses} pose files.")
+    return record
+
+
+def extractor_outputs(pack_dir):
+    """{relative path: bytes} of everything an extractor run wrote (traces excluded; journal lines sorted)."""
+    outputs = {}
+    for path in glob.glob(os.path.join(pack_dir, "**", "*"), recursive=True):
+        if os.path.isdir(path) or path.endswith(".trace.json"):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        outputs[os.path.relpath(path, pack_dir)] = b"".join(sorted(data.splitlines(True))) if path.endswith(".ndjson") else data
+    return outputs
+
+
+def check_writer_parity(script, bones, poses, fmt, work_dir):
+    """Runs an extractor with background writer threads and synchronously; returns (files compared, differing paths)."""
+    outputs = []
+    for threads in (2, 0):
+        pack_dir = os.path.join(work_dir, f"parity_{threads}")
+        shutil.rmtree(pack_dir, ignore_errors=True)
+        os.makedirs(os.path.join(pack_dir, "blend"))
+        pack = fake_bpy.SyntheticPack(bones=bones, poses=poses, blend_path=os.path.join(pack_dir, "blend", "pack.blend"))
+        run_blender_script(os.path.join(SCRIPTS_DIR, script), pack, {"OUTPUT_FORMAT": fmt, "QUIET": True, "WRITER_THREADS": threads})
+        outputs.append(extractor_outputs(pack_dir))
+        shutil.rmtree(pack_dir, ignore_errors=True)
+    threaded, synchronous = outputs
+    return len(synchronous), sorted(p for p in set(threaded) | set(synchronous) if threaded.get(p) != synchronous.get(p))
+
+
+def bench_manifest(poses, work_dir):
+    path = os.path.join(work_dir, "manifest.json")
+    entries = {f"Pose {i:06d} F": f"poses/female/Pose_{i:06d}.json" for i in range(poses)}
+    t0 = time.perf_counter()
+    write_manifest(path, entries)
+    seconds = time.perf_counter() - t0
+    return case_result(poses, poses, seconds, bytes=os.path.getsize(path))
+
+
+def bench_encode(names, poses, fmt, budget):
+    done, seconds, size = run_budgeted(
+        (synthetic_pose(names, i) for i in range(poses)), lambda pose: len(encode_pose(pose, fmt)), budget)
+    return case_result(poses, done, seconds, bytesPerPose=size // done if done else 0)
+
+
+def bench_parse(names, poses, fmt, budget, work_dir):
+    """Writes a synthetic library in `fmt` (untimed), then times parsing every file."""
+    lib_dir = os.path.join(work_dir, f"library_{fmt}")
+    shutil.rmtree(lib_dir, ignore_errors=True)
+    os.makedirs(lib_dir)
+    paths, t_write = [], time.perf_counter()
+    for i in range(poses):
+        payload = encode_pose(synthetic_pose(names, i), fmt)
+        path = os.path.join(lib_dir, f"Pose_{i:06d}{pose_extension(fmt)}")
+        with open(path, "wb" if isinstance(payload, bytes) else "w") as f:
+            f.write(payload)
+        paths.append(path)
+        if time.perf_counter() - t_write >= budget:  # parse can't cover more files than were written
+            break
+
+    if fmt == "binary":
+        def parse(path):
+            with open(path, "rb") as f:
+                return len(decode_binary_pose(f.read()))
+    else:
+        def parse(path):
+            return sum(len(bones) for _, bones in read_pose_file(path))
+    done, seconds, bones = run_budgeted(paths, parse, budget)
+    shutil.rmtree(lib_dir, ignore_errors=True)
+    return case_result(poses, done, seconds, bonesParsed=bones)
+
+
+def bench_saved_poses(repeat):
+    """Parses the real models/saved_poses/*.json files (the app's bundled pose data)."""
+    paths = sorted(glob.glob(os.path.join(SAVED_POSES_DIR, "*.json")))
+    if not paths:
+        return None
+
+    def once():
+        done, seconds, poses = run_budgeted(paths, lambda p: sum(1 for _ in read_pose_file(p)), float("inf"))
+        return case_result(len(paths), done, seconds, poses=poses, bytes=sum(os.path.getsize(p) for p in paths))
+    return best_of(repeat, once)
+
+
+# --- Reporting ---
+def environment():
+    info = {"python": platform.python_version(), "implementation": platform.python_implementation(),
+            "platform": platform.platform(), "machine": platform.machine(), "cpus": os.cpu_count()}
+    try:
+        info["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                        text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        info["commit"] = None
+    return info
+
+
+def latest_result(results_dir, exclude=None):
+    """Newest pose_pipeline-*.json in results_dir other than `exclude`, or None."""
+    found = sorted(p for p in glob.glob(os.path.join(results_dir, "pose_pipeline-*.json"))
+                   if not exclude or os.path.abspath(p) != os.path.abspath(exclude))
+    return found[-1] if found else None
+
+
+def compare(cases, baseline_cases, threshold):
+    """{case: ratio} of usPerItem against the baseline, and the cases slower than `threshold`."""
+    ratios, regressions = {}, []
+    for key, case in cases.items():
+        old = baseline_cases.get(key, {})
+        if case.get("usPerItem") and old.get("usPerItem"):
+            ratios[key] = round(case["usPerItem"] / old["usPerItem"], 3)
+            if ratios[key] > threshold:
+                regressions.append(key)
+    return ratios, regressions
+
+
+def print_table(cases, ratios):
+    print(f"\n{'Case':<44}{'items':>8}{'us/item':>14}{'est. s':>10}{'vs base':>9}")
+    for key, case in cases.items():
+        if case.get("skipped"):
+            print(f"{key:<44}{'':>8}{'skipped':>14}  ({case['skipped']})")
+            continue
+        ratio = f"{ratios[key]:.2f}x" if key in ratios else ""
+        mark = "~" if case["extrapolated"] else ""
+        print(f"{key:<44}{case['items']:>8}{case['usPerItem']:>14.1f}{mark + str(case['estimatedSeconds']):>10}{ratio:>9}")
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pose extraction, encoding, manifests and parsing on synthetic data.")
+    parser.add_argument("--bones", type=int, nargs="+", default=list(DEFAULT_BONES), help="Synthetic skeleton sizes (default: 62 159 500).")
+    parser.add_argument("--poses", type=int, nargs="+", default=None, help="Library sizes (default: 100 1000 10000).")
+    parser.add_argument("--full", action="store_true", help="Library sizes 100 1000 10000 100000.")
+    parser.add_argument("--only", nargs="+", choices=SUITES, default=list(SUITES), help="Suites to run.")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS), help="Pose formats for encode/parse.")
+    parser.add_argument("--extract-formats", nargs="+", choices=FORMATS, default=["pretty"], help="OUTPUT_FORMAT values for the extractor runs.")
+    parser.add_argument("--extract-max-poses", type=int, default=1000, help="Largest pack the extractors are run on (default: 1000).")
+    parser.add_argument("--parity-poses", type=int, default=200, help="Pack size for the threaded-vs-synchronous writer check (default: 200; 0 skips it).")
+    parser.add_argument("--budget", type=float, default=20.0, help="Seconds per case before extrapolating (default: 20).")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeats for fast cases; the best run is kept (default: 3).")
+    parser.add_argument("--max-disk-mb", type=float, default=1024, help="Skip cases that would write more than this (default: 1024).")
+    parser.add_argument("--baseline", help="Result JSON to compare with (default: newest earlier result in benchmarks/).")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio flagged as a regression (default: 1.25).")
+    parser.add_argument("-o", "--output", help="Result path (default: benchmarks/pose_pipeline-<timestamp>.json).")
+    args = parser.parse_args(argv)
+
+    pose_counts = args.poses or list(FULL_POSES if args.full else DEFAULT_POSES)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"pose_pipeline-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    max_disk = args.max_disk_mb * 1024 * 1024
+    cases, parity = {}, {}
+    print(f"--- Pose pipeline benchmark: bones {args.bones}, poses {pose_counts}, suites {args.only} ---")
+
+    def record(key, make):
+        print(f"  {key} ...", flush=True)
+        cases[key] = make()
+
+    with tempfile.TemporaryDirectory(prefix="pose_bench_") as work_dir:
+        if "manifest" in args.only:
+            for n in pose_counts:
+                record(f"manifest/n{n}", lambda: best_of(args.repeat, lambda: bench_manifest(n, work_dir)))
+
+        if "parse" in args.only:
+            saved = bench_saved_poses(args.repeat)
+            if saved:
+                cases["parse/saved_poses"] = saved
+
+        if "extract" in args.only and args.parity_poses > 0:
+            for script in EXTRACTORS:
+                for fmt in args.extract_formats:
+                    key = f"{os.path.splitext(script)[0]}/{fmt}"
+                    print(f"  parity/{key} ...", flush=True)
+                    files, mismatches = check_writer_parity(script, args.bones[0], args.parity_poses, fmt, work_dir)
+                    parity[key] = {"files": files, "mismatches": mismatches}
+
+        for bones in args.bones:
+            names = fake_bpy.synthetic_bone_names(bones)
+            if "extract" in args.only:
+                for script in EXTRACTORS:
+                    for fmt in args.extract_formats:
+                        for n in pose_counts:
+                            key = f"extract/{os.path.splitext(script)[0]}/{fmt}/b{bones}/n{n}"
+                            if n > args.extract_max_poses:
+                                cases[key] = {"skipped": f"> --extract-max-poses {args.extract_max_poses}"}
+                            elif n * pose_bytes(names, fmt) > max_disk:
+                                cases[key] = {"skipped": f"> --max-disk-mb {args.max_disk_mb:g}"}
+                            else:
+                                record(key, lambda: bench_extract(script, bones, n, fmt, work_dir))
+            for fmt in args.formats:
+                for n in pose_counts:
+                    if "encode" in args.only:
+                        record(f"encode/{fmt}/b{bones}/n{n}", lambda: best_of(args.repeat, lambda: bench_encode(names, n, fmt, args.budget)))
+                    if "parse" in args.only:
+                        key = f"parse/{fmt}/b{bones}/n{n}"
+                        if n * pose_bytes(names, fmt) > max_disk:
+                            cases[key] = {"skipped": f"> --max-disk-mb {args.max_disk_mb:g}"}
+                        else:
+                            record(key, lambda: best_of(args.repeat, lambda: bench_parse(names, n, fmt, args.budget, work_dir)))
+
+    baseline_path = args.baseline or latest_result(os.path.dirname(os.path.abspath(output)), exclude=output)
+    ratios, regressions = {}, []
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            ratios, regressions = compare(cases, json.load(f).get("cases", {}), args.threshold)
+
+    result = {"created": datetime.datetime.now().isoformat(timespec="seconds"), "environment": environment(),
+              "settings": {"bones": args.bones, "poses": pose_counts, "budget": args.budget, "repeat": args.repeat,
+                           "extractMaxPoses": args.extract_max_poses},
+              "baseline": repo_relative(baseline_path) if baseline_path else None,
+              "regressions": regressions, "ratios": ratios, "writerParity": parity, "cases": cases}
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    print_table(cases, ratios)
+    print(f"\n(~ = extrapolated from the first --budget seconds)\nResults saved: '{repo_relative(output)}'")
+    if baseline_path:
+        print(f"Compared with '{repo_relative(baseline_path)}': {len(regressions)} regression(s) over {args.threshold}x")
+        for key in regressions:
+            print(f"  WARNING: {key} is {ratios[key]:.2f}x slower")
+    for key, check in parity.items():
+        if check["mismatches"]:
+            print(f"ERROR: {key}: background writer output differs from the synchronous run in "
+                  f"{len(check['mismatches'])} of {check['files']} file(s), e.g. '{check['mismatches'][0]}'")
+        else:
+            print(f"Writer parity {key}: {check['files']} file(s) byte-identical")
+    return 1 if regressions or any(check["mismatches"] for check in parity.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
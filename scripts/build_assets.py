@@ -0,0 +1,586 @@
+# START OF FILE: build_assets.py
+# Offline tool (plain Python, no Blender needed unless .blend files are present).
+#
+# Incremental asset build: runs the offline tools below as a dependency graph
+# and rebuilds only what is out of date.
+#   registry            build_registry.py      js/shapes/*.js, models/*.glb -> js/registry.json
+#   sidecar:<model>     build_skeleton_sidecars.py  poseable GLB -> .skeleton.json/.bin
+#   shape-pack          pack_shapes.py         shapes.dump.json -> models/shapes.glb + index
+#   extract:<blend>     extract_applied_poses.py (Blender) -> poses/<gender>/*.json
+#   pose:<pose>         pose_space.py to-gltf  one extracted pose -> poses/converted/<model>/to-gltf/
+#   pose-manifest:<m>   manifest.json over the converted poses of one model
+#   bundle:<model>      pose_bundle.py pack    saved + converted poses -> models/bundles/<model>.bundle.json
+#   pose-compat         pose_compatibility.py  every pose x model -> models/pose_compatibility.json
+#   glb-report          analyze_glb.py         models/*.glb -> models/glb_report.json/.md (load cost, budgets)
+#
+# Each node declares its input files (sources plus the tool script and the
+# local modules it imports, so editing a tool rebuilds what it made) and its
+# outputs; an output consumed as another node's input is an edge. The content
+# hashes of every node's inputs/outputs and its command line are kept in
+# .asset_build/db.json. A node runs when its record is missing, an input hash
+# or the command changed, or an output is missing or was edited; a node whose
+# rebuilt upstream produced identical bytes is not rerun. Hashes are cached by
+# (mtime, size), so an up-to-date check reads only files that were touched.
+# Independent nodes run in parallel (-j), in dependency order; nodes below a
+# failure are skipped. Nodes are discovered from the tree, so the plan is
+# rebuilt after every pass that changed something (new extracted poses, new
+# registry entries) until it settles. Outputs of nodes that no longer exist
+# (a deleted pose) are removed unless they were edited by hand.
+#
+# --watch keeps running and rebuilds after every change to an input directory
+# (inotify on Linux, polling elsewhere or with --poll).
+#
+# Usage:  python scripts/build_assets.py [targets...] [-j 4] [--watch [--poll]] [--dry-run] [--force] [--list]
+#         targets are node ids or id prefixes (e.g. sidecar, pose:female/wave); upstream nodes are included
+import argparse
+import collections
+import concurrent.futures
+import ctypes
+import ctypes.util
+import glob
+import hashlib
+import json
+import os
+import re
+import select
+import shutil
+import subprocess
+import sys
+import time
+
+from build_registry import SHAPES_DIR, model_files
+from glb_utils import MODELS_DIR, REGISTRY_PATH, REPO_ROOT, list_model_files, read_poseable_models, repo_relative
+from pose_utils import DEFAULT_POSE_ROOTS, POSES_DIR, SAVED_POSES_DIR, discover_pose_files, safe_pose_filename
+
+# --- Configuration ---
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(REPO_ROOT, ".asset_build", "db.json")
+DB_VERSION = 1
+BLENDER = os.environ.get("BLENDER", "blender")
+SHAPE_DUMP_PATH = os.path.join(REPO_ROOT, "shapes.dump.json")  # Saved from bake_shapes.html
+BUNDLES_DIR = os.path.join(MODELS_DIR, "bundles")  # Outside the pose roots, so bundles aren't read back as poses
+COMPATIBILITY_PATH = os.path.join(MODELS_DIR, "pose_compatibility.json")
+GLB_REPORT_PATH = os.path.join(MODELS_DIR, "glb_report")  # .json and .md
+# poses/<gender>/ written by the extractors -> model the poses are converted and bundled for.
+POSE_MODELS = {"female": "models/femalebase0.glb", "male": "models/malebase0.glb"}
+# Directories searched (recursively) for .blend files; the extractor writes to <blend dir>/../poses.
+BLEND_SEARCH_SKIP = {".git", ".asset_build", "node_modules", "js", "css", "poses"}
+MAX_PASSES = 4  # Replans per build; each pass can only discover nodes created by the previous one
+POLL_INTERVAL = 0.3  # Seconds between polls without inotify
+DEBOUNCE = 0.15  # Quiet time after the last change before rebuilding (editors write in several steps)
+OUTPUT_TAIL_LINES = 15  # Lines of a failed command's output to show
+
+_LOCAL_IMPORT = re.compile(r"^\s*(?:from|import)\s+(\w+)", re.M)
+
+
+# --- Helper Functions ---
+def rel(path):
+    return repo_relative(path).replace("\\", "/")
+
+
+def script_inputs(script, _seen=None):
+    """The tool script plus every scripts/*.py it imports (transitively), as absolute paths."""
+    seen = set() if _seen is None else _seen
+    path = os.path.join(SCRIPTS_DIR, script)
+    if path in seen or not os.path.exists(path):
+        return seen
+    seen.add(path)
+    with open(path, "r", encoding="utf-8") as f:
+        for module in _LOCAL_IMPORT.findall(f.read()):
+            script_inputs(module + ".py", seen)
+    return seen
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Node:
+    """One build step: input/output files (absolute paths) and a command (argv run from the repo root) or a callable."""
+
+    def __init__(self, node_id, inputs, outputs, command=None, action=None, after=(), unavailable=None):
+        self.id = node_id
+        self.inputs = sorted(set(inputs))
+        self.outputs = sorted(set(outputs))
+        self.command = command
+        self.action = action
+        self.after = set(after)  # Node ids to order after without depending on their outputs' content
+        self.unavailable = unavailable  # Reason the node can't run here (e.g. no Blender); it is skipped
+        self.signature = json.dumps(command) if command else f"action:{node_id}"
+        self.deps = set()
+
+
+class BuildDB:
+    """Per-node input/output hashes and command signatures, plus a (mtime, size) -> sha256 cache."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get("version") != DB_VERSION:
+            data = {}
+        self.files = data.get("files", {})
+        self.nodes = data.get("nodes", {})
+
+    def digest(self, path):
+        """sha256 of a file, or None if it doesn't exist; rehashed only when mtime/size changed."""
+        key = rel(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.files.pop(key, None)
+            return None
+        cached = self.files.get(key)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        digest = file_digest(path)
+        self.files[key] = [st.st_mtime_ns, st.st_size, digest]
+        return digest
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": DB_VERSION, "files": self.files, "nodes": self.nodes}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+# --- Rules ---
+def find_blend_files():
+    found = []
+    for root, dirs, files in os.walk(REPO_ROOT):
+        dirs[:] = sorted(d for d in dirs if d not in BLEND_SEARCH_SKIP and not d.startswith("."))
+        found.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(".blend"))
+    return found
+
+
+def manifest_action(path, entries):
+    """Writes a {poseName: relativePath} manifest (same layout as pose_space.py writes)."""
+    def write():
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({name: repo_relative(p) for name, p in entries.items()}, f, indent=4, sort_keys=True)
+    return write
+
+
+def plan():
+    """Discovers the build graph from the current tree. Returns {node id: Node}."""
+    nodes = []
+
+    shape_modules = glob.glob(os.path.join(SHAPES_DIR, "*.js"))
+    nodes.append(Node("registry", shape_modules + model_files() + list(script_inputs("build_registry.py")), [REGISTRY_PATH],
+                      ["python", "scripts/build_registry.py"]))
+
+    sidecar_tools = script_inputs("build_skeleton_sidecars.py")
+    bone_mappings = os.path.join(REPO_ROOT, "js", "bone_mappings.json")
+    for model in read_poseable_models() if os.path.exists(REGISTRY_PATH) else []:
+        base = os.path.splitext(os.path.join(REPO_ROOT, model))[0]
+        nodes.append(Node(f"sidecar:{model}", [os.path.join(REPO_ROOT, model), bone_mappings] + list(sidecar_tools),
+                          [base + ".skeleton.json", base + ".skeleton.bin"], ["python", "scripts/build_skeleton_sidecars.py", model]))
+
+    if os.path.exists(SHAPE_DUMP_PATH):
+        pack = os.path.join(MODELS_DIR, "shapes.glb")
+        nodes.append(Node("shape-pack", [SHAPE_DUMP_PATH] + list(script_inputs("pack_shapes.py")),
+                          [pack, os.path.join(MODELS_DIR, "shapes.index.json")],
+                          ["python", "scripts/pack_shapes.py", rel(SHAPE_DUMP_PATH), "-o", rel(pack)]))
+
+    extract_ids = []
+    blender = shutil.which(BLENDER)
+    for blend in find_blend_files():
+        journal = os.path.normpath(os.path.join(os.path.dirname(blend), "..", "poses", "extraction_journal.ndjson"))
+        node = Node(f"extract:{rel(blend)}", [blend] + list(script_inputs("extract_applied_poses.py")), [journal],
+                    [BLENDER, "-b", rel(blend), "--python", "scripts/extract_applied_poses.py"],
+                    unavailable=None if blender else f"'{BLENDER}' not found (set BLENDER)")
+        nodes.append(node)
+        extract_ids.append(node.id)
+
+    converted_poses = []
+    convert_tools = script_inputs("pose_space.py")
+    bundle_tools = script_inputs("pose_bundle.py")
+    for gender, model in POSE_MODELS.items():
+        model_path = os.path.join(REPO_ROOT, model)
+        if not os.path.exists(model_path):
+            continue
+        model_name = os.path.splitext(os.path.basename(model))[0]
+        converted_dir = os.path.join(POSES_DIR, "converted", model_name, "to-gltf")
+        converted = {}
+        # One node per pose, so editing a pose reconverts only that pose.
+        for source in discover_pose_files([os.path.join(POSES_DIR, gender)]):
+            stem = os.path.splitext(os.path.basename(source))[0]
+            output = os.path.join(converted_dir, f"{safe_pose_filename(stem)}.json")
+            converted[stem] = output
+            nodes.append(Node(f"pose:{gender}/{stem}", [source, model_path] + list(convert_tools), [output],
+                              ["python", "scripts/pose_space.py", "to-gltf", rel(source), "--model", model,
+                               "-o", rel(converted_dir), "--no-manifest"], after=extract_ids))
+        converted_poses.extend(converted.values())
+        if converted:
+            nodes.append(Node(f"pose-manifest:{model}", list(converted.values()), [os.path.join(converted_dir, "manifest.json")],
+                              action=manifest_action(os.path.join(converted_dir, "manifest.json"), converted)))
+
+        sources = discover_pose_files([SAVED_POSES_DIR]) + list(converted.values())
+        bundle = os.path.join(BUNDLES_DIR, f"{model_name}.bundle.json")
+        roots = [rel(SAVED_POSES_DIR)] + ([rel(converted_dir)] if converted else [])
+        nodes.append(Node(f"bundle:{model}", sources + [model_path, REGISTRY_PATH] + list(bundle_tools), [bundle],
+                          ["python", "scripts/pose_bundle.py", "pack"] + roots + ["--model", model, "-o", rel(bundle)]))
+
+    # Converted poses are listed even before they exist, so the index waits for them.
+    nodes.append(Node("pose-compat", discover_pose_files(DEFAULT_POSE_ROOTS) + converted_poses + list_model_files(MODELS_DIR)
+                      + list(script_inputs("pose_compatibility.py")), [COMPATIBILITY_PATH],
+                      ["python", "scripts/pose_compatibility.py"], after=extract_ids))
+    nodes.append(Node("glb-report", list_model_files(MODELS_DIR) + list(script_inputs("analyze_glb.py")),
+                      [GLB_REPORT_PATH + ".json", GLB_REPORT_PATH + ".md"], ["python", "scripts/analyze_glb.py", "-o", rel(GLB_REPORT_PATH)]))
+    return link({node.id: node for node in nodes})
+
+
+def link(nodes):
+    """Fills Node.deps from output -> input matches (plus `after` ordering)."""
+    producers = {}
+    for node in nodes.values():
+        for output in node.outputs:
+            if output in producers:
+                raise ValueError(f"'{rel(output)}' is an output of both {producers[output]} and {node.id}.")
+            producers[output] = node.id
+    for node in nodes.values():
+        node.deps = {producers[i] for i in node.inputs if i in producers} | (node.after & nodes.keys())
+        node.deps.discard(node.id)
+    return nodes
+
+
+def select_targets(nodes, targets):
+    """Nodes matching the targets (id or id prefix) plus everything upstream of them."""
+    wanted = [n for n in nodes if any(n.startswith(t) for t in targets)]
+    stack, keep = list(wanted), set()
+    while stack:
+        node_id = stack.pop()
+        if node_id not in keep:
+            keep.add(node_id)
+            stack.extend(nodes[node_id].deps)
+    return {n: nodes[n] for n in nodes if n in keep}
+
+
+# --- Build ---
+def stale_reason(node, db, input_hashes):
+    """Why the node must run (None if up to date). Fills input_hashes with the hashes the check saw."""
+    record = db.nodes.get(node.id)
+    missing = []
+    for path in node.inputs:
+        input_hashes[rel(path)] = db.digest(path)
+        if input_hashes[rel(path)] is None:
+            missing.append(rel(path))
+    if missing:
+        return f"missing input {missing[0]}"
+    if record is None:
+        return "never built"
+    if record.get("signature") != node.signature:
+        return "command changed"
+    if set(record.get("inputs", {})) != set(input_hashes):
+        return "inputs added/removed"
+    for path, digest in input_hashes.items():
+        if record["inputs"][path] != digest:
+            return f"{path} changed"
+    for path in node.outputs:
+        digest = db.digest(path)
+        if digest is None:
+            return f"{rel(path)} missing"
+        if record.get("outputs", {}).get(rel(path)) != digest:
+            return f"{rel(path)} edited"
+    return None
+
+
+def execute(node):
+    """Runs one node (in a worker thread). Returns (ok, seconds, captured output)."""
+    for output in node.outputs:
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    t0 = time.perf_counter()
+    if node.action:
+        try:
+            node.action()
+            return True, time.perf_counter() - t0, ""
+        except (OSError, ValueError) as e:
+            return False, time.perf_counter() - t0, str(e)
+    argv = [sys.executable if arg == "python" else arg for arg in node.command]
+    try:
+        proc = subprocess.run(argv, cwd=REPO_ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    except OSError as e:
+        return False, time.perf_counter() - t0, str(e)
+    missing = [rel(p) for p in node.outputs if not os.path.exists(p)]
+    text = proc.stdout + (f"\ndid not write {', '.join(missing)}" if proc.returncode == 0 and missing else "")
+    return proc.returncode == 0 and not missing, time.perf_counter() - t0, text
+
+
+def run_graph(nodes, db, jobs=4, force=False, dry_run=False, verbose=False):
+    """Runs stale nodes in dependency order, independent ones in parallel. Returns {node id: status}."""
+    status = {}
+    waiting = {n: set(node.deps) for n, node in nodes.items()}
+    dependents = {n: [] for n in nodes}
+    for n, node in nodes.items():
+        for dep in node.deps:
+            dependents[dep].append(n)
+    ready = sorted(n for n, deps in waiting.items() if not deps)
+    running = {}
+
+    def finish(node_id, result):
+        status[node_id] = result
+        for child in dependents[node_id]:
+            waiting[child].discard(node_id)
+            if not waiting[child]:
+                ready.append(child)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while ready or running:
+            while ready:
+                node_id = ready.pop(0)
+                node = nodes[node_id]
+                upstream = [status[d] for d in node.deps]
+                if any(s in ("failed", "blocked") for s in upstream):
+                    print(f"  blocked  {node_id} (upstream failed)")
+                    finish(node_id, "blocked")
+                    continue
+                input_hashes = {}
+                reason = "forced" if force else stale_reason(node, db, input_hashes)
+                if dry_run and reason is None and "would build" in upstream:
+                    reason = "upstream changes"
+                if reason is None:
+                    if verbose:
+                        print(f"  ok       {node_id}")
+                    finish(node_id, "up-to-date")
+                elif node.unavailable:
+                    print(f"  skipped  {node_id} ({reason}; {node.unavailable})")
+                    finish(node_id, "skipped")
+                elif reason.startswith("missing input"):
+                    print(f"  ERROR: {node_id}: {reason}")
+                    finish(node_id, "failed")
+                elif dry_run:
+                    print(f"  stale    {node_id} ({reason})")
+                    finish(node_id, "would build")
+                else:
+                    if force:
+                        stale_reason(node, db, input_hashes)
+                    print(f"  build    {node_id} ({reason})")
+                    running[pool.submit(execute, node)] = (node_id, input_hashes)
+            if not running:
+                break
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                node_id, input_hashes = running.pop(future)
+                node = nodes[node_id]
+                ok, seconds, output = future.result()
+                if ok:
+                    # Inputs are recorded as they were when the node was judged stale, so an
+                    # edit made while it ran is picked up by the next build.
+                    db.nodes[node_id] = {"signature": node.signature, "inputs": input_hashes,
+                                         "outputs": {rel(p): db.digest(p) for p in node.outputs}, "seconds": round(seconds, 3)}
+                    db.save()
+                    print(f"  done     {node_id} ({seconds:.2f}s)")
+                    finish(node_id, "built")
+                else:
+                    db.nodes.pop(node_id, None)
+                    print(f"  ERROR: {node_id} failed after {seconds:.2f}s:")
+                    for line in output.strip().splitlines()[-OUTPUT_TAIL_LINES:]:
+                        print(f"    | {line}")
+                    finish(node_id, "failed")
+    for node_id in nodes.keys() - status.keys():
+        print(f"  ERROR: {node_id} is part of a dependency cycle.")
+        status[node_id] = "failed"
+    return status
+
+
+def prune(nodes, db):
+    """Drops records of nodes no longer in the plan and deletes their outputs unless edited since.
+    Returns True if a file was removed (the plan has to be rediscovered)."""
+    removed = False
+    current = {rel(p) for node in nodes.values() for p in node.outputs}
+    for node_id in sorted(db.nodes.keys() - nodes.keys()):
+        for output, digest in db.nodes[node_id].get("outputs", {}).items():
+            path = os.path.join(REPO_ROOT, output)
+            if output not in current and digest and db.digest(path) == digest:
+                os.remove(path)
+                db.files.pop(output, None)
+                removed = True
+                print(f"  removed  {output} ({node_id} no longer exists)")
+        del db.nodes[node_id]
+    db.save()
+    return removed
+
+
+def build(db, targets=(), jobs=4, force=False, dry_run=False, verbose=False, quiet=False):
+    """Plans and runs until nothing more changes. Returns (built count, failed count).
+    quiet skips the summary when nothing was stale (watch mode sees its own writes)."""
+    t0 = time.perf_counter()
+    outcome = {}  # node id -> status over all passes; a later "up-to-date" doesn't hide a build
+    for _ in range(MAX_PASSES):
+        try:
+            nodes = plan()
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return sum(1 for s in outcome.values() if s == "built"), 1
+        if targets:
+            nodes = select_targets(nodes, targets)
+        elif not dry_run and prune(nodes, db):
+            nodes = plan()
+        status = run_graph(nodes, db, jobs, force, dry_run, verbose)
+        for node_id, s in status.items():
+            if s != "up-to-date" or outcome.get(node_id) != "built":
+                outcome[node_id] = s
+        changed = sum(1 for s in status.values() if s == "built")
+        force = False
+        if not changed or dry_run:
+            break
+    else:
+        print(f"  WARNING: Still rebuilding after {MAX_PASSES} passes; run again.")
+    counts = collections.Counter(outcome[n] for n in status)  # nodes pruned in a later pass drop out
+    built, stale, fresh, skipped = counts["built"], counts["would build"], counts["up-to-date"], counts["skipped"]
+    failed = counts["failed"] + counts["blocked"]
+    if quiet and not (built or failed or stale):
+        return built, failed
+    summary = f"{stale} stale" if dry_run else f"{built} built"
+    skipped_note = f", {skipped} skipped" if skipped else ""
+    print(f"--- {time.strftime('%H:%M:%S') + ' ' if quiet else ''}{summary}, {fresh} up to date{skipped_note}, {failed} failed/blocked "
+          f"({time.perf_counter() - t0:.2f}s) ---")
+    return built, failed
+
+
+# --- Watching ---
+def watched_dirs(nodes):
+    """Directories whose changes can make a node stale or add/remove nodes."""
+    dirs = {os.path.dirname(p) for node in nodes.values() for p in node.inputs + node.outputs}
+    dirs |= {REPO_ROOT, SHAPES_DIR, MODELS_DIR, SAVED_POSES_DIR, POSES_DIR, SCRIPTS_DIR}
+    dirs |= {os.path.join(POSES_DIR, gender) for gender in POSE_MODELS}
+    return sorted(d for d in dirs if os.path.isdir(d))
+
+
+class InotifyWatcher:
+    """Blocks until a file in one of the directories is written, created, moved or deleted (Linux only)."""
+    IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x8, 0x40, 0x80, 0x100, 0x200
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = set()
+
+    def watch(self, dirs):
+        for d in set(dirs) - self.dirs:
+            if self.libc.inotify_add_watch(self.fd, os.fsencode(d), self.MASK) >= 0:
+                self.dirs.add(d)
+
+    def _drain(self):
+        try:
+            while os.read(self.fd, 64 * 1024):
+                pass
+        except BlockingIOError:
+            pass
+
+    def wait(self, timeout=None):
+        """True once a change arrived, after DEBOUNCE seconds without further changes."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return False
+        while select.select([self.fd], [], [], 0)[0] or select.select([self.fd], [], [], DEBOUNCE)[0]:
+            self._drain()
+        return True
+
+
+class PollingWatcher:
+    """Same interface as InotifyWatcher; compares directory listings every POLL_INTERVAL seconds."""
+
+    def __init__(self):
+        self.dirs = set()
+        self.snapshot = {}
+
+    def watch(self, dirs):
+        self.dirs = set(dirs)
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        state = {}
+        for d in self.dirs:
+            try:
+                with os.scandir(d) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            st = entry.stat()
+                            state[entry.path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                pass
+        return state
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while deadline is None or time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            current = self._scan()
+            if current != self.snapshot:
+                while True:  # Debounce: wait until the listing stops changing
+                    time.sleep(DEBOUNCE)
+                    settled = self._scan()
+                    if settled == current:
+                        break
+                    current = settled
+                self.snapshot = current
+                return True
+        return False
+
+
+def watch(db, targets, jobs, use_polling=False):
+    watcher = None
+    if not use_polling and sys.platform.startswith("linux"):
+        try:
+            watcher = InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            print(f"  WARNING: inotify unavailable ({e}); polling every {POLL_INTERVAL}s.")
+    watcher = watcher or PollingWatcher()
+    print(f"--- Watching ({'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'}); Ctrl+C to stop ---")
+    try:
+        while True:
+            watcher.watch(watched_dirs(plan()))
+            watcher.wait()
+            build(db, targets, jobs, quiet=True)
+    except KeyboardInterrupt:
+        print("--- Stopped watching ---")
+    return 0
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally rebuild generated assets (registry, sidecars, pose conversions, bundles).")
+    parser.add_argument("targets", nargs="*", help="Node ids or id prefixes to build, with their upstream nodes (default: everything).")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 4, help="Parallel jobs (default: CPU count).")
+    parser.add_argument("--force", action="store_true", help="Rebuild the selected nodes even if they are up to date.")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Only list what is stale.")
+    parser.add_argument("--list", action="store_true", help="Print the graph (inputs, outputs, dependencies) and exit.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Also list up-to-date nodes.")
+    parser.add_argument("--watch", action="store_true", help="After building, rebuild whenever an input changes.")
+    parser.add_argument("--poll", action="store_true", help="With --watch: poll instead of using inotify.")
+    args = parser.parse_args(argv)
+
+    db = BuildDB()
+    if args.list:
+        nodes = plan()
+        if args.targets:
+            nodes = select_targets(nodes, args.targets)
+        for node in nodes.values():
+            print(f"{node.id}{'  [' + node.unavailable + ']' if node.unavailable else ''}")
+            print(f"    after:   {', '.join(sorted(node.deps)) or '-'}")
+            print(f"    inputs:  {len(node.inputs)} file(s)")
+            for output in node.outputs:
+                print(f"    output:  {rel(output)}")
+        return 0
+
+    _, failed = build(db, args.targets, args.jobs, args.force, args.dry_run, args.verbose)
+    if args.watch and not args.dry_run:
+        return watch(db, args.targets, args.jobs, args.poll)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
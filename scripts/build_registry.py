@@ -0,0 +1,210 @@
+# START OF FILE: build_registry.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# Generates js/registry.json, the manifest the app builds its shape/model list
+# from at startup:
+#   shapes  - one entry per `create*` export in js/shapes/*.js: shape key,
+#             label, category (dropdown group), module path and export name;
+#             js/shape_registry.js import()s only the chosen shape's module
+#   modules - byte size and sha256 of each shape module
+#   models  - every models/*.glb with label, size, sha256, bone count and
+#             whether it is poseable (has a skin); replaces the hand-kept
+#             POSEABLE_MODELS list and drives the next-model prefetch hints
+#
+# Shape keys are derived from export names (createPersonSuperheroPoseGroup ->
+# person_superhero_pose); KEY_OVERRIDES / LABEL_OVERRIDES keep the keys saved
+# scenes and the shape pack already use. Rerun after adding a shape export or
+# a model; --check exits with status 1 when the manifest is out of date.
+#
+# Usage:  python scripts/build_registry.py [--check] [-o js/registry.json]
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+
+from glb_utils import MODELS_DIR, REGISTRY_PATH, REPO_ROOT, list_model_files, load_glb, repo_relative
+
+# --- Configuration ---
+REGISTRY_VERSION = 1  # REGISTRY_VERSION in js/shape_registry.js
+SHAPES_DIR = os.path.join(REPO_ROOT, "js", "shapes")
+# Dropdown groups in display order; modules not listed get a title-cased group after these.
+MODULE_CATEGORIES = {
+    "primitives.js": "Primitives",
+    "variations.js": "Variations",
+    "combinations_basic.js": "Basic Combinations",
+    "combinations_separated.js": "Separated Combinations",
+    "rings_arrays.js": "Rings & Arrays",
+    "figures_static.js": "Static Figures",
+    "figures_dynamic_people.js": "Dynamic People",
+    "figures_dynamic_animals.js": "Dynamic Animals",
+    "objects.js": "Objects",
+    "abstract.js": "Abstract",
+    "wireframes.js": "Wireframes",
+}
+POSEABLE_CATEGORY = "Poseable Models"
+MODEL_CATEGORY = "Models"
+# Exports whose derived key differs from the key already in use.
+KEY_OVERRIDES = {
+    "createLowPolySphereGeometry": "lowpoly_sphere",
+    "createBearWalking4LegsGroup": "bear_walking_4legs",
+    "createIcosahedronInSphereBase": "wireframe_icosahedron_in_sphere",
+}
+# Labels (by shape key or model path) that title-casing the key doesn't produce.
+LABEL_OVERRIDES = {
+    "lowpoly_sphere": "Low-Poly Sphere",
+    "three_spheres_line": "3 Spheres (Line)",
+    "three_cubes_line": "3 Cubes (Line)",
+    "three_spheres_triangle": "3 Spheres (Triangle)",
+    "three_cubes_triangle": "3 Cubes (Triangle)",
+    "intersecting_cube_sphere": "Intersecting Cube/Sphere",
+    "sphere_cube_apart": "Sphere & Cube Apart",
+    "cube_grid_flat": "Cube Grid (Flat)",
+    "sphere_grid_flat": "Sphere Grid (Flat)",
+    "person_box": "Person (Boxes)",
+    "person_spheres": "Person (Spheres)",
+    "person_mixed": "Person (Mixed)",
+    "bear_walking_4legs": "Bear Walking (4 Legs)",
+    "table_chair": "Table & Chair",
+    "saturn_like": "Saturn-Like",
+    "models/femalebase0.glb": "Female Base 0 (A-Pose)",
+    "models/malebase0.glb": "Male Base 0 (A-Pose)",
+    "models/male_base2.glb": "Male Base 2",
+}
+SMALL_WORDS = {"on", "of", "with", "in", "and", "the"}
+
+_EXPORT_PATTERN = re.compile(r"^export\s+(?:async\s+)?(?:function\s+(\w+)|const\s+(\w+)\s*=)", re.M)
+_CREATOR_AFFIXES = re.compile(r"^create|(?:Geometry|Group|Base)$")
+_WORD_BOUNDARY = re.compile(r"(?<=[a-z])(?=[A-Z0-9])|(?<=[0-9])(?=[A-Z])")
+
+
+# --- Helper Functions ---
+def file_digest(path):
+    """(byte size, sha256 hex) of a file, read in 1 MB blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return os.path.getsize(path), h.hexdigest()
+
+
+def shape_key(export_name):
+    """createPersonSuperheroPoseGroup -> person_superhero_pose (unless overridden)."""
+    if export_name in KEY_OVERRIDES:
+        return KEY_OVERRIDES[export_name]
+    return _WORD_BOUNDARY.sub("_", _CREATOR_AFFIXES.sub("", export_name)).lower()
+
+
+def label_for(key):
+    """Dropdown label: LABEL_OVERRIDES, else the title-cased key/file stem."""
+    if key in LABEL_OVERRIDES:
+        return LABEL_OVERRIDES[key]
+    words = os.path.splitext(os.path.basename(key))[0].split("_")
+    return " ".join(w if i and w in SMALL_WORDS else w.capitalize() for i, w in enumerate(words))
+
+
+def module_exports(path):
+    """Names exported by a shape module, in source order."""
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    return [m.group(1) or m.group(2) for m in _EXPORT_PATTERN.finditer(source)]
+
+
+def module_order(path):
+    name = os.path.basename(path)
+    order = list(MODULE_CATEGORIES)
+    return (order.index(name) if name in order else len(order), name)
+
+
+# --- Scanning ---
+def scan_shapes(shapes_dir=SHAPES_DIR):
+    """Returns (modules, shapes, duplicate keys) for every create* export under js/shapes/."""
+    modules, shapes, seen, duplicates = {}, [], {}, []
+    for path in sorted(glob.glob(os.path.join(shapes_dir, "*.js")), key=module_order):
+        module = repo_relative(path).replace("\\", "/")
+        name = os.path.basename(path)
+        category = MODULE_CATEGORIES.get(name, label_for(name))
+        size, digest = file_digest(path)
+        modules[module] = {"bytes": size, "hash": digest, "category": category}
+        for export in module_exports(path):
+            if not export.startswith("create"):
+                continue  # helpers such as applyWireframeMaterial
+            key = shape_key(export)
+            if key in seen:
+                duplicates.append(f"'{key}' from {module}:{export} and {seen[key]}")
+                continue
+            seen[key] = f"{module}:{export}"
+            shapes.append({"key": key, "label": label_for(key), "category": category, "module": module, "export": export})
+    return modules, shapes, duplicates
+
+
+def model_files(models_dir=MODELS_DIR):
+    """models/*.glb that belong in the dropdown (geometry packs from pack_shapes.py have a sibling .index.json)."""
+    return [p for p in list_model_files(models_dir) if not os.path.exists(os.path.splitext(p)[0] + ".index.json")]
+
+
+def scan_models(models_dir=MODELS_DIR):
+    """Returns an entry per model file; poseable models (with a skin) first, like the old dropdown."""
+    models = []
+    for path in model_files(models_dir):
+        model = repo_relative(path).replace("\\", "/")
+        size, digest = file_digest(path)
+        try:
+            gltf = load_glb(path).gltf
+        except (OSError, ValueError) as e:
+            print(f"  WARNING: Skipping '{model}': {e}")
+            continue
+        skins = gltf.get("skins", [])
+        poseable = bool(skins)
+        models.append({"path": model, "label": label_for(model), "category": POSEABLE_CATEGORY if poseable else MODEL_CATEGORY,
+                       "bytes": size, "hash": digest, "poseable": poseable,
+                       "bones": len(skins[0].get("joints", [])) if skins else 0})
+    models.sort(key=lambda m: not m["poseable"])
+    return models
+
+
+def build_registry():
+    modules, shapes, duplicates = scan_shapes()
+    return {"version": REGISTRY_VERSION, "models": scan_models(), "modules": modules, "shapes": shapes}, duplicates
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate js/registry.json from js/shapes/*.js exports and models/*.glb.")
+    parser.add_argument("-o", "--output", default=REGISTRY_PATH, help="Manifest path (default: js/registry.json).")
+    parser.add_argument("--check", action="store_true", help="Don't write; exit with status 1 if the manifest is missing or stale.")
+    args = parser.parse_args(argv)
+
+    registry, duplicates = build_registry()
+    for duplicate in duplicates:
+        print(f"ERROR: Duplicate shape key {duplicate}. Add a KEY_OVERRIDES entry.")
+    if duplicates:
+        return 1
+    text = json.dumps(registry, indent=1) + "\n"
+
+    if args.check:
+        try:
+            with open(args.output, "r", encoding="utf-8") as f:
+                current = f.read()
+        except OSError:
+            current = None
+        if current != text:
+            print(f"'{repo_relative(args.output)}' is out of date; run scripts/build_registry.py.")
+            return 1
+        print(f"'{repo_relative(args.output)}' is up to date.")
+        return 0
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(text)
+    poseable = sum(1 for m in registry["models"] if m["poseable"])
+    print(f"--- Registry: {len(registry['shapes'])} shapes from {len(registry['modules'])} modules, "
+          f"{len(registry['models'])} models ({poseable} poseable) -> '{repo_relative(args.output)}' ---")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
@@ -0,0 +1,189 @@
+# START OF FILE: build_skeleton_sidecars.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# For every poseable GLB, writes a skeleton sidecar next to the model:
+#   models/<name>.skeleton.json  - ordered bone names, friendly names, groups
+#                                  resolved to bone indices, stable hash
+#   models/<name>.skeleton.bin   - rest TRS as packed float32 (10 floats per
+#                                  bone: tx ty tz, qx qy qz qw, sx sy sz)
+#                                  followed by int32 parent indices
+#
+# Bone order is Three.js traversal order (the order processLoadedGltf() pushes
+# into initialBoneState), so the web app can fetch the .bin once and read
+# rest state / bone lookups as typed arrays instead of traversing the scene.
+#
+# Also cross-checks js/bone_mappings.json and flags models whose skeletons
+# have drifted from their mapping entries (or whose files don't exist).
+#
+# Usage:  python scripts/build_skeleton_sidecars.py [--check] [--report out.json]
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from glb_utils import (MODELS_DIR, REPO_ROOT, list_model_files, load_bone_mappings,
+                       load_skeleton, read_poseable_models, repo_relative)
+
+# --- Configuration ---
+SIDECAR_FORMAT = "shadow-room-skeleton/1"
+REST_STRIDE = 10  # floats per bone in the rest block
+
+
+# --- Helper Functions ---
+def skeleton_hash(skeleton):
+    """Stable hash of bone order + hierarchy; changes whenever a bone index would change."""
+    h = hashlib.sha1()
+    for name, parent in zip(skeleton.names, skeleton.parents.tolist()):
+        h.update(f"{name}\t{parent}\n".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def resolve_mapping(skeleton, mapping):
+    """Resolves a bone_mappings.json entry to bone indices. Returns (friendly, groups, drift)."""
+    friendly = [None] * len(skeleton)
+    groups = {}
+    missing = []
+    for bone_name, info in (mapping or {}).items():
+        index = skeleton.index.get(bone_name)
+        if index is None:
+            missing.append(bone_name)
+            continue
+        friendly[index] = info.get("friendlyName", bone_name)
+        group = info.get("group", "Other")
+        sub_group = info.get("subGroup")
+        groups.setdefault(group, {"bones": [], "subGroups": {}})
+        groups[group]["bones"].append(index)
+        if sub_group:
+            groups[group]["subGroups"].setdefault(sub_group, []).append(index)
+
+    unmapped = [name for name in skeleton.names if mapping and name not in mapping]
+    drift = {"missingInSkeleton": missing, "unmappedBones": unmapped}
+    return friendly, groups, drift
+
+
+def write_sidecar(model_path, skeleton, mapping):
+    """Writes <model>.skeleton.json / .bin and returns the JSON metadata dict."""
+    base = os.path.splitext(model_path)[0]
+    json_path = base + ".skeleton.json"
+    bin_path = base + ".skeleton.bin"
+
+    rest = skeleton.rest.astype("<f4")
+    parents = skeleton.parents.astype("<i4")
+    rest_bytes = rest.tobytes()
+    with open(bin_path, "wb") as f:
+        f.write(rest_bytes)
+        f.write(parents.tobytes())
+
+    friendly, groups, drift = resolve_mapping(skeleton, mapping)
+    meta = {
+        "format": SIDECAR_FORMAT,
+        "model": repo_relative(model_path),
+        "boneCount": len(skeleton),
+        "hash": skeleton_hash(skeleton),
+        "bones": skeleton.names,
+        "friendlyNames": friendly,
+        "groups": groups,
+        "binary": {
+            "uri": os.path.basename(bin_path),
+            "byteLength": len(rest_bytes) + parents.nbytes,
+            "rest": {"byteOffset": 0, "componentType": "float32", "stride": REST_STRIDE,
+                     "layout": ["tx", "ty", "tz", "qx", "qy", "qz", "qw", "sx", "sy", "sz"]},
+            "parents": {"byteOffset": len(rest_bytes), "componentType": "int32"},
+        },
+        "mappingDrift": drift if mapping else None,
+    }
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+# --- Main ---
+def build_sidecars(models, mappings):
+    """Builds sidecars for `models` (repo-relative paths) and returns a drift report dict."""
+    report = {"models": {}, "mappingOnly": [], "drifted": []}
+
+    for model in models:
+        model_path = os.path.join(REPO_ROOT, model)
+        mapping = mappings.get(model)
+        if not os.path.exists(model_path):
+            print(f"  MISSING: '{model}' does not exist.")
+            report["models"][model] = {"status": "missing-file", "hasMapping": mapping is not None}
+            report["drifted"].append(model)
+            continue
+        try:
+            skeleton = load_skeleton(model_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"  ERROR reading '{model}': {e}")
+            report["models"][model] = {"status": "error", "error": str(e)}
+            continue
+        if len(skeleton) == 0:
+            print(f"  Skipping '{model}': no skinned skeleton.")
+            report["models"][model] = {"status": "no-skeleton"}
+            continue
+
+        meta = write_sidecar(model_path, skeleton, mapping)
+        entry = {"status": "ok", "boneCount": meta["boneCount"], "hash": meta["hash"],
+                 "hasMapping": mapping is not None}
+        drift = meta["mappingDrift"]
+        if mapping is None:
+            print(f"  WARNING: '{model}' has no entry in bone_mappings.json.")
+        elif drift["missingInSkeleton"]:
+            entry["status"] = "drifted"
+            entry["missingInSkeleton"] = drift["missingInSkeleton"]
+            report["drifted"].append(model)
+            print(f"  DRIFT: {len(drift['missingInSkeleton'])} mapped bone(s) not in '{model}': "
+                  f"{', '.join(drift['missingInSkeleton'][:8])}{' ...' if len(drift['missingInSkeleton']) > 8 else ''}")
+        if mapping is not None:
+            entry["unmappedBones"] = len(drift["unmappedBones"])
+        report["models"][model] = entry
+        print(f"  Wrote sidecar for '{model}': {meta['boneCount']} bones, hash {meta['hash']}")
+
+    for model in sorted(mappings):
+        if model in report["models"]:
+            continue
+        exists = os.path.exists(os.path.join(REPO_ROOT, model))
+        report["mappingOnly"].append(model)
+        if not exists:
+            report["drifted"].append(model)
+            print(f"  DRIFT: bone_mappings.json has an entry for '{model}', which doesn't exist.")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build skeleton sidecars for poseable GLB models.")
+    parser.add_argument("models", nargs="*", help="Model paths relative to the repo root "
+                        "(default: poseable models from js/registry.json plus any mapped GLB in models/).")
+    parser.add_argument("--report", help="Write the drift report as JSON to this path.")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if any drift was found.")
+    args = parser.parse_args(argv)
+
+    mappings = load_bone_mappings()
+    models = args.models
+    if not models:
+        models = read_poseable_models()
+        on_disk = [repo_relative(p) for p in list_model_files(MODELS_DIR)]
+        models += [m for m in on_disk if m in mappings and m not in models]
+
+    print(f"--- Building skeleton sidecars for {len(models)} model(s) ---")
+    report = build_sidecars(models, mappings)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Drift report saved: '{args.report}'")
+
+    print("\n--- Sidecar Summary ---")
+    print(f"Models processed: {sum(1 for e in report['models'].values() if e['status'] in ('ok', 'drifted'))}")
+    print(f"Drifted / missing: {len(set(report['drifted']))}")
+    if args.check and report["drifted"]:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
@@ -0,0 +1,137 @@
+# START OF FILE: compact_pose_journal.py
+# Offline tool (plain Python, no Blender needed).
+#
+# Turns the NDJSON journal written by extract_applied_poses.py
+# (poses/extraction_journal.ndjson) into the final pose files and the
+# per-gender manifest.json files in one streaming pass, e.g. after Blender
+# crashed before the extractor reached its manifest step. Records are read
+# line by line and never held all at once; when an action was journaled more
+# than once (resumed runs), the last record wins. A torn last line from an
+# interrupted write is skipped. Each file is encoded in the record's
+# pose_writer.py format (older records: by extension, .json pretty JSON and
+# .posebin binary), so it comes out byte-identical to what the extractor wrote.
+#
+# Usage:  python scripts/compact_pose_journal.py [journal] [--verify]
+#             [--rewrite-journal] [--root DIR]
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+from glb_utils import REPO_ROOT, repo_relative
+from pose_utils import POSES_DIR, write_manifest
+from pose_writer import FORMATS, encode_pose, pose_extension
+
+# --- Configuration ---
+DEFAULT_JOURNAL = os.path.join(POSES_DIR, "extraction_journal.ndjson")
+FORMAT_BY_EXTENSION = {".json": "pretty", ".posebin": "binary"}
+
+
+# --- Helper Functions ---
+def pose_payload_hash(pose_data):
+    """Same hash as extract_applied_poses.py (SHA-1 of the compact JSON payload)."""
+    return hashlib.sha1(json.dumps(pose_data, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def encode_record(record):
+    """The bytes a record's pose file should hold, or None if its format doesn't match the file's extension."""
+    extension = os.path.splitext(record["file"])[1].lower()
+    fmt = record.get("format", FORMAT_BY_EXTENSION.get(extension))
+    if fmt not in FORMATS or pose_extension(fmt) != extension:
+        return None
+    payload = encode_pose(record["pose"], fmt)
+    return payload if isinstance(payload, bytes) else payload.encode("utf-8")
+
+
+def iter_journal(path):
+    """Yields (line_no, record) for every valid journal record; reports unreadable lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"  WARNING: Skipping unreadable journal line {line_no} (interrupted write?).")
+                continue
+            if not (isinstance(record, dict) and record.get("action") and record.get("file")
+                    and isinstance(record.get("pose"), list)):
+                print(f"  WARNING: Skipping malformed journal record on line {line_no}.")
+                continue
+            yield line_no, record
+
+
+def compact(journal_path, root=REPO_ROOT, verify=False):
+    """Streams the journal into pose files + manifests. Returns (stats, winning line numbers)."""
+    manifests = {}   # manifest dir -> {poseName: relativePath}
+    last_line = {}   # action -> line of its winning record (for --rewrite-journal)
+    stats = {"records": 0, "written": 0, "superseded": 0, "hashMismatches": 0, "unsupported": 0}
+    for line_no, record in iter_journal(journal_path):
+        stats["records"] += 1
+        payload = encode_record(record)
+        if payload is None:
+            print(f"  WARNING: Unsupported pose file type '{record['file']}' for '{record['action']}' (line {line_no}); skipped.")
+            stats["unsupported"] += 1
+            continue
+        if verify and ((record.get("hash") and pose_payload_hash(record["pose"]) != record["hash"])
+                       or (record.get("fileHash") and hashlib.sha1(payload).hexdigest() != record["fileHash"])):
+            print(f"  WARNING: Hash mismatch for '{record['action']}' (line {line_no}); skipped.")
+            stats["hashMismatches"] += 1
+            continue
+        if record["action"] in last_line:
+            stats["superseded"] += 1
+        last_line[record["action"]] = line_no
+        path = os.path.join(root, record["file"])
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(payload)
+        manifests.setdefault(os.path.dirname(path), {})[record["action"]] = record["file"]
+        stats["written"] += 1
+
+    for manifest_dir, entries in sorted(manifests.items()):
+        write_manifest(os.path.join(manifest_dir, "manifest.json"), entries)
+        print(f"  Manifest saved: '{repo_relative(os.path.join(manifest_dir, 'manifest.json'))}' ({len(entries)} poses)")
+    stats["poses"] = len(last_line)
+    return stats, set(last_line.values())
+
+
+def rewrite_journal(journal_path, keep_lines):
+    """Rewrites the journal with only the winning record per action (atomic replace)."""
+    tmp_path = journal_path + ".tmp"
+    with open(journal_path, "r", encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as dst:
+        for line_no, line in enumerate(src, 1):
+            if line_no in keep_lines:
+                dst.write(line if line.endswith("\n") else line + "\n")
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.replace(tmp_path, journal_path)
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact an extraction journal into pose files and manifests.")
+    parser.add_argument("journal", nargs="?", default=DEFAULT_JOURNAL, help="Journal path (default: poses/extraction_journal.ndjson).")
+    parser.add_argument("--root", default=REPO_ROOT, help="Directory the journal's 'file' paths are relative to (default: repo root).")
+    parser.add_argument("--verify", action="store_true", help="Check each record's payload and file hashes; skip mismatches.")
+    parser.add_argument("--rewrite-journal", action="store_true", help="Drop superseded records from the journal afterwards.")
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.journal):
+        print(f"ERROR: Journal not found: '{args.journal}'")
+        return 1
+    print(f"--- Compacting '{args.journal}' ---")
+    stats, keep_lines = compact(args.journal, args.root, args.verify)
+    if args.rewrite_journal and stats["superseded"]:
+        rewrite_journal(args.journal, keep_lines)
+        print(f"  Journal rewritten with {len(keep_lines)} record(s).")
+    print(f"  Records: {stats['records']}, poses: {stats['poses']}, superseded: {stats['superseded']}, "
+          f"hash mismatches: {stats['hashMismatches']}, unsupported: {stats['unsupported']}")
+    return 0 if stats["poses"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
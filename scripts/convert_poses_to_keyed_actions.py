@@ -1,6 +1,9 @@
 # START OF FILE: convert_poses_to_keyed_actions.py (v10.1 - Corrected Names)
 import bpy
+import os
 import re
+import sys
+from contextlib import nullcontext
 
 print("\n--- Starting Pose Conversion Script (v10.1) ---")
 
@@ -10,8 +13,32 @@ FEMALE_ARMATURE_NAME = "metarig.001" # Or the specific name of the female rig ob
 MALE_ARMATURE_NAME = "metarig.002"     # Or the specific name of the male rig object
 NLA_TRACK_NAME = "Pose Actions"      # Name for the NLA track to store poses
 ACTION_PREFIX = "Pose_"               # Prefix for the newly created single-frame actions
+QUIET = False                         # True: no per-action prints (errors/warnings still show) - console output is slow
+PROFILE_TRACE_PATH = os.path.join(os.path.dirname(bpy.data.filepath), "convert_poses_to_keyed_actions.trace.json") # None to skip
+log = print                           # Per-action output; replaced by the profiler's QUIET-aware logger below
 
 # --- Helper Functions ---
+class NullProfiler:
+    """Stand-in when scripts/phase_profiler.py isn't importable: no timings, plain prints."""
+    log = staticmethod(print)
+    def phase(self, name): return nullcontext()
+    def next_action(self, label): pass
+    def end_action(self): pass
+    def finish(self): pass
+
+def load_profiler():
+    """Creates a PhaseProfiler from scripts/phase_profiler.py (falls back to NullProfiler)."""
+    blend_dir = os.path.dirname(bpy.data.filepath)
+    for candidate in (os.path.join(blend_dir, "..", "scripts"), os.path.join(blend_dir, "scripts"), blend_dir):
+        candidate = os.path.abspath(candidate)
+        if os.path.isfile(os.path.join(candidate, "phase_profiler.py")) and candidate not in sys.path: sys.path.append(candidate)
+    try:
+        from phase_profiler import PhaseProfiler
+        return PhaseProfiler("convert_poses_to_keyed_actions", QUIET, PROFILE_TRACE_PATH)
+    except ImportError:
+        print("Warning: scripts/phase_profiler.py not found; no timing report.")
+        return NullProfiler()
+
 def get_armature(name):
     """Gets the armature object by name."""
     obj = bpy.data.objects.get(name)
@@ -34,9 +61,9 @@ def ensure_object_visible_and_selectable(obj):
     if not obj:
         return False
     try:
-        if obj.hide_get(): obj.hide_set(False); print(f"  Made object '{obj.name}' visible.")
-        if obj.hide_render: obj.hide_render = False; print(f"  Made object '{obj.name}' renderable.")
-        if obj.hide_select: obj.hide_select = False; print(f"  Made object '{obj.name}' selectable.")
+        if obj.hide_get(): obj.hide_set(False); log(f"  Made object '{obj.name}' visible.")
+        if obj.hide_render: obj.hide_render = False; log(f"  Made object '{obj.name}' renderable.")
+        if obj.hide_select: obj.hide_select = False; log(f"  Made object '{obj.name}' selectable.")
 
         for coll in bpy.data.collections:
             if obj.name in coll.objects:
@@ -50,19 +77,19 @@ def ensure_object_visible_and_selectable(obj):
                 if layer_collection:
                     current_lc = layer_collection
                     while current_lc:
-                        if current_lc.hide_viewport: current_lc.hide_viewport = False; print(f"  Made LayerColl '{current_lc.name}' visible.")
-                        if current_lc.exclude: current_lc.exclude = False; print(f"  Included LayerColl '{current_lc.name}'.")
+                        if current_lc.hide_viewport: current_lc.hide_viewport = False; log(f"  Made LayerColl '{current_lc.name}' visible.")
+                        if current_lc.exclude: current_lc.exclude = False; log(f"  Included LayerColl '{current_lc.name}'.")
                         current_lc = current_lc.parent
                 else:
-                     print(f"  Warning: Could not find Layer Collection for Collection '{coll.name}'. Visibility might be indirect.")
+                     log(f"  Warning: Could not find Layer Collection for Collection '{coll.name}'. Visibility might be indirect.")
 
 
         bpy.context.view_layer.update()
-        print(f"  Visibility/Selectability checks complete for '{obj.name}'.")
+        log(f"  Visibility/Selectability checks complete for '{obj.name}'.")
         return True
 
     except Exception as e:
-        print(f"Error ensuring visibility/selectability for {obj.name}: {e}")
+        log(f"Error ensuring visibility/selectability for {obj.name}: {e}")
         return False
 
 def process_armature(armature, gender_suffix):
@@ -70,10 +97,10 @@ def process_armature(armature, gender_suffix):
     if not armature:
         return
 
-    print(f"\nProcessing Armature: {armature.name} (Expected Gender: {gender_suffix})")
+    log(f"\nProcessing Armature: {armature.name} (Expected Gender: {gender_suffix})")
 
     if not ensure_object_visible_and_selectable(armature):
-         print(f"Skipping {armature.name} due to visibility/selectability issues.")
+         log(f"Skipping {armature.name} due to visibility/selectability issues.")
          return
 
     # Ensure armature is the active object and in Pose Mode
@@ -84,11 +111,11 @@ def process_armature(armature, gender_suffix):
         armature.select_set(True)
         bpy.context.view_layer.objects.active = armature
         bpy.ops.object.mode_set(mode='POSE')
-        print(f"  Switched {armature.name} to Pose Mode.")
+        log(f"  Switched {armature.name} to Pose Mode.")
     except RuntimeError as e:
-        print(f"  Error setting mode for {armature.name}: {e}. Attempting to continue...")
+        log(f"  Error setting mode for {armature.name}: {e}. Attempting to continue...")
         if bpy.context.object != armature or bpy.context.mode != 'POSE':
-            print(f"  FATAL: Could not switch {armature.name} to Pose Mode. Skipping.")
+            log(f"  FATAL: Could not switch {armature.name} to Pose Mode. Skipping.")
             bpy.ops.object.mode_set(mode='OBJECT') # Try to return to object mode
             return
 
@@ -100,9 +127,9 @@ def process_armature(armature, gender_suffix):
     nla_track = armature.animation_data.nla_tracks.get(NLA_TRACK_NAME)
     if not nla_track:
         nla_track = armature.animation_data.nla_tracks.new(name=NLA_TRACK_NAME)
-        print(f"  Created NLA track: '{NLA_TRACK_NAME}'")
+        log(f"  Created NLA track: '{NLA_TRACK_NAME}'")
     else:
-        print(f"  Found existing NLA track: '{NLA_TRACK_NAME}'")
+        log(f"  Found existing NLA track: '{NLA_TRACK_NAME}'")
         # Optional: Clear existing strips if you want to rebuild
         # strips_to_remove = [strip for strip in nla_track.strips]
         # for strip in strips_to_remove:
@@ -116,13 +143,14 @@ def process_armature(armature, gender_suffix):
         if action.name.endswith(f" {gender_suffix}") and not action.name.startswith(ACTION_PREFIX)
     ]
 
-    print(f"  Found {len(original_actions)} original actions ending with ' {gender_suffix}'.")
+    log(f"  Found {len(original_actions)} original actions ending with ' {gender_suffix}'.")
 
     processed_count = 0
     skipped_count = 0
 
     for original_action in original_actions:
-        print(f"\n  Processing Original Action: '{original_action.name}'")
+        profiler.next_action(original_action.name)
+        log(f"\n  Processing Original Action: '{original_action.name}'")
 
         # Generate the new action name
         new_action_name_base = clean_action_name(original_action.name)
@@ -135,16 +163,16 @@ def process_armature(armature, gender_suffix):
              strip_exists_for_action = any(strip.action == existing_pose_action for strip in nla_track.strips)
 
         if existing_pose_action and strip_exists_for_action:
-            print(f"    Skipping: Pose action '{new_action_name}' already exists AND is on NLA track.")
+            log(f"    Skipping: Pose action '{new_action_name}' already exists AND is on NLA track.")
             skipped_count += 1
             continue # Skip to the next original action
         elif existing_pose_action and not strip_exists_for_action:
-             print(f"    Pose action '{new_action_name}' exists but not on NLA track. Adding strip.")
+             log(f"    Pose action '{new_action_name}' exists but not on NLA track. Adding strip.")
              try:
                  nla_track.strips.new(name=new_action_name, start=1, action=existing_pose_action) # Adjust start frame if needed
-                 print(f"      Added existing action '{new_action_name}' to NLA track.")
+                 log(f"      Added existing action '{new_action_name}' to NLA track.")
              except Exception as e:
-                 print(f"      ERROR adding existing action strip for '{new_action_name}': {e}")
+                 log(f"      ERROR adding existing action strip for '{new_action_name}': {e}")
              skipped_count += 1 # Count as skipped creation, but added strip
              continue
 
@@ -155,25 +183,26 @@ def process_armature(armature, gender_suffix):
             current_action_backup = armature.animation_data.action
 
         try:
-            print(f"    Applying original action '{original_action.name}'...")
+            log(f"    Applying original action '{original_action.name}'...")
             # Ensure mode is correct
-            if bpy.context.mode != 'POSE':
-                bpy.ops.object.mode_set(mode='POSE')
-            if bpy.context.object != armature:
-                 bpy.ops.object.select_all(action='DESELECT')
-                 armature.select_set(True)
-                 bpy.context.view_layer.objects.active = armature
-                 bpy.ops.object.mode_set(mode='POSE')
+            with profiler.phase("mode_set"):
+                if bpy.context.mode != 'POSE':
+                    bpy.ops.object.mode_set(mode='POSE')
+                if bpy.context.object != armature:
+                     bpy.ops.object.select_all(action='DESELECT')
+                     armature.select_set(True)
+                     bpy.context.view_layer.objects.active = armature
+                     bpy.ops.object.mode_set(mode='POSE')
 
 
             # Assign the action temporarily to apply the pose
-            armature.animation_data.action = original_action
-            bpy.context.scene.frame_set(1) # Evaluate pose at frame 1
-            bpy.context.view_layer.update() # Ensure pose updates
-            print(f"    Pose applied from '{original_action.name}'.")
+            with profiler.phase("assign_action"): armature.animation_data.action = original_action
+            with profiler.phase("frame_set"): bpy.context.scene.frame_set(1) # Evaluate pose at frame 1
+            with profiler.phase("view_layer.update"): bpy.context.view_layer.update() # Ensure pose updates
+            log(f"    Pose applied from '{original_action.name}'.")
 
         except Exception as e:
-            print(f"    ERROR applying original action '{original_action.name}': {e}. Skipping.")
+            log(f"    ERROR applying original action '{original_action.name}': {e}. Skipping.")
             skipped_count += 1
             # Restore backup action
             if armature.animation_data:
@@ -182,23 +211,25 @@ def process_armature(armature, gender_suffix):
 
 
         # 2. Create the new single-frame action
-        print(f"    Creating new pose action: '{new_action_name}'")
-        new_action = bpy.data.actions.new(name=new_action_name)
-        # Assign it temporarily to the armature to receive keyframes
-        armature.animation_data.action = new_action
+        log(f"    Creating new pose action: '{new_action_name}'")
+        with profiler.phase("new_action"):
+            new_action = bpy.data.actions.new(name=new_action_name)
+            # Assign it temporarily to the armature to receive keyframes
+            armature.animation_data.action = new_action
 
 
         # 3. Keyframe ALL pose bones at frame 1
         keyframed_bones = 0
         try:
-            bpy.ops.pose.select_all(action='SELECT') # Select all pose bones
-            # Insert keyframe for Location, Rotation (Quaternion), and Scale AT FRAME 1
-            bpy.ops.anim.keyframe_insert_menu(type='LocRotScale', frame=1)
+            with profiler.phase("keyframe_insert"):
+                bpy.ops.pose.select_all(action='SELECT') # Select all pose bones
+                # Insert keyframe for Location, Rotation (Quaternion), and Scale AT FRAME 1
+                bpy.ops.anim.keyframe_insert_menu(type='LocRotScale', frame=1)
             keyframed_bones = len(bpy.context.selected_pose_bones)
-            print(f"    Inserted LocRotScale keyframe for {keyframed_bones} selected bones at frame 1 into '{new_action.name}'.")
+            log(f"    Inserted LocRotScale keyframe for {keyframed_bones} selected bones at frame 1 into '{new_action.name}'.")
 
         except Exception as e:
-            print(f"    ERROR keyframing pose for '{new_action_name}': {e}. Skipping.")
+            log(f"    ERROR keyframing pose for '{new_action_name}': {e}. Skipping.")
             # Clean up the potentially partially created action
             bpy.data.actions.remove(new_action)
             # Restore backup action
@@ -210,18 +241,19 @@ def process_armature(armature, gender_suffix):
         # 4. Add the new action as a strip to the NLA track
         try:
             # Make sure NLA track exists
-             if not armature.animation_data.nla_tracks.get(NLA_TRACK_NAME):
-                 nla_track = armature.animation_data.nla_tracks.new(name=NLA_TRACK_NAME)
-                 print(f"      Re-created NLA track: '{NLA_TRACK_NAME}' just in case.")
-             else:
-                 nla_track = armature.animation_data.nla_tracks.get(NLA_TRACK_NAME)
-
-            strip = nla_track.strips.new(name=new_action.name, start=1, action=new_action)
-            strip.frame_end = 2 # Ensure strip has a length of 1 frame visually
-            print(f"    Added action '{new_action.name}' to NLA track '{NLA_TRACK_NAME}'.")
+            if not armature.animation_data.nla_tracks.get(NLA_TRACK_NAME):
+                nla_track = armature.animation_data.nla_tracks.new(name=NLA_TRACK_NAME)
+                log(f"      Re-created NLA track: '{NLA_TRACK_NAME}' just in case.")
+            else:
+                nla_track = armature.animation_data.nla_tracks.get(NLA_TRACK_NAME)
+
+            with profiler.phase("nla_strip"):
+                strip = nla_track.strips.new(name=new_action.name, start=1, action=new_action)
+                strip.frame_end = 2 # Ensure strip has a length of 1 frame visually
+            log(f"    Added action '{new_action.name}' to NLA track '{NLA_TRACK_NAME}'.")
             processed_count += 1
         except Exception as e:
-             print(f"    ERROR adding strip for '{new_action.name}' to NLA: {e}. Action created but not added to NLA.")
+             log(f"    ERROR adding strip for '{new_action.name}' to NLA: {e}. Action created but not added to NLA.")
              skipped_count += 1
 
         # Restore backup action (or clear if none existed)
@@ -229,11 +261,14 @@ def process_armature(armature, gender_suffix):
             armature.animation_data.action = current_action_backup
 
 
+    profiler.end_action()
     print(f"\nFinished processing for {armature.name}.")
     print(f"  Successfully processed and added to NLA: {processed_count}")
     print(f"  Skipped/Existing/Error: {skipped_count}")
 
 # --- Main Execution ---
+profiler = load_profiler()
+log = profiler.log
 female_armature = get_armature(FEMALE_ARMATURE_NAME)
 male_armature = get_armature(MALE_ARMATURE_NAME)
 
@@ -295,6 +330,7 @@ else:
             print(f"  Error during state restoration: {e_restore}")
 
 
+    profiler.finish()
     print("\n--- Pose Conversion Script Finished ---")
 
 # END OF FILE
\ No newline at end of file
@@ -0,0 +1,57 @@
+import bpy
+import json
+import os
+
+print("\n--- Starting Rest Dump Export ---")
+
+# --- Configuration ---
+# Armature objects to dump; empty = every armature in the file
+ARMATURE_NAMES = ["Female", "Male"]
+# Written next to the extracted poses: poses/<armature>.rest.json (read by scripts/pose_space.py --rest-dump)
+OUTPUT_DIR = os.path.join(os.path.dirname(bpy.data.filepath), "..", "poses")
+
+# --- Helper Functions ---
+def rows(matrix):
+    """mathutils.Matrix -> row-major nested lists."""
+    return [list(row) for row in matrix]
+
+def bones_parents_first(armature_data):
+    """Rest bones ordered so every parent precedes its children (depth-first from the roots)."""
+    ordered = []
+    stack = [bone for bone in reversed(armature_data.bones) if bone.parent is None]
+    while stack:
+        bone = stack.pop()
+        ordered.append(bone)
+        stack.extend(reversed(bone.children))
+    return ordered
+
+def rest_dump(obj):
+    """Armature-space rest data for every bone of an armature object."""
+    bones = []
+    for bone in bones_parents_first(obj.data):
+        bones.append({
+            "name": bone.name,
+            "parent": bone.parent.name if bone.parent else None,
+            "head": list(bone.head_local),
+            "tail": list(bone.tail_local),
+            "matrix_local": rows(bone.matrix_local), # includes the bone roll
+        })
+    return {"armature": obj.name, "up": "Z", "matrix_world": rows(obj.matrix_world), "bones": bones}
+
+# --- Main ---
+armatures = [obj for obj in bpy.data.objects if obj.type == 'ARMATURE' and (not ARMATURE_NAMES or obj.name in ARMATURE_NAMES)]
+if not armatures:
+    print(f"ERROR: No armature objects found (looked for: {ARMATURE_NAMES or 'any'}).")
+else:
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for obj in armatures:
+        dump = rest_dump(obj)
+        path = os.path.abspath(os.path.join(OUTPUT_DIR, f"{obj.name}.rest.json"))
+        try:
+            with open(path, 'w') as f:
+                json.dump(dump, f, indent=2)
+            print(f"Saved rest dump for '{obj.name}' ({len(dump['bones'])} bones): {path}")
+        except Exception as e:
+            print(f"ERROR writing '{path}': {e}")
+
+print("--- Script Finished ---")
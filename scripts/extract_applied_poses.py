@@ -1,6 +1,10 @@
 import bpy
+import hashlib
 import json
 import os
+import sys
+import threading
+from contextlib import nullcontext
 import mathutils # Keep for potential future use
 
 print("--- Starting Pose Extraction Script (v6) ---")
@@ -10,9 +14,48 @@ OUTPUT_DIR_BASE = os.path.join(os.path.dirname(bpy.data.filepath), "..", "poses"
 FEMALE_ARMATURE_NAME = "Female"
 MALE_ARMATURE_NAME = "Male"
 FLOAT_TOLERANCE = 1e-5
+JOURNAL_PATH = os.path.join(OUTPUT_DIR_BASE, "extraction_journal.ndjson") # One NDJSON record per extracted pose
+JOURNAL_FSYNC_EVERY = 20 # Poses between fsyncs; a crash loses at most this many journal records
+RESUME = False # True: skip actions already in the journal whose file is intact (after a crash) instead of starting over
+WRITER_THREADS = 2 # Background pose-file writer threads (scripts/pose_writer.py); 0 = write on the main thread
+WRITER_QUEUE_SIZE = 32 # Poses that may wait for a writer before the loop blocks
+OUTPUT_FORMAT = "pretty" # "pretty" (indent=2), "compact" or "binary" (.posebin)
+QUIET = False # True: no per-action prints (errors/warnings still show) - console output is slow inside Blender
+PROFILE_TRACE_PATH = os.path.join(OUTPUT_DIR_BASE, "extract_applied_poses.trace.json") # Chrome/Perfetto trace; None to skip
+log = print # Per-action output; replaced by the profiler's QUIET-aware logger once it is loaded
 
 # --- Helper Functions ---
 
+def add_scripts_dir_to_path():
+    """Makes the repo's scripts/ folder (pose_writer.py, phase_profiler.py) importable inside Blender."""
+    blend_dir = os.path.dirname(bpy.data.filepath)
+    for candidate in (os.path.join(blend_dir, "..", "scripts"), os.path.join(blend_dir, "scripts"), blend_dir):
+        candidate = os.path.abspath(candidate)
+        if os.path.isfile(os.path.join(candidate, "pose_writer.py")) and candidate not in sys.path: sys.path.append(candidate)
+
+def load_pose_writer(profiler=None):
+    """Creates a PoseWriter from scripts/pose_writer.py, or returns None (synchronous json.dump) if it isn't found."""
+    try:
+        from pose_writer import PoseWriter
+        return PoseWriter(WRITER_THREADS, WRITER_QUEUE_SIZE, OUTPUT_FORMAT, profiler=profiler)
+    except ImportError:
+        print("WARNING: scripts/pose_writer.py not found; writing pose JSON synchronously."); return None
+
+class NullProfiler:
+    """Stand-in when scripts/phase_profiler.py isn't importable: no timings, plain prints."""
+    log = staticmethod(print)
+    def phase(self, name): return nullcontext()
+    def next_action(self, label): pass
+    def finish(self): pass
+
+def load_profiler():
+    """Creates a PhaseProfiler from scripts/phase_profiler.py (falls back to NullProfiler)."""
+    try:
+        from phase_profiler import PhaseProfiler
+        return PhaseProfiler("extract_applied_poses", QUIET, PROFILE_TRACE_PATH)
+    except ImportError:
+        print("WARNING: scripts/phase_profiler.py not found; no timing report."); return NullProfiler()
+
 def ensure_object_mode():
     """Ensures Blender is in Object Mode."""
     if bpy.context.object and bpy.context.object.mode != 'OBJECT':
@@ -20,7 +63,76 @@ def ensure_object_mode():
             bpy.ops.object.mode_set(mode='OBJECT')
         except RuntimeError as e:
             if "context is incorrect" not in str(e):
-                 print(f"    WARNING: Could not switch to Object Mode automatically: {e}. Might be okay.")
+                 log(f"    WARNING: Could not switch to Object Mode automatically: {e}. Might be okay.")
+
+
+# --- Extraction Journal ---
+# Every pose is also appended to JOURNAL_PATH once its file is written, so a crash halfway
+# through a big pack doesn't orphan the poses already done: re-run with
+# RESUME = True to only process the rest, or rebuild pose files + manifests
+# outside Blender with `python scripts/compact_pose_journal.py`.
+def pose_payload_hash(pose_json):
+    """Stable SHA-1 of a pose's transform payload, given as its compact JSON."""
+    return hashlib.sha1(pose_json.encode('utf-8')).hexdigest()
+
+def read_journal(path):
+    """Yields the valid records of a journal; a torn line from an interrupted write is skipped."""
+    if not os.path.exists(path): return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line: continue
+            try: record = json.loads(line)
+            except ValueError:
+                print(f"  WARNING: Ignoring unreadable journal line {line_no} (interrupted write?)."); continue
+            if isinstance(record, dict) and record.get('action') and isinstance(record.get('pose'), list): yield record
+
+def journaled_file_intact(record):
+    """True if a journal record's pose file is still on disk with the bytes that were journaled."""
+    path = os.path.join(OUTPUT_DIR_BASE, "..", record['file'])
+    if not record.get('fileHash') or not os.path.isfile(path): return False
+    with open(path, 'rb') as f: return hashlib.sha1(f.read()).hexdigest() == record['fileHash']
+
+class PoseJournal:
+    """Append-only NDJSON journal: flushed every record, fsynced every `fsync_every` records. Thread-safe."""
+    def __init__(self, path, fsync_every=JOURNAL_FSYNC_EVERY, resume=False):
+        self.path, self.fsync_every, self.pending = path, max(1, fsync_every), 0
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not resume and os.path.exists(path):
+            os.replace(path, path + ".bak"); print(f"Previous journal kept as '{path}.bak'.")
+        needs_newline = False
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END); needs_newline = f.read(1) != b"\n"
+        self.file = open(path, 'a', encoding='utf-8')
+        if needs_newline: self.file.write("\n") # Terminate a torn last line so the next record parses
+
+    def append(self, line):
+        """Appends one already-serialized record."""
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+            self.pending += 1
+            if self.pending >= self.fsync_every: self._sync()
+
+    def on_written(self, meta):
+        """PoseWriter callback: journals a pose only once its file is on disk (with the file's SHA-1)."""
+        def journal_pose(path, pose_data, digest):
+            pose_json = json.dumps(pose_data, separators=(',', ':')) # Serialized once: hashed and embedded as the record's "pose"
+            head = json.dumps(dict(meta, hash=pose_payload_hash(pose_json), fileHash=digest), separators=(',', ':'))
+            self.append(f'{head[:-1]},"pose":{pose_json}}}')
+        return journal_pose
+
+    def sync(self):
+        with self.lock: self._sync()
+
+    def _sync(self):
+        if self.pending:
+            os.fsync(self.file.fileno()); self.pending = 0
+
+    def close(self):
+        self.sync(); self.file.close()
 
 
 # --- === REVISED Collection Visibility Logic v6 === ---
@@ -34,11 +146,11 @@ def unhide_path_to_collection(layer_collection_root, target_collection):
         # Found the target collection's layer_collection. Unhide it.
         needs_update = False
         if layer_collection_root.hide_viewport:
-            print(f"    Unhiding Viewport: LayerCollection '{layer_collection_root.name}' (for Collection '{target_collection.name}')")
+            log(f"    Unhiding Viewport: LayerCollection '{layer_collection_root.name}' (for Collection '{target_collection.name}')")
             layer_collection_root.hide_viewport = False
             needs_update = True
         if layer_collection_root.exclude:
-            print(f"    Disabling Exclude: LayerCollection '{layer_collection_root.name}' (for Collection '{target_collection.name}')")
+            log(f"    Disabling Exclude: LayerCollection '{layer_collection_root.name}' (for Collection '{target_collection.name}')")
             layer_collection_root.exclude = False
             needs_update = True
         # if needs_update: print("    -> Path node unhidden.")
@@ -50,11 +162,11 @@ def unhide_path_to_collection(layer_collection_root, target_collection):
             # If target was found in a child, ensure this parent is also visible
             needs_update = False
             if layer_collection_root.hide_viewport:
-                print(f"    Unhiding Viewport Parent: LayerCollection '{layer_collection_root.name}'")
+                log(f"    Unhiding Viewport Parent: LayerCollection '{layer_collection_root.name}'")
                 layer_collection_root.hide_viewport = False
                 needs_update = True
             if layer_collection_root.exclude:
-                print(f"    Disabling Exclude Parent: LayerCollection '{layer_collection_root.name}'")
+                log(f"    Disabling Exclude Parent: LayerCollection '{layer_collection_root.name}'")
                 layer_collection_root.exclude = False
                 needs_update = True
             # if needs_update: print("    -> Path parent node unhidden.")
@@ -66,15 +178,15 @@ def unhide_path_to_collection(layer_collection_root, target_collection):
 def ensure_collection_visible(obj, view_layer):
     """Ensures the collection path containing the object is visible in the view layer."""
     if not obj or not view_layer:
-        print(f"    ERROR: Invalid input to ensure_collection_visible (obj: {obj}, view_layer: {view_layer})")
+        log(f"    ERROR: Invalid input to ensure_collection_visible (obj: {obj}, view_layer: {view_layer})")
         return False
     path_ensured = False
     try:
         if not obj.users_collection:
-             print(f"    INFO: Object '{obj.name}' is not linked to any collection. Assuming visible.")
+             log(f"    INFO: Object '{obj.name}' is not linked to any collection. Assuming visible.")
              return True
 
-        print(f"    Ensuring collection visibility path for '{obj.name}'...")
+        log(f"    Ensuring collection visibility path for '{obj.name}'...")
         # We need to ensure at least one collection path is visible
         for coll in obj.users_collection:
              if unhide_path_to_collection(view_layer.layer_collection, coll):
@@ -84,16 +196,16 @@ def ensure_collection_visible(obj, view_layer):
                   break # Found one visible path, that should be enough
              else:
                   # This collection wasn't found under the root view layer collection tree
-                  print(f"    INFO: Collection '{coll.name}' for object '{obj.name}' not found under root LayerCollection '{view_layer.layer_collection.name}'.")
+                  log(f"    INFO: Collection '{coll.name}' for object '{obj.name}' not found under root LayerCollection '{view_layer.layer_collection.name}'.")
 
         if not path_ensured:
-             print(f"    WARNING: Could not ensure any collection path was visible for '{obj.name}'.")
+             log(f"    WARNING: Could not ensure any collection path was visible for '{obj.name}'.")
              # Might still work if object is linked directly to scene collection and scene is visible
 
         return True # Return true, but rely on subsequent steps to fail if truly hidden
 
     except Exception as e:
-        print(f"    ERROR ensuring collection visibility for '{obj.name}': {e}")
+        log(f"    ERROR ensuring collection visibility for '{obj.name}': {e}")
         import traceback
         traceback.print_exc()
         return False
@@ -103,7 +215,7 @@ def ensure_collection_visible(obj, view_layer):
 def set_active_and_selected(obj):
     """Sets the object as active and selected, ensuring visibility of object and collection."""
     if not obj:
-        print("   ERROR: Object provided to set_active_and_selected is None.")
+        log("   ERROR: Object provided to set_active_and_selected is None.")
         return False
     try:
         ensure_object_mode()
@@ -111,41 +223,41 @@ def set_active_and_selected(obj):
 
         # 1. Ensure Collection Path is Visible FIRST
         if not ensure_collection_visible(obj, view_layer):
-             print(f"   WARNING: Failed attempting to ensure collection visibility for '{obj.name}'. Proceeding with caution.")
+             log(f"   WARNING: Failed attempting to ensure collection visibility for '{obj.name}'. Proceeding with caution.")
              # Don't abort yet, maybe object itself is the issue or it's linked differently
 
         # 2. Ensure Object is Visible/Selectable
         obj.hide_set(False)
         obj.hide_select = False
         obj.hide_render = False
-        print(f"    Set object '{obj.name}' visibility/selectability flags.")
+        log(f"    Set object '{obj.name}' visibility/selectability flags.")
 
         # 3. Deselect All and Select/Activate Object
         bpy.ops.object.select_all(action='DESELECT')
         try:
              obj.select_set(True)
-             print(f"    Set '{obj.name}' selected state.")
+             log(f"    Set '{obj.name}' selected state.")
         except Exception as e_sel:
              # This might fail if truly hidden despite checks
-             print(f"    ERROR during obj.select_set(True) for '{obj.name}': {e_sel}. Aborting.")
+             log(f"    ERROR during obj.select_set(True) for '{obj.name}': {e_sel}. Aborting.")
              return False
         try:
             if view_layer.objects.active != obj:
                  view_layer.objects.active = obj
-            print(f"    Set '{obj.name}' as active object for the view layer.")
+            log(f"    Set '{obj.name}' as active object for the view layer.")
         except Exception as e_act:
-             print(f"    ERROR setting '{obj.name}' as active object: {e_act}. Aborting.")
+             log(f"    ERROR setting '{obj.name}' as active object: {e_act}. Aborting.")
              return False
 
         # 4. Force View Layer Update (Crucial after visibility changes)
         view_layer.update()
         # bpy.context.evaluated_depsgraph_get().update() # Maybe not needed if view_layer.update() works
 
-        print(f"    Finished selection/activation attempt for '{obj.name}'.")
+        log(f"    Finished selection/activation attempt for '{obj.name}'.")
         return True
 
     except Exception as e:
-        print(f"    ERROR: Unexpected failure in set_active_and_selected for '{obj.name}': {e}")
+        log(f"    ERROR: Unexpected failure in set_active_and_selected for '{obj.name}': {e}")
         import traceback
         traceback.print_exc()
         return False
@@ -168,6 +280,18 @@ female_poses, male_poses = {}, {}
 processed_pose_names_female, processed_pose_names_male = set(), set()
 total_actions, asset_actions_count, processed_count = len(bpy.data.actions), 0, 0
 skipped_gender_count, skipped_duplicate_count, error_count = 0, 0, 0
+skipped_journaled_count = 0
+
+journaled_actions = {}
+if RESUME:
+    for record in read_journal(JOURNAL_PATH): journaled_actions[record['action']] = record
+    print(f"Resuming: {len(journaled_actions)} action(s) already journaled in '{JOURNAL_PATH}'.")
+journal = PoseJournal(JOURNAL_PATH, resume=RESUME)
+add_scripts_dir_to_path()
+profiler = load_profiler()
+log = profiler.log
+pose_writer = load_pose_writer(None if isinstance(profiler, NullProfiler) else profiler)
+pose_extension = pose_writer.extension if pose_writer else ".json"
 
 print(f"Scanning {total_actions} total actions...")
 
@@ -177,10 +301,11 @@ for i, action in enumerate(bpy.data.actions):
 
     asset_actions_count += 1
     action_name = action.name
+    profiler.next_action(action_name)
     action_name_clean_suffix = action_name.strip()
     action_name_lower = action_name_clean_suffix.lower()
 
-    print(f"\nProcessing Asset Action {asset_actions_count}: '{action_name}' ({i+1}/{total_actions})")
+    log(f"\nProcessing Asset Action {asset_actions_count}: '{action_name}' ({i+1}/{total_actions})")
 
     armature_obj, output_dir, pose_dict, processed_names_set = None, None, None, None
     gender, relative_dir_name = "Unknown", ""
@@ -192,88 +317,116 @@ for i, action in enumerate(bpy.data.actions):
     elif action_name_lower.endswith(' m'):
         armature_obj, output_dir, pose_dict, processed_names_set, gender, relative_dir_name = male_armature_obj, male_output_dir, male_poses, processed_pose_names_male, "Male", "male"
     elif "female" in action_name_lower or "woman" in action_name_lower:
-         armature_obj, output_dir, pose_dict, processed_names_set, gender, relative_dir_name = female_armature_obj, female_output_dir, female_poses, processed_pose_names_female, "Female (Keyword Match)", "female"; print(f"  INFO: Matched gender via keyword for '{action_name}'.")
+         armature_obj, output_dir, pose_dict, processed_names_set, gender, relative_dir_name = female_armature_obj, female_output_dir, female_poses, processed_pose_names_female, "Female (Keyword Match)", "female"; log(f"  INFO: Matched gender via keyword for '{action_name}'.")
     elif "male" in action_name_lower or "man" in action_name_lower:
-         armature_obj, output_dir, pose_dict, processed_names_set, gender, relative_dir_name = male_armature_obj, male_output_dir, male_poses, processed_pose_names_male, "Male (Keyword Match)", "male"; print(f"  INFO: Matched gender via keyword for '{action_name}'.")
+         armature_obj, output_dir, pose_dict, processed_names_set, gender, relative_dir_name = male_armature_obj, male_output_dir, male_poses, processed_pose_names_male, "Male (Keyword Match)", "male"; log(f"  INFO: Matched gender via keyword for '{action_name}'.")
     else:
-         print(f"  Skipping '{action_name}': Could not determine gender."); skipped_gender_count += 1; continue
+         log(f"  Skipping '{action_name}': Could not determine gender."); skipped_gender_count += 1; continue
 
     if not armature_obj:
-        print(f"  Skipping '{action_name}': Target {gender} armature object not found.");
+        log(f"  Skipping '{action_name}': Target {gender} armature object not found.");
         if gender != "Unknown": error_count += 1
         continue
 
     friendly_pose_name = action_name
     if friendly_pose_name in processed_names_set:
-        print(f"  Skipping '{friendly_pose_name}': Duplicate name."); skipped_duplicate_count += 1; continue
+        log(f"  Skipping '{friendly_pose_name}': Duplicate name."); skipped_duplicate_count += 1; continue
 
-    print(f"  Targeting {gender} Armature: '{armature_obj.name}'")
+    journaled = journaled_actions.get(action_name)
+    if journaled and journaled.get('gender') == relative_dir_name and not journaled_file_intact(journaled):
+        log(f"  Re-extracting '{friendly_pose_name}': Journaled file '{journaled['file']}' is missing or changed."); journaled = None
+    if journaled and journaled.get('gender') == relative_dir_name:
+        log(f"  Skipping '{friendly_pose_name}': Already journaled (resume).")
+        pose_dict[friendly_pose_name] = journaled['file']
+        processed_names_set.add(friendly_pose_name); skipped_journaled_count += 1; continue
+
+    log(f"  Targeting {gender} Armature: '{armature_obj.name}'")
 
     # --- Apply the Pose ---
     current_action_applied = False
     try:
-        ensure_object_mode()
-        if not set_active_and_selected(armature_obj):
-             print(f"  ERROR: Failed critical step to activate/select '{armature_obj.name}'. Skipping pose.")
+        with profiler.phase("select"):
+            ensure_object_mode()
+            selected = set_active_and_selected(armature_obj)
+        if not selected:
+             log(f"  ERROR: Failed critical step to activate/select '{armature_obj.name}'. Skipping pose.")
              error_count += 1
              continue
 
-        if not armature_obj.animation_data: armature_obj.animation_data_create()
-        armature_obj.animation_data.action = action
+        with profiler.phase("assign_action"):
+            if not armature_obj.animation_data: armature_obj.animation_data_create()
+            armature_obj.animation_data.action = action
         current_action_applied = True
 
-        bpy.context.scene.frame_set(1)
-        bpy.context.view_layer.update() # Update after setting action and frame
-        print(f"  Applied action '{action_name}' to '{armature_obj.name}' at frame 1.")
+        with profiler.phase("frame_set"): bpy.context.scene.frame_set(1)
+        with profiler.phase("view_layer.update"): bpy.context.view_layer.update() # Update after setting action and frame
+        log(f"  Applied action '{action_name}' to '{armature_obj.name}' at frame 1.")
 
-        print("  Attempting to switch to Pose Mode...")
-        bpy.ops.object.mode_set(mode='POSE')
-        print("  Successfully entered Pose Mode.")
+        log("  Attempting to switch to Pose Mode...")
+        with profiler.phase("mode_set"): bpy.ops.object.mode_set(mode='POSE')
+        log("  Successfully entered Pose Mode.")
 
         # (Extract bone data - same as v5)
         # ...
         current_pose_data = []
         extracted_bone_count = 0
         # print("  Extracting bone transforms...") # Reduce log noise
-        for bone in armature_obj.pose.bones:
-            cleaned_name = bone.name.replace(".", "")
-            pos = bone.location; quat = bone.rotation_quaternion; scale = bone.scale
-            bone_data = {'name': cleaned_name, 'position': [pos.x, pos.y, pos.z], 'quaternion': [quat.x, quat.y, quat.z, quat.w], 'scale': [scale.x, scale.y, scale.z]}
-            current_pose_data.append(bone_data)
-            extracted_bone_count += 1
-        print(f"  Extracted data for {extracted_bone_count} bones.")
+        with profiler.phase("read_bones"):
+            for bone in armature_obj.pose.bones:
+                cleaned_name = bone.name.replace(".", "")
+                pos = bone.location; quat = bone.rotation_quaternion; scale = bone.scale
+                bone_data = {'name': cleaned_name, 'position': [pos.x, pos.y, pos.z], 'quaternion': [quat.x, quat.y, quat.z, quat.w], 'scale': [scale.x, scale.y, scale.z]}
+                current_pose_data.append(bone_data)
+                extracted_bone_count += 1
+        log(f"  Extracted data for {extracted_bone_count} bones.")
 
         # (Save Pose JSON - same as v5)
         # ...
         safe_filename = friendly_pose_name.replace(" ", "_").replace("/", "-").replace("\\", "-")
-        json_filename = f"{safe_filename}.json"; json_filepath = os.path.join(output_dir, json_filename)
+        json_filename = f"{safe_filename}{pose_extension}"; json_filepath = os.path.join(output_dir, json_filename)
         relative_filepath = os.path.join("poses", relative_dir_name, json_filename).replace("\\", "/")
         # print(f"  Saving pose data to: {json_filepath}") # Reduce log noise
+        journal_meta = {'action': action_name, 'gender': relative_dir_name, 'armature': armature_obj.name, 'file': relative_filepath, 'format': pose_writer.fmt if pose_writer else 'pretty'}
         try:
-            with open(json_filepath, 'w') as f: json.dump(current_pose_data, f, indent=2)
+            with profiler.phase("write_handoff" if pose_writer else "write_json"):
+                if pose_writer: pose_writer.submit(json_filepath, current_pose_data, friendly_pose_name, journal.on_written(journal_meta)) # Formatting, disk I/O + journaling on the writer threads
+                else:
+                    payload = json.dumps(current_pose_data, indent=2).encode('utf-8')
+                    with open(json_filepath, 'wb') as f: f.write(payload)
+                    journal.on_written(journal_meta)(json_filepath, current_pose_data, hashlib.sha1(payload).hexdigest())
             pose_dict[friendly_pose_name] = relative_filepath
             processed_names_set.add(friendly_pose_name); processed_count += 1
-            print(f"  Successfully saved '{friendly_pose_name}'.")
-        except IOError as e: print(f"  ERROR writing JSON '{json_filepath}': {e}"); error_count += 1
-        except TypeError as e: print(f"  ERROR serializing JSON for '{friendly_pose_name}': {e}"); error_count += 1
+            log(f"  Successfully {'queued' if pose_writer else 'saved'} '{friendly_pose_name}'.")
+        except IOError as e: log(f"  ERROR writing JSON '{json_filepath}': {e}"); error_count += 1
+        except TypeError as e: log(f"  ERROR serializing JSON for '{friendly_pose_name}': {e}"); error_count += 1
 
     except RuntimeError as e:
         if "Cannot edit hidden object" in str(e) or "context is incorrect" in str(e).lower():
-             print(f"  ERROR switching mode for '{armature_obj.name}': {e}. Object/Collection still hidden?")
-        else: print(f"  RUNTIME ERROR processing action '{action_name}': {e}")
+             log(f"  ERROR switching mode for '{armature_obj.name}': {e}. Object/Collection still hidden?")
+        else: log(f"  RUNTIME ERROR processing action '{action_name}': {e}")
         error_count += 1
     except Exception as e:
-        print(f"  UNEXPECTED ERROR processing action '{action_name}': {e}")
+        log(f"  UNEXPECTED ERROR processing action '{action_name}': {e}")
         error_count += 1
         import traceback; traceback.print_exc()
     finally:
         # --- Ensure back to Object Mode & clear action ---
-        ensure_object_mode()
-        if current_action_applied and armature_obj and armature_obj.animation_data:
-             if armature_obj.animation_data.action == action: armature_obj.animation_data.action = None
+        with profiler.phase("restore"):
+            ensure_object_mode()
+            if current_action_applied and armature_obj and armature_obj.animation_data:
+                 if armature_obj.animation_data.action == action: armature_obj.animation_data.action = None
 
 # --- Save Manifest Files & Summary ---
 # ... (same as v5) ...
+profiler.next_action("finalize")
+if pose_writer:
+    for failed_path, failed_name, _ in pose_writer.close(): # Don't list poses whose file never made it to disk (they aren't journaled either)
+        if failed_name in female_poses and female_poses[failed_name].endswith(os.path.basename(failed_path)): del female_poses[failed_name]
+        elif failed_name in male_poses and male_poses[failed_name].endswith(os.path.basename(failed_path)): del male_poses[failed_name]
+        processed_count -= 1; error_count += 1
+    pose_writer.report()
+journal.close() # After the writers drain: they append the last records
+print(f"\nJournal synced: '{JOURNAL_PATH}'")
 print("\n--- Saving Manifest Files ---")
 female_manifest_path = os.path.join(female_output_dir, "manifest.json"); male_manifest_path = os.path.join(male_output_dir, "manifest.json")
 try:
@@ -288,4 +441,6 @@ except IOError as e: print(f"ERROR writing Male manifest '{male_manifest_path}':
 print("\n--- Pose Extraction Summary ---")
 print(f"Total Asset Actions Found: {asset_actions_count}"); print(f"Successfully Processed & Saved: {processed_count}")
 print(f"Skipped (Ambiguous Gender): {skipped_gender_count}"); print(f"Skipped (Duplicate Name): {skipped_duplicate_count}")
-print(f"Errors Encountered: {error_count}"); print("--- Script Finished ---")
\ No newline at end of file
+if RESUME: print(f"Skipped (Already Journaled): {skipped_journaled_count}")
+print(f"Errors Encountered: {error_count}")
+profiler.finish(); print("--- Script Finished ---")
\ No newline at end of file
@@ -2,6 +2,8 @@ import bpy
 import json
 import os
 import re
+import sys
+from contextlib import nullcontext
 import math
 from mathutils import Vector, Quaternion, Matrix # Keep imports
 
@@ -13,6 +15,13 @@ MALE_ARMATURE_NAME = "Male"
 # !! IMPORTANT: Output directory relative to THIS script file's location !!
 OUTPUT_BASE_DIR = "poses"
 
+WRITER_THREADS = 2 # Background pose-file writer threads (pose_writer.py next to this script); 0 = write on the main thread
+WRITER_QUEUE_SIZE = 32 # Poses that may wait for a writer before the loop blocks
+OUTPUT_FORMAT = "pretty" # "pretty" (indent=2), "compact" or "binary" (.posebin)
+QUIET = False # True: no per-action prints (errors/warnings still show) - console output is slow inside Blender
+PROFILE_TRACE_NAME = "extract_poses.trace.json" # Chrome/Perfetto trace written into the output folder; None to skip
+log = print # Per-action output; replaced by the profiler's QUIET-aware logger once it is loaded
+
 # --- Helper Functions ---
 def sanitize_filename(name):
     """Removes or replaces characters unsafe for filenames."""
@@ -36,6 +45,37 @@ def get_friendly_pose_name(action_name):
     name = re.sub(r'\s+', ' ', name).strip()
     return name
 
+def add_script_dir_to_path(script_dir):
+    """Makes pose_writer.py / phase_profiler.py next to this script importable inside Blender."""
+    if script_dir and os.path.isfile(os.path.join(script_dir, "pose_writer.py")) and script_dir not in sys.path:
+        sys.path.append(script_dir)
+
+def load_pose_writer(profiler=None):
+    """Creates a PoseWriter from pose_writer.py next to this script, or returns None (synchronous json.dump)."""
+    try:
+        from pose_writer import PoseWriter
+        return PoseWriter(WRITER_THREADS, WRITER_QUEUE_SIZE, OUTPUT_FORMAT, profiler=profiler)
+    except ImportError:
+        print("Warning: pose_writer.py not found next to the script; writing pose JSON synchronously.")
+        return None
+
+class NullProfiler:
+    """Stand-in when phase_profiler.py isn't importable: no timings, plain prints."""
+    log = staticmethod(print)
+    def phase(self, name): return nullcontext()
+    def next_action(self, label): pass
+    def finish(self): pass
+
+def load_profiler(output_path):
+    """Creates a PhaseProfiler from phase_profiler.py next to this script (falls back to NullProfiler)."""
+    try:
+        from phase_profiler import PhaseProfiler
+        trace_path = os.path.join(output_path, PROFILE_TRACE_NAME) if PROFILE_TRACE_NAME else None
+        return PhaseProfiler("extract_poses", QUIET, trace_path)
+    except ImportError:
+        print("Warning: phase_profiler.py not found next to the script; no timing report.")
+        return NullProfiler()
+
 def update_manifest(manifest_path, pose_friendly_name, relative_json_path):
     """Loads, updates, and saves the manifest JSON file."""
     manifest_data = {}
@@ -48,7 +88,7 @@ def update_manifest(manifest_path, pose_friendly_name, relative_json_path):
     # Only add if the friendly name isn't already there (first one wins for duplicates)
     if pose_friendly_name not in manifest_data:
         manifest_data[pose_friendly_name] = relative_json_path
-        print(f"  Adding manifest entry: '{pose_friendly_name}' -> '{relative_json_path}'")
+        log(f"  Adding manifest entry: '{pose_friendly_name}' -> '{relative_json_path}'")
         try: # Save the updated manifest immediately after adding
             sorted_manifest = dict(sorted(manifest_data.items()))
             with open(manifest_path, 'w') as f: json.dump(sorted_manifest, f, indent=2)
@@ -56,7 +96,7 @@ def update_manifest(manifest_path, pose_friendly_name, relative_json_path):
             return True # Indicate update happened
         except Exception as e: print(f"  ERROR saving updated manifest '{manifest_path}': {e}")
     else:
-        print(f"  Skipping manifest entry: '{pose_friendly_name}' already exists.")
+        log(f"  Skipping manifest entry: '{pose_friendly_name}' already exists.")
         return False # Indicate no update happened
     return False
 
@@ -102,6 +142,14 @@ def extract_poses():
     print(f"Found Female Armature: {female_armature.name if female_armature else 'Not Found'}")
     print(f"Found Male Armature: {male_armature.name if male_armature else 'Not Found'}")
 
+    global log
+    add_script_dir_to_path(script_dir)
+    profiler = load_profiler(output_path)
+    log = profiler.log
+    pose_writer = load_pose_writer(None if isinstance(profiler, NullProfiler) else profiler)
+    pose_extension = pose_writer.extension if pose_writer else ".json"
+    written_entries = {} # output path -> (manifest path, friendly name), to undo entries whose write fails
+
     female_manifest = {}; male_manifest = {}
     processed_count = 0; skipped_count = 0; error_count = 0
     processed_unique_friendly_names = {"female": set(), "male": set()} # Track unique FRIENDLY names per gender
@@ -128,6 +176,7 @@ def extract_poses():
 
         for action in asset_actions:
             action_name = action.name
+            profiler.next_action(action_name)
             target_armature = None
             gender_subdir = None
             manifest_dict = None
@@ -142,18 +191,18 @@ def extract_poses():
 
             if gender == "female":
                  if female_armature: target_armature, gender_subdir, manifest_dict, relative_dir, gender_subdir_name = female_armature, female_dir, female_manifest, os.path.join(OUTPUT_BASE_DIR, "female"), "female"
-                 else: print(f"\nSkipping Female Action '{action_name}': Female armature object not found."); skipped_count += 1; continue
+                 else: log(f"\nSkipping Female Action '{action_name}': Female armature object not found."); skipped_count += 1; continue
             elif gender == "male":
                  if male_armature: target_armature, gender_subdir, manifest_dict, relative_dir, gender_subdir_name = male_armature, male_dir, male_manifest, os.path.join(OUTPUT_BASE_DIR, "male"), "male"
-                 else: print(f"\nSkipping Male Action '{action_name}': Male armature object not found."); skipped_count += 1; continue
-            else: print(f"\nSkipping Action '{action_name}': Cannot determine gender from name."); skipped_count += 1; continue
+                 else: log(f"\nSkipping Male Action '{action_name}': Male armature object not found."); skipped_count += 1; continue
+            else: log(f"\nSkipping Action '{action_name}': Cannot determine gender from name."); skipped_count += 1; continue
 
-            print(f"\nProcessing Action: '{action_name}' (Gender: {gender}, Target: {target_armature.name})")
+            log(f"\nProcessing Action: '{action_name}' (Gender: {gender}, Target: {target_armature.name})")
 
             # --- Handle Uniqueness by Friendly Name ---
             friendly_name = get_friendly_pose_name(action_name)
             if friendly_name in processed_unique_friendly_names[gender]:
-                print(f"  Skipping: Friendly name '{friendly_name}' already processed for {gender}.")
+                log(f"  Skipping: Friendly name '{friendly_name}' already processed for {gender}.")
                 skipped_count += 1
                 continue
             processed_unique_friendly_names[gender].add(friendly_name)
@@ -163,47 +212,57 @@ def extract_poses():
             try:
                 if not target_armature.animation_data: target_armature.animation_data_create()
 
-                context.view_layer.objects.active = target_armature
-                bpy.ops.object.select_all(action='DESELECT')
-                target_armature.select_set(True)
-                bpy.ops.object.mode_set(mode='POSE')
+                with profiler.phase("select"):
+                    context.view_layer.objects.active = target_armature
+                    bpy.ops.object.select_all(action='DESELECT')
+                    target_armature.select_set(True)
+                with profiler.phase("mode_set"): bpy.ops.object.mode_set(mode='POSE')
 
-                target_armature.animation_data.action = action
+                with profiler.phase("assign_action"): target_armature.animation_data.action = action
                 frame_to_set = int(action.frame_range[0]) if action.frame_range else 1
-                context.scene.frame_set(frame_to_set)
-                context.view_layer.update()
-                print(f"  Applied Action visually at frame {frame_to_set}")
+                with profiler.phase("frame_set"): context.scene.frame_set(frame_to_set)
+                with profiler.phase("view_layer.update"): context.view_layer.update()
+                log(f"  Applied Action visually at frame {frame_to_set}")
 
                 pose_data = []
                 if not target_armature.pose: raise ValueError("No pose bones accessible.")
 
-                for pbone in target_armature.pose.bones:
-                    loc = list(pbone.location); quat = list(pbone.rotation_quaternion); scale = list(pbone.scale)
-                    pose_data.append({ "name": pbone.name, "position": loc, "quaternion": quat, "scale": scale })
-                print(f"  Extracted data for {len(pose_data)} bones.")
+                with profiler.phase("read_bones"):
+                    for pbone in target_armature.pose.bones:
+                        loc = list(pbone.location); quat = list(pbone.rotation_quaternion); scale = list(pbone.scale)
+                        pose_data.append({ "name": pbone.name, "position": loc, "quaternion": quat, "scale": scale })
+                log(f"  Extracted data for {len(pose_data)} bones.")
 
                 # --- Save JSON & Update Manifest ---
                 filename_base = sanitize_filename(friendly_name) # Use sanitized FRIENDLY name for file
                 if not filename_base: filename_base = sanitize_filename(action_name)
                 if not filename_base: filename_base = f"pose_{processed_count}"
 
-                json_filename = f"{filename_base}.json"
+                json_filename = f"{filename_base}{pose_extension}"
                 json_filepath = os.path.join(gender_subdir, json_filename)
                 relative_json_path = f"{OUTPUT_BASE_DIR}/{gender_subdir_name}/{json_filename}".replace("\\","/")
 
-                # Save JSON
-                with open(json_filepath, 'w') as f: json.dump(pose_data, f, indent=2)
-                print(f"  Saved pose JSON to: {json_filepath}")
+                # Save JSON (handed off to the writer threads when available)
+                if pose_writer:
+                    with profiler.phase("write_handoff"): pose_writer.submit(json_filepath, pose_data, friendly_name)
+                    written_entries[json_filepath] = (os.path.join(gender_subdir, "manifest.json"), friendly_name)
+                    log(f"  Queued pose file: {json_filepath}")
+                else:
+                    with profiler.phase("write_json"):
+                        with open(json_filepath, 'w') as f: json.dump(pose_data, f, indent=2)
+                    log(f"  Saved pose JSON to: {json_filepath}")
 
                 # Update Manifest (function handles loading/saving)
-                update_manifest(os.path.join(gender_subdir, "manifest.json"), friendly_name, relative_json_path)
+                with profiler.phase("manifest_update"):
+                    update_manifest(os.path.join(gender_subdir, "manifest.json"), friendly_name, relative_json_path)
 
                 processed_count += 1
-                target_armature.animation_data.action = None # Unlink action
-                bpy.ops.object.mode_set(mode='OBJECT') # Switch back after success
+                with profiler.phase("restore"):
+                    target_armature.animation_data.action = None # Unlink action
+                    bpy.ops.object.mode_set(mode='OBJECT') # Switch back after success
 
             except Exception as e:
-                print(f"  ERROR processing action '{action_name}': {e}")
+                log(f"  ERROR processing action '{action_name}': {e}")
                 error_count += 1
                 # Remove from processed set if error occurred before saving
                 if friendly_name in processed_unique_friendly_names[gender]:
@@ -213,6 +272,19 @@ def extract_poses():
                     if context.object and context.mode != 'OBJECT': bpy.ops.object.mode_set(mode='OBJECT')
                 except: pass
 
+    # --- Wait for Pending Writes ---
+    profiler.next_action("finalize")
+    if pose_writer:
+        for failed_path, failed_name, _ in pose_writer.close():
+            error_count += 1; processed_count -= 1
+            manifest_path, friendly_name = written_entries.get(failed_path, (None, failed_name))
+            try: # Drop the manifest entry that points at the missing file
+                with open(manifest_path, 'r') as f: manifest_data = json.load(f)
+                if manifest_data.pop(friendly_name, None) is not None:
+                    with open(manifest_path, 'w') as f: json.dump(dict(sorted(manifest_data.items())), f, indent=2)
+            except Exception as e: print(f"  Warning: could not remove '{friendly_name}' from manifest: {e}")
+        pose_writer.report()
+
     # --- Final Manifest Save (Ensures file exists even if empty) ---
     try:
         female_manifest_path = os.path.join(female_dir, "manifest.json")
@@ -229,6 +301,7 @@ def extract_poses():
     print(f"Successfully processed & saved (unique poses): {processed_count}")
     print(f"Actions skipped (not asset/no gender/duplicate/etc): {skipped_count}")
     print(f"Errors during processing: {error_count}")
+    profiler.finish()
 
     # Restore original state
     try:
@@ -0,0 +1,533 @@
+# START OF FILE: fake_bpy.py
+# Pure-Python stand-in for the parts of `bpy` / `mathutils` the pose scripts
+# use, so the extractors can run (and be benchmarked) on a machine without
+# Blender. It models armature objects with pose bones, actions with fcurves
+# and asset_data, collections / view layers, modes, selection and frame_set()
+# evaluation, plus rest bones (armature.data.bones) - enough for
+# extract_poses.py, extract_applied_poses.py and export_rest_dump.py to run
+# unmodified. Timings through it measure the scripts' own Python overhead,
+# not Blender's C-side evaluation.
+#
+#   import fake_bpy
+#   pack = fake_bpy.SyntheticPack(bones=159, poses=1000, blend_path="/tmp/pack/blend/pack.blend")
+#   fake_bpy.install(pack)       # registers `bpy` and `mathutils` in sys.modules
+#   runpy.run_path("scripts/extract_applied_poses.py")
+#   fake_bpy.uninstall()
+#
+# Actions are created lazily from a seed, so a 100k-pose pack doesn't hold
+# 100k x bones x 10 fcurves in memory.
+import math
+import random
+import sys
+import types
+
+# --- Configuration ---
+ARMATURE_NAMES = ("Female", "Male")
+_TORSO = ("hips", "spine", "spine.001", "spine.002", "spine.003", "neck", "head")
+_LIMBS = ("shoulder", "upper_arm", "forearm", "hand", "thigh", "shin", "foot", "toe")
+_FINGERS = ("thumb", "f_index", "f_middle", "f_ring", "f_pinky")
+
+
+# --- mathutils ---
+class Vector:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, seq=(0.0, 0.0, 0.0)):
+        self.x, self.y, self.z = seq
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.z)[i]
+
+    def __repr__(self):
+        return f"Vector(({self.x:.4f}, {self.y:.4f}, {self.z:.4f}))"
+
+
+class Quaternion:
+    """mathutils order: iterates and indexes as (w, x, y, z)."""
+    __slots__ = ("w", "x", "y", "z")
+
+    def __init__(self, seq=(1.0, 0.0, 0.0, 0.0)):
+        self.w, self.x, self.y, self.z = seq
+
+    def __iter__(self):
+        return iter((self.w, self.x, self.y, self.z))
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, i):
+        return (self.w, self.x, self.y, self.z)[i]
+
+    def __repr__(self):
+        return f"Quaternion(({self.w:.4f}, {self.x:.4f}, {self.y:.4f}, {self.z:.4f}))"
+
+
+class Matrix:
+    def __init__(self, rows=None):
+        self.rows = rows or [[1.0 if r == c else 0.0 for c in range(4)] for r in range(4)]
+
+    def __iter__(self):
+        return iter([list(row) for row in self.rows])
+
+    def __getitem__(self, i):
+        return self.rows[i]
+
+
+class Euler(Vector):
+    pass
+
+
+# --- Synthetic Skeleton / Poses ---
+def synthetic_bone_names(count):
+    """Rigify-style bone names (torso chain, L/R limbs and fingers, then face bones) - `count` of them."""
+    names = list(_TORSO)
+    for limb in _LIMBS:
+        names += [f"{limb}.L", f"{limb}.R"]
+    for finger in _FINGERS:
+        for segment in range(1, 4):
+            names += [f"{finger}.{segment:02d}.L", f"{finger}.{segment:02d}.R"]
+    k = 0
+    while len(names) < count:
+        side = ("L", "R")[k % 2]
+        names.append(f"face_{k // 2:03d}.{side}")
+        k += 1
+    return names[:count]
+
+
+def synthetic_bone_parents(names):
+    """Parent name (or None) per synthetic bone: torso chain, limbs off the torso, fingers off the hands, face off the head."""
+    parents = {}
+    for i, name in enumerate(names):
+        base, _, side = name.rpartition(".")
+        if name in _TORSO:
+            parent = _TORSO[_TORSO.index(name) - 1] if name != _TORSO[0] else None
+        elif base in _LIMBS:
+            k = _LIMBS.index(base)
+            parent = {0: "spine.003", 4: "hips"}.get(k) or f"{_LIMBS[k - 1]}.{side}"
+        elif base.startswith(_FINGERS):
+            finger, _, segment = base.rpartition(".")
+            parent = f"hand.{side}" if segment == "01" else f"{finger}.{int(segment) - 1:02d}.{side}"
+        else:
+            parent = "head"
+        parents[name] = parent if parent in parents else (names[0] if i else None)
+    return [parents[name] for name in names]
+
+
+def synthetic_pose_values(bones, seed):
+    """Deterministic flat [loc3, quat wxyz, scale3] * bones for one synthetic pose."""
+    rng = random.Random(seed)
+    values = []
+    for b in range(bones):
+        angle = rng.uniform(-0.6, 0.6)
+        ax, ay, az = rng.gauss(0, 1), rng.gauss(0, 1), rng.gauss(0, 1)
+        n = math.sqrt(ax * ax + ay * ay + az * az) or 1.0
+        s = math.sin(angle / 2) / n
+        loc = (rng.uniform(-0.05, 0.05), rng.uniform(-0.05, 0.05), rng.uniform(-0.05, 0.05)) if b == 0 else (0.0, 0.0, 0.0)
+        values += [*loc, math.cos(angle / 2), ax * s, ay * s, az * s, 1.0, 1.0, 1.0]
+    return values
+
+
+# --- bpy.types stand-ins ---
+class AssetData:
+    def __init__(self):
+        self.tags = []
+        self.description = ""
+
+
+class FCurve:
+    __slots__ = ("data_path", "array_index", "value")
+
+    def __init__(self, data_path, array_index, value):
+        self.data_path, self.array_index, self.value = data_path, array_index, value
+
+    def evaluate(self, frame):
+        return self.value  # single-key pose actions are constant
+
+
+_CHANNELS = (("location", 3), ("rotation_quaternion", 4), ("scale", 3))
+
+
+class Action:
+    """One pose action; its keyed values are generated on first use."""
+
+    def __init__(self, name, bone_names, seed, asset=True):
+        self.name = name
+        self.asset_data = AssetData() if asset else None
+        self.frame_range = (1.0, 1.0)
+        self.users = 1
+        self._bone_names = bone_names
+        self._seed = seed
+        self._values = None
+        self._fcurves = None
+
+    @property
+    def values(self):
+        if self._values is None:
+            self._values = synthetic_pose_values(len(self._bone_names), self._seed)
+        return self._values
+
+    @property
+    def fcurves(self):
+        if self._fcurves is None:
+            curves, v = [], self.values
+            for b, name in enumerate(self._bone_names):
+                offset = b * 10
+                for attr, size in _CHANNELS:
+                    for i in range(size):
+                        curves.append(FCurve(f'pose.bones["{name}"].{attr}', i, v[offset + i]))
+                    offset += size
+            self._fcurves = curves
+        return self._fcurves
+
+    def apply_to(self, pose_bones):
+        """frame_set() evaluation: writes this action's values into the pose bones."""
+        v = self.values
+        for b, bone in enumerate(pose_bones):
+            o = b * 10
+            bone.location = Vector(v[o:o + 3])
+            bone.rotation_quaternion = Quaternion(v[o + 3:o + 7])
+            bone.scale = Vector(v[o + 7:o + 10])
+
+
+class Bone:
+    """Rest bone (armature.data.bones): +Y along the bone, heads stacked by depth."""
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.children = []
+        self.select = False
+        depth = 0
+        while parent is not None:
+            depth, parent = depth + 1, parent.parent
+        side = -1.0 if name.endswith(".R") else 1.0 if name.endswith(".L") else 0.0
+        self.head_local = Vector((0.05 * depth * side, 0.0, 0.1 * depth))
+        self.tail_local = Vector((self.head_local.x, 0.1, self.head_local.z))
+        rows = [[1.0 if r == c else 0.0 for c in range(4)] for r in range(4)]
+        rows[0][3], rows[1][3], rows[2][3] = self.head_local
+        self.matrix_local = Matrix(rows)
+
+
+class ArmatureData:
+    def __init__(self, bone_names):
+        self.bones = _NamedList()
+        for name, parent in zip(bone_names, synthetic_bone_parents(list(bone_names))):
+            bone = Bone(name, self.bones.get(parent))
+            if bone.parent is not None:
+                bone.parent.children.append(bone)
+            self.bones.append(bone)
+
+
+class PoseBone:
+    __slots__ = ("name", "location", "rotation_quaternion", "scale", "rotation_mode", "bone")
+
+    def __init__(self, bone):
+        self.name = bone.name
+        self.location = Vector()
+        self.rotation_quaternion = Quaternion()
+        self.scale = Vector((1.0, 1.0, 1.0))
+        self.rotation_mode = "QUATERNION"
+        self.bone = bone
+
+
+class Pose:
+    def __init__(self, armature_data):
+        self.bones = [PoseBone(bone) for bone in armature_data.bones]
+
+
+class NlaStrip:
+    def __init__(self, name, start, action):
+        self.name, self.action, self.frame_start, self.frame_end = name, action, start, start + 1
+
+
+class NlaStrips(list):
+    def new(self, name, start, action):
+        strip = NlaStrip(name, start, action)
+        self.append(strip)
+        return strip
+
+
+class NlaTrack:
+    def __init__(self, name):
+        self.name = name
+        self.strips = NlaStrips()
+
+
+class NlaTracks(list):
+    def get(self, name):
+        return next((t for t in self if t.name == name), None)
+
+    def new(self, name="NlaTrack"):
+        track = NlaTrack(name)
+        self.append(track)
+        return track
+
+
+class AnimData:
+    def __init__(self):
+        self.action = None
+        self.nla_tracks = NlaTracks()
+
+
+class Object:
+    def __init__(self, name, obj_type="ARMATURE", bone_names=()):
+        self.name = name
+        self.type = obj_type
+        self.mode = "OBJECT"
+        self.data = ArmatureData(bone_names) if obj_type == "ARMATURE" else None
+        self.pose = Pose(self.data) if obj_type == "ARMATURE" else None
+        self.matrix_world = Matrix()
+        self.animation_data = None
+        self.users_collection = []
+        self.hide_select = False
+        self.hide_render = False
+        self.hide_viewport = False
+        self._hidden = False
+        self._selected = False
+
+    def animation_data_create(self):
+        if self.animation_data is None:
+            self.animation_data = AnimData()
+        return self.animation_data
+
+    def hide_get(self):
+        return self._hidden
+
+    def hide_set(self, state):
+        self._hidden = bool(state)
+
+    def select_set(self, state):
+        if state and (self._hidden or self.hide_select):
+            raise RuntimeError(f"Object '{self.name}' can't be selected because it is hidden")
+        self._selected = bool(state)
+
+    def select_get(self):
+        return self._selected
+
+
+class Collection:
+    def __init__(self, name, objects=()):
+        self.name = name
+        self.objects = list(objects)
+        self.children = []
+        for obj in self.objects:
+            obj.users_collection.append(self)
+
+
+class LayerCollection:
+    def __init__(self, collection, parent=None):
+        self.collection = collection
+        self.name = collection.name
+        self.parent = parent
+        self.hide_viewport = False
+        self.exclude = False
+        self.children = _NamedList(LayerCollection(child, self) for child in collection.children)
+
+
+class _NamedList(list):
+    """bpy_prop_collection-ish list: iteration, get(name), `name in`."""
+
+    def get(self, name, default=None):
+        return next((item for item in self if item.name == name), default)
+
+    def __contains__(self, item):
+        if isinstance(item, str):
+            return any(x.name == item for x in self)
+        return list.__contains__(self, item)
+
+
+class ActionCollection:
+    """bpy.data.actions: synthetic pose actions built on demand, plus actions created via new()."""
+
+    def __init__(self, pack):
+        self._pack = pack
+        self._cache = {}
+        self._extra = []
+
+    def __len__(self):
+        return self._pack.poses + len(self._extra)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if i >= self._pack.poses:
+            return self._extra[i - self._pack.poses]
+        action = self._cache.get(i)
+        if action is None:
+            action = self._cache[i] = self._pack.make_action(i)
+        return action
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def get(self, name, default=None):
+        return next((a for a in self if a.name == name), default)
+
+    def new(self, name):
+        action = Action(name, (), seed=0, asset=False)
+        action._values = []
+        self._extra.append(action)
+        return action
+
+    def remove(self, action):
+        self._extra.remove(action)
+
+
+class ViewLayerObjects(_NamedList):
+    active = None
+
+
+class ViewLayer:
+    def __init__(self, scene_collection, objects):
+        self.layer_collection = LayerCollection(scene_collection)
+        self.objects = ViewLayerObjects(objects)
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+
+class Scene:
+    def __init__(self, data):
+        self._data = data
+        self.frame_current = 1
+
+    def frame_set(self, frame):
+        """Evaluates every armature's active action at `frame` (pose actions are constant)."""
+        self.frame_current = frame
+        for obj in self._data.objects:
+            anim = obj.animation_data
+            if obj.pose is not None and anim is not None and anim.action is not None:
+                anim.action.apply_to(obj.pose.bones)
+
+
+class Context:
+    def __init__(self, data, view_layer, scene):
+        self._data = data
+        self.view_layer = view_layer
+        self.scene = scene
+        self.space_data = None
+        self.preferences = types.SimpleNamespace()
+
+    @property
+    def object(self):
+        return self.view_layer.objects.active
+
+    active_object = object
+
+    @property
+    def mode(self):
+        obj = self.object
+        return "OBJECT" if obj is None or obj.mode == "OBJECT" else obj.mode
+
+    @property
+    def selected_objects(self):
+        return [o for o in self._data.objects if o.select_get()]
+
+    @property
+    def selected_pose_bones(self):
+        obj = self.object
+        return list(obj.pose.bones) if obj is not None and obj.pose is not None else []
+
+
+# --- bpy.ops ---
+def _make_ops(ctx, data):
+    def mode_set(mode="OBJECT", **_):
+        obj = ctx.object
+        if obj is None:
+            raise RuntimeError("Operator bpy.ops.object.mode_set.poll() failed, context is incorrect")
+        if mode != "OBJECT" and obj.hide_get():
+            raise RuntimeError("Cannot edit hidden object")
+        obj.mode = mode
+        return {"FINISHED"}
+
+    def select_all(action="TOGGLE", **_):
+        for obj in data.objects:
+            obj._selected = action == "SELECT"
+        return {"FINISHED"}
+
+    def done(*_, **__):
+        return {"FINISHED"}
+
+    def keyframe_insert_menu(type="LocRotScale", frame=1, **_):
+        obj = ctx.object
+        action = obj.animation_data.action
+        for bone in obj.pose.bones:
+            action._values.extend([*bone.location, *bone.rotation_quaternion, *bone.scale])
+        return {"FINISHED"}
+
+    return types.SimpleNamespace(
+        object=types.SimpleNamespace(mode_set=mode_set, select_all=select_all),
+        pose=types.SimpleNamespace(select_all=done, transforms_clear=done),
+        anim=types.SimpleNamespace(keyframe_insert_menu=keyframe_insert_menu),
+    )
+
+
+# --- Pack / Install ---
+class SyntheticPack:
+    """A synthetic pose-pack .blend: two armatures sharing a `bones`-bone skeleton and `poses` asset actions."""
+
+    def __init__(self, bones=159, poses=1000, blend_path="/tmp/fake_pack/blend/pack.blend", seed=0,
+                 armature_names=ARMATURE_NAMES):
+        self.bones = bones
+        self.poses = poses
+        self.blend_path = blend_path
+        self.seed = seed
+        self.bone_names = synthetic_bone_names(bones)
+        self.armature_names = armature_names
+
+    def make_action(self, i):
+        suffix = "F" if i % 2 == 0 else "M"
+        return Action(f"Pose {i:06d} {suffix}", self.bone_names, seed=self.seed * 1_000_003 + i)
+
+    def build_data(self):
+        armatures = [Object(name, "ARMATURE", self.bone_names) for name in self.armature_names]
+        rig_collection = Collection("Rigs", armatures)
+        scene_collection = Collection("Scene Collection")
+        scene_collection.children.append(rig_collection)
+        data = types.SimpleNamespace(
+            filepath=self.blend_path,
+            objects=_NamedList(armatures),
+            collections=_NamedList([rig_collection]),
+            texts=_NamedList(),
+        )
+        data.actions = ActionCollection(self)
+        return data, scene_collection
+
+
+def install(pack):
+    """Builds fresh bpy/mathutils modules for `pack` and registers them in sys.modules. Returns bpy."""
+    data, scene_collection = pack.build_data()
+    view_layer = ViewLayer(scene_collection, data.objects)
+    scene = Scene(data)
+    context = Context(data, view_layer, scene)
+
+    bpy = types.ModuleType("bpy")
+    bpy.data = data
+    bpy.context = context
+    bpy.ops = _make_ops(context, data)
+    bpy.path = types.SimpleNamespace(abspath=lambda p: p[2:] if p.startswith("//") else p)
+    bpy.types = types.SimpleNamespace(Object=Object, Action=Action, Bone=Bone, PoseBone=PoseBone, FCurve=FCurve)
+    bpy.app = types.SimpleNamespace(version=(4, 1, 0), version_string="4.1.0 (fake_bpy)", background=True)
+
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Vector, mathutils.Quaternion, mathutils.Matrix, mathutils.Euler = Vector, Quaternion, Matrix, Euler
+
+    sys.modules["bpy"] = bpy
+    sys.modules["mathutils"] = mathutils
+    return bpy
+
+
+def uninstall():
+    """Removes the stand-in modules from sys.modules."""
+    sys.modules.pop("bpy", None)
+    sys.modules.pop("mathutils", None)
+
+# END OF FILE
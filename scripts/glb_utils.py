@@ -0,0 +1,365 @@
+# START OF FILE: glb_utils.py
+# Shared helpers for the offline (non-Blender) asset tools.
+# Reads binary glTF (.glb) files without copying the BIN chunk and rebuilds
+# skeletons the same way Three.js' GLTFLoader does, so bone names and order
+# line up with what js/main.js sees at runtime.
+import json
+import math
+import os
+import re
+import struct
+
+import numpy as np
+
+# --- Configuration ---
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODELS_DIR = os.path.join(REPO_ROOT, "models")
+BONE_MAPPINGS_PATH = os.path.join(REPO_ROOT, "js", "bone_mappings.json")
+REGISTRY_PATH = os.path.join(REPO_ROOT, "js", "registry.json")  # written by build_registry.py
+
+GLB_MAGIC = 0x46546C67  # b'glTF'
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+COMPONENT_DTYPES = {
+    5120: np.int8, 5121: np.uint8, 5122: np.int16,
+    5123: np.uint16, 5125: np.uint32, 5126: np.float32,
+}
+IDENTITY_TRS = np.array([0, 0, 0, 0, 0, 0, 1, 1, 1, 1], dtype=np.float64)
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+# Same characters THREE.PropertyBinding.sanitizeNodeName strips.
+_RESERVED_NAME_CHARS = re.compile(r"[\[\]\.:/]")
+_WHITESPACE = re.compile(r"\s")
+
+
+# --- Helper Functions ---
+def sanitize_node_name(name):
+    """Mirrors THREE.PropertyBinding.sanitizeNodeName ('spine.001' -> 'spine001')."""
+    return _RESERVED_NAME_CHARS.sub("", _WHITESPACE.sub("_", name or ""))
+
+
+def repo_relative(path):
+    """Returns a forward-slash path relative to the repo root (the form main.js uses)."""
+    return os.path.relpath(os.path.abspath(path), REPO_ROOT).replace("\\", "/")
+
+
+class GLBFile:
+    """A parsed .glb: the JSON document plus a zero-copy view of the BIN chunk."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = f.read()
+        view = memoryview(self.data)
+        magic, version, length = struct.unpack_from("<III", view, 0)
+        if magic != GLB_MAGIC:
+            raise ValueError(f"'{path}' is not a binary glTF file.")
+        if version != 2:
+            raise ValueError(f"'{path}' uses unsupported glTF container version {version}.")
+
+        self.version = version
+        self.length = length
+        self.chunks = []  # (type, offset, length) of each chunk payload
+        self.json_chunk = None
+        self.bin_chunk = None
+
+        offset = 12
+        while offset + 8 <= min(length, len(view)):
+            chunk_length, chunk_type = struct.unpack_from("<II", view, offset)
+            payload = view[offset + 8:offset + 8 + chunk_length]
+            self.chunks.append((chunk_type, offset + 8, chunk_length))
+            if chunk_type == CHUNK_JSON and self.json_chunk is None:
+                self.json_chunk = payload
+            elif chunk_type == CHUNK_BIN and self.bin_chunk is None:
+                self.bin_chunk = payload
+            offset += 8 + chunk_length
+
+        if self.json_chunk is None:
+            raise ValueError(f"'{path}' has no JSON chunk.")
+        self.gltf = json.loads(bytes(self.json_chunk).decode("utf-8"))
+
+    # --- Buffer Access ---
+    def buffer_view_bytes(self, view_index):
+        """Returns a memoryview over one bufferView (only the embedded BIN buffer is supported)."""
+        bv = self.gltf["bufferViews"][view_index]
+        if bv.get("buffer", 0) != 0 or self.bin_chunk is None:
+            raise ValueError(f"bufferView {view_index} in '{self.path}' does not live in the BIN chunk.")
+        start = bv.get("byteOffset", 0)
+        return self.bin_chunk[start:start + bv["byteLength"]]
+
+    def read_accessor(self, accessor_index):
+        """Returns accessor data as an (count, components) numpy array (a view when tightly packed)."""
+        acc = self.gltf["accessors"][accessor_index]
+        dtype = np.dtype(COMPONENT_DTYPES[acc["componentType"]])
+        width = TYPE_SIZES[acc["type"]]
+        count = acc["count"]
+        if "bufferView" not in acc:
+            return np.zeros((count, width), dtype=dtype)
+
+        raw = self.buffer_view_bytes(acc["bufferView"])
+        offset = acc.get("byteOffset", 0)
+        stride = self.gltf["bufferViews"][acc["bufferView"]].get("byteStride", 0)
+        element_size = dtype.itemsize * width
+        if not stride or stride == element_size:
+            return np.frombuffer(raw, dtype=dtype, count=count * width, offset=offset).reshape(count, width)
+        # Interleaved: view the elements through a strided array.
+        return np.lib.stride_tricks.as_strided(
+            np.frombuffer(raw, dtype=np.uint8, offset=offset).view(dtype),
+            shape=(count, width), strides=(stride, dtype.itemsize))
+
+
+def load_glb(path):
+    """Loads a .glb file, raising ValueError for anything that isn't glTF 2.0 binary."""
+    return GLBFile(path)
+
+
+def list_model_files(models_dir=MODELS_DIR):
+    """Returns every .glb directly inside models/, sorted by name."""
+    if not os.path.isdir(models_dir):
+        return []
+    return sorted(os.path.join(models_dir, f) for f in os.listdir(models_dir) if f.lower().endswith(".glb"))
+
+
+def read_poseable_models(registry_path=REGISTRY_PATH):
+    """Returns the poseable model paths listed in js/registry.json (see build_registry.py)."""
+    try:
+        with open(registry_path, "r", encoding="utf-8") as f:
+            registry = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Could not read '{registry_path}' (run scripts/build_registry.py): {e}")
+        return []
+    return [m["path"] for m in registry.get("models", []) if m.get("poseable")]
+
+
+def load_bone_mappings(path=BONE_MAPPINGS_PATH):
+    """Loads js/bone_mappings.json ({modelPath: {boneName: {friendlyName, group, subGroup?}}})."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Could not read bone mappings '{path}': {e}")
+        return {}
+
+
+# --- Writing ---
+class GLBBuilder:
+    """Accumulates binary data + accessors and writes a single-buffer .glb."""
+
+    COMPONENT_TYPES = {np.dtype(v): k for k, v in COMPONENT_DTYPES.items()}
+    TYPES_BY_WIDTH = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4", 16: "MAT4"}
+
+    def __init__(self, generator="shadow_room scripts"):
+        self.gltf = {"asset": {"version": "2.0", "generator": generator},
+                     "buffers": [], "bufferViews": [], "accessors": []}
+        self.blob = bytearray()
+
+    def add_buffer_view(self, data, target=None):
+        """Appends raw bytes (4-byte aligned) and returns the bufferView index."""
+        while len(self.blob) % 4:
+            self.blob.append(0)
+        view = {"buffer": 0, "byteOffset": len(self.blob), "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        self.blob.extend(data)
+        self.gltf["bufferViews"].append(view)
+        return len(self.gltf["bufferViews"]) - 1
+
+    def add_accessor(self, array, target=None, min_max=False, accessor_type=None):
+        """Adds an (count, width) or (count,) array as an accessor and returns its index."""
+        array = np.ascontiguousarray(array)
+        if array.dtype == np.float64:
+            array = array.astype(np.float32)
+        shaped = array.reshape(len(array), -1)
+        accessor = {
+            "bufferView": self.add_buffer_view(array.tobytes(), target),
+            "componentType": self.COMPONENT_TYPES[array.dtype],
+            "count": len(shaped),
+            "type": accessor_type or self.TYPES_BY_WIDTH[shaped.shape[1]],
+        }
+        if min_max and len(shaped):
+            accessor["min"] = shaped.min(axis=0).tolist()
+            accessor["max"] = shaped.max(axis=0).tolist()
+        self.gltf["accessors"].append(accessor)
+        return len(self.gltf["accessors"]) - 1
+
+    def to_bytes(self):
+        """Serializes JSON + BIN chunks into .glb bytes."""
+        gltf = dict(self.gltf)
+        while len(self.blob) % 4:
+            self.blob.append(0)
+        if self.blob:
+            gltf["buffers"] = [{"byteLength": len(self.blob)}]
+        else:
+            for key in ("buffers", "bufferViews", "accessors"):
+                if not gltf.get(key):
+                    gltf.pop(key, None)
+        json_bytes = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        json_bytes += b" " * (-len(json_bytes) % 4)
+        chunks = struct.pack("<II", len(json_bytes), CHUNK_JSON) + json_bytes
+        if self.blob:
+            chunks += struct.pack("<II", len(self.blob), CHUNK_BIN) + bytes(self.blob)
+        return struct.pack("<III", GLB_MAGIC, 2, 12 + len(chunks)) + chunks
+
+    def write(self, path):
+        data = self.to_bytes()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return len(data)
+
+
+# --- Transform Math ---
+def matrix_to_trs(matrix):
+    """Decomposes a column-major glTF 4x4 matrix into (translation, quaternion xyzw, scale)."""
+    m = np.asarray(matrix, dtype=np.float64).reshape(4, 4).T  # row-major
+    translation = m[:3, 3].copy()
+    basis = m[:3, :3].copy()
+    scale = np.linalg.norm(basis, axis=0)
+    if np.linalg.det(basis) < 0:
+        scale[0] = -scale[0]
+    safe = np.where(np.abs(scale) > 1e-12, scale, 1.0)
+    return translation, rotation_matrix_to_quat(basis / safe), scale
+
+
+def rotation_matrix_to_quat(r):
+    """Converts a 3x3 rotation matrix to an xyzw quaternion (same branches as THREE.Quaternion)."""
+    m11, m12, m13 = r[0]
+    m21, m22, m23 = r[1]
+    m31, m32, m33 = r[2]
+    trace = m11 + m22 + m33
+    if trace > 0:
+        s = 0.5 / math.sqrt(trace + 1.0)
+        q = ((m32 - m23) * s, (m13 - m31) * s, (m21 - m12) * s, 0.25 / s)
+    elif m11 > m22 and m11 > m33:
+        s = 2.0 * math.sqrt(1.0 + m11 - m22 - m33)
+        q = (0.25 * s, (m12 + m21) / s, (m13 + m31) / s, (m32 - m23) / s)
+    elif m22 > m33:
+        s = 2.0 * math.sqrt(1.0 + m22 - m11 - m33)
+        q = ((m12 + m21) / s, 0.25 * s, (m23 + m32) / s, (m13 - m31) / s)
+    else:
+        s = 2.0 * math.sqrt(1.0 + m33 - m11 - m22)
+        q = ((m13 + m31) / s, (m23 + m32) / s, 0.25 * s, (m21 - m12) / s)
+    return np.array(q, dtype=np.float64)
+
+
+def trs_to_matrix(t, q, s):
+    """Builds a row-major 4x4 matrix from translation, xyzw quaternion and scale."""
+    x, y, z, w = q
+    r = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+    m = np.eye(4)
+    m[:3, :3] = r * np.asarray(s, dtype=np.float64)
+    m[:3, 3] = t
+    return m
+
+
+def node_matrix(node):
+    """Row-major local matrix of a glTF node."""
+    if "matrix" in node:
+        return np.asarray(node["matrix"], dtype=np.float64).reshape(4, 4).T
+    return trs_to_matrix(*node_trs(node))
+
+
+def node_trs(node):
+    """Returns a node's local (translation, quaternion xyzw, scale), decomposing 'matrix' if present."""
+    if "matrix" in node:
+        return matrix_to_trs(node["matrix"])
+    return (np.array(node.get("translation", (0.0, 0.0, 0.0)), dtype=np.float64),
+            np.array(node.get("rotation", (0.0, 0.0, 0.0, 1.0)), dtype=np.float64),
+            np.array(node.get("scale", (1.0, 1.0, 1.0)), dtype=np.float64))
+
+
+# --- Skeleton Extraction ---
+class Skeleton:
+    """Bones of one GLB in Three.js traversal order, with parents and rest TRS.
+
+    `parents[i]` is the index of the nearest ancestor that is also a bone, or -1.
+    `rest` is a (bones, 10) float64 array: translation xyz, quaternion xyzw, scale xyz.
+    `offsets` holds, in the same layout, the combined transform of any non-bone
+    nodes between a bone and its parent bone (or the scene root for root bones,
+    e.g. Sketchfab's Z-up -> Y-up wrapper), so FK lands in glTF world space.
+    """
+
+    def __init__(self, names, source_names, node_indices, parents, rest, offsets=None):
+        self.names = names
+        self.source_names = source_names
+        self.node_indices = node_indices
+        self.parents = parents
+        self.rest = rest
+        if offsets is None:
+            offsets = np.tile(IDENTITY_TRS, (len(names), 1))
+        self.offsets = offsets
+        self.identity_offsets = np.all(np.abs(offsets - IDENTITY_TRS) < 1e-9, axis=1)
+        self.index = {name: i for i, name in enumerate(names)}
+
+    def __len__(self):
+        return len(self.names)
+
+
+def unique_node_names(gltf):
+    """Per-node runtime names, deduplicated the way GLTFLoader.createUniqueName does."""
+    used = {}
+    names = []
+    for node in gltf.get("nodes", []):
+        name = sanitize_node_name(node.get("name", ""))
+        if name in used:
+            used[name] += 1
+            name = f"{name}_{used[name]}"
+        else:
+            used[name] = 0
+        names.append(name)
+    return names
+
+
+def extract_skeleton(glb):
+    """Builds a Skeleton from every node referenced as a joint by any skin in the file."""
+    gltf = glb.gltf if isinstance(glb, GLBFile) else glb
+    nodes = gltf.get("nodes", [])
+    joint_nodes = set()
+    for skin in gltf.get("skins", []):
+        joint_nodes.update(skin.get("joints", []))
+
+    runtime_names = unique_node_names(gltf)
+    scene_index = gltf.get("scene", 0)
+    scenes = gltf.get("scenes", [])
+    roots = scenes[scene_index].get("nodes", []) if scenes else []
+
+    names, source_names, node_indices, parents, rest, offsets = [], [], [], [], [], []
+    # Depth-first pre-order, children in declaration order (== Object3D.traverse()).
+    # `above` is the matrix of non-bone nodes walked since the last bone.
+    stack = [(root, -1, np.eye(4)) for root in reversed(roots)]
+    while stack:
+        node_index, parent_bone, above = stack.pop()
+        node = nodes[node_index]
+        bone_index = parent_bone
+        if node_index in joint_nodes:
+            bone_index = len(names)
+            names.append(runtime_names[node_index])
+            source_names.append(node.get("name", ""))
+            node_indices.append(node_index)
+            parents.append(parent_bone)
+            t, q, s = node_trs(node)
+            rest.append(np.concatenate([t, q, s]))
+            offsets.append(np.concatenate(matrix_to_trs(above.T.reshape(-1))))
+            child_above = np.eye(4)
+        else:
+            child_above = above @ node_matrix(node)
+        for child in reversed(node.get("children", [])):
+            stack.append((child, bone_index, child_above))
+
+    rest_array = np.array(rest, dtype=np.float64).reshape(len(rest), 10)
+    offset_array = np.array(offsets, dtype=np.float64).reshape(len(offsets), 10)
+    return Skeleton(names, source_names, node_indices, np.array(parents, dtype=np.int32),
+                    rest_array, offset_array)
+
+
+def load_skeleton(path):
+    """Convenience wrapper: parse the GLB at `path` and return its Skeleton."""
+    return extract_skeleton(load_glb(path))
+
+# END OF FILE
@@ -0,0 +1,274 @@
+# START OF FILE: mirror_poses.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# Generates left/right mirrored copies of a whole pose library in one pass,
+# so pose packs don't have to be authored/extracted twice.
+#
+# Pairing: every bone whose name has an L/R marker (shoulderL, f_index01L,
+# lidTL001, shoulderL_metarig, ik.r -> ikr, ...) is paired with the name that
+# has the marker swapped, and the pair is checked against the mirrored rest
+# positions. Bones without a partner that sit on the sagittal plane are
+# center bones and mirror onto themselves.
+#
+# Mirroring happens in world space on the *change from rest*: the partner's
+# world rotation delta is reflected across the sagittal plane and re-applied
+# on top of this bone's own rest, which keeps asymmetric rests and differing
+# bone rolls correct. Translated bones (root, IK targets) get their partner's
+# reflected world position, corrected by the rest asymmetry.
+#
+# Usage:  python scripts/mirror_poses.py --model models/femalebase0.glb
+#             [pose dirs/files ...] [-o out_dir | --in-place]
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from glb_utils import REPO_ROOT, load_skeleton, repo_relative
+from pose_math import (POS, ROT, forward_kinematics, parent_world, quat_angle_between,
+                       quat_conj, quat_mul, quat_normalize, trs_compose, trs_inverse_apply)
+from pose_utils import (DEFAULT_POSE_ROOTS, array_to_pose, load_pose_library, manifest_entry, pose_output_paths,
+                        poses_to_array, unique_pose_labels, write_manifest, write_pose_file)
+
+# --- Configuration ---
+DEFAULT_OUTPUT_BASE = os.path.join(REPO_ROOT, "poses", "mirrored")
+MIRROR_SUFFIX = "Mirrored"
+CENTER_TOLERANCE = 0.02    # fraction of rig height a center bone may sit off the plane
+PAIR_TOLERANCE = 0.05      # fraction of rig height a mirrored partner may be off
+MOVED_EPSILON = 1e-5       # local translation change that counts as "translated"
+_SIDE_SWAP = {"L": "R", "R": "L", "l": "r", "r": "l"}
+_GENDER_SUFFIX = re.compile(r"([\s_]+)([FMfm])$")  # Extractor stems use underscores: Walk_01_S_F
+_MIRRORED_NAME = re.compile(rf"(?:^|[\s_]){MIRROR_SUFFIX}(?:[\s_]|$)")  # Also with a "(folder)" tag
+
+
+# --- Pairing ---
+def name_partners(name, names):
+    """Candidate partner names: `name` with one L/R marker swapped, that exist in `names`."""
+    candidates = []
+    for i, ch in enumerate(name):
+        if ch in _SIDE_SWAP:
+            swapped = name[:i] + _SIDE_SWAP[ch] + name[i + 1:]
+            if swapped != name and swapped in names:
+                candidates.append(swapped)
+    return candidates
+
+
+def reflect_vectors(v, axis):
+    """Reflects vectors across the plane whose normal is `axis`."""
+    out = np.array(v, dtype=np.float64, copy=True)
+    out[..., axis] = -out[..., axis]
+    return out
+
+
+def reflect_quats(q, axis):
+    """Reflects rotations across the plane whose normal is `axis` (R -> M R M)."""
+    out = -np.array(q, dtype=np.float64, copy=True)
+    out[..., axis] = -out[..., axis]
+    out[..., 3] = -out[..., 3]
+    return out
+
+
+def build_mirror_map(skeleton, rest_world):
+    """Returns (partner index array, lateral axis, info dict) for a skeleton."""
+    names = skeleton.names
+    positions = rest_world[:, POS]
+    height = float(np.ptp(positions, axis=0).max()) or 1.0
+
+    # Lateral axis = the one along which named L/R pairs differ most.
+    raw_pairs = []
+    for b, name in enumerate(names):
+        for other in name_partners(name, skeleton.index):
+            raw_pairs.append((b, skeleton.index[other]))
+    if raw_pairs:
+        a, b = np.array(raw_pairs).T
+        axis = int(np.argmax(np.abs(positions[a] - positions[b]).mean(axis=0)))
+    else:
+        axis = 0
+    plane = float(np.median(positions[:, axis]))
+
+    partner = np.arange(len(names))
+    rejected, off_center = [], []
+    for b, name in enumerate(names):
+        mirrored = reflect_vectors(positions[b] - [plane if i == axis else 0 for i in range(3)], axis)
+        best, best_dist = None, None
+        for other in name_partners(name, skeleton.index):
+            o = skeleton.index[other]
+            dist = np.linalg.norm(mirrored - (positions[o] - [plane if i == axis else 0 for i in range(3)]))
+            if best is None or dist < best_dist:
+                best, best_dist = o, dist
+        if best is not None and best_dist <= PAIR_TOLERANCE * height:
+            partner[b] = best
+        elif best is not None:
+            rejected.append((name, names[best], round(best_dist / height, 4)))
+        elif abs(positions[b, axis] - plane) > CENTER_TOLERANCE * height:
+            off_center.append(name)
+
+    # Keep the relation symmetric: drop one-sided pairings.
+    for b in range(len(names)):
+        if partner[partner[b]] != b:
+            partner[b] = b
+
+    pair_mask = partner != np.arange(len(names))
+    asym = np.zeros(len(names))
+    if pair_mask.any():
+        centered = positions.copy()
+        centered[:, axis] -= plane
+        asym[pair_mask] = np.linalg.norm(reflect_vectors(centered[pair_mask], axis)
+                                         - centered[partner[pair_mask]], axis=-1)
+    info = {
+        "axis": "xyz"[axis],
+        "plane": plane,
+        "pairs": int(pair_mask.sum()) // 2,
+        "centerBones": int((~pair_mask).sum()) - len(off_center),
+        "offCenterUnpaired": off_center,
+        "rejectedPairs": rejected,
+        "restAsymmetryMax": float(asym.max()) if len(asym) else 0.0,
+    }
+    return partner, axis, plane, info
+
+
+# --- Mirroring ---
+class Mirrorer:
+    """Precomputed pairing and rest data for one skeleton."""
+
+    def __init__(self, skeleton):
+        self.skeleton = skeleton
+        self.rest_world = forward_kinematics(skeleton, skeleton.rest)
+        self.partner, self.axis, self.plane, self.info = build_mirror_map(skeleton, self.rest_world)
+        # Rest asymmetry: where this bone sits vs. where its reflected partner sits.
+        self.rest_correction = self.rest_world[:, POS] - self._reflect_points(self.rest_world[self.partner, POS])
+
+    def _reflect_points(self, p):
+        shifted = np.array(p, dtype=np.float64, copy=True)
+        shifted[..., self.axis] = 2.0 * self.plane - shifted[..., self.axis]
+        return shifted
+
+    def mirror(self, local):
+        """(N, B, 10) local TRS -> mirrored (N, B, 10) local TRS. Returns (mirrored, world, mirrored_world)."""
+        sk = self.skeleton
+        n = local.shape[0]
+        world = forward_kinematics(sk, local)
+        moved = np.abs(local[..., POS] - sk.rest[:, POS]).max(axis=-1) > MOVED_EPSILON  # (N, B)
+
+        out = np.broadcast_to(sk.rest, (n,) + sk.rest.shape).copy()
+        out_world = np.empty_like(out)
+        for b in range(len(sk)):
+            p = self.partner[b]
+            parent = parent_world(sk, out_world, b)
+            delta = quat_mul(world[:, p, ROT], quat_conj(self.rest_world[p, ROT]))
+            desired_rot = quat_mul(reflect_quats(delta, self.axis), self.rest_world[b, ROT])
+            out[:, b, ROT] = quat_normalize(quat_mul(quat_conj(parent[..., ROT]), desired_rot))
+            out[:, b, 7:10] = local[:, p, 7:10]
+
+            needs_pos = moved[:, p] | moved[:, b]
+            if needs_pos.any():
+                desired = np.empty((n, 10))
+                desired[:, POS] = self._reflect_points(world[:, p, POS]) + self.rest_correction[b]
+                desired[:, ROT] = desired_rot
+                desired[:, 7:10] = 1.0
+                solved = trs_inverse_apply(parent, desired)[:, POS]
+                out[:, b, POS] = np.where(needs_pos[:, None], solved, out[:, b, POS])
+            out_world[:, b] = trs_compose(parent, out[:, b])
+        return out, world, out_world
+
+    def mirror_error(self, world, mirrored_world):
+        """Max distance between mirrored joints and the reflected originals (rest asymmetry removed)."""
+        expected = self._reflect_points(world[:, self.partner, POS]) + self.rest_correction
+        return np.linalg.norm(mirrored_world[..., POS] - expected, axis=-1)
+
+
+def mirrored_pose_name(name):
+    """'Walk 01 S F' -> 'Walk 01 S Mirrored F'; 'Walk_01_S_F' -> 'Walk_01_S_Mirrored_F';
+    'tpose' -> 'tpose Mirrored'."""
+    match = _GENDER_SUFFIX.search(name)
+    if match:
+        separator, gender = match.groups()
+        return f"{name[:match.start()]}{separator}{MIRROR_SUFFIX}{separator}{gender}"
+    return f"{name} {MIRROR_SUFFIX}"
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate left/right mirrored copies of a pose library.")
+    parser.add_argument("sources", nargs="*", help="Pose files/directories (default: poses/ and models/saved_poses/).")
+    parser.add_argument("--model", required=True, help="GLB whose skeleton the poses belong to.")
+    parser.add_argument("--min-coverage", type=float, default=0.9,
+                        help="Skip poses that supply fewer than this fraction of the model's bones.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-o", "--output-dir", help="Output directory (default: poses/mirrored/<model>).")
+    group.add_argument("--in-place", action="store_true",
+                       help="Write next to each source pose and add entries to that folder's manifest.json.")
+    args = parser.parse_args(argv)
+
+    model_path = args.model if os.path.isabs(args.model) else os.path.join(REPO_ROOT, args.model)
+    skeleton = load_skeleton(model_path)
+    mirrorer = Mirrorer(skeleton)
+    info = mirrorer.info
+    print(f"--- Mirroring poses for {repo_relative(model_path)} ---")
+    print(f"  Sagittal plane: {info['axis']} = {info['plane']:.4f}; {info['pairs']} L/R pair(s), "
+          f"{info['centerBones']} center bone(s); rest asymmetry max {info['restAsymmetryMax']:.5f}")
+    for name in info["offCenterUnpaired"]:
+        print(f"  WARNING: '{name}' is off-center but has no L/R partner; mirrored onto itself.")
+    for name, other, dist in info["rejectedPairs"]:
+        print(f"  WARNING: '{name}' / '{other}' rests are not mirror images ({dist} of rig height); not paired.")
+
+    poses = [p for p in load_pose_library(args.sources or DEFAULT_POSE_ROOTS)
+             if not _MIRRORED_NAME.search(p.name)]
+    local, present = poses_to_array(poses, skeleton)
+    keep = np.flatnonzero(present.mean(axis=1) >= args.min_coverage) if poses else np.zeros(0, dtype=int)
+    if len(keep) < len(poses):
+        print(f"  Skipping {len(poses) - len(keep)} pose(s) that don't fit this skeleton.")
+    if len(keep) == 0:
+        print("No poses to mirror.")
+        return 1
+
+    t0 = time.perf_counter()
+    mirrored, world, mirrored_world = mirrorer.mirror(local[keep])
+    error = mirrorer.mirror_error(world, mirrored_world)
+    roundtrip, _, _ = mirrorer.mirror(mirrored)
+    roundtrip_rot = np.degrees(quat_angle_between(roundtrip[..., ROT], local[keep][..., ROT]))
+    elapsed = time.perf_counter() - t0
+
+    output_dir = args.output_dir or os.path.join(DEFAULT_OUTPUT_BASE, os.path.splitext(os.path.basename(model_path))[0])
+    kept = [poses[i] for i in keep]
+    target_dirs = [os.path.dirname(p.path) if args.in_place else output_dir for p in kept]
+    names, paths = [None] * len(kept), [None] * len(kept)
+    try:
+        for target_dir in dict.fromkeys(target_dirs):  # same-named poses only clash within one output folder
+            rows = [r for r, d in enumerate(target_dirs) if d == target_dir]
+            labels = unique_pose_labels([kept[r] for r in rows], [mirrored_pose_name(kept[r].name) for r in rows])
+            for r, label, path in zip(rows, labels, pose_output_paths(labels, target_dir)):
+                names[r], paths[r] = label, path
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    manifests = {}
+    for row, (name, path, target_dir) in enumerate(zip(names, paths, target_dirs)):
+        write_pose_file(path, array_to_pose(mirrored[row], skeleton))
+        manifests.setdefault(target_dir, {})[name] = manifest_entry(path, target_dir)
+
+    for target_dir, entries in manifests.items():
+        manifest_path = os.path.join(target_dir, "manifest.json")
+        manifest = {}
+        if args.in_place and os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        manifest.update(entries)
+        write_manifest(manifest_path, manifest)
+
+    print(f"  Mirrored {len(keep)} pose(s) in {elapsed * 1000:.1f} ms.")
+    print(f"  Max asymmetry error vs. reflected originals: {error.max():.6f} "
+          f"(worst bone '{skeleton.names[int(np.argmax(error.max(axis=0)))]}')")
+    print(f"  Max round-trip (mirror twice) rotation error: {roundtrip_rot.max():.5f} deg")
+    print(f"  Written to: {', '.join(repo_relative(d) for d in manifests)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
@@ -0,0 +1,230 @@
+# START OF FILE: pack_shapes.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# Packs the procedural shapes listed in js/registry.json into one binary glTF
+# geometry pack that js/shape_pack.js loads by shape key:
+#   1. open bake_shapes.html in the browser and save shapes.dump.json
+#      (raw buffers of every mesh each shape builds, baked by three.js itself)
+#   2. python scripts/pack_shapes.py shapes.dump.json
+#
+# Identical primitives (same vertex + index bytes, e.g. the left and right limb
+# capsules of every figure) are stored once and instanced: every node that
+# uses one references the same glTF mesh. Each mesh's buffers are contiguous
+# and laid out in shape order, so a shape is one or a few byte ranges of the
+# file. models/shapes.index.json maps each shape key to its nodes plus the
+# absolute byte ranges the runtime fetches with HTTP Range requests. Per-mesh
+# state from the dump (name, visible, material side/wireframe/type) is carried
+# into the index nodes (and the glTF nodes' name/extras) for the runtime to restore.
+#
+# Usage:  python scripts/pack_shapes.py shapes.dump.json [-o models/shapes.glb] [--report report.json]
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from glb_utils import CHUNK_BIN, MODELS_DIR, GLBBuilder, load_glb, repo_relative
+
+# --- Configuration ---
+DUMP_FORMAT = "shadow-room-shape-dump"
+PACK_VERSION = 2  # SHAPE_PACK_VERSION in js/shape_pack.js
+DEFAULT_OUTPUT = os.path.join(MODELS_DIR, "shapes.glb")
+GLTF_ATTRIBUTES = {"position": "POSITION", "normal": "NORMAL", "uv": "TEXCOORD_0"}
+INDEX_DTYPES = {"u16": np.uint16, "u32": np.uint32}
+TARGET_ARRAY_BUFFER = 34962
+TARGET_ELEMENT_ARRAY_BUFFER = 34963
+MESH_STATE_FIELDS = ("name", "visible", "side", "wireframe", "material")  # dump mesh -> index node, as baked
+
+
+# --- Helper Functions ---
+def decode_geometry(entry):
+    """Dump geometry -> ({name: (count, itemSize) float32}, index array or None)."""
+    attributes = {}
+    for name, attr in entry.get("attributes", {}).items():
+        if name not in GLTF_ATTRIBUTES:
+            continue
+        data = np.frombuffer(base64.b64decode(attr["data"]), dtype="<f4")
+        attributes[name] = data.reshape(-1, attr["itemSize"])
+    index = None
+    if entry.get("index"):
+        index = np.frombuffer(base64.b64decode(entry["index"]["data"]), dtype=INDEX_DTYPES[entry["index"]["type"]])
+    return attributes, index
+
+
+def geometry_hash(attributes, index):
+    """Content hash used to dedupe primitives across (and within) shapes."""
+    h = hashlib.sha1()
+    for name in sorted(attributes):
+        h.update(f"{name}:{attributes[name].shape[1]}:".encode())
+        h.update(attributes[name].tobytes())
+    if index is not None:
+        h.update(f"index:{index.dtype.str}:".encode())
+        h.update(index.tobytes())
+    return h.hexdigest()
+
+
+def read_dump(path):
+    with open(path, "r", encoding="utf-8") as f:
+        dump = json.load(f)
+    if not isinstance(dump, dict) or dump.get("format") != DUMP_FORMAT or dump.get("version") != PACK_VERSION:
+        raise ValueError(f"'{path}' is not a {DUMP_FORMAT} v{PACK_VERSION} file (bake it with bake_shapes.html).")
+    return dump
+
+
+# --- Packing ---
+def dedupe(dump):
+    """Returns (unique geometries, dump geometry index -> unique index) with uniques in first-use shape order."""
+    unique, by_hash, remap = [], {}, {}
+    for shape in dump["shapes"].values():
+        for mesh in shape["meshes"]:
+            g = mesh["geometry"]
+            if g in remap:
+                continue
+            attributes, index = decode_geometry(dump["geometries"][g])
+            key = geometry_hash(attributes, index)
+            if key not in by_hash:
+                by_hash[key] = len(unique)
+                unique.append((attributes, index))
+            remap[g] = by_hash[key]
+    return unique, remap
+
+
+def build_pack(dump):
+    """Builds the GLB (GLBBuilder) and the runtime index with BIN-relative byte ranges."""
+    unique, remap = dedupe(dump)
+    builder = GLBBuilder(generator="shadow_room pack_shapes.py")
+    gltf = builder.gltf
+    gltf["meshes"], gltf["nodes"] = [], []
+    meshes = []
+    for attributes, index in unique:
+        start = len(builder.blob) + (-len(builder.blob) % 4)
+        info = {"attributes": {}, "index": None, "vertices": len(attributes["position"]) if "position" in attributes else 0}
+        primitive = {"attributes": {}}
+        for name, data in attributes.items():
+            accessor = builder.add_accessor(data, TARGET_ARRAY_BUFFER, min_max=(name == "position"))
+            primitive["attributes"][GLTF_ATTRIBUTES[name]] = accessor
+            view = gltf["bufferViews"][gltf["accessors"][accessor]["bufferView"]]
+            info["attributes"][name] = {"range": [view["byteOffset"], view["byteLength"]], "itemSize": data.shape[1]}
+            if name == "position":
+                info["min"], info["max"] = gltf["accessors"][accessor]["min"], gltf["accessors"][accessor]["max"]
+        if index is not None:
+            accessor = builder.add_accessor(index, TARGET_ELEMENT_ARRAY_BUFFER, accessor_type="SCALAR")
+            primitive["indices"] = accessor
+            view = gltf["bufferViews"][gltf["accessors"][accessor]["bufferView"]]
+            info["index"] = {"range": [view["byteOffset"], view["byteLength"]], "type": "u32" if index.dtype == np.uint32 else "u16",
+                             "count": len(index)}
+        info["range"] = [start, len(builder.blob)]
+        gltf["meshes"].append({"primitives": [primitive]})
+        meshes.append(info)
+
+    shapes, roots = {}, []
+    for key, shape in dump["shapes"].items():
+        children, nodes = [], []
+        for mesh in shape["meshes"]:
+            node = {"mesh": remap[mesh["geometry"]]}
+            if mesh.get("matrix"):
+                node["matrix"] = mesh["matrix"]
+            state = {field: mesh[field] for field in MESH_STATE_FIELDS if field in mesh}
+            gltf_node = dict(node)
+            extras = {k: v for k, v in state.items() if k != "name"}
+            if "name" in state:
+                gltf_node["name"] = state["name"]
+            if extras:
+                gltf_node["extras"] = extras
+            gltf["nodes"].append(gltf_node)
+            children.append(len(gltf["nodes"]) - 1)
+            nodes.append({**node, **state})
+        root = {"name": key, "children": children, "extras": {"kind": shape["kind"]}}
+        if shape.get("root"):
+            root.update(translation=shape["root"]["position"], rotation=shape["root"]["quaternion"], scale=shape["root"]["scale"])
+        gltf["nodes"].append(root)
+        roots.append(len(gltf["nodes"]) - 1)
+        entry = {"kind": shape["kind"], "nodes": nodes}
+        if shape.get("root"):
+            entry["root"] = shape["root"]
+        shapes[key] = entry
+    gltf["scenes"] = [{"name": "shapes", "nodes": roots}]
+    gltf["scene"] = 0
+    return builder, meshes, shapes
+
+
+def shift_ranges(meshes, offset):
+    """Turns BIN-relative ranges into absolute file offsets (what Range requests need)."""
+    for info in meshes:
+        info["range"] = [info["range"][0] + offset, info["range"][1] + offset]
+        for attr in list(info["attributes"].values()) + ([info["index"]] if info["index"] else []):
+            attr["range"][0] += offset
+
+
+def shape_stats(shape, meshes):
+    """Mesh instances, unique meshes, vertices drawn and bytes fetched for one shape."""
+    used = {node["mesh"] for node in shape["nodes"]}
+    return {
+        "instances": len(shape["nodes"]),
+        "uniqueMeshes": len(used),
+        "vertices": sum(meshes[node["mesh"]]["vertices"] for node in shape["nodes"]),
+        "bytes": sum(meshes[m]["range"][1] - meshes[m]["range"][0] for m in used),
+    }
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack baked procedural shapes into a deduplicated GLB geometry pack.")
+    parser.add_argument("dump", help="shapes.dump.json saved from bake_shapes.html.")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="Pack path (default: models/shapes.glb); the index is written next to it.")
+    parser.add_argument("--report", help="Also write the per-shape statistics to this JSON file.")
+    args = parser.parse_args(argv)
+
+    try:
+        dump = read_dump(args.dump)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return 1
+    if not dump["shapes"]:
+        print("ERROR: The dump contains no shapes.")
+        return 1
+
+    print(f"--- Packing {len(dump['shapes'])} shapes ({len(dump['geometries'])} baked geometries, size {dump['size']}) ---")
+    builder, meshes, shapes = build_pack(dump)
+    size = builder.write(args.output)
+    bin_offset = next(offset for chunk_type, offset, _ in load_glb(args.output).chunks if chunk_type == CHUNK_BIN)
+    shift_ranges(meshes, bin_offset)
+
+    glb_url = repo_relative(args.output).replace("\\", "/")
+    for key, entry in shapes.items():
+        entry.update(shape_stats(entry, meshes))
+    index = {"version": PACK_VERSION, "glb": glb_url, "size": dump["size"], "meshes": meshes, "shapes": shapes,
+             "procedural": dump.get("procedural", [])}
+    index_path = os.path.splitext(args.output)[0] + ".index.json"
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+
+    print(f"{'shape':<32} {'inst.':>6} {'unique':>6} {'vertices':>9} {'bytes':>10}")
+    for key, entry in shapes.items():
+        print(f"{key:<32} {entry['instances']:>6} {entry['uniqueMeshes']:>6} {entry['vertices']:>9} {entry['bytes']:>10}")
+    raw_bytes = sum(sum(a.nbytes for a in attributes.values()) + (index.nbytes if index is not None else 0)
+                    for attributes, index in (decode_geometry(g) for g in dump["geometries"]))
+    print(f"\n{len(dump['geometries'])} baked geometries -> {len(meshes)} unique meshes "
+          f"({raw_bytes / 1024:.1f} KB -> {(size - bin_offset) / 1024:.1f} KB of buffers).")
+    if dump.get("procedural"):
+        print(f"Kept procedural (use Math.random): {', '.join(dump['procedural'])}")
+    for key, reason in dump.get("failed", {}).items():
+        print(f"  WARNING: '{key}' was not baked: {reason}")
+    print(f"Saved '{repo_relative(args.output)}' ({size / 1024:.1f} KB) and '{repo_relative(index_path)}'.")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"shapes": {key: {k: entry[k] for k in ("instances", "uniqueMeshes", "vertices", "bytes")} for key, entry in shapes.items()},
+                       "uniqueMeshes": len(meshes), "bakedGeometries": len(dump["geometries"]),
+                       "rawBytes": raw_bytes, "packBytes": size}, f, indent=2)
+        print(f"Report written to '{args.report}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
@@ -0,0 +1,140 @@
+# START OF FILE: phase_profiler.py
+# Lightweight per-action / per-phase timing for the Blender scripts (stdlib
+# only, imports in Blender's bundled Python as well as plain Python 3).
+#
+#   profiler = PhaseProfiler("extract_applied_poses", quiet=True, trace_path=".../trace.json")
+#   for action in actions:
+#       profiler.next_action(action.name)  # closes the previous action's span
+#       with profiler.phase("frame_set"): bpy.context.scene.frame_set(1)
+#       profiler.log("  Applied ...")      # printed unless quiet (ERROR/WARNING lines always print)
+#   profiler.end_action()
+#   profiler.finish()                      # p50/p95/max table + Chrome trace JSON
+#
+# The trace uses the Chrome trace-event format ("X" complete events, times in
+# microseconds) and opens in chrome://tracing or https://ui.perfetto.dev.
+# Per-phase summaries, including log2 latency histograms, are stored in the
+# trace's "otherData" block.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Configuration ---
+ALWAYS_PRINT = ("error", "warning", "fatal")  # quiet mode still shows lines containing these (any case)
+
+
+# --- Helper Functions ---
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list (0 for an empty list)."""
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def log2_histogram(durations_ns):
+    """{'<=Nus': count} buckets on powers of two microseconds."""
+    buckets = {}
+    for ns in durations_ns:
+        edge = 1
+        while edge * 1000 < ns:
+            edge *= 2
+        key = f"<={edge}us"
+        buckets[key] = buckets.get(key, 0) + 1
+    return dict(sorted(buckets.items(), key=lambda kv: int(kv[0][2:-2])))
+
+
+# --- Profiler ---
+class PhaseProfiler:
+    """Collects nested action/phase spans with perf_counter_ns and reports them."""
+
+    def __init__(self, name, quiet=False, trace_path=None):
+        self.name = name
+        self.quiet = quiet
+        self.trace_path = trace_path
+        self.samples = {}    # phase name -> [duration ns]
+        self.events = []     # Chrome trace events
+        self._start = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._action = None  # (label, start ns) of the open action span
+
+    def log(self, *args):
+        """print() replacement for per-action chatter; suppressed in quiet mode except errors/warnings."""
+        if not self.quiet:
+            print(*args)
+            return
+        text = " ".join(str(a) for a in args)
+        lowered = text.lower()
+        if any(marker in lowered for marker in ALWAYS_PRINT):
+            print(text)
+
+    def _record(self, name, category, t0, t1):
+        # list.append is atomic, so phases timed on writer threads can report here too
+        self.samples.setdefault(name if category == "phase" else f"[{category}]", []).append(t1 - t0)
+        self.events.append({"name": name, "cat": category, "ph": "X", "pid": self._pid,
+                            "tid": threading.get_ident(), "ts": (t0 - self._start) / 1000.0,
+                            "dur": (t1 - t0) / 1000.0})
+
+    @contextmanager
+    def phase(self, name):
+        """Span around one phase (mode_set, frame_set, ...); aggregated by name."""
+        t0 = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._record(name, "phase", t0, time.perf_counter_ns())
+
+    def next_action(self, label):
+        """Starts the span for the next action/pose, closing the previous one (aggregated as '[action]')."""
+        now = time.perf_counter_ns()
+        if self._action:
+            self._record(self._action[0], "action", self._action[1], now)
+        self._action = (label, now)
+
+    def end_action(self):
+        """Closes the open action span, if any."""
+        if self._action:
+            self._record(self._action[0], "action", self._action[1], time.perf_counter_ns())
+            self._action = None
+
+    def summary(self):
+        """{phase: {count, totalMs, p50Ms, p95Ms, maxMs, histogram}}, slowest total first."""
+        out = {}
+        for name, values in self.samples.items():
+            ordered = sorted(values)
+            out[name] = {
+                "count": len(ordered),
+                "totalMs": round(sum(ordered) / 1e6, 3),
+                "p50Ms": round(percentile(ordered, 0.50) / 1e6, 3),
+                "p95Ms": round(percentile(ordered, 0.95) / 1e6, 3),
+                "maxMs": round(ordered[-1] / 1e6, 3),
+                "histogram": log2_histogram(ordered),
+            }
+        return dict(sorted(out.items(), key=lambda kv: -kv[1]["totalMs"]))
+
+    def write_trace(self, path):
+        """Writes the Chrome/Perfetto trace JSON; returns the path."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        meta = [{"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": self.name}}]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": meta + self.events, "displayTimeUnit": "ms",
+                       "otherData": {"script": self.name, "phases": self.summary()}}, f)
+        return path
+
+    def finish(self):
+        """Prints the timing table and writes the trace (if trace_path is set). Returns the summary."""
+        self.end_action()
+        summary = self.summary()
+        wall_ms = (time.perf_counter_ns() - self._start) / 1e6
+        print(f"\n--- Timing: {self.name} ({wall_ms / 1000:.2f} s wall) ---")
+        print(f"{'Phase':<24}{'count':>7}{'total ms':>12}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for name, s in summary.items():
+            print(f"{name:<24}{s['count']:>7}{s['totalMs']:>12.1f}{s['p50Ms']:>10.3f}{s['p95Ms']:>10.3f}{s['maxMs']:>10.3f}")
+        if self.trace_path:
+            try:
+                print(f"Trace saved: '{self.write_trace(self.trace_path)}' (open in https://ui.perfetto.dev)")
+            except OSError as e:
+                print(f"ERROR writing trace '{self.trace_path}': {e}")
+        return summary
+
+# END OF FILE
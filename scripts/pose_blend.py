@@ -0,0 +1,299 @@
+# START OF FILE: pose_blend.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# Region-layered pose composition: "arms from pose A, legs from pose B".
+# Regions are the bone groups from js/bone_mappings.json (Torso, Head, Arms,
+# Hands, Legs, Feet, ...) or plain bone names; bones without a mapping entry
+# inherit the group of their nearest mapped ancestor (face bones -> Head).
+# Any number of sources is blended with per-bone weights: positions/scales
+# by weighted sum, rotations by normalized weighted quaternion averaging.
+#
+# Two modes:
+#   layer   - one pose: a base plus ordered layers, each replacing (weight 1)
+#             or partially blending (weight < 1) its regions
+#   combine - every (or a random sample of) region combination across the
+#             pose library, computed in chunks; with --dedupe, results closer
+#             than N degrees (RMS over bones) to an existing pose or an
+#             earlier result are dropped
+#
+# Usage:
+#   python scripts/pose_blend.py --model models/femalebase0.glb \
+#       --base poses/female/Stand.json --layer "Arms,Hands=poses/female/Wave.json" \
+#       --layer "Legs,Feet=poses/female/Kneel.json@0.5" --name "Stand Wave Kneel"
+#   python scripts/pose_blend.py --model models/femalebase0.glb --combine \
+#       --regions Torso,Head Arms,Hands Legs,Feet --limit 5000 --dedupe 5 [pose dirs ...]
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+from glb_utils import REPO_ROOT, load_bone_mappings, load_skeleton, repo_relative
+from pose_math import POS, ROT, SCL, quat_canonical, quat_weighted_average
+from pose_utils import (DEFAULT_POSE_ROOTS, array_to_pose, load_pose_library, manifest_entry, pose_output_paths,
+                        poses_to_array, resolve_pose, unique_pose_labels, write_manifest, write_pose_file)
+
+# --- Configuration ---
+DEFAULT_OUTPUT_BASE = os.path.join(REPO_ROOT, "poses", "blended")
+DEFAULT_LIMIT = 1000       # combine mode: max combinations written
+CHUNK_SIZE = 1024          # combine mode: combinations blended per batch
+UNGROUPED = "Other"
+
+
+# --- Regions ---
+def bone_groups(skeleton, mapping):
+    """Group name per bone from a bone_mappings.json entry; unmapped bones inherit from their ancestors."""
+    groups = []
+    for b, name in enumerate(skeleton.names):
+        info = (mapping or {}).get(name)
+        if info and info.get("group"):
+            groups.append(info["group"])
+        else:
+            parent = skeleton.parents[b]
+            groups.append(groups[parent] if parent >= 0 else UNGROUPED)
+    return groups
+
+
+def region_mask(skeleton, groups, spec):
+    """(bones,) bool mask for a comma-separated list of group and/or bone names."""
+    mask = np.zeros(len(skeleton), dtype=bool)
+    group_lookup = {g.lower() for g in groups}
+    for token in filter(None, (t.strip() for t in spec.split(","))):
+        if token.lower() in group_lookup:
+            mask |= np.array([g.lower() == token.lower() for g in groups])
+        elif token in skeleton.index:
+            mask[skeleton.index[token]] = True
+        else:
+            raise ValueError(f"'{token}' is neither a bone group ({', '.join(sorted(set(groups)))}) nor a bone.")
+    return mask
+
+
+def region_weights(skeleton, masks, feather=0.0):
+    """(regions, bones) one-hot weights; bones in no region go to the first one.
+
+    With `feather` > 0, a bone whose parent belongs to another region hands
+    that fraction of its weight to the parent's region, softening the seam.
+    """
+    owner = np.zeros(len(skeleton), dtype=np.int64)
+    for r in range(len(masks) - 1, -1, -1):
+        owner[masks[r]] = r
+    weights = np.zeros((len(masks), len(skeleton)))
+    weights[owner, np.arange(len(skeleton))] = 1.0
+    if feather > 0:
+        for b, parent in enumerate(skeleton.parents):
+            if parent >= 0 and owner[parent] != owner[b]:
+                weights[owner[b], b] -= feather
+                weights[owner[parent], b] += feather
+    return weights
+
+
+# --- Blending ---
+def blend_poses(sources, weights):
+    """Blends (..., N, bones, 10) source poses with (..., N, bones) weights -> (..., bones, 10)."""
+    total = weights.sum(axis=-2, keepdims=True)
+    w = np.where(total > 0, weights / np.where(total > 0, total, 1.0), 1.0 / weights.shape[-2])
+    w = np.broadcast_to(w, sources.shape[:-1])
+    out = np.empty(sources.shape[:-3] + sources.shape[-2:], dtype=np.float64)
+    out[..., POS] = np.sum(sources[..., POS] * w[..., None], axis=-3)
+    out[..., SCL] = np.sum(sources[..., SCL] * w[..., None], axis=-3)
+    out[..., ROT] = quat_weighted_average(sources[..., ROT], w, axis=-2)
+    return out
+
+
+def layer_weights(masks, layer_weights_list):
+    """(1 + layers, bones) weights for a base pose plus ordered layers (later layers win)."""
+    weights = np.zeros((len(masks) + 1, len(masks[0]) if masks else 0))
+    weights[0] = 1.0
+    for i, (mask, w) in enumerate(zip(masks, layer_weights_list), start=1):
+        weights[:i, mask] *= (1.0 - w)
+        weights[i, mask] = w
+    return weights
+
+
+# --- Dedupe ---
+def rotation_features(local):
+    """(poses, bones*4) canonical rotation vectors; squared distance ~ sum of per-bone chord^2."""
+    return quat_canonical(local[..., ROT]).reshape(len(local), -1)
+
+
+def rms_angle_deg(sq_dist, bones):
+    """Converts summed squared quaternion chords to an RMS rotation angle in degrees."""
+    chord = np.sqrt(np.clip(sq_dist / bones, 0.0, 4.0))
+    return np.degrees(4.0 * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0)))
+
+
+class Deduper:
+    """Greedy distance filter against a growing set of accepted poses."""
+
+    def __init__(self, existing, bones, min_deg):
+        self.bones = bones
+        self.min_deg = min_deg
+        self.accepted = [rotation_features(existing)] if len(existing) else []
+
+    def _min_distance(self, feats, pool):
+        sq = (np.sum(feats * feats, axis=1)[:, None] + np.sum(pool * pool, axis=1)[None, :]
+              - 2.0 * feats @ pool.T)
+        return rms_angle_deg(sq.min(axis=1), self.bones)
+
+    def filter(self, local):
+        """Returns indices into `local` far enough from everything accepted so far (and accepts them)."""
+        feats = rotation_features(local)
+        keep = np.ones(len(local), dtype=bool)
+        for pool in self.accepted:
+            keep &= self._min_distance(feats, pool) >= self.min_deg
+        chosen = []
+        for i in np.flatnonzero(keep):
+            if chosen and self._min_distance(feats[i:i + 1], feats[chosen]).item() < self.min_deg:
+                continue
+            chosen.append(i)
+        if chosen:
+            self.accepted.append(feats[chosen])
+        return np.array(chosen, dtype=np.int64)
+
+
+# --- Combinations ---
+def iter_combinations(pool_size, regions, limit, sample=None, seed=0):
+    """Yields (chunk, regions) int arrays of pose indices per region, skipping single-source combos."""
+    if sample:
+        rng = np.random.default_rng(seed)
+        combos = rng.integers(0, pool_size, size=(sample * 2, regions))
+        combos = combos[(combos != combos[:, :1]).any(axis=1)]
+        combos = np.unique(combos, axis=0)
+        rng.shuffle(combos)
+        combos = combos[:min(sample, limit)]
+        for start in range(0, len(combos), CHUNK_SIZE):
+            yield combos[start:start + CHUNK_SIZE]
+        return
+    product = (c for c in itertools.product(range(pool_size), repeat=regions) if len(set(c)) > 1)
+    remaining = limit
+    while remaining > 0:
+        chunk = list(itertools.islice(product, min(CHUNK_SIZE, remaining)))
+        if not chunk:
+            return
+        remaining -= len(chunk)
+        yield np.array(chunk, dtype=np.int64)
+
+
+def combination_name(labels, combo, region_specs):
+    """'Mix Torso,Head=Stand Arms,Hands=Wave ...' from the pool's unique pose labels."""
+    return "Mix " + " ".join(f"{spec}={labels[i]}" for spec, i in zip(region_specs, combo))
+
+
+# --- Main ---
+def parse_layer(text):
+    """'Arms,Hands=pose.json#Name@0.5' -> (regions, ref, weight)."""
+    regions, sep, ref = text.partition("=")
+    if not sep or not ref:
+        raise ValueError(f"Bad --layer '{text}' (expected REGIONS=POSE[@WEIGHT]).")
+    weight = 1.0
+    if "@" in ref:
+        ref, _, w = ref.rpartition("@")
+        weight = float(w)
+    return regions, ref, min(max(weight, 0.0), 1.0)
+
+
+def write_outputs(output_dir, named_poses, skeleton):
+    """Writes poses + manifest.json to output_dir; returns the manifest. Raises ValueError if two names share a file."""
+    manifest = {}
+    paths = pose_output_paths([name for name, _ in named_poses], output_dir)
+    for (name, local), path in zip(named_poses, paths):
+        write_pose_file(path, array_to_pose(local, skeleton))
+        manifest[name] = manifest_entry(path, output_dir)
+    write_manifest(os.path.join(output_dir, "manifest.json"), manifest)
+    return manifest
+
+
+def run_layer(args, skeleton, groups):
+    """--base/--layer mode: composes one pose."""
+    base = resolve_pose(args.base)
+    layers = [parse_layer(text) for text in args.layer]
+    records = [base] + [resolve_pose(ref) for _, ref, _ in layers]
+    local, _ = poses_to_array(records, skeleton)
+    masks = [region_mask(skeleton, groups, regions) for regions, _, _ in layers]
+    weights = layer_weights(masks, [w for _, _, w in layers])
+    result = blend_poses(local, weights)
+    name = args.name or " + ".join(r.name for r in records)
+    return [(name, result)]
+
+
+def run_combine(args, skeleton, groups):
+    """--combine mode: blends region combinations across the library in chunks."""
+    poses = load_pose_library(args.sources or DEFAULT_POSE_ROOTS)
+    local, present = poses_to_array(poses, skeleton)
+    keep = np.flatnonzero(present.mean(axis=1) >= args.min_coverage) if poses else np.zeros(0, dtype=int)
+    poses, local = [poses[i] for i in keep], local[keep]
+    if len(poses) < 2:
+        print("Need at least two poses that fit this skeleton.")
+        return []
+    masks = [region_mask(skeleton, groups, spec) for spec in args.regions]
+    weights = region_weights(skeleton, masks, args.feather)
+    print(f"  Pool: {len(poses)} pose(s) x {len(masks)} region(s) = "
+          f"{len(poses) ** len(masks) - len(poses)} possible combination(s)")
+
+    labels = unique_pose_labels(poses)  # same-named poses from different folders would give clashing names
+    deduper = Deduper(local, len(skeleton), args.dedupe) if args.dedupe > 0 else None
+    results, generated = [], 0
+    for combo in iter_combinations(len(poses), len(masks), args.limit, args.sample, args.seed):
+        blended = blend_poses(local[combo], weights)
+        generated += len(combo)
+        rows = deduper.filter(blended) if deduper else np.arange(len(combo))
+        results.extend((combination_name(labels, combo[r], args.regions), blended[r]) for r in rows)
+    if deduper:
+        print(f"  Dedupe ({args.dedupe} deg RMS): kept {len(results)} of {generated} combination(s)")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Region-layered pose blending and variant generation.")
+    parser.add_argument("sources", nargs="*", help="Combine mode: pose files/directories (default: poses/ and models/saved_poses/).")
+    parser.add_argument("--model", required=True, help="GLB whose skeleton the poses belong to.")
+    parser.add_argument("--base", help="Layer mode: base pose ref ('file.json' or 'file.json#Name').")
+    parser.add_argument("--layer", action="append", default=[], help="Layer mode: REGIONS=POSE[@WEIGHT], applied in order.")
+    parser.add_argument("--name", help="Layer mode: name of the resulting pose.")
+    parser.add_argument("--combine", action="store_true", help="Enumerate region combinations across the library.")
+    parser.add_argument("--regions", nargs="+", default=["Torso,Head", "Arms,Hands", "Legs,Feet"],
+                        help="Combine mode: one comma-separated group/bone list per region; unlisted bones follow the first.")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Combine mode: max combinations (default %(default)s).")
+    parser.add_argument("--sample", type=int, help="Combine mode: draw this many random combinations instead of enumerating.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--feather", type=float, default=0.0, help="Weight handed across region seams (0..0.5).")
+    parser.add_argument("--dedupe", type=float, default=0.0, help="Drop results closer than this many degrees (RMS) to any other pose.")
+    parser.add_argument("--min-coverage", type=float, default=0.9,
+                        help="Combine mode: skip poses that supply fewer than this fraction of the model's bones.")
+    parser.add_argument("-o", "--output-dir", help="Output directory (default: poses/blended/<model>).")
+    args = parser.parse_args(argv)
+    if not args.combine and not (args.base and args.layer):
+        parser.error("give --base with one or more --layer, or --combine")
+
+    model_path = args.model if os.path.isabs(args.model) else os.path.join(REPO_ROOT, args.model)
+    skeleton = load_skeleton(model_path)
+    mapping = load_bone_mappings().get(repo_relative(model_path))
+    if not mapping:
+        print(f"  WARNING: No bone_mappings.json entry for {repo_relative(model_path)}; only bone names can be used as regions.")
+    groups = bone_groups(skeleton, mapping)
+    print(f"--- Blending poses for {repo_relative(model_path)} ---")
+
+    t0 = time.perf_counter()
+    results = run_combine(args, skeleton, groups) if args.combine else run_layer(args, skeleton, groups)
+    elapsed = time.perf_counter() - t0
+    if not results:
+        print("No poses generated.")
+        return 1
+
+    model_stem = os.path.splitext(os.path.basename(model_path))[0]
+    output_dir = args.output_dir or os.path.join(DEFAULT_OUTPUT_BASE, model_stem)
+    try:
+        write_outputs(output_dir, results, skeleton)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+    print(f"  Generated {len(results)} pose(s) in {elapsed * 1000:.1f} ms -> {repo_relative(output_dir)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
@@ -0,0 +1,174 @@
+# START OF FILE: pose_bundle.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# Converts between pose files and the bundle format the browser pose store
+# (js/pose_store.js) imports and exports:
+#   pack   - extractor output, models/saved_poses/*.json or any pose folder ->
+#            one bundle for a model (poser.html "Import Poses"); bone names are
+#            normalized to the GLB's runtime names, and --from-blender converts
+#            Blender pose-bone values to glTF node-local TRS first (see
+#            pose_space.py)
+#   unpack - a bundle (poser.html "Export Poses") -> pose-schema JSON files and
+#            a manifest per model
+#
+# Bundle: {"format": "shadow-room-pose-bundle", "version": 1,
+#          "boneSets": {id: [boneName, ...]},
+#          "poses": [{"model", "name", "boneSet", "trs"}]}
+# where trs is base64 of little-endian float32, bones x 10 (position,
+# quaternion xyzw, scale), and id is "<count>-<FNV-1a 32 of the names>" so
+# identical bone lists are stored once (same id as boneSetId() in JS).
+#
+# Usage:  python scripts/pose_bundle.py pack [sources] --model models/femalebase0.glb
+#             [--from-blender [--quat-order wxyz] [--rest-dump F]] [-o bundle.json]
+#         python scripts/pose_bundle.py unpack bundle.json [-o DIR]
+import argparse
+import base64
+import json
+import os
+import sys
+
+import numpy as np
+
+from glb_utils import REPO_ROOT, load_skeleton, read_poseable_models, repo_relative
+from pose_math import ROT
+from pose_space import AXIS_CHANGE, BONE_AXES, QUAT_ORDERS, basis_skeleton, blender_to_gltf, load_rest_dump
+from pose_utils import DEFAULT_POSE_ROOTS, load_pose_library, poses_to_array, safe_pose_filename, write_manifest, write_pose_file
+
+# --- Configuration ---
+BUNDLE_FORMAT = "shadow-room-pose-bundle"
+BUNDLE_VERSION = 1
+DEFAULT_UNPACK_DIR = os.path.join(REPO_ROOT, "poses", "bundles")
+
+
+# --- Helper Functions ---
+def bone_set_id(names):
+    """'<count>-<FNV-1a 32 hex>' of the UTF-8 names joined by newlines (matches pose_store.js)."""
+    h = 0x811C9DC5
+    for byte in "\n".join(names).encode("utf-8"):
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return f"{len(names)}-{h:08x}"
+
+
+def encode_trs(rows):
+    """(bones, 10) array -> base64 little-endian float32."""
+    return base64.b64encode(np.ascontiguousarray(rows, dtype="<f4").tobytes()).decode("ascii")
+
+
+def decode_trs(text, bones):
+    """Inverse of encode_trs -> (bones, 10) float64 array."""
+    data = np.frombuffer(base64.b64decode(text), dtype="<f4")
+    if data.size != bones * 10:
+        raise ValueError(f"payload holds {data.size} floats, expected {bones * 10}")
+    return data.reshape(bones, 10).astype(np.float64)
+
+
+def new_bundle():
+    return {"format": BUNDLE_FORMAT, "version": BUNDLE_VERSION, "boneSets": {}, "poses": []}
+
+
+def read_bundle(path):
+    with open(path, "r", encoding="utf-8") as f:
+        bundle = json.load(f)
+    if not isinstance(bundle, dict) or bundle.get("format") != BUNDLE_FORMAT or bundle.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"'{path}' is not a {BUNDLE_FORMAT} v{BUNDLE_VERSION} file.")
+    return bundle
+
+
+# --- Pack / Unpack ---
+def pack(poses, values, present, names, model_key, bundle=None):
+    """Adds poses (rows of `values`, bones where `present`) to a bundle; returns it."""
+    bundle = bundle or new_bundle()
+    for row, pose in enumerate(poses):
+        bones = np.flatnonzero(present[row])
+        bone_names = [names[b] for b in bones]
+        set_id = bone_set_id(bone_names)
+        bundle["boneSets"].setdefault(set_id, bone_names)
+        bundle["poses"].append({"model": model_key, "name": pose.name, "boneSet": set_id, "trs": encode_trs(values[row, bones])})
+    return bundle
+
+
+def unpack(bundle, output_dir):
+    """Writes every bundle pose as a pose-schema file under <output_dir>/<model stem>/. Returns {model: count}."""
+    manifests = {}
+    for pose in bundle["poses"]:
+        names = bundle["boneSets"].get(pose["boneSet"])
+        if names is None:
+            print(f"  WARNING: Skipping '{pose['name']}': bone set {pose['boneSet']} is missing.")
+            continue
+        try:
+            rows = decode_trs(pose["trs"], len(names)).tolist()
+        except ValueError as e:
+            print(f"  WARNING: Skipping '{pose['name']}': {e}")
+            continue
+        model_dir = os.path.join(output_dir, os.path.splitext(os.path.basename(pose["model"]))[0])
+        filename = f"{safe_pose_filename(pose['name'])}.json"
+        write_pose_file(os.path.join(model_dir, filename),
+                        [{"name": name, "position": r[0:3], "quaternion": r[3:7], "scale": r[7:10]} for name, r in zip(names, rows)])
+        manifests.setdefault(model_dir, {})[pose["name"]] = repo_relative(os.path.join(model_dir, filename))
+    for model_dir, entries in manifests.items():
+        write_manifest(os.path.join(model_dir, "manifest.json"), entries)
+    return {repo_relative(d): len(e) for d, e in manifests.items()}
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack pose files into a pose-store bundle, or unpack a bundle into pose files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("pack", help="Pose files/folders -> bundle.")
+    p.add_argument("sources", nargs="*", help="Pose files/directories (default: poses/ and models/saved_poses/).")
+    p.add_argument("--model", required=True, help="GLB the poses are for; also the store key (e.g. models/femalebase0.glb).")
+    p.add_argument("--from-blender", action="store_true", help="Sources hold Blender pose-bone values (extractor output); convert to node-local TRS.")
+    p.add_argument("--rest-dump", help="With --from-blender: rest dump from export_rest_dump.py instead of the GLB skin.")
+    p.add_argument("--up", choices=sorted(AXIS_CHANGE), default="y", help="With --from-blender: GLB up axis (default: y).")
+    p.add_argument("--bone-axes", choices=BONE_AXES, default="blender", help="With --from-blender: bone frames in the GLB (default: blender).")
+    p.add_argument("--quat-order", choices=sorted(QUAT_ORDERS), default="xyzw", help="Quaternion order in the sources (extract_poses.py writes wxyz).")
+    p.add_argument("--min-coverage", type=float, default=0.5, help="Skip poses supplying fewer than this fraction of the model's bones.")
+    p.add_argument("-o", "--output", help="Bundle path (default: <model>.bundle.json in the current directory).")
+    u = sub.add_parser("unpack", help="Bundle -> pose files + manifest per model.")
+    u.add_argument("bundle", help="Bundle exported from poser.html or written by 'pack'.")
+    u.add_argument("-o", "--output-dir", default=DEFAULT_UNPACK_DIR, help="Output directory (default: poses/bundles).")
+    args = parser.parse_args(argv)
+
+    if args.command == "unpack":
+        try:
+            bundle = read_bundle(args.bundle)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: {e}")
+            return 1
+        print(f"--- Unpacking '{args.bundle}' ({len(bundle['poses'])} poses, {len(bundle['boneSets'])} bone sets) ---")
+        counts = unpack(bundle, args.output_dir)
+        for model_dir, count in counts.items():
+            print(f"  {count} pose(s) -> '{model_dir}'")
+        return 0 if counts else 1
+
+    model_path = args.model if os.path.isabs(args.model) else os.path.join(REPO_ROOT, args.model)
+    model_key = repo_relative(model_path).replace("\\", "/")
+    if model_key not in read_poseable_models():
+        print(f"  WARNING: '{model_key}' is not a poseable model in js/registry.json; the app won't list these poses.")
+    skeleton = load_rest_dump(args.rest_dump, args.up, args.bone_axes) if args.rest_dump else load_skeleton(model_path)
+    poses = load_pose_library(args.sources or DEFAULT_POSE_ROOTS)
+    values, present = poses_to_array(poses, basis_skeleton(skeleton) if args.from_blender else skeleton)
+    keep = np.flatnonzero(present.mean(axis=1) >= args.min_coverage) if poses else np.zeros(0, dtype=int)
+    if len(keep) < len(poses):
+        print(f"  Skipping {len(poses) - len(keep)} pose(s) that don't fit {model_key}.")
+    if len(keep) == 0:
+        print("No poses to pack.")
+        return 1
+    values = values[keep]
+    values[..., ROT] = values[..., ROT][..., QUAT_ORDERS[args.quat_order]]
+    if args.from_blender:
+        values = blender_to_gltf(values, skeleton.rest, args.up, args.bone_axes)
+
+    bundle = pack([poses[i] for i in keep], values, present[keep], skeleton.names, model_key)
+    output = args.output or f"{os.path.splitext(os.path.basename(model_path))[0]}.bundle.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, separators=(",", ":"))
+    print(f"--- Packed {len(bundle['poses'])} pose(s) for {model_key} ({len(bundle['boneSets'])} bone set(s), "
+          f"{os.path.getsize(output) / 1024:.1f} KB) -> '{output}' ---")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
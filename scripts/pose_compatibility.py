@@ -0,0 +1,212 @@
+# START OF FILE: pose_compatibility.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# Builds a pose x model compatibility matrix so we know up front which poses
+# fit which GLB instead of finding out in applyPoseData() via notFoundCount.
+# saved_poses mixes a 62-bone rig (tpose.json) with the 159-bone pose-pack rig
+# (backflipevadefemale0.json); this records, per pose and model:
+#   coverage   - fraction of the pose's bones that exist in the model
+#   missing    - pose bones the model doesn't have
+#   extra      - model bones the pose leaves untouched
+#   normalized - bones that only match after Three.js name sanitizing
+#                (e.g. 'spine.001' -> 'spine001')
+#
+# Bone sets are packed into uint64 bitmasks over a shared vocabulary, so the
+# whole matrix is a handful of broadcast AND/popcount operations.
+#
+# Usage:  python scripts/pose_compatibility.py [pose dirs/files ...] [-o out.json]
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from glb_utils import MODELS_DIR, REPO_ROOT, list_model_files, load_skeleton, repo_relative
+from pose_utils import DEFAULT_POSE_ROOTS, load_pose_library, normalize_bone_name
+
+# --- Configuration ---
+INDEX_FORMAT = "shadow-room-pose-compat/1"
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, "models", "pose_compatibility.json")
+DEFAULT_MIN_COVERAGE = 0.95
+DETAIL_NAME_LIMIT = 20  # bone names listed per missing/extra entry with --details
+
+
+# --- Bitmask Helpers ---
+class BoneVocabulary:
+    """Maps normalized bone names to bit positions."""
+
+    def __init__(self):
+        self.index = {}
+        self.names = []
+
+    def bit(self, name):
+        i = self.index.get(name)
+        if i is None:
+            i = self.index[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    @property
+    def words(self):
+        return max(1, (len(self.names) + 63) // 64)
+
+
+def pack_bitmasks(bit_lists, words):
+    """Packs a list of bit-index lists into an (N, words) uint64 array."""
+    masks = np.zeros((len(bit_lists), words), dtype=np.uint64)
+    lengths = np.fromiter((len(b) for b in bit_lists), dtype=np.int64, count=len(bit_lists))
+    if lengths.sum() == 0:
+        return masks
+    rows = np.repeat(np.arange(len(bit_lists)), lengths)
+    bits = np.fromiter((b for bl in bit_lists for b in bl), dtype=np.int64, count=int(lengths.sum()))
+    values = np.left_shift(np.uint64(1), (bits % 64).astype(np.uint64))
+    np.bitwise_or.at(masks, (rows, bits // 64), values)
+    return masks
+
+
+if hasattr(np, "bitwise_count"):
+    def popcount(masks):
+        """Number of set bits along the last axis."""
+        return np.bitwise_count(masks).sum(axis=-1, dtype=np.int64)
+else:  # numpy < 2.0
+    _BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(masks):
+        """Number of set bits along the last axis."""
+        as_bytes = np.ascontiguousarray(masks).view(np.uint8)
+        return _BYTE_COUNTS[as_bytes].reshape(masks.shape[:-1] + (-1,)).sum(axis=-1, dtype=np.int64)
+
+
+def mask_to_names(mask, vocab):
+    """Expands one (words,) bitmask back to bone names."""
+    bits = np.unpackbits(mask.view(np.uint8), bitorder="little")
+    return [vocab.names[i] for i in np.flatnonzero(bits[:len(vocab.names)])]
+
+
+# --- Matrix ---
+def build_masks(poses, skeletons):
+    """Returns (vocab, pose_masks, renamed_masks, model_masks)."""
+    vocab = BoneVocabulary()
+    model_bits = [[vocab.bit(n) for n in sk.names] for sk in skeletons]
+    pose_bits, renamed_bits = [], []
+    seen = {}  # poses from one rig share a bone list; resolve each list once
+    resolved = {}  # raw bone name -> (bit, renamed?); normalizing is the slow part for mixed rigs
+    for pose in poses:
+        key = tuple(pose.bone_names())
+        cached = seen.get(key)
+        if cached is None:
+            bits, renamed = [], []
+            for raw in key:
+                hit = resolved.get(raw)
+                if hit is None:
+                    norm = normalize_bone_name(raw)
+                    hit = resolved[raw] = (vocab.bit(norm), norm != raw)
+                bits.append(hit[0])
+                if hit[1]:
+                    renamed.append(hit[0])
+            cached = seen[key] = (bits, renamed)
+        pose_bits.append(cached[0])
+        renamed_bits.append(cached[1])
+    words = vocab.words
+    return (vocab, pack_bitmasks(pose_bits, words), pack_bitmasks(renamed_bits, words),
+            pack_bitmasks(model_bits, words))
+
+
+def compute_matrix(pose_masks, renamed_masks, model_masks):
+    """Vectorized pose x model counts. Returns dict of (P, M) int arrays plus coverage."""
+    pm = pose_masks[:, None, :]
+    mm = model_masks[None, :, :]
+    matched = popcount(pm & mm)
+    pose_count = popcount(pose_masks)[:, None]
+    model_count = popcount(model_masks)[None, :]
+    coverage = np.divide(matched, pose_count, out=np.zeros(matched.shape, dtype=np.float64),
+                         where=pose_count > 0)
+    return {
+        "matched": matched,
+        "missing": pose_count - matched,
+        "extra": model_count - matched,
+        "normalized": popcount(renamed_masks[:, None, :] & mm),
+        "coverage": coverage,
+    }
+
+
+def build_index(poses, models, skeletons, min_coverage, details=False):
+    """Builds the JSON-serializable compatibility index."""
+    vocab, pose_masks, renamed_masks, model_masks = build_masks(poses, skeletons)
+    t0 = time.perf_counter()
+    result = compute_matrix(pose_masks, renamed_masks, model_masks)
+    elapsed = time.perf_counter() - t0
+
+    compatible = result["coverage"] >= min_coverage
+    index = {
+        "format": INDEX_FORMAT,
+        "minCoverage": min_coverage,
+        "models": [{"path": m, "boneCount": len(sk)} for m, sk in zip(models, skeletons)],
+        "poses": [{"id": p.id, "name": p.name, "gender": p.gender, "boneCount": len(p.bones)}
+                  for p in poses],
+        # Rows are poses, columns are models (same order as the lists above).
+        "matrix": {
+            "coverage": np.round(result["coverage"], 4).tolist(),
+            "missing": result["missing"].tolist(),
+            "extra": result["extra"].tolist(),
+            "normalized": result["normalized"].tolist(),
+        },
+        "byModel": {m: [poses[i].id for i in np.flatnonzero(compatible[:, j])]
+                    for j, m in enumerate(models)},
+    }
+    if details:
+        index["details"] = {}
+        for i, pose in enumerate(poses):
+            entry = {}
+            for j, model in enumerate(models):
+                missing = mask_to_names(pose_masks[i] & ~model_masks[j], vocab)
+                extra = mask_to_names(model_masks[j] & ~pose_masks[i], vocab)
+                entry[model] = {"missing": missing[:DETAIL_NAME_LIMIT], "extra": extra[:DETAIL_NAME_LIMIT]}
+            index["details"][pose.id] = entry
+    return index, elapsed
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the pose x model compatibility index.")
+    parser.add_argument("sources", nargs="*", help="Pose files/directories "
+                        "(default: poses/ and models/saved_poses/).")
+    parser.add_argument("--models", nargs="*", help="GLB paths (default: every models/*.glb).")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="Index JSON path.")
+    parser.add_argument("--min-coverage", type=float, default=DEFAULT_MIN_COVERAGE,
+                        help="Coverage needed to list a pose under byModel (default %(default)s).")
+    parser.add_argument("--details", action="store_true", help="Include missing/extra bone names.")
+    args = parser.parse_args(argv)
+
+    model_paths = args.models or list_model_files(MODELS_DIR)
+    models, skeletons = [], []
+    for path in model_paths:
+        try:
+            skeletons.append(load_skeleton(path))
+            models.append(repo_relative(path))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"  WARNING: Skipping model '{path}': {e}")
+
+    poses = load_pose_library(args.sources or DEFAULT_POSE_ROOTS)
+    print(f"--- Pose compatibility: {len(poses)} pose(s) x {len(models)} model(s) ---")
+    if not poses or not models:
+        print("Nothing to compare.")
+        return 1
+
+    index, elapsed = build_index(poses, models, skeletons, args.min_coverage, args.details)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+
+    for j, model in enumerate(models):
+        print(f"  {model}: {len(index['byModel'][model])}/{len(poses)} pose(s) at >= "
+              f"{args.min_coverage:.0%} coverage")
+    print(f"Matrix computed in {elapsed * 1000:.2f} ms. Index saved: '{args.output}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
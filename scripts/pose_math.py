@@ -0,0 +1,186 @@
+# START OF FILE: pose_math.py
+# Batched transform math for the offline pose tools (numpy).
+# Conventions match the pose JSON / Three.js: quaternions are [x, y, z, w],
+# a TRS row is 10 floats [tx ty tz, qx qy qz qw, sx sy sz], and every
+# function broadcasts over leading axes (poses, bones, ...).
+import numpy as np
+
+from glb_utils import IDENTITY_TRS  # noqa: F401  (re-exported for the pose tools)
+
+# --- Layout ---
+POS = slice(0, 3)
+ROT = slice(3, 7)
+SCL = slice(7, 10)
+
+
+# --- Quaternions ---
+def quat_mul(a, b):
+    """Hamilton product a*b (apply b, then a)."""
+    ax, ay, az, aw = np.moveaxis(a, -1, 0)
+    bx, by, bz, bw = np.moveaxis(b, -1, 0)
+    return np.stack([
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    ], axis=-1)
+
+
+def quat_conj(q):
+    """Conjugate (== inverse for unit quaternions)."""
+    return q * np.array([-1.0, -1.0, -1.0, 1.0])
+
+
+def quat_normalize(q):
+    """Unit-length quaternions; zero-length input becomes identity."""
+    n = np.linalg.norm(q, axis=-1, keepdims=True)
+    out = np.divide(q, n, out=np.zeros_like(q, dtype=np.float64), where=n > 1e-12)
+    out[..., 3] = np.where(n[..., 0] > 1e-12, out[..., 3], 1.0)
+    return out
+
+
+def quat_rotate(q, v):
+    """Rotates vectors v (..., 3) by unit quaternions q (..., 4)."""
+    u = q[..., :3]
+    w = q[..., 3:4]
+    t = 2.0 * np.cross(u, v)
+    return v + w * t + np.cross(u, t)
+
+
+def quat_canonical(q):
+    """Flips sign so w >= 0 (q and -q are the same rotation)."""
+    return np.where(q[..., 3:4] < 0, -q, q)
+
+
+def quat_angle(q):
+    """Rotation angle in radians of unit quaternions (0..pi)."""
+    w = np.clip(np.abs(q[..., 3]), 0.0, 1.0)
+    return 2.0 * np.arccos(w)
+
+
+def quat_angle_between(a, b):
+    """Angle in radians of the rotation taking a to b."""
+    d = np.abs(np.sum(a * b, axis=-1))
+    return 2.0 * np.arccos(np.clip(d, 0.0, 1.0))
+
+
+def quat_align(q, reference):
+    """Flips q where needed so it lies in the same hemisphere as `reference` (shortest arc)."""
+    return np.where(np.sum(q * reference, axis=-1, keepdims=True) < 0, -q, q)
+
+
+def quat_slerp_raw(a, b, t):
+    """Spherical interpolation without the shortest-arc flip; t broadcasts against a/b[..., 0]."""
+    t = np.asarray(t, dtype=np.float64)[..., None]
+    dot = np.clip(np.sum(a * b, axis=-1, keepdims=True), -1.0, 1.0)
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+    near = np.abs(sin_theta) < 1e-6
+    safe = np.where(near, 1.0, sin_theta)
+    wa = np.where(near, 1.0 - t, np.sin((1.0 - t) * theta) / safe)
+    wb = np.where(near, t, np.sin(t * theta) / safe)
+    return quat_normalize(wa * a + wb * b)
+
+
+def quat_slerp(a, b, t):
+    """Spherical interpolation along the shortest arc."""
+    return quat_slerp_raw(a, quat_align(b, a), t)
+
+
+def quat_weighted_average(quats, weights, axis=0):
+    """Normalized weighted average of unit quaternions along `axis` (weights: quats.shape[:-1]).
+
+    Every input is first flipped into the hemisphere of the most heavily
+    weighted one, so q/-q ambiguity never cancels rotations out. Accurate for
+    the spreads found between poses of one rig; exact for one-hot weights.
+    """
+    axis = axis % (quats.ndim - 1)
+    ref = np.take_along_axis(quats, np.expand_dims(np.argmax(weights, axis=axis), axis)[..., None], axis=axis)
+    aligned = quat_align(quats, ref)
+    return quat_normalize(np.sum(aligned * weights[..., None], axis=axis))
+
+
+def quat_log(q):
+    """Log map of unit quaternions -> (..., 3) rotation vectors (half-angle * axis)."""
+    v = q[..., :3]
+    n = np.linalg.norm(v, axis=-1, keepdims=True)
+    angle = np.arctan2(n, q[..., 3:4])
+    return np.where(n > 1e-12, v * (angle / np.where(n > 1e-12, n, 1.0)), v)
+
+
+def quat_exp(v):
+    """Inverse of quat_log."""
+    n = np.linalg.norm(v, axis=-1, keepdims=True)
+    scale = np.where(n > 1e-12, np.sin(n) / np.where(n > 1e-12, n, 1.0), 1.0)
+    return np.concatenate([v * scale, np.cos(n)], axis=-1)
+
+
+def squad_controls(keys):
+    """Hemisphere-aligned keys and squad control points for a (K, ..., 4) key sequence."""
+    keys = keys.copy()
+    for k in range(1, len(keys)):
+        keys[k] = quat_align(keys[k], keys[k - 1])
+    prev = np.concatenate([keys[:1], keys[:-1]])
+    nxt = np.concatenate([keys[1:], keys[-1:]])
+    inv = quat_conj(keys)
+    tangent = -0.25 * (quat_log(quat_mul(inv, nxt)) + quat_log(quat_mul(inv, prev)))
+    return keys, quat_mul(keys, quat_exp(tangent))
+
+
+def quat_squad(q0, q1, s0, s1, t):
+    """Spherical cubic interpolation between aligned keys q0, q1 with control points s0, s1."""
+    t = np.asarray(t, dtype=np.float64)
+    outer = quat_slerp_raw(q0, q1, t)
+    inner = quat_slerp_raw(s0, s1, t)
+    return quat_slerp_raw(outer, inner, 2.0 * t * (1.0 - t))
+
+
+# --- TRS Composition ---
+def trs_compose(parent, child):
+    """parent ∘ child for TRS rows (exact for uniform/positive scale, like bone chains)."""
+    out = np.empty(np.broadcast_shapes(parent.shape, child.shape), dtype=np.float64)
+    out[..., POS] = parent[..., POS] + quat_rotate(parent[..., ROT], parent[..., SCL] * child[..., POS])
+    out[..., ROT] = quat_mul(parent[..., ROT], child[..., ROT])
+    out[..., SCL] = parent[..., SCL] * child[..., SCL]
+    return out
+
+
+def trs_inverse_apply(parent, world):
+    """Solves parent ∘ local == world for local (inverse of trs_compose)."""
+    out = np.empty(np.broadcast_shapes(parent.shape, world.shape), dtype=np.float64)
+    inv_rot = quat_conj(parent[..., ROT])
+    scale = np.where(np.abs(parent[..., SCL]) > 1e-12, parent[..., SCL], 1.0)
+    out[..., POS] = quat_rotate(inv_rot, world[..., POS] - parent[..., POS]) / scale
+    out[..., ROT] = quat_mul(inv_rot, world[..., ROT])
+    out[..., SCL] = world[..., SCL] / scale
+    return out
+
+
+# --- Forward Kinematics ---
+def forward_kinematics(skeleton, local):
+    """World TRS for every bone.
+
+    `local` is (..., bones, 10) node-local TRS in skeleton order; parents always
+    precede children, so one pass over the bones suffices and each step is
+    vectorized across all leading (pose) axes.
+    """
+    world = np.empty(local.shape, dtype=np.float64)
+    for b, parent in enumerate(skeleton.parents):
+        base = skeleton.offsets[b]
+        if parent >= 0:
+            base = world[..., parent, :] if skeleton.identity_offsets[b] else trs_compose(world[..., parent, :], base)
+        world[..., b, :] = trs_compose(base, local[..., b, :])
+    return world
+
+
+def parent_world(skeleton, world, b):
+    """World TRS of bone b's parent frame (including any non-bone offset nodes)."""
+    parent = skeleton.parents[b]
+    base = skeleton.offsets[b]
+    if parent < 0:
+        return np.broadcast_to(base, world.shape[:-2] + (10,))
+    if skeleton.identity_offsets[b]:
+        return world[..., parent, :]
+    return trs_compose(world[..., parent, :], base)
+
+# END OF FILE
@@ -0,0 +1,496 @@
+# START OF FILE: pose_service.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# Local asyncio HTTP service over the pose library (extractor output in
+# poses/, .json and .posebin, and models/saved_poses/), so a client can fetch
+# a whole category in one round trip instead of one file per pose.
+#
+#   GET  /poses?gender=&catalog=&boneSet=&q=&ids=&offset=&limit=
+#                         pose metadata (id, name, gender, catalog, boneSet, bones)
+#   GET  /poses/data?...  same filters + pagination, with the pose data
+#                         (&format=json | pose | bin)
+#   POST /poses/batch     {"ids": [...], "format": "json"} - poses by id
+#   GET  /bonesets        {boneSetId: [boneName, ...]}
+#   GET  /stats           index size, cache hits/misses/evictions/bytes
+#
+# gender and boneSet take comma-separated lists; catalog is the pose's folder
+# relative to the repo (poses/female, models/saved_poses, ...) and matches as
+# a prefix; q is a case-insensitive name substring. Pages are in id order,
+# `next` is the offset of the following page (null on the last one).
+#
+# Formats (same bone-set ids and TRS layout as pose bundles, see
+# pose_bundle.py: bones x 10 float32 position, quaternion xyzw, scale):
+#   json - {"total", "offset", "next", "boneSets": {id: names},
+#           "poses": [{id, name, gender, catalog, boneSet, trs: base64}]}
+#   pose - {"total", "offset", "next", "poses": {id: [{name, position,
+#           quaternion, scale}, ...]}} (the app's pose schema; largest)
+#   bin  - b"SRPQ", uint16 version, uint16 reserved, uint32 total, offset,
+#          next (0xFFFFFFFF = none), bone-set count, pose count; per bone set:
+#          uint32 id length + id, uint32 name count, per name uint16 length +
+#          UTF-8; per pose: uint16 id length + id, uint16 name length + name,
+#          uint32 bone-set index; zero padding to 4 bytes; then every pose's
+#          float32 TRS rows back to back, little-endian (one Float32Array view)
+#
+# Decoded poses live in an LRU bounded by --cache-mb; misses are read on a
+# thread pool, and concurrent requests for the same file share one read. The
+# library is rescanned every --rescan seconds (changed files only).
+#
+# Usage:  python scripts/pose_service.py [--port 8010] [--cache-mb 64] [--rescan 2] [roots...]
+#         python scripts/pose_service_loadtest.py   (throughput / latency percentiles)
+import argparse
+import asyncio
+import collections
+import json
+import os
+import struct
+import sys
+import time
+import urllib.parse
+
+import numpy as np
+
+from glb_utils import IDENTITY_TRS, repo_relative
+from pose_bundle import bone_set_id, encode_trs
+from pose_utils import DEFAULT_POSE_ROOTS, NON_POSE_FILES, PoseRecord, gender_from_path, read_pose_file
+from pose_writer import decode_binary_pose
+
+# --- Configuration ---
+POSE_EXTENSIONS = (".json", ".posebin")
+SKIP_SUFFIXES = (".rest.json", ".bundle.json", ".trace.json")  # Rest dumps, bundles and profiler traces aren't poses
+DEFAULT_PAGE = 100
+MAX_PAGE = 1000
+MAX_BODY = 1 << 20  # Bytes accepted in a POST body
+FORMATS = ("json", "pose", "bin")
+BIN_MAGIC = b"SRPQ"
+BIN_VERSION = 1
+NO_NEXT = 0xFFFFFFFF
+ENTRY_OVERHEAD = 200  # Approximate bytes of Python bookkeeping per cached pose, counted against the budget
+_BIN_HEADER = struct.Struct("<4sHHIIIII")
+STATUS_TEXT = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+# --- Helper Functions ---
+def bones_to_rows(bones):
+    """App-schema bone list -> (names, (bones, 10) float32); missing fields take the identity TRS."""
+    try:
+        rows = np.array([[*b["position"], *b["quaternion"], *b["scale"]] for b in bones], dtype=np.float32)
+        if rows.shape == (len(bones), 10):
+            return [b["name"] for b in bones], rows
+    except (KeyError, TypeError, ValueError):
+        pass
+    rows = np.tile(IDENTITY_TRS.astype(np.float32), (len(bones), 1))
+    for i, bone in enumerate(bones):
+        for field, start, width in (("position", 0, 3), ("quaternion", 3, 4), ("scale", 7, 3)):
+            value = bone.get(field)
+            if isinstance(value, (list, tuple)) and len(value) == width:
+                rows[i, start:start + width] = value
+    return [b["name"] for b in bones], rows
+
+
+def load_pose_file(path):
+    """Every pose in a .json or .posebin file -> [(name, bone names, rows)]."""
+    if path.endswith(".posebin"):
+        with open(path, "rb") as f:
+            poses = [(os.path.splitext(os.path.basename(path))[0], decode_binary_pose(f.read()))]
+    else:
+        poses = list(read_pose_file(path))
+    return [(name,) + bones_to_rows(bones) for name, bones in poses]
+
+
+def discover_files(roots):
+    found = []
+    for root in roots:
+        if os.path.isfile(root):
+            found.append(os.path.abspath(root))
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                lower = filename.lower()
+                if lower.endswith(POSE_EXTENSIONS) and not lower.endswith(SKIP_SUFFIXES) and filename not in NON_POSE_FILES:
+                    found.append(os.path.abspath(os.path.join(dirpath, filename)))
+    return found
+
+
+class PoseEntry:
+    """Index entry for one pose; the TRS rows themselves live in the PoseCache."""
+    __slots__ = ("id", "name", "path", "mtime_ns", "gender", "catalog", "bone_set", "bones")
+
+    def __init__(self, record, mtime_ns, bone_set, bones):
+        self.id = record.id
+        self.name = record.name
+        self.path = record.path
+        self.mtime_ns = mtime_ns
+        self.gender = record.gender
+        self.catalog = repo_relative(os.path.dirname(record.path)).replace("\\", "/")
+        self.bone_set = bone_set
+        self.bones = bones
+
+    def metadata(self):
+        return {"id": self.id, "name": self.name, "gender": self.gender, "catalog": self.catalog,
+                "boneSet": self.bone_set, "bones": self.bones}
+
+
+class PoseCache:
+    """LRU of decoded TRS rows keyed by (pose id, file mtime), evicted by total byte size."""
+
+    def __init__(self, budget_bytes):
+        self.budget = budget_bytes
+        self.entries = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        rows = self.entries.get(key)
+        if rows is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return rows
+
+    def put(self, key, rows):
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key).nbytes + ENTRY_OVERHEAD
+        self.entries[key] = rows
+        self.bytes += rows.nbytes + ENTRY_OVERHEAD
+        while self.bytes > self.budget and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted.nbytes + ENTRY_OVERHEAD
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries": len(self.entries), "bytes": self.bytes, "budget": self.budget, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions, "hitRate": round(self.hits / lookups, 4) if lookups else None}
+
+
+class PoseLibrary:
+    """Pose index + bone-set table + cache; file reads run on the default executor."""
+
+    def __init__(self, roots, cache):
+        self.roots = roots
+        self.cache = cache
+        self.entries = {}  # id -> PoseEntry
+        self.ordered = []  # Entries sorted by id (page order)
+        self.bone_sets = {}  # id -> [names]
+        self.files = {}  # path -> (mtime_ns, [pose ids])
+        self.loading = {}  # path -> Future of an in-flight read
+        self.scanned_at = None
+
+    def scan(self):
+        """Reads new or changed files (blocking; run in the executor). Returns a state for apply()."""
+        read, files, entries, bone_sets, loaded = 0, {}, {}, dict(self.bone_sets), []
+        for path in discover_files(self.roots):
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            known = self.files.get(path)
+            if known and known[0] == mtime_ns:
+                files[path] = known
+                entries.update((pose_id, self.entries[pose_id]) for pose_id in known[1])
+                continue
+            try:
+                poses = load_pose_file(path)
+            except (OSError, ValueError, KeyError, struct.error) as e:
+                print(f"  WARNING: Skipping unreadable pose file '{repo_relative(path)}': {e}")
+                continue
+            read += 1
+            ids = []
+            for name, names, rows in poses:
+                set_id = bone_set_id(names)
+                bone_sets.setdefault(set_id, names)
+                entry = PoseEntry(PoseRecord(name, path, None, gender_from_path(path)), mtime_ns, set_id, len(names))
+                entries[entry.id] = entry
+                ids.append(entry.id)
+                loaded.append(((entry.id, mtime_ns), rows))
+            files[path] = (mtime_ns, ids)
+        used = {e.bone_set for e in entries.values()}
+        return {"read": read, "files": files, "entries": entries, "loaded": loaded,
+                "boneSets": {k: v for k, v in bone_sets.items() if k in used}}
+
+    def apply(self, state):
+        """Swaps in a scan() result (on the event loop thread, which owns the cache). Returns (read, dropped)."""
+        dropped = len(self.files.keys() - state["files"].keys())
+        self.files, self.entries, self.bone_sets = state["files"], state["entries"], state["boneSets"]
+        self.ordered = sorted(self.entries.values(), key=lambda e: e.id)
+        for key, rows in state["loaded"]:
+            self.cache.put(key, rows)
+        self.scanned_at = time.time()
+        return state["read"], dropped
+
+    async def rescan(self):
+        return self.apply(await asyncio.get_running_loop().run_in_executor(None, self.scan))
+
+    def query(self, gender=None, catalog=None, bone_sets=None, text=None, ids=None):
+        if ids is not None:
+            return [self.entries[i] for i in ids if i in self.entries]
+        result = self.ordered
+        if gender:
+            result = [e for e in result if e.gender in gender]
+        if catalog:
+            result = [e for e in result if e.catalog == catalog or e.catalog.startswith(catalog.rstrip("/") + "/")]
+        if bone_sets:
+            result = [e for e in result if e.bone_set in bone_sets]
+        if text:
+            result = [e for e in result if text in e.name.lower()]
+        return result
+
+    async def _read_file(self, path):
+        """Reads a file once for any number of concurrent callers and refills the cache."""
+        future = self.loading.get(path)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(None, load_pose_file, path)
+            self.loading[path] = future
+            future.add_done_callback(lambda _: self.loading.pop(path, None))
+        poses = await asyncio.shield(future)
+        mtime_ns = self.files.get(path, (None,))[0]
+        by_id = {}
+        for name, _, rows in poses:
+            pose_id = PoseRecord(name, path, None).id
+            self.cache.put((pose_id, mtime_ns), rows)
+            by_id[pose_id] = rows
+        return by_id
+
+    async def rows(self, entries):
+        """TRS rows for each entry (cache first; misses grouped by file)."""
+        found, missing = {}, collections.defaultdict(list)
+        for e in entries:
+            rows = self.cache.get((e.id, e.mtime_ns))
+            if rows is None:
+                missing[e.path].append(e.id)
+            else:
+                found[e.id] = rows
+        if missing:
+            results = await asyncio.gather(*(self._read_file(path) for path in missing), return_exceptions=True)
+            for path, result in zip(missing, results):
+                if isinstance(result, Exception):
+                    raise OSError(f"could not read '{repo_relative(path)}': {result}")
+                for pose_id in missing[path]:
+                    if pose_id in result:
+                        found[pose_id] = result[pose_id]
+        return [found.get(e.id) for e in entries]
+
+
+# --- Encoding ---
+def encode_json(page, rows, bone_sets):
+    poses = [dict(e.metadata(), trs=encode_trs(r)) for e, r in zip(page["entries"], rows) if r is not None]
+    used = {e.bone_set for e in page["entries"]}
+    body = {"total": page["total"], "offset": page["offset"], "next": page["next"],
+            "boneSets": {k: bone_sets[k] for k in sorted(used) if k in bone_sets}, "poses": poses}
+    return "application/json", json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+def encode_pose_schema(page, rows, bone_sets):
+    poses = {}
+    for e, r in zip(page["entries"], rows):
+        if r is None:
+            continue
+        values = r.astype(np.float64).tolist()
+        poses[e.id] = [{"name": n, "position": v[0:3], "quaternion": v[3:7], "scale": v[7:10]}
+                       for n, v in zip(bone_sets[e.bone_set], values)]
+    body = {"total": page["total"], "offset": page["offset"], "next": page["next"], "poses": poses}
+    return "application/json", json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+def encode_binary(page, rows, bone_sets):
+    pairs = [(e, r) for e, r in zip(page["entries"], rows) if r is not None]
+    set_ids = sorted({e.bone_set for e, _ in pairs})
+    set_index = {k: i for i, k in enumerate(set_ids)}
+    nxt = NO_NEXT if page["next"] is None else page["next"]
+    parts = [_BIN_HEADER.pack(BIN_MAGIC, BIN_VERSION, 0, page["total"], page["offset"], nxt, len(set_ids), len(pairs))]
+    for set_id in set_ids:
+        key = set_id.encode("utf-8")
+        parts.append(struct.pack("<I", len(key)) + key + struct.pack("<I", len(bone_sets[set_id])))
+        for name in bone_sets[set_id]:
+            raw = name.encode("utf-8")
+            parts.append(struct.pack("<H", len(raw)) + raw)
+    for e, _ in pairs:
+        pose_id, name = e.id.encode("utf-8"), e.name.encode("utf-8")
+        parts.append(struct.pack("<H", len(pose_id)) + pose_id + struct.pack("<H", len(name)) + name + struct.pack("<I", set_index[e.bone_set]))
+    head = b"".join(parts)
+    head += b"\0" * (-len(head) % 4)
+    floats = np.concatenate([r for _, r in pairs]).astype("<f4").tobytes() if pairs else b""
+    return "application/octet-stream", head + floats
+
+
+ENCODERS = {"json": encode_json, "pose": encode_pose_schema, "bin": encode_binary}
+
+
+# --- HTTP ---
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def json_response(status, body):
+    return status, "application/json", json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+def list_param(params, name):
+    values = [v for value in params.get(name, []) for v in value.split(",") if v]
+    return set(values) or None
+
+
+def int_param(params, name, default, low, high):
+    try:
+        value = int(params[name][-1]) if name in params else default
+    except ValueError:
+        raise RequestError(400, f"'{name}' must be an integer.")
+    return min(max(value, low), high)
+
+
+class PoseService:
+    def __init__(self, library):
+        self.library = library
+        self.requests = 0
+        self.started = time.time()
+
+    def select(self, params, ids=None):
+        """Filtered, paginated entries: {"entries", "total", "offset", "next"}."""
+        if ids is None and "ids" in params:
+            ids = [v for value in params["ids"] for v in value.split(",") if v]
+        text = params.get("q", [""])[-1].lower() or None
+        matched = self.library.query(list_param(params, "gender"), params.get("catalog", [None])[-1],
+                                     list_param(params, "boneSet"), text, ids)
+        offset = int_param(params, "offset", 0, 0, max(len(matched), 0))
+        limit = int_param(params, "limit", DEFAULT_PAGE if ids is None else MAX_PAGE, 1, MAX_PAGE)
+        page = matched[offset:offset + limit]
+        nxt = offset + len(page) if offset + len(page) < len(matched) else None
+        return {"entries": page, "total": len(matched), "offset": offset, "next": nxt}
+
+    async def data(self, page, fmt):
+        if fmt not in ENCODERS:
+            raise RequestError(400, f"Unknown format '{fmt}' (choose from {', '.join(FORMATS)}).")
+        rows = await self.library.rows(page["entries"])
+        content_type, body = ENCODERS[fmt](page, rows, self.library.bone_sets)
+        return 200, content_type, body
+
+    async def route(self, method, target, body):
+        url = urllib.parse.urlsplit(target)
+        params = urllib.parse.parse_qs(url.query)
+        path = url.path.rstrip("/") or "/"
+        if method == "OPTIONS":
+            return 204, "text/plain", b""
+        if path == "/poses/batch":
+            if method != "POST":
+                raise RequestError(405, "Use POST with {\"ids\": [...]}.")
+            try:
+                request = json.loads(body or b"{}")
+                ids = [str(i) for i in request["ids"]]
+            except (ValueError, KeyError, TypeError):
+                raise RequestError(400, "Body must be JSON with an \"ids\" list.")
+            return await self.data(self.select(params, ids), str(request.get("format", "json")))
+        if method not in ("GET", "HEAD"):
+            raise RequestError(405, f"{method} is not supported on {path}.")
+        if path == "/poses":
+            page = self.select(params)
+            return json_response(200, {"total": page["total"], "offset": page["offset"], "next": page["next"],
+                                       "poses": [e.metadata() for e in page["entries"]]})
+        if path == "/poses/data":
+            return await self.data(self.select(params), params.get("format", ["json"])[-1])
+        if path == "/bonesets":
+            return json_response(200, self.library.bone_sets)
+        if path == "/stats":
+            return json_response(200, {"poses": len(self.library.entries), "files": len(self.library.files),
+                                       "boneSets": len(self.library.bone_sets), "requests": self.requests,
+                                       "uptime": round(time.time() - self.started, 1), "scannedAt": self.library.scanned_at, "cache": self.library.cache.stats()})
+        raise RequestError(404, f"No endpoint {path}.")
+
+    async def handle_connection(self, reader, writer):
+        """HTTP/1.1 with keep-alive: one request at a time per connection."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                self.requests += 1
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY:
+                        raise RequestError(413, f"Body larger than {MAX_BODY} bytes.")
+                    body = await reader.readexactly(length) if length else b""
+                    status, content_type, payload = await self.route(method, target, body)
+                except RequestError as e:
+                    status, content_type, payload = json_response(e.status, {"error": str(e)})
+                except ValueError:
+                    status, content_type, payload = json_response(400, {"error": "Bad Content-Length."})
+                except OSError as e:
+                    status, content_type, payload = json_response(500, {"error": str(e)})
+                response = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+                            f"Content-Length: {len(payload)}\r\nAccess-Control-Allow-Origin: *\r\n"
+                            f"Access-Control-Allow-Methods: GET, POST, OPTIONS\r\nAccess-Control-Allow-Headers: Content-Type\r\n"
+                            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1")
+                writer.write(response if method == "HEAD" else response + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def rescan_forever(library, interval):
+    while True:
+        await asyncio.sleep(interval)
+        read, dropped = await library.rescan()
+        if read or dropped:
+            print(f"  Rescan: {read} file(s) read, {dropped} removed; {len(library.entries)} pose(s) indexed.")
+
+
+async def serve(args):
+    roots = args.roots or list(DEFAULT_POSE_ROOTS)
+    library = PoseLibrary([os.path.abspath(r) for r in roots], PoseCache(int(args.cache_mb * 1024 * 1024)))
+    t0 = time.perf_counter()
+    read, _ = await library.rescan()
+    print(f"--- Indexed {len(library.entries)} pose(s) from {read} file(s), {len(library.bone_sets)} bone set(s) "
+          f"in {time.perf_counter() - t0:.2f}s; cache {library.cache.bytes / 1024:.0f} KB of {args.cache_mb:g} MB ---")
+    service = PoseService(library)
+    server = await asyncio.start_server(service.handle_connection, args.host, args.port, backlog=args.backlog)
+    print(f"--- Pose service at http://{args.host}:{args.port}/ (Ctrl+C to stop) ---")
+    if args.rescan > 0:
+        asyncio.get_running_loop().create_task(rescan_forever(library, args.rescan))
+    async with server:
+        await server.serve_forever()
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve batched pose queries over the pose library.")
+    parser.add_argument("roots", nargs="*", help="Pose files/directories (default: poses/ and models/saved_poses/).")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8010, help="Port (default: 8010).")
+    parser.add_argument("--cache-mb", type=float, default=64, help="Byte budget of the decoded-pose LRU in MB (default: 64).")
+    parser.add_argument("--rescan", type=float, default=2.0, help="Seconds between library rescans; 0 disables (default: 2).")
+    parser.add_argument("--backlog", type=int, default=1024, help="Listen backlog for bursts of connections (default: 1024).")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("--- Stopped ---")
+    except OSError as e:
+        print(f"ERROR: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
@@ -0,0 +1,221 @@
+# START OF FILE: pose_service_loadtest.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# Load test for pose_service.py: opens --concurrency keep-alive connections
+# and sends --requests requests drawn from --mix:
+#   list  - GET /poses (a random metadata page)
+#   data  - GET /poses/data (a random gender/page with pose data)
+#   batch - POST /poses/batch (a random sample of --page pose ids)
+# then reports throughput (requests/s, MB/s), latency percentiles per request
+# kind and overall, errors, and the service's cache hit rate from /stats.
+#
+# Usage:  python scripts/pose_service.py &
+#         python scripts/pose_service_loadtest.py [--url http://127.0.0.1:8010] [-c 200] [-n 5000]
+#             [--mix list,data,batch] [--format bin] [--page 50] [--report report.json]
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import urllib.parse
+
+import numpy as np
+
+# --- Configuration ---
+KINDS = ("list", "data", "batch")
+PERCENTILES = (50, 90, 95, 99)
+
+
+# --- Helper Functions ---
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client over asyncio streams."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, target, body=b""):
+        """Returns (status, body bytes); reconnects once if the server closed the connection."""
+        for attempt in (0, 1):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            head = (f"{method} {target} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                    f"Content-Length: {len(body)}\r\n" + ("Content-Type: application/json\r\n" if body else "") + "\r\n")
+            try:
+                self.writer.write(head.encode("latin-1") + body)
+                await self.writer.drain()
+                status_and_headers = await self.reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, ConnectionError):
+                await self.close()
+                if attempt:
+                    raise
+                continue
+            lines = status_and_headers.decode("latin-1").split("\r\n")
+            status = int(lines[0].split(" ", 2)[1])
+            headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(":") for line in lines[1:] if line)}
+            payload = await self.reader.readexactly(int(headers.get("content-length", 0)))
+            if headers.get("connection", "").lower() == "close":
+                await self.close()
+            return status, payload
+        raise ConnectionError("unreachable")
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+
+async def fetch_ids(conn):
+    """Every pose id and gender, paging through /poses."""
+    poses, offset = [], 0
+    while offset is not None:
+        status, payload = await conn.request("GET", f"/poses?limit=1000&offset={offset}")
+        if status != 200:
+            raise ConnectionError(f"/poses returned HTTP {status}")
+        page = json.loads(payload)
+        poses.extend(page["poses"])
+        offset = page["next"]
+    return poses
+
+
+def make_request(kind, rng, poses, genders, args):
+    """(method, target, body) for one request of the given kind."""
+    if kind == "list":
+        return "GET", f"/poses?offset={rng.randrange(max(len(poses), 1))}&limit={args.page}", b""
+    if kind == "data":
+        query = {"format": args.format, "limit": args.page, "offset": rng.randrange(max(len(poses) - args.page, 1))}
+        if genders and rng.random() < 0.5:
+            query = {"gender": rng.choice(genders), "format": args.format, "limit": args.page}
+        return "GET", "/poses/data?" + urllib.parse.urlencode(query), b""
+    ids = [p["id"] for p in rng.sample(poses, min(args.page, len(poses)))]
+    return "POST", "/poses/batch", json.dumps({"ids": ids, "format": args.format}).encode("utf-8")
+
+
+async def worker(host, port, queue, rng, poses, genders, args, results):
+    conn = Connection(host, port)
+    try:
+        while True:
+            try:
+                kind = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            method, target, body = make_request(kind, rng, poses, genders, args)
+            t0 = time.perf_counter()
+            try:
+                status, payload = await conn.request(method, target, body)
+            except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                results.append((kind, time.perf_counter() - t0, None, 0, str(e)))
+                await conn.close()
+                continue
+            results.append((kind, time.perf_counter() - t0, status, len(payload), None))
+    finally:
+        await conn.close()
+
+
+def latency_stats(latencies):
+    ms = np.asarray(latencies) * 1000
+    stats = {f"p{p}": round(float(np.percentile(ms, p)), 2) for p in PERCENTILES}
+    stats.update(mean=round(float(ms.mean()), 2), max=round(float(ms.max()), 2))
+    return stats
+
+
+async def run(args):
+    url = urllib.parse.urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    control = Connection(host, port)
+    poses = await fetch_ids(control)
+    if not poses:
+        raise ConnectionError("the service has no poses indexed")
+    genders = sorted({p["gender"] for p in poses if p["gender"]})
+    mix = [k.strip() for k in args.mix.split(",") if k.strip()]
+    rng = random.Random(args.seed)
+    queue = asyncio.Queue()
+    for _ in range(args.requests):
+        queue.put_nowait(rng.choice(mix))
+
+    print(f"--- {args.requests} requests ({', '.join(mix)}; format {args.format}, page {args.page}) over "
+          f"{args.concurrency} connections to {args.url} ({len(poses)} poses) ---")
+    results = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(host, port, queue, random.Random(args.seed + i + 1), poses, genders, args, results)
+                           for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - t0
+    status, payload = await control.request("GET", "/stats")
+    service_stats = json.loads(payload) if status == 200 else None
+    await control.close()
+
+    ok = [r for r in results if r[2] == 200]
+    report = {"requests": len(results), "ok": len(ok), "errors": len(results) - len(ok), "seconds": round(elapsed, 3),
+              "requestsPerSecond": round(len(results) / elapsed, 1), "megabytesPerSecond": round(sum(r[3] for r in ok) / elapsed / 1e6, 2),
+              "latencyMs": latency_stats([r[1] for r in results]) if results else None, "byKind": {},
+              "cache": service_stats["cache"] if service_stats else None}
+    for kind in mix:
+        rows = [r for r in results if r[0] == kind]
+        if rows:
+            report["byKind"][kind] = {"requests": len(rows), "meanBytes": int(np.mean([r[3] for r in rows])),
+                                      "latencyMs": latency_stats([r[1] for r in rows])}
+    errors = {}
+    for r in results:
+        if r[2] != 200:
+            errors[r[4] or f"HTTP {r[2]}"] = errors.get(r[4] or f"HTTP {r[2]}", 0) + 1
+    report["errorKinds"] = errors
+    return report
+
+
+def print_report(report):
+    header = "".join(f"{'p' + str(p):>9}" for p in PERCENTILES) + f"{'max':>9}"
+    print(f"\n{'kind':<8}{'reqs':>7}{'bytes':>10}{header}")
+    for kind, k in report["byKind"].items():
+        lat = k["latencyMs"]
+        print(f"{kind:<8}{k['requests']:>7}{k['meanBytes']:>10}" + "".join(f"{lat['p' + str(p)]:>9.1f}" for p in PERCENTILES) + f"{lat['max']:>9.1f}")
+    lat = report["latencyMs"]
+    print(f"{'all':<8}{report['requests']:>7}{'':>10}" + "".join(f"{lat['p' + str(p)]:>9.1f}" for p in PERCENTILES) + f"{lat['max']:>9.1f}")
+    print(f"\n{report['requestsPerSecond']} req/s, {report['megabytesPerSecond']} MB/s over {report['seconds']}s; "
+          f"{report['ok']} ok, {report['errors']} error(s)")
+    for message, count in report["errorKinds"].items():
+        print(f"  WARNING: {count} x {message}")
+    if report["cache"]:
+        c = report["cache"]
+        print(f"Service cache: {c['entries']} poses, {c['bytes'] / 1024:.0f} KB of {c['budget'] / 1024:.0f} KB, "
+              f"hit rate {c['hitRate']}, {c['evictions']} eviction(s)")
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure pose_service.py throughput and latency percentiles.")
+    parser.add_argument("--url", default="http://127.0.0.1:8010", help="Service URL (default: http://127.0.0.1:8010).")
+    parser.add_argument("-c", "--concurrency", type=int, default=200, help="Concurrent keep-alive connections (default: 200).")
+    parser.add_argument("-n", "--requests", type=int, default=5000, help="Total requests (default: 5000).")
+    parser.add_argument("--mix", default="list,data,batch", help=f"Comma-separated request kinds to draw from ({', '.join(KINDS)}).")
+    parser.add_argument("--format", default="bin", choices=("json", "pose", "bin"), help="Pose data format (default: bin).")
+    parser.add_argument("--page", type=int, default=50, help="Poses per page / batch (default: 50).")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the request mix.")
+    parser.add_argument("--report", help="Also write the results as JSON to this path.")
+    args = parser.parse_args(argv)
+    unknown = set(k.strip() for k in args.mix.split(",") if k.strip()) - set(KINDS)
+    if unknown:
+        print(f"ERROR: Unknown request kind(s): {', '.join(sorted(unknown))}.")
+        return 1
+
+    try:
+        report = asyncio.run(run(args))
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Could not reach the pose service at {args.url}: {e}")
+        return 1
+    print_report(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to '{args.report}'.")
+    return 0 if report["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
@@ -0,0 +1,243 @@
+# START OF FILE: pose_space.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# Converts pose libraries between Blender pose-bone space and glTF node-local
+# TRS. Blender's pbone.location / rotation_quaternion / scale (what
+# extract_poses.py and extract_applied_poses.py write) are relative to each
+# bone's rest matrix, while applyPoseData() in the app writes values straight
+# into the Three.js node's position/quaternion/scale - so raw extractor output
+# collapses the mesh. With the rest transforms known, the mapping is
+#
+#   glTF node local = rest local ∘ basis'          (to-gltf)
+#   basis'          = rest local⁻¹ ∘ node local    (to-blender)
+#
+# where basis' is the Blender basis expressed in the exported bone frame:
+#   --bone-axes blender  (glTF-Blender-IO default) bones keep Blender's frame
+#                        (Y along the bone, roll baked into the rest), only
+#                        root bones pick up the Z-up -> Y-up axis change;
+#                        basis' = basis
+#   --bone-axes swizzled every node was axis-converted (older exporters);
+#                        basis' = C basis C⁻¹ with C the --up axis change
+#
+# Rest transforms come from the GLB skin (--model) or from a rest dump written
+# by export_rest_dump.py in Blender (--rest-dump): armature-space
+# matrix_local per bone, or head/tail/roll (rebuilt with Blender's
+# vec_roll_to_mat3), with parents. Everything is vectorized over
+# (poses, bones); only the rest setup loops over bones.
+#
+# Usage:  python scripts/pose_space.py to-gltf poses/female --model models/femalebase0.glb
+#         python scripts/pose_space.py to-blender models/saved_poses --model models/femalebase0.glb
+#             [--rest-dump X.rest.json] [--up y|z] [--bone-axes blender|swizzled]
+#             [--quat-order xyzw|wxyz] [--min-coverage 0.5] [-o DIR] [--no-manifest]
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from glb_utils import IDENTITY_TRS, REPO_ROOT, Skeleton, load_skeleton, repo_relative, rotation_matrix_to_quat, sanitize_node_name
+from pose_math import POS, ROT, SCL, quat_align, quat_canonical, trs_compose, trs_inverse_apply
+from pose_utils import DEFAULT_POSE_ROOTS, array_to_pose, load_pose_library, poses_to_array, safe_pose_filename, write_manifest, write_pose_file
+
+# --- Configuration ---
+DEFAULT_OUTPUT_BASE = os.path.join(REPO_ROOT, "poses", "converted")
+BONE_AXES = ("blender", "swizzled")
+# Blender is Z-up; glTF is Y-up: (x, y, z) -> (x, z, -y), a -90 degree turn about X.
+AXIS_CHANGE = {"y": np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, -1.0, 0.0]]), "z": np.eye(3)}
+QUAT_ORDERS = {"xyzw": [0, 1, 2, 3], "wxyz": [1, 2, 3, 0]}  # column picks that give xyzw
+ROLL_SAFE_THRESHOLD = 6.1e-3      # Blender's vec_roll_to_mat3_normalized constants
+ROLL_CRITICAL_THRESHOLD = 2.5e-4
+
+
+# --- Axis / Bone Frames ---
+def axis_conjugate(trs, c):
+    """C ∘ trs ∘ C⁻¹ for TRS rows, C a signed axis permutation (keeps scale axis-aligned)."""
+    out = np.array(trs, dtype=np.float64, copy=True)
+    out[..., POS] = trs[..., POS] @ c.T
+    out[..., 3:6] = trs[..., 3:6] @ c.T  # vector part of an xyzw quaternion rotates like a position
+    out[..., SCL] = trs[..., SCL] @ np.abs(c).T
+    return out
+
+
+def vec_roll_to_mat3(head, tail, roll):
+    """Blender's bone rest rotation from head/tail/roll, vectorized: (..., 3, 3) with +Y along the bone."""
+    nor = np.asarray(tail, dtype=np.float64) - np.asarray(head, dtype=np.float64)
+    nor = nor / np.maximum(np.linalg.norm(nor, axis=-1, keepdims=True), 1e-12)
+    x, y, z = nor[..., 0], nor[..., 1], nor[..., 2]
+    theta = 1.0 + y
+    theta_alt = x * x + z * z
+    near_flip = theta <= ROLL_SAFE_THRESHOLD
+    singular = near_flip & (theta_alt <= ROLL_CRITICAL_THRESHOLD ** 2)
+    theta = np.where(near_flip, theta_alt * 0.5 + theta_alt * theta_alt * 0.125, theta)
+    theta = np.where(singular, 1.0, theta)
+
+    b = np.empty(nor.shape[:-1] + (3, 3))
+    b[..., 0, 0] = 1.0 - x * x / theta
+    b[..., 0, 1] = x
+    b[..., 0, 2] = -x * z / theta
+    b[..., 1, 0] = -x
+    b[..., 1, 1] = y
+    b[..., 1, 2] = -z
+    b[..., 2, 0] = -x * z / theta
+    b[..., 2, 1] = z
+    b[..., 2, 2] = 1.0 - z * z / theta
+    b[singular] = np.diag([-1.0, -1.0, 1.0])  # bone pointing straight down -Y
+
+    # Roll: rotation about the bone axis (Rodrigues)
+    roll = np.asarray(roll, dtype=np.float64)
+    cos, sin = np.cos(roll)[..., None, None], np.sin(roll)[..., None, None]
+    k = np.zeros(b.shape)
+    k[..., 0, 1], k[..., 0, 2], k[..., 1, 2] = -z, y, -x
+    k[..., 1, 0], k[..., 2, 0], k[..., 2, 1] = z, -y, x
+    r = np.eye(3) + sin * k + (1.0 - cos) * (k @ k)
+    return r @ b
+
+
+def matrix_to_trs_row(m):
+    """Row-major 4x4 -> TRS row (translation, quaternion xyzw, scale)."""
+    basis = m[:3, :3]
+    scale = np.linalg.norm(basis, axis=0)
+    if np.linalg.det(basis) < 0:
+        scale[0] = -scale[0]
+    return np.concatenate([m[:3, 3], rotation_matrix_to_quat(basis / np.where(np.abs(scale) > 1e-12, scale, 1.0)), scale])
+
+
+def load_rest_dump(path, up="y", bone_axes="blender"):
+    """Skeleton whose rest is the glTF node-local TRS implied by a Blender rest dump.
+
+    Bones with `matrix_local` (armature space, row-major 4x4) use it directly;
+    otherwise head/tail/roll are rebuilt into one. Parents must precede children.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        dump = json.load(f)
+    bones = dump["bones"]
+    index = {b["name"]: i for i, b in enumerate(bones)}
+    parents = np.array([index.get(b.get("parent"), -1) for b in bones], dtype=np.int32)
+    if any(p >= i for i, p in enumerate(parents)):
+        raise ValueError(f"Rest dump '{path}' lists a child before its parent.")
+
+    armature = np.empty((len(bones), 4, 4))
+    for i, bone in enumerate(bones):
+        if "matrix_local" in bone:
+            armature[i] = np.asarray(bone["matrix_local"], dtype=np.float64)
+        else:
+            armature[i] = np.eye(4)
+            armature[i, :3, :3] = vec_roll_to_mat3(bone["head"], bone["tail"], bone.get("roll", 0.0))
+            armature[i, :3, 3] = bone["head"]
+
+    c4 = np.eye(4)
+    c4[:3, :3] = AXIS_CHANGE[up]
+    rest = np.empty((len(bones), 10))
+    for i, parent in enumerate(parents):
+        if parent < 0:
+            local = c4 @ armature[i]                                  # root: armature space -> glTF axes
+        else:
+            local = np.linalg.inv(armature[parent]) @ armature[i]     # child: relative to the parent's rest
+        if bone_axes == "swizzled":
+            local = local @ c4.T if parent < 0 else c4 @ local @ c4.T
+        rest[i] = matrix_to_trs_row(local)
+
+    names = [sanitize_node_name(b["name"]) for b in bones]
+    return Skeleton(names, [b["name"] for b in bones], list(range(len(bones))), parents, rest)
+
+
+# --- Conversion ---
+def blender_to_gltf(basis, rest, up="y", bone_axes="blender"):
+    """(..., bones, 10) Blender basis TRS -> glTF node-local TRS for rest (bones, 10)."""
+    if bone_axes == "swizzled":
+        basis = axis_conjugate(basis, AXIS_CHANGE[up])
+    local = trs_compose(rest, basis)
+    local[..., ROT] = quat_canonical(local[..., ROT])
+    return local
+
+
+def gltf_to_blender(local, rest, up="y", bone_axes="blender"):
+    """Inverse of blender_to_gltf: glTF node-local TRS -> Blender basis TRS."""
+    basis = trs_inverse_apply(rest, local)
+    if bone_axes == "swizzled":
+        basis = axis_conjugate(basis, AXIS_CHANGE[up].T)
+    basis[..., ROT] = quat_canonical(basis[..., ROT])
+    return basis
+
+
+def basis_skeleton(skeleton):
+    """Same bones as `skeleton` with an identity rest, so poses_to_array() fills missing bones with identity basis."""
+    return Skeleton(skeleton.names, skeleton.source_names, skeleton.node_indices, skeleton.parents,
+                    np.tile(IDENTITY_TRS, (len(skeleton), 1)))
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert poses between Blender pose-bone space and glTF node-local TRS.")
+    parser.add_argument("direction", choices=("to-gltf", "to-blender"), help="to-gltf: extractor output -> app poses; to-blender: app poses -> Blender basis.")
+    parser.add_argument("sources", nargs="*", help="Pose files/directories (default: poses/ and models/saved_poses/).")
+    parser.add_argument("--model", required=True, help="GLB the poses belong to (rest transforms and bone names).")
+    parser.add_argument("--rest-dump", help="Rest dump from export_rest_dump.py to use instead of the GLB skin.")
+    parser.add_argument("--up", choices=sorted(AXIS_CHANGE), default="y", help="Up axis the GLB was exported with (default: y).")
+    parser.add_argument("--bone-axes", choices=BONE_AXES, default="blender", help="Bone frames in the GLB (default: blender).")
+    parser.add_argument("--quat-order", choices=sorted(QUAT_ORDERS), default="xyzw",
+                        help="Quaternion order of Blender-space poses (extract_poses.py writes wxyz; default: xyzw).")
+    parser.add_argument("--min-coverage", type=float, default=0.5, help="Skip poses supplying fewer than this fraction of the bones.")
+    parser.add_argument("-o", "--output-dir", help="Output directory (default: poses/converted/<model>/<direction>).")
+    parser.add_argument("--no-manifest", action="store_true", help="Only write pose files (build_assets.py converts one pose per run and writes the manifest itself).")
+    args = parser.parse_args(argv)
+
+    model_path = args.model if os.path.isabs(args.model) else os.path.join(REPO_ROOT, args.model)
+    skeleton = load_rest_dump(args.rest_dump, args.up, args.bone_axes) if args.rest_dump else load_skeleton(model_path)
+    model_name = os.path.splitext(os.path.basename(model_path))[0]
+    print(f"--- {args.direction}: {repo_relative(model_path)} ({len(skeleton)} bones, rest from "
+          f"{repo_relative(args.rest_dump) if args.rest_dump else 'GLB skin'}, up {args.up}, bone axes {args.bone_axes}) ---")
+
+    poses = load_pose_library(args.sources or DEFAULT_POSE_ROOTS)
+    to_gltf = args.direction == "to-gltf"
+    values, present = poses_to_array(poses, basis_skeleton(skeleton) if to_gltf else skeleton)
+    keep = np.flatnonzero(present.mean(axis=1) >= args.min_coverage) if poses else np.zeros(0, dtype=int)
+    if len(keep) < len(poses):
+        print(f"  Skipping {len(poses) - len(keep)} pose(s) that don't fit this skeleton.")
+    if len(keep) == 0:
+        print("No poses to convert.")
+        return 1
+    values = values[keep]
+    if to_gltf:
+        values[..., ROT] = values[..., ROT][..., QUAT_ORDERS[args.quat_order]]
+
+    t0 = time.perf_counter()
+    if to_gltf:
+        out = blender_to_gltf(values, skeleton.rest, args.up, args.bone_axes)
+        back = gltf_to_blender(out, skeleton.rest, args.up, args.bone_axes)
+    else:
+        out = gltf_to_blender(values, skeleton.rest, args.up, args.bone_axes)
+        back = blender_to_gltf(out, skeleton.rest, args.up, args.bone_axes)
+    elapsed = time.perf_counter() - t0
+    roundtrip_pos = np.abs(back[..., POS] - values[..., POS]).max()
+    roundtrip_rot = np.abs(quat_align(back[..., ROT], values[..., ROT]) - values[..., ROT]).max()
+
+    output_dir = args.output_dir or os.path.join(DEFAULT_OUTPUT_BASE, model_name, args.direction)
+    names = skeleton.names if to_gltf else skeleton.source_names  # runtime node names vs. Blender bone names
+    out_skeleton = Skeleton(names, skeleton.source_names, skeleton.node_indices, skeleton.parents, skeleton.rest)
+    manifest = {}
+    for row, i in enumerate(keep):
+        pose = poses[i]
+        bones = np.flatnonzero(present[i])
+        filename = f"{safe_pose_filename(pose.name)}.json"
+        pose_data = array_to_pose(out[row], out_skeleton, bones)
+        if not to_gltf and args.quat_order == "wxyz":
+            for bone in pose_data:
+                bone["quaternion"] = bone["quaternion"][3:] + bone["quaternion"][:3]
+        write_pose_file(os.path.join(output_dir, filename), pose_data)
+        manifest[pose.name] = repo_relative(os.path.join(output_dir, filename))
+    if not args.no_manifest:
+        write_manifest(os.path.join(output_dir, "manifest.json"), manifest)
+
+    print(f"  Converted {len(keep)} pose(s) x {len(skeleton)} bones in {elapsed * 1000:.1f} ms; "
+          f"round-trip error max {roundtrip_pos:.2e} (position), {roundtrip_rot:.2e} (quaternion).")
+    print(f"  Output: '{repo_relative(output_dir)}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
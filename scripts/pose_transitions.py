@@ -0,0 +1,234 @@
+# START OF FILE: pose_transitions.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# Generates in-between frames for pose transitions ("stand -> kneel in 8
+# steps") without hand-keying in Blender. Rotations use per-bone slerp
+# (two keys) or squad (key lists) along the shortest arc; positions and
+# scales are eased. All transitions with the same shape are computed in one
+# batch: (transitions, frames, bones) arrays.
+#
+# Output, per transition:
+#   frames - <out>/<name>/<name>_000.json ... in the pose schema + manifest.json
+#   gltf   - one animation per transition inside <out>/transitions.glb; track
+#            names match the model's bones (for Blender or another glTF
+#            player - the app itself has no clip playback yet)
+#
+# Usage:
+#   python scripts/pose_transitions.py --model models/femalebase0.glb \
+#       --from poses/female/Stand.json --to poses/female/Kneel.json --steps 8
+#   python scripts/pose_transitions.py --model ... --sequence a.json b.json c.json
+#   python scripts/pose_transitions.py --model ... --batch transitions.json
+#     (transitions.json: [{"name": "...", "poses": [ref, ...], "steps": 8,
+#                          "easing": "ease-in-out", "interp": "squad"}, ...])
+# A pose ref is a file path, or "file.json#Pose Name" for multi-pose files.
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from glb_utils import GLBBuilder, REPO_ROOT, load_skeleton, repo_relative
+from pose_math import POS, ROT, SCL, quat_normalize, quat_slerp, quat_squad, squad_controls
+from pose_utils import (array_to_pose, manifest_entry, poses_to_array, resolve_pose,
+                        safe_pose_filename, write_manifest, write_pose_file)
+
+# --- Configuration ---
+DEFAULT_OUTPUT_DIR = os.path.join(REPO_ROOT, "poses", "transitions")
+DEFAULT_STEPS = 8
+DEFAULT_FPS = 24
+
+EASINGS = {
+    "linear": lambda t: t,
+    "ease-in": lambda t: t * t * t,
+    "ease-out": lambda t: 1.0 - (1.0 - t) ** 3,
+    "ease-in-out": lambda t: t * t * (3.0 - 2.0 * t),
+    "sine": lambda t: 0.5 - 0.5 * np.cos(np.pi * t),
+}
+
+
+# --- Transitions ---
+class Transition:
+    """One requested transition: key poses plus interpolation settings."""
+
+    def __init__(self, name, keys, steps=DEFAULT_STEPS, easing="ease-in-out", interp=None):
+        if len(keys) < 2:
+            raise ValueError(f"Transition '{name}' needs at least two poses.")
+        if easing not in EASINGS:
+            raise ValueError(f"Unknown easing '{easing}' (choose from {', '.join(EASINGS)}).")
+        self.name = name
+        self.keys = keys
+        self.steps = max(1, int(steps))
+        self.easing = easing
+        self.interp = interp or ("squad" if len(keys) > 2 else "slerp")
+
+    @property
+    def group_key(self):
+        return (len(self.keys), self.steps, self.easing, self.interp)
+
+
+# --- Interpolation ---
+def segment_times(steps, easing, last):
+    """Eased parameters for one segment; the end key is only included on the last segment."""
+    t = np.linspace(0.0, 1.0, steps + 1)
+    if not last:
+        t = t[:-1]
+    return EASINGS[easing](t)
+
+
+def interpolate(keys, steps, easing="ease-in-out", interp="slerp"):
+    """(T, K, B, 10) key poses -> (T, F, B, 10) frames, F = (K - 1) * steps + 1."""
+    n_keys = keys.shape[1]
+    rot_keys = np.moveaxis(keys[..., ROT], 1, 0)  # (K, T, B, 4)
+    if interp == "squad":
+        rot_keys, controls = squad_controls(quat_normalize(rot_keys))
+
+    segments = []
+    for k in range(n_keys - 1):
+        t = segment_times(steps, easing, last=(k == n_keys - 2))
+        tt = t[None, :, None]  # broadcast over (T, F, B)
+        a, b = keys[:, k][:, None], keys[:, k + 1][:, None]
+        frames = np.empty((keys.shape[0], len(t)) + keys.shape[2:], dtype=np.float64)
+        frames[..., POS] = a[..., POS] + (b[..., POS] - a[..., POS]) * tt[..., None]
+        frames[..., SCL] = a[..., SCL] + (b[..., SCL] - a[..., SCL]) * tt[..., None]
+        if interp == "squad":
+            frames[..., ROT] = quat_squad(rot_keys[k][:, None], rot_keys[k + 1][:, None],
+                                          controls[k][:, None], controls[k + 1][:, None], tt)
+        else:
+            frames[..., ROT] = quat_slerp(a[..., ROT], b[..., ROT], tt)
+        segments.append(frames)
+    return np.concatenate(segments, axis=1)
+
+
+def run_transitions(transitions, skeleton):
+    """Interpolates every transition, batching those with the same shape. Returns {name: frames}."""
+    groups = {}
+    for tr in transitions:
+        groups.setdefault(tr.group_key, []).append(tr)
+    results = {}
+    for (n_keys, steps, easing, interp), members in groups.items():
+        records = [pose for tr in members for pose in tr.keys]
+        local, _ = poses_to_array(records, skeleton)
+        keys = local.reshape(len(members), n_keys, len(skeleton), 10)
+        frames = interpolate(keys, steps, easing, interp)
+        for tr, tr_frames in zip(members, frames):
+            results[tr.name] = tr_frames
+    return results
+
+
+# --- Output ---
+def write_frame_sequence(output_dir, name, frames, skeleton):
+    """Writes <output_dir>/<name>/<name>_NNN.json plus a manifest; returns the frame count."""
+    folder = os.path.join(output_dir, safe_pose_filename(name))
+    manifest = {}
+    for i, frame in enumerate(frames):
+        filename = f"{safe_pose_filename(name)}_{i:03d}.json"
+        path = os.path.join(folder, filename)
+        write_pose_file(path, array_to_pose(frame, skeleton))
+        manifest[f"{name} {i:03d}"] = manifest_entry(path, folder)
+    write_manifest(os.path.join(folder, "manifest.json"), manifest)
+    return len(frames)
+
+
+def write_clips_glb(path, clips, skeleton, fps=DEFAULT_FPS):
+    """Writes a skeleton-only GLB with one animation per transition; returns the byte size."""
+    builder = GLBBuilder()
+    gltf = builder.gltf
+    nodes = []
+    for b, name in enumerate(skeleton.source_names):
+        rest = skeleton.rest[b]
+        nodes.append({"name": name, "translation": rest[POS].tolist(),
+                      "rotation": rest[ROT].tolist(), "scale": rest[SCL].tolist()})
+    for b, parent in enumerate(skeleton.parents):
+        if parent >= 0:
+            nodes[parent].setdefault("children", []).append(b)
+    gltf["nodes"] = nodes
+    gltf["scenes"] = [{"nodes": [b for b, p in enumerate(skeleton.parents) if p < 0]}]
+    gltf["scene"] = 0
+
+    animations = []
+    times_cache = {}
+    for name, frames in clips.items():
+        count = len(frames)
+        if count not in times_cache:
+            times_cache[count] = builder.add_accessor(np.arange(count, dtype=np.float32) / fps, min_max=True)
+        times = times_cache[count]
+        samplers, channels = [], []
+        for b in range(len(skeleton)):
+            for path_name, sl in (("translation", POS), ("rotation", ROT), ("scale", SCL)):
+                output = builder.add_accessor(np.ascontiguousarray(frames[:, b, sl], dtype=np.float32))
+                samplers.append({"input": times, "output": output, "interpolation": "LINEAR"})
+                channels.append({"sampler": len(samplers) - 1, "target": {"node": b, "path": path_name}})
+        animations.append({"name": name, "samplers": samplers, "channels": channels})
+    gltf["animations"] = animations
+    return builder.write(path)
+
+
+# --- Main ---
+def load_batch(path):
+    """Reads a --batch JSON file into Transition objects."""
+    with open(path, "r", encoding="utf-8") as f:
+        specs = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    transitions = []
+    for spec in specs:
+        keys = [resolve_pose(ref, base_dir) for ref in spec["poses"]]
+        name = spec.get("name") or " to ".join(k.name for k in keys)
+        transitions.append(Transition(name, keys, spec.get("steps", DEFAULT_STEPS),
+                                      spec.get("easing", "ease-in-out"), spec.get("interp")))
+    return transitions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate in-between frames for pose transitions.")
+    parser.add_argument("--model", required=True, help="GLB whose skeleton the poses belong to.")
+    parser.add_argument("--from", dest="from_pose", help="Start pose ref.")
+    parser.add_argument("--to", dest="to_pose", help="End pose ref.")
+    parser.add_argument("--sequence", nargs="+", help="Key pose refs for one multi-key transition.")
+    parser.add_argument("--batch", help="JSON list of transitions to compute together.")
+    parser.add_argument("--name", help="Name for a --from/--to or --sequence transition.")
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="Frames per segment (default %(default)s).")
+    parser.add_argument("--easing", default="ease-in-out", choices=sorted(EASINGS))
+    parser.add_argument("--interp", choices=("slerp", "squad"), help="Rotation interpolation (default: slerp for two keys, squad for more).")
+    parser.add_argument("--format", choices=("frames", "gltf", "both"), default="frames")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS, help="Clip frame rate for --format gltf.")
+    parser.add_argument("-o", "--output-dir", default=DEFAULT_OUTPUT_DIR)
+    args = parser.parse_args(argv)
+
+    transitions = []
+    if args.batch:
+        transitions += load_batch(args.batch)
+    refs = args.sequence or ([args.from_pose, args.to_pose] if args.from_pose and args.to_pose else None)
+    if refs:
+        keys = [resolve_pose(ref) for ref in refs]
+        transitions.append(Transition(args.name or " to ".join(k.name for k in keys), keys,
+                                      args.steps, args.easing, args.interp))
+    if not transitions:
+        parser.error("give --from/--to, --sequence or --batch")
+
+    model_path = args.model if os.path.isabs(args.model) else os.path.join(REPO_ROOT, args.model)
+    skeleton = load_skeleton(model_path)
+    print(f"--- Generating {len(transitions)} transition(s) on {repo_relative(model_path)} ---")
+
+    t0 = time.perf_counter()
+    clips = run_transitions(transitions, skeleton)
+    elapsed = time.perf_counter() - t0
+    total_frames = sum(len(f) for f in clips.values())
+    print(f"  Interpolated {total_frames} frame(s) in {elapsed * 1000:.1f} ms.")
+
+    if args.format in ("frames", "both"):
+        for name, frames in clips.items():
+            write_frame_sequence(args.output_dir, name, frames, skeleton)
+            print(f"  '{name}': {len(frames)} frame file(s)")
+    if args.format in ("gltf", "both"):
+        glb_path = os.path.join(args.output_dir, "transitions.glb")
+        size = write_clips_glb(glb_path, clips, skeleton, args.fps)
+        print(f"  Clip GLB saved: '{glb_path}' ({len(clips)} animation(s), {size / 1024:.1f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
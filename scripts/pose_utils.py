@@ -0,0 +1,222 @@
+# START OF FILE: pose_utils.py
+# Shared helpers for the offline pose tools: finding and loading pose JSON
+# (extractor output in poses/<gender>/, models/saved_poses/, poser.html
+# downloads) in the web app's schema:
+#   [ {"name": str, "position": [x,y,z], "quaternion": [x,y,z,w], "scale": [x,y,z]}, ... ]
+import json
+import os
+
+import numpy as np
+
+from glb_utils import REPO_ROOT, repo_relative, sanitize_node_name
+
+# --- Configuration ---
+POSES_DIR = os.path.join(REPO_ROOT, "poses")                  # extract_*.py output
+SAVED_POSES_DIR = os.path.join(REPO_ROOT, "models", "saved_poses")
+DEFAULT_POSE_ROOTS = (POSES_DIR, SAVED_POSES_DIR)
+NON_POSE_FILES = {"manifest.json"}
+
+
+# --- Helper Functions ---
+def normalize_bone_name(name):
+    """Bone name as Three.js sees it at runtime ('spine.001' -> 'spine001')."""
+    return sanitize_node_name(name)
+
+
+def gender_from_path(path):
+    """Best-effort gender from a poses/<gender>/ path segment ('female', 'male' or None)."""
+    parts = [p.lower() for p in os.path.normpath(path).split(os.sep)]
+    if "female" in parts:
+        return "female"
+    if "male" in parts:
+        return "male"
+    return None
+
+
+def is_pose_array(data):
+    """True if `data` looks like a pose in the web app's schema."""
+    return (isinstance(data, list) and len(data) > 0
+            and all(isinstance(b, dict) and "name" in b for b in data))
+
+
+class PoseRecord:
+    """One pose loaded from disk."""
+
+    def __init__(self, name, path, bones, gender=None):
+        self.name = name
+        self.path = path
+        self.bones = bones
+        self.gender = gender
+        # Unique id: repo-relative file path, plus '#name' for multi-pose files. Computed once -
+        # relpath is slow enough to dominate indexes that list every id per model.
+        rel = os.path.relpath(path, REPO_ROOT).replace("\\", "/")
+        stem = os.path.splitext(os.path.basename(path))[0]
+        self.id = rel if name == stem else f"{rel}#{name}"
+
+    def bone_names(self):
+        return [b["name"] for b in self.bones]
+
+
+def read_pose_file(path):
+    """Yields (pose_name, bones) for a pose file.
+
+    Accepts a single pose array or a {poseName: poseArray} object (the shape
+    poser.html keeps under localStorage['poses_<modelPath>']).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if is_pose_array(data):
+        yield stem, data
+    elif isinstance(data, dict):
+        for pose_name, bones in data.items():
+            if is_pose_array(bones):
+                yield pose_name, bones
+
+
+def resolve_pose(ref, base_dir=REPO_ROOT):
+    """Loads a pose ref ('file.json' or 'file.json#Pose Name') as a PoseRecord."""
+    path, _, wanted = ref.partition("#")
+    if not os.path.isabs(path):
+        path = os.path.abspath(path) if os.path.exists(path) else os.path.join(base_dir, path)
+    for name, bones in read_pose_file(path):
+        if not wanted or name == wanted:
+            return PoseRecord(name, path, bones, gender_from_path(path))
+    raise ValueError(f"Pose '{wanted or ref}' not found in '{path}'.")
+
+
+def discover_pose_files(roots=DEFAULT_POSE_ROOTS):
+    """Returns every candidate pose .json under `roots` (files or directories), sorted."""
+    found = []
+    for root in roots:
+        if os.path.isfile(root):
+            found.append(os.path.abspath(root))
+            continue
+        if not os.path.isdir(root):
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(".json") and filename not in NON_POSE_FILES:
+                    found.append(os.path.abspath(os.path.join(dirpath, filename)))
+    return found
+
+
+def load_pose_library(roots=DEFAULT_POSE_ROOTS, quiet=False):
+    """Loads every pose under `roots` into a list of PoseRecords, skipping unreadable files."""
+    records = []
+    for path in discover_pose_files(roots):
+        try:
+            for pose_name, bones in read_pose_file(path):
+                records.append(PoseRecord(pose_name, path, bones, gender_from_path(path)))
+        except (OSError, ValueError) as e:
+            if not quiet:
+                print(f"  WARNING: Skipping unreadable pose file '{path}': {e}")
+    return records
+
+
+# --- Array Conversion ---
+def poses_to_array(poses, skeleton):
+    """Packs PoseRecords into a (poses, bones, 10) local-TRS array in skeleton order.
+
+    Bones a pose doesn't mention keep the skeleton's rest transform. Returns
+    (array, present) where `present` is a (poses, bones) bool mask of the
+    bones each pose actually supplied.
+    """
+    out = np.broadcast_to(skeleton.rest, (len(poses),) + skeleton.rest.shape).copy()
+    present = np.zeros((len(poses), len(skeleton)), dtype=bool)
+    for i, pose in enumerate(poses):
+        for bone in pose.bones:
+            b = skeleton.index.get(normalize_bone_name(bone["name"]))
+            if b is None:
+                continue
+            present[i, b] = True
+            if bone.get("position") is not None:
+                out[i, b, 0:3] = bone["position"]
+            if bone.get("quaternion") is not None:
+                out[i, b, 3:7] = bone["quaternion"]
+            if bone.get("scale") is not None:
+                out[i, b, 7:10] = bone["scale"]
+    return out, present
+
+
+def array_to_pose(local, skeleton, bones=None):
+    """Inverse of poses_to_array for one pose: (bones, 10) array -> pose JSON list."""
+    rows = local.tolist()
+    indices = range(len(skeleton)) if bones is None else bones
+    return [{"name": skeleton.names[b], "position": rows[b][0:3],
+             "quaternion": rows[b][3:7], "scale": rows[b][7:10]} for b in indices]
+
+
+def write_pose_file(path, pose_data, indent=2):
+    """Writes one pose JSON file (same formatting as the extractor scripts)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(pose_data, f, indent=indent)
+
+
+def write_manifest(path, manifest):
+    """Writes a {friendlyName: relativePath} manifest sorted by name, like extract_applied_poses.py."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+
+
+def safe_pose_filename(name):
+    """Filename-safe form of a pose name (same substitutions as extract_applied_poses.py)."""
+    return name.replace(" ", "_").replace("/", "-").replace("\\", "-")
+
+
+def unique_pose_labels(poses, names=None):
+    """Output names for PoseRecords, unique across the set.
+
+    `names` (default: each pose's name) are kept unless several poses share one;
+    those get the shortest run of trailing source folders that tells them apart
+    ('Walk F (female)' / 'Walk F (saved_poses)'), or folder/file for poses from
+    different files in one folder, so same-named poses don't overwrite each other.
+    """
+    names = [p.name for p in poses] if names is None else list(names)
+    groups = {}
+    for row, name in enumerate(names):
+        groups.setdefault(name, []).append(row)
+    labels = list(names)
+    for name, rows in groups.items():
+        if len(rows) < 2:
+            continue
+        dirs = [os.path.dirname(os.path.abspath(poses[r].path)).replace("\\", "/").split("/") for r in rows]
+        tags = None
+        for k in range(1, max(len(d) for d in dirs) + 1):
+            candidate = ["/".join(d[-k:]) for d in dirs]
+            if len(set(candidate)) == len(rows):
+                tags = candidate
+                break
+        if tags is None:
+            tags = [f"{d[-1]}/{os.path.splitext(os.path.basename(poses[r].path))[0]}" for d, r in zip(dirs, rows)]
+        for r, tag in zip(rows, tags):
+            labels[r] = f"{name} ({tag})"
+    return labels
+
+
+def pose_output_paths(names, output_dir):
+    """[output_dir/<safe name>.json] per name; raises ValueError if two names map to one file."""
+    paths, owners = [], {}
+    for name in names:
+        filename = f"{safe_pose_filename(name)}.json"
+        other = owners.setdefault(filename.lower(), name)  # Case-insensitive file systems count too
+        if other != name:
+            raise ValueError(f"Poses '{other}' and '{name}' would both be written to '{filename}'.")
+        paths.append(os.path.join(output_dir, filename))
+    return paths
+
+
+def manifest_entry(path, manifest_dir):
+    """Manifest value for a pose file: repo-relative (the form the app fetches) inside the repo,
+    otherwise relative to the manifest's folder so an output folder elsewhere stays self-contained."""
+    path = os.path.abspath(path)
+    try:
+        inside = os.path.commonpath([path, REPO_ROOT]) == REPO_ROOT
+    except ValueError:  # different drives
+        inside = False
+    return repo_relative(path) if inside else os.path.relpath(path, os.path.abspath(manifest_dir)).replace("\\", "/")
+
+# END OF FILE
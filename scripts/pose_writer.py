@@ -0,0 +1,193 @@
+# START OF FILE: pose_writer.py
+# Background pose-file writer for the Blender extractors (stdlib only, so it
+# imports in Blender's bundled Python as well as plain Python 3).
+#
+# The extraction loop only hands off the extracted pose data; worker threads
+# do the formatting, hashing and (atomic) file writes, so disk I/O overlaps
+# with Blender evaluating the next action. The queue is bounded: when the
+# workers fall behind, submit() blocks (a "stall") instead of buffering the
+# whole pack in memory. workers=0 writes synchronously on the calling thread;
+# both modes produce byte-identical files.
+#
+# Formats:
+#   pretty  - json indent=2 (what the extractors always wrote; default)
+#   compact - json without whitespace
+#   binary  - .posebin: b"SRPB", uint16 version, uint16 reserved, uint32 bones,
+#             then per bone uint16 name length + UTF-8 name, zero padding to 4
+#             bytes, then bones x 10 float32 (position, quaternion xyzw, scale),
+#             little-endian
+import hashlib
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from contextlib import nullcontext
+
+# --- Configuration ---
+FORMATS = ("pretty", "compact", "binary")
+BINARY_MAGIC = b"SRPB"
+BINARY_VERSION = 1
+_HEADER = struct.Struct("<4sHHI")
+
+
+# --- Encoding ---
+def pose_extension(fmt):
+    """File extension for an output format."""
+    return ".posebin" if fmt == "binary" else ".json"
+
+
+def encode_pose(pose_data, fmt="pretty"):
+    """Serializes a pose (list of {name, position, quaternion, scale}) -> str (JSON) or bytes (binary)."""
+    if fmt == "pretty":
+        return json.dumps(pose_data, indent=2)
+    if fmt == "compact":
+        return json.dumps(pose_data, separators=(",", ":"))
+    if fmt != "binary":
+        raise ValueError(f"Unknown pose format '{fmt}' (choose from {', '.join(FORMATS)}).")
+    parts = [_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, len(pose_data))]
+    floats = []
+    for bone in pose_data:
+        name = bone["name"].encode("utf-8")
+        parts.append(struct.pack("<H", len(name)) + name)
+        floats.extend(bone["position"]); floats.extend(bone["quaternion"]); floats.extend(bone["scale"])
+    head = b"".join(parts)
+    head += b"\0" * (-len(head) % 4)
+    return head + struct.pack(f"<{len(floats)}f", *floats)
+
+
+def decode_binary_pose(data):
+    """Inverse of encode_pose(..., 'binary') -> pose list (floats rounded to float32)."""
+    magic, version, _, count = _HEADER.unpack_from(data, 0)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Not a .posebin file (bad magic/version).")
+    offset, names = _HEADER.size, []
+    for _ in range(count):
+        (length,) = struct.unpack_from("<H", data, offset)
+        names.append(bytes(data[offset + 2:offset + 2 + length]).decode("utf-8"))
+        offset += 2 + length
+    offset += -offset % 4
+    values = struct.unpack_from(f"<{count * 10}f", data, offset)
+    return [{"name": name, "position": list(values[i * 10:i * 10 + 3]),
+             "quaternion": list(values[i * 10 + 3:i * 10 + 7]), "scale": list(values[i * 10 + 7:i * 10 + 10])}
+            for i, name in enumerate(names)]
+
+
+# --- Writer ---
+class PoseWriter:
+    """Bounded-queue, thread-pool pose writer. submit() poses, then close() and report()."""
+
+    def __init__(self, workers=2, queue_size=32, fmt="pretty", atomic=True, profiler=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown pose format '{fmt}' (choose from {', '.join(FORMATS)}).")
+        self.workers = max(0, int(workers))
+        self.fmt = fmt
+        self.atomic = atomic
+        self.profiler = profiler  # optional phase_profiler.PhaseProfiler: times encode/disk per file
+        self.hashes = {}       # path -> sha1 of the written content
+        self.failures = []     # (path, tag, exception)
+        self.latencies = []    # seconds per job (encode + hash + write + on_written)
+        self.depths = []       # queue depth seen by each submit()
+        self.stalls = 0
+        self.stall_time = 0.0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size))) if self.workers else None
+        self._threads = [threading.Thread(target=self._run, name=f"PoseWriter-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def extension(self):
+        return pose_extension(self.fmt)
+
+    def submit(self, path, pose_data, tag=None, on_written=None):
+        """Queues one pose for writing; blocks while the queue is full. Don't mutate pose_data afterwards.
+
+        on_written(path, pose_data, digest) runs on the writing thread once the file is on disk (never for a
+        failed write); an exception it raises counts as a failure of that pose.
+        """
+        job = (path, pose_data, tag, on_written)
+        if not self.workers:
+            self._write(job)
+            return
+        self.depths.append(self._queue.qsize())
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            t0 = time.perf_counter()
+            self._queue.put(job)
+            self.stalls += 1
+            self.stall_time += time.perf_counter() - t0
+
+    def close(self):
+        """Waits for every queued write and stops the workers. Returns the failures list."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        return self.failures
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._write(job)
+
+    def _write(self, job):
+        path, pose_data, tag, on_written = job
+        t0 = time.perf_counter()
+        target = f"{path}.tmp{threading.get_ident()}" if self.atomic else path
+        phase = self.profiler.phase if self.profiler else (lambda name: nullcontext())
+        try:
+            with phase("encode"):
+                payload = encode_pose(pose_data, self.fmt)
+                if not isinstance(payload, bytes):
+                    payload = payload.encode("utf-8")  # Written as bytes so the digest is the file's on every OS
+                digest = hashlib.sha1(payload).hexdigest()
+            with phase("disk_write"):
+                with open(target, "wb") as f:
+                    f.write(payload)
+                if self.atomic:
+                    os.replace(target, path)
+            if on_written:
+                on_written(path, pose_data, digest)
+            with self._lock:
+                self.hashes[path] = digest
+                self.latencies.append(time.perf_counter() - t0)
+        except Exception as e:
+            with self._lock:
+                self.failures.append((path, tag, e))
+            if self.atomic and os.path.exists(target):
+                try: os.remove(target)
+                except OSError: pass
+
+    def stats(self):
+        """Summary dict: files, failures, queue depth, write latency (ms) and stalls."""
+        lat = sorted(self.latencies)
+        pick = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1000, 3) if lat else 0.0
+        return {
+            "format": self.fmt, "workers": self.workers, "files": len(self.hashes), "failures": len(self.failures),
+            "queueDepthMax": max(self.depths, default=0),
+            "queueDepthMean": round(sum(self.depths) / len(self.depths), 2) if self.depths else 0.0,
+            "writeMsP50": pick(0.50), "writeMsP95": pick(0.95), "writeMsMax": pick(1.0),
+            "stalls": self.stalls, "stallSeconds": round(self.stall_time, 4),
+        }
+
+    def report(self):
+        """Prints the end-of-run summary in the extractors' log style."""
+        s = self.stats()
+        mode = f"{s['workers']} worker thread(s)" if s["workers"] else "synchronous"
+        print(f"\n--- Pose Writer ({s['format']}, {mode}) ---")
+        print(f"Files written: {s['files']}, failed: {s['failures']}")
+        print(f"Write latency ms: p50 {s['writeMsP50']}, p95 {s['writeMsP95']}, max {s['writeMsMax']}")
+        if s["workers"]:
+            print(f"Queue depth: max {s['queueDepthMax']}, mean {s['queueDepthMean']}; "
+                  f"backpressure stalls: {s['stalls']} ({s['stallSeconds']} s)")
+        for path, tag, e in self.failures:
+            print(f"ERROR writing '{path}'{f' ({tag})' if tag else ''}: {e}")
+
+# END OF FILE
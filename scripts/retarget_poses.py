@@ -0,0 +1,332 @@
+# START OF FILE: retarget_poses.py
+# Offline tool (plain Python + numpy, no Blender needed).
+#
+# Retargets a pose library from one skeleton to another so poses authored on
+# the pose-pack rigs (femalebase0 / malebase0) can be used on
+# game_character_base.glb, jumping_man.glb, male_base2.glb, ...
+#
+# Bones are paired through js/bone_mappings.json friendly names (plus the
+# alias table below for labels that differ between rigs, or a --map file).
+# For every paired bone the source's world-space rotation *relative to its
+# rest* is applied on top of the target's rest, then converted back to the
+# target's node-local frame; unpaired target bones keep their rest rotation.
+# Root (Hips) translation is carried over scaled by the leg-length ratio.
+# Each step runs once per target bone, vectorized over the whole library.
+#
+# The report measures the result after FK on the target: per bone, the angle
+# between the source's and the target's world-space bone direction (joint to
+# nearest paired descendant) and the joint position error relative to the
+# root. Rotation deltas are copied exactly, so what remains is the rigs' rest
+# mismatch; restDirErrorDeg shows the same angle before any pose is applied.
+# Same-named poses from different folders get their source file appended to
+# the output name instead of overwriting each other.
+#
+# Poses are node-local TRS in the web app's schema (what applyPoseData()
+# writes into bone.position/quaternion/scale).
+#
+# Usage:
+#   python scripts/retarget_poses.py --source models/femalebase0.glb \
+#       --target models/male_base2.glb [pose dirs/files ...] [-o out_dir]
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from glb_utils import REPO_ROOT, load_bone_mappings, load_skeleton, repo_relative
+from pose_math import (POS, ROT, forward_kinematics, parent_world, quat_conj, quat_mul, quat_normalize,
+                       trs_compose, trs_inverse_apply)
+from pose_utils import (DEFAULT_POSE_ROOTS, array_to_pose, load_pose_library, manifest_entry, pose_output_paths,
+                        poses_to_array, unique_pose_labels, write_manifest, write_pose_file)
+
+# --- Configuration ---
+DEFAULT_OUTPUT_BASE = os.path.join(REPO_ROOT, "poses", "retargeted")
+ROOT_KEY = "Hips"
+LEG_CHAIN = ("Thigh L", "Shin L", "Foot L")
+
+# bone_mappings.json labels that name the same joint on different rigs.
+FRIENDLY_NAME_ALIASES = {
+    "Spine Base": "Hips",              # Rigify 'spine' is the hips bone
+    "Spine 1": "Spine",
+    "Spine 4 (Chest)": "Chest",
+    "Neck/Head Base": "Neck",
+}
+
+
+# --- Bone Pairing ---
+def canonical_keys(skeleton, mapping):
+    """Returns {canonical key: bone index} for one skeleton's mapping entry."""
+    keys = {}
+    for bone_name, info in (mapping or {}).items():
+        b = skeleton.index.get(bone_name)
+        if b is None:
+            continue
+        key = FRIENDLY_NAME_ALIASES.get(info.get("friendlyName"), info.get("friendlyName"))
+        if key and key not in keys:
+            keys[key] = b
+    return keys
+
+
+def build_bone_pairs(source, target, source_mapping, target_mapping, overrides=None):
+    """Pairs target bones with source bones. Returns (pairs dict t->s, key dict t->label)."""
+    pairs, labels = {}, {}
+    if source_mapping and target_mapping:
+        src_keys = canonical_keys(source, source_mapping)
+        for key, t in canonical_keys(target, target_mapping).items():
+            if key in src_keys:
+                pairs[t] = src_keys[key]
+                labels[t] = key
+    else:
+        # Without mappings, fall back to identical runtime names.
+        for t, name in enumerate(target.names):
+            if name in source.index:
+                pairs[t] = source.index[name]
+                labels[t] = name
+    for src_name, tgt_name in (overrides or {}).items():
+        s, t = source.index.get(src_name), target.index.get(tgt_name)
+        if s is None or t is None:
+            print(f"  WARNING: --map entry '{src_name}' -> '{tgt_name}' names an unknown bone.")
+            continue
+        pairs[t] = s
+        labels[t] = tgt_name
+    return pairs, labels
+
+
+def is_ancestor(skeleton, a, b):
+    """True if bone a is a strict ancestor of bone b."""
+    b = skeleton.parents[b]
+    while b >= 0:
+        if b == a:
+            return True
+        b = skeleton.parents[b]
+    return False
+
+
+def bone_depths(skeleton):
+    depths = []
+    for parent in skeleton.parents:  # parents precede children
+        depths.append(depths[parent] + 1 if parent >= 0 else 0)
+    return depths
+
+
+def bone_segments(source, target, pairs):
+    """Direction segments for the error report: per paired target bone, its nearest paired descendant
+    whose source bone also descends from the bone's source. Returns four index arrays
+    (target bones, target children, source bones, source children)."""
+    depths = bone_depths(target)
+    segments = []
+    for t, s in sorted(pairs.items()):
+        children = [c for c in sorted(pairs) if is_ancestor(target, t, c) and is_ancestor(source, s, pairs[c])]
+        if children:
+            c = min(children, key=lambda c: depths[c])
+            segments.append((t, c, s, pairs[c]))
+    return tuple(np.array(column, dtype=np.int64) for column in zip(*segments)) if segments else \
+        tuple(np.zeros(0, dtype=np.int64) for _ in range(4))
+
+
+def leg_length(skeleton, world_rest, keys):
+    """Rest-pose thigh->shin->foot length in world units, or None if the chain isn't mapped."""
+    chain = [keys.get(k) for k in LEG_CHAIN]
+    if any(b is None for b in chain):
+        return None
+    p = world_rest[chain, POS]
+    return float(np.linalg.norm(p[1] - p[0]) + np.linalg.norm(p[2] - p[1]))
+
+
+# --- Retargeting ---
+class Retargeter:
+    """Precomputed rest data for one source -> target skeleton pair."""
+
+    def __init__(self, source, target, pairs, root_source=None, root_target=None, scale_ratio=1.0):
+        self.source = source
+        self.target = target
+        self.pairs = pairs
+        self.root_source = root_source
+        self.root_target = root_target
+        self.scale_ratio = scale_ratio
+        self.source_rest_world = forward_kinematics(source, source.rest)
+        self.target_rest_world = forward_kinematics(target, target.rest)
+        self.segments = bone_segments(source, target, pairs)
+
+    def retarget(self, source_local):
+        """(N, Bs, 10) source local TRS -> (N, Bt, 10) target local TRS."""
+        n = source_local.shape[0]
+        src_world = forward_kinematics(self.source, source_local)
+        tgt = self.target
+        out = np.broadcast_to(tgt.rest, (n,) + tgt.rest.shape).copy()
+        world = np.empty_like(out)
+
+        for t in range(len(tgt)):
+            parent = parent_world(tgt, world, t)
+            s = self.pairs.get(t)
+            if s is not None:
+                # World delta from the source's rest, re-applied to the target's rest.
+                delta = quat_mul(src_world[:, s, ROT], quat_conj(self.source_rest_world[s, ROT]))
+                desired = quat_mul(delta, self.target_rest_world[t, ROT])
+                out[:, t, ROT] = quat_normalize(quat_mul(quat_conj(parent[..., ROT]), desired))
+                if t == self.root_target:
+                    desired_world = np.broadcast_to(self.target_rest_world[t], (n, 10)).copy()
+                    offset = src_world[:, s, POS] - self.source_rest_world[s, POS]
+                    desired_world[:, POS] += offset * self.scale_ratio
+                    out[:, t, POS] = trs_inverse_apply(parent, desired_world)[:, POS]
+            world[:, t] = trs_compose(parent, out[:, t])
+        return out, src_world, world
+
+    def direction_errors(self, src_world, tgt_world):
+        """(N, segments) angle in degrees between source and target world-space bone directions."""
+        tb, tc, sb, sc = self.segments
+        src_dir = src_world[..., sc, POS] - src_world[..., sb, POS]
+        tgt_dir = tgt_world[..., tc, POS] - tgt_world[..., tb, POS]
+        norms = np.linalg.norm(src_dir, axis=-1) * np.linalg.norm(tgt_dir, axis=-1)
+        cos = np.einsum("...i,...i->...", src_dir, tgt_dir) / np.maximum(norms, 1e-12)
+        return np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+
+    def errors(self, src_world, tgt_world, src_length, tgt_length):
+        """Per paired target bone, after FK on the target: world bone-direction error (deg; NaN for bones
+        without a paired descendant) and joint position error relative to the root (leg lengths).
+
+        Also returns the direction error of the two rests, i.e. the part no retargeting of rotations removes.
+        """
+        targets = np.array(sorted(self.pairs), dtype=np.int64)
+        sources = np.array([self.pairs[t] for t in targets], dtype=np.int64)
+        n = src_world.shape[0]
+        if len(targets) == 0:
+            return targets, np.zeros((n, 0)), np.zeros((n, 0)), np.zeros(0)
+        columns = np.searchsorted(targets, self.segments[0])
+        dir_err = np.full((n, len(targets)), np.nan)
+        dir_err[:, columns] = self.direction_errors(src_world, tgt_world)
+        rest_err = np.full(len(targets), np.nan)
+        rest_err[columns] = self.direction_errors(self.source_rest_world, self.target_rest_world)
+
+        # Joint positions relative to the root, in leg-length units.
+        rs = self.root_source if self.root_source is not None else sources[0]
+        rt = self.root_target if self.root_target is not None else targets[0]
+        src_rel = (src_world[:, sources, POS] - src_world[:, rs:rs + 1, POS]) / (src_length or 1.0)
+        tgt_rel = (tgt_world[:, targets, POS] - tgt_world[:, rt:rt + 1, POS]) / (tgt_length or 1.0)
+        pos_err = np.linalg.norm(src_rel - tgt_rel, axis=-1)
+        return targets, dir_err, pos_err, rest_err
+
+
+def make_retargeter(source_path, target_path, mappings, overrides=None):
+    """Loads both skeletons and builds a Retargeter. Returns (retargeter, info dict)."""
+    source = load_skeleton(source_path)
+    target = load_skeleton(target_path)
+    src_map = mappings.get(repo_relative(source_path))
+    tgt_map = mappings.get(repo_relative(target_path))
+    pairs, labels = build_bone_pairs(source, target, src_map, tgt_map, overrides)
+
+    src_keys, tgt_keys = canonical_keys(source, src_map), canonical_keys(target, tgt_map)
+    retargeter = Retargeter(source, target, pairs, src_keys.get(ROOT_KEY), tgt_keys.get(ROOT_KEY))
+    src_len = leg_length(source, retargeter.source_rest_world, src_keys)
+    tgt_len = leg_length(target, retargeter.target_rest_world, tgt_keys)
+    if src_len and tgt_len:
+        retargeter.scale_ratio = tgt_len / src_len
+    else:
+        print("  WARNING: Leg chain not mapped on both rigs; root translation is not rescaled.")
+    if retargeter.root_target is None:
+        print(f"  WARNING: No '{ROOT_KEY}' bone paired; root translation is left at rest.")
+    info = {"pairs": len(pairs), "labels": labels, "sourceLegLength": src_len,
+            "targetLegLength": tgt_len, "scaleRatio": retargeter.scale_ratio}
+    return retargeter, info
+
+
+# --- Main ---
+def rounded(value, digits=4):
+    """Report number, or None for NaN (bones without a direction)."""
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retarget a pose library between skeletons.")
+    parser.add_argument("sources", nargs="*", help="Pose files/directories (default: poses/ and models/saved_poses/).")
+    parser.add_argument("--source", required=True, help="GLB the poses were authored on.")
+    parser.add_argument("--target", required=True, help="GLB to retarget onto.")
+    parser.add_argument("--map", help="JSON {sourceBone: targetBone} overriding/adding bone pairs.")
+    parser.add_argument("--min-coverage", type=float, default=0.5,
+                        help="Skip poses that supply fewer than this fraction of the source's bones.")
+    parser.add_argument("-o", "--output-dir", help="Output directory (default: poses/retargeted/<target>).")
+    parser.add_argument("--report", help="Per-bone error report JSON path (default: <output-dir>/retarget_report.json).")
+    args = parser.parse_args(argv)
+
+    overrides = None
+    if args.map:
+        with open(args.map, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+
+    source_path = os.path.join(REPO_ROOT, args.source) if not os.path.isabs(args.source) else args.source
+    target_path = os.path.join(REPO_ROOT, args.target) if not os.path.isabs(args.target) else args.target
+    retargeter, info = make_retargeter(source_path, target_path, load_bone_mappings(), overrides)
+    target_stem = os.path.splitext(os.path.basename(target_path))[0]
+    output_dir = args.output_dir or os.path.join(DEFAULT_OUTPUT_BASE, target_stem)
+
+    print(f"--- Retargeting {repo_relative(source_path)} -> {repo_relative(target_path)} ---")
+    print(f"  Paired bones: {info['pairs']}, root scale ratio: {info['scaleRatio']:.4f}")
+
+    poses = load_pose_library(args.sources or DEFAULT_POSE_ROOTS)
+    local, present = poses_to_array(poses, retargeter.source)
+    coverage = present.mean(axis=1) if len(poses) else np.zeros(0)
+    keep = np.flatnonzero(coverage >= args.min_coverage)
+    skipped = len(poses) - len(keep)
+    if skipped:
+        print(f"  Skipping {skipped} pose(s) below {args.min_coverage:.0%} bone coverage on the source rig.")
+    if len(keep) == 0:
+        print("No poses to retarget.")
+        return 1
+
+    labels = unique_pose_labels([poses[i] for i in keep])
+    try:
+        paths = pose_output_paths(labels, output_dir)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    t0 = time.perf_counter()
+    out, src_world, tgt_world = retargeter.retarget(local[keep])
+    targets, dir_err, pos_err, rest_err = retargeter.errors(src_world, tgt_world, info["sourceLegLength"],
+                                                            info["targetLegLength"])
+    elapsed = time.perf_counter() - t0
+
+    manifest = {}
+    for row, (label, path) in enumerate(zip(labels, paths)):
+        write_pose_file(path, array_to_pose(out[row], retargeter.target))
+        manifest[label] = manifest_entry(path, output_dir)
+    write_manifest(os.path.join(output_dir, "manifest.json"), manifest)
+
+    report = {
+        "source": repo_relative(source_path),
+        "target": repo_relative(target_path),
+        "scaleRatio": info["scaleRatio"],
+        "poses": len(keep),
+        "bones": {
+            retargeter.target.names[t]: {
+                "source": retargeter.source.names[retargeter.pairs[t]],
+                "label": info["labels"].get(t),
+                "dirErrorDegMean": rounded(dir_err[:, k].mean()),
+                "dirErrorDegMax": rounded(dir_err[:, k].max()),
+                "restDirErrorDeg": rounded(rest_err[k]),
+                "posErrorMean": round(float(pos_err[:, k].mean()), 4),
+                "posErrorMax": round(float(pos_err[:, k].max()), 4),
+            } for k, t in enumerate(targets)
+        },
+    }
+    report_path = args.report or os.path.join(output_dir, "retarget_report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"  Retargeted {len(keep)} pose(s) in {elapsed * 1000:.1f} ms -> '{output_dir}'")
+    if len(targets):
+        worst = int(np.argmax(pos_err.max(axis=0)))
+        if len(retargeter.segments[0]):
+            print(f"  Mean bone direction error: {np.nanmean(dir_err):.3f} deg (rests alone: {np.nanmean(rest_err):.3f} deg)")
+        print(f"  Mean FK position error: {pos_err.mean():.4f} leg lengths "
+              f"(worst: '{retargeter.target.names[targets[worst]]}')")
+    print(f"  Report saved: '{report_path}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE
@@ -0,0 +1,413 @@
+# START OF FILE: serve_assets.py
+# Offline tool (plain Python, no Blender needed; brotli is optional).
+#
+# Local static server for the app that behaves like the CDN it is deployed to,
+# so asset loading can be measured and tuned locally:
+#   - precompressed variants: compressible files (JSON, JS, GLB, ...) are
+#     gzipped (and brotli-compressed when the `brotli` package is installed)
+#     once, cached in .asset_cache/ by content hash, and served by
+#     Accept-Encoding with Vary: Accept-Encoding; a variant is only used when
+#     it saves at least MIN_SAVING of the bytes
+#   - strong ETags from the content hash (one per encoding) and
+#     If-None-Match / If-Range handling, so revalidation costs a 304
+#   - Cache-Control: content-hashed file names (name.<hex>.ext) are immutable
+#     for a year; everything else is `no-cache` (always revalidated)
+#   - single byte-range requests (206 / 416), always on the identity encoding:
+#     js/shape_pack.js fetches mesh byte ranges of models/shapes.glb
+#   - --throttle simulates a mobile link: latency before the first byte and a
+#     bandwidth shared by all connections
+#   - one log line per request (status, encoding, bytes, time to first byte,
+#     total time); --log appends them as NDJSON and Ctrl+C prints totals per
+#     file type, to compare the load cost of asset sets
+#
+# Usage:  python scripts/serve_assets.py [--port 8000] [--throttle 3g | --bandwidth KBPS --latency MS]
+#             [--precompress] [--log requests.ndjson] [--root DIR]
+import argparse
+import email.utils
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from glb_utils import REPO_ROOT
+
+# --- Configuration ---
+CACHE_DIR = os.path.join(REPO_ROOT, ".asset_cache")
+MIME_TYPES = {
+    ".html": "text/html; charset=utf-8", ".js": "text/javascript; charset=utf-8", ".mjs": "text/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8", ".json": "application/json", ".ndjson": "application/x-ndjson",
+    ".glb": "model/gltf-binary", ".gltf": "model/gltf+json", ".bin": "application/octet-stream",
+    ".posebin": "application/octet-stream", ".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg",
+    ".webp": "image/webp", ".svg": "image/svg+xml", ".ico": "image/x-icon", ".txt": "text/plain; charset=utf-8",
+    ".md": "text/markdown; charset=utf-8", ".wasm": "application/wasm",
+}
+COMPRESSIBLE = {".html", ".js", ".mjs", ".css", ".json", ".ndjson", ".glb", ".gltf", ".bin", ".posebin", ".svg", ".txt", ".md", ".wasm"}
+MIN_COMPRESS_SIZE = 1024  # Smaller files are always sent as-is
+MIN_SAVING = 0.1  # A variant must be at least 10% smaller than the original
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# (encoding, cache file suffix) in order of preference
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+IMMUTABLE_NAME = re.compile(r"\.[0-9a-f]{8,}\.[^./]+$")  # name.<content hash>.ext
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDATE = "no-cache"
+# name -> (kilobits per second, round-trip latency ms); roughly the Chrome DevTools presets
+THROTTLE_PROFILES = {"slow-3g": (400, 400), "3g": (1600, 150), "4g": (9000, 85), "wifi": (30000, 20)}
+SEND_CHUNK = 16 * 1024
+SKIP_DIRS = {".git", ".asset_cache", ".asset_build", "node_modules", "__pycache__"}
+
+
+# --- Helper Functions ---
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def parse_accept_encoding(header):
+    """{coding: q} from an Accept-Encoding header."""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def parse_range(header, size):
+    """(start, end inclusive) for a single `bytes=` range, None to send the whole file
+    (absent, malformed or multi-range), or "unsatisfiable"."""
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", header or "")
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0:
+            return "unsatisfiable"
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        return "unsatisfiable"
+    return start, end
+
+
+class FileInfo:
+    """Content hash, size and mtime of one file; recomputed when mtime/size change."""
+
+    def __init__(self, path, st):
+        self.path = path
+        self.mtime_ns = st.st_mtime_ns
+        self.size = st.st_size
+        self.sha256 = file_sha256(path)
+        self.variants = {}  # encoding -> (cache path, size) or None when not worth it
+
+
+class AssetStore:
+    """File lookup plus the hash and compressed-variant caches, shared by the handler threads."""
+
+    def __init__(self, root, cache_dir=CACHE_DIR):
+        self.root = os.path.realpath(root)
+        self.cache_dir = cache_dir
+        self.infos = {}
+        self.lock = threading.Lock()
+        self.variant_locks = {}
+
+    def resolve(self, url_path):
+        """URL path -> file path inside the root, or None (missing, outside the root, hidden)."""
+        parts = [p for p in urllib.parse.unquote(url_path).split("/") if p not in ("", ".")]
+        if any(p == ".." or p in SKIP_DIRS for p in parts):
+            return None
+        path = os.path.realpath(os.path.join(self.root, *parts))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        return path if os.path.isfile(path) else None
+
+    def info(self, path):
+        st = os.stat(path)
+        with self.lock:
+            cached = self.infos.get(path)
+        if cached and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+            return cached
+        info = FileInfo(path, st)
+        with self.lock:
+            self.infos[path] = info
+        return info
+
+    def variant(self, info, encoding):
+        """(path, size) of the cached compressed copy, built on first use; None if not worth serving."""
+        if encoding in info.variants:
+            return info.variants[encoding]
+        suffix = dict(ENCODINGS)[encoding]
+        with self.lock:
+            lock = self.variant_locks.setdefault((info.sha256, encoding), threading.Lock())
+        with lock:  # One thread compresses; the others wait for its result
+            if encoding in info.variants:
+                return info.variants[encoding]
+            cache_path = os.path.join(self.cache_dir, info.sha256 + suffix)
+            if not os.path.exists(cache_path):
+                with open(info.path, "rb") as f:
+                    data = f.read()
+                if encoding == "br":
+                    packed = brotli.compress(data, quality=BROTLI_QUALITY)
+                else:
+                    packed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = f"{cache_path}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(packed)
+                os.replace(tmp, cache_path)
+            size = os.path.getsize(cache_path)
+            info.variants[encoding] = (cache_path, size) if size <= info.size * (1 - MIN_SAVING) else None
+            return info.variants[encoding]
+
+    def available_encodings(self):
+        return [e for e, _ in ENCODINGS if e != "br" or brotli is not None]
+
+    def precompress(self):
+        """Builds every variant up front (otherwise the first request for a file pays for it)."""
+        count = 0
+        for root, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            for name in files:
+                path = os.path.join(root, name)
+                if os.path.splitext(name)[1].lower() in COMPRESSIBLE and os.path.getsize(path) >= MIN_COMPRESS_SIZE:
+                    info = self.info(path)
+                    for encoding in self.available_encodings():
+                        count += self.variant(info, encoding) is not None
+        return count
+
+
+class Link:
+    """Shared bandwidth + latency, like one phone connection used by all parallel requests."""
+
+    def __init__(self, kbps, latency_ms):
+        self.bytes_per_second = kbps * 1000 / 8 if kbps else None
+        self.latency = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.free_at = 0.0
+
+    def send_delay(self, nbytes):
+        """Seconds to wait before `nbytes` have crossed the link (reserves that link time)."""
+        if not self.bytes_per_second:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.free_at = max(self.free_at, now) + nbytes / self.bytes_per_second
+            return self.free_at - now
+
+
+class RequestLog:
+    """Per-request records: printed, optionally appended as NDJSON, and totalled per file type."""
+
+    def __init__(self, path=None, quiet=False):
+        self.file = open(path, "a", encoding="utf-8") if path else None
+        self.quiet = quiet
+        self.lock = threading.Lock()
+        self.totals = {}
+
+    def add(self, record):
+        with self.lock:
+            if not self.quiet:
+                print(f"{record['status']} {record['method']:<4} {record['path']:<48} {record['encoding']:<8} "
+                      f"{record['bytes']:>10} B  ttfb {record['ttfbMs']:>7.1f} ms  total {record['totalMs']:>8.1f} ms")
+            if self.file:
+                self.file.write(json.dumps(record) + "\n")
+                self.file.flush()
+            kind = os.path.splitext(record["path"])[1].lower() or "(none)"
+            total = self.totals.setdefault(kind, {"requests": 0, "bytes": 0, "fileBytes": 0, "totalMs": 0.0})
+            total["requests"] += 1
+            total["bytes"] += record["bytes"]
+            total["fileBytes"] += record["fileBytes"]
+            total["totalMs"] += record["totalMs"]
+
+    def summary(self):
+        if not self.totals:
+            return
+        print(f"\n{'type':<10} {'requests':>8} {'sent':>12} {'file bytes':>12} {'sum ms':>10}")
+        for kind, t in sorted(self.totals.items(), key=lambda item: -item[1]["bytes"]):
+            print(f"{kind:<10} {t['requests']:>8} {t['bytes']:>12} {t['fileBytes']:>12} {t['totalMs']:>10.1f}")
+        print(f"{'total':<10} {sum(t['requests'] for t in self.totals.values()):>8} "
+              f"{sum(t['bytes'] for t in self.totals.values()):>12} {sum(t['fileBytes'] for t in self.totals.values()):>12}")
+
+
+# --- Request Handling ---
+class AssetHandler(BaseHTTPRequestHandler):
+    server_version = "ShadowRoomAssets/1"
+    protocol_version = "HTTP/1.1"  # Keep-alive, like a real CDN
+    store = link = log = None  # Set by main()
+
+    def log_message(self, format, *args):
+        pass  # RequestLog prints its own line per request
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def serve(self, send_body):
+        t0 = time.perf_counter()
+        record = {"method": self.command, "path": urllib.parse.urlsplit(self.path).path, "status": 0, "encoding": "identity",
+                  "bytes": 0, "fileBytes": 0, "range": None, "ttfbMs": 0.0, "totalMs": 0.0}
+        try:
+            self.respond(record, send_body, t0)
+        except (BrokenPipeError, ConnectionResetError):
+            record["aborted"] = True
+        record["totalMs"] = round((time.perf_counter() - t0) * 1000, 2)
+        self.log.add(record)
+
+    def send_status(self, record, status, headers, t0):
+        if self.link.latency:
+            time.sleep(self.link.latency)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        record["status"] = int(status)
+        record["ttfbMs"] = round((time.perf_counter() - t0) * 1000, 2)
+
+    def respond(self, record, send_body, t0):
+        path = self.store.resolve(record["path"])
+        if path is None:
+            body = b"Not found\n"
+            self.send_status(record, HTTPStatus.NOT_FOUND, [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))], t0)
+            if send_body:
+                self.wfile.write(body)
+            return
+        info = self.store.info(path)
+        ext = os.path.splitext(path)[1].lower()
+        record["fileBytes"] = info.size
+        headers = [("Content-Type", MIME_TYPES.get(ext, "application/octet-stream")),
+                   ("Cache-Control", CACHE_IMMUTABLE if IMMUTABLE_NAME.search(os.path.basename(path)) else CACHE_REVALIDATE),
+                   ("Last-Modified", email.utils.formatdate(info.mtime_ns / 1e9, usegmt=True)),
+                   ("Accept-Ranges", "bytes")]
+        compressible = ext in COMPRESSIBLE and info.size >= MIN_COMPRESS_SIZE
+        if compressible:
+            headers.append(("Vary", "Accept-Encoding"))
+
+        # Byte ranges address the identity bytes, so a Range request is never compressed.
+        wanted = None if "Range" in self.headers else parse_accept_encoding(self.headers.get("Accept-Encoding"))
+        body_path, size, encoding = path, info.size, "identity"
+        if compressible and wanted:
+            for candidate in self.store.available_encodings():
+                if wanted.get(candidate, 0) > 0:
+                    variant = self.store.variant(info, candidate)
+                    if variant:
+                        body_path, size, encoding = variant[0], variant[1], candidate
+                        break
+        etag = f'"{info.sha256[:32]}"' if encoding == "identity" else f'"{info.sha256[:32]}-{encoding}"'
+        headers.append(("ETag", etag))
+        if encoding != "identity":
+            headers.append(("Content-Encoding", encoding))
+        record["encoding"] = encoding
+
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+            self.send_status(record, HTTPStatus.NOT_MODIFIED, [h for h in headers if h[0] != "Content-Type"], t0)
+            return
+
+        start, end, status = 0, size - 1, HTTPStatus.OK
+        if "Range" in self.headers and (self.headers.get("If-Range") in (None, etag)):
+            byte_range = parse_range(self.headers["Range"], size)
+            if byte_range == "unsatisfiable":
+                self.send_status(record, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+                                 headers + [("Content-Range", f"bytes */{size}"), ("Content-Length", "0")], t0)
+                return
+            if byte_range:
+                start, end = byte_range
+                status = HTTPStatus.PARTIAL_CONTENT
+                headers.append(("Content-Range", f"bytes {start}-{end}/{size}"))
+                record["range"] = [start, end]
+        length = end - start + 1 if size else 0
+        self.send_status(record, status, headers + [("Content-Length", str(length))], t0)
+        if not send_body:
+            return
+        with open(body_path, "rb") as f:
+            f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(SEND_CHUNK, remaining))
+                if not chunk:
+                    break
+                delay = self.link.send_delay(len(chunk))
+                if delay > 0:
+                    time.sleep(delay)
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+                record["bytes"] += len(chunk)
+
+
+# --- Main ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the app locally with precompressed variants, ETags, range requests and throttling.")
+    parser.add_argument("--root", default=REPO_ROOT, help="Directory to serve (default: the repo root).")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8000, help="Port (default: 8000).")
+    parser.add_argument("--throttle", choices=sorted(THROTTLE_PROFILES), help="Simulated link (bandwidth + latency preset).")
+    parser.add_argument("--bandwidth", type=float, help="Link bandwidth in kbit/s shared by all requests (overrides --throttle).")
+    parser.add_argument("--latency", type=float, help="Added latency per request in ms (overrides --throttle).")
+    parser.add_argument("--precompress", action="store_true", help="Build every compressed variant before serving.")
+    parser.add_argument("--log", help="Append one JSON record per request to this file.")
+    parser.add_argument("--quiet", action="store_true", help="Don't print a line per request.")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        print(f"ERROR: '{args.root}' is not a directory.")
+        return 1
+    kbps, latency = THROTTLE_PROFILES.get(args.throttle, (None, 0))
+    AssetHandler.store = AssetStore(args.root)
+    AssetHandler.link = Link(args.bandwidth if args.bandwidth is not None else kbps, args.latency if args.latency is not None else latency)
+    AssetHandler.log = RequestLog(args.log, args.quiet)
+    if brotli is None:
+        print("  WARNING: 'brotli' is not installed (pip install brotli); serving gzip variants only.")
+    if args.precompress:
+        t0 = time.perf_counter()
+        count = AssetHandler.store.precompress()
+        print(f"  Precompressed {count} variant(s) into '{CACHE_DIR}' in {time.perf_counter() - t0:.1f}s.")
+
+    server = ThreadingHTTPServer((args.host, args.port), AssetHandler)
+    server.daemon_threads = True
+    link = AssetHandler.link
+    throttle = f"{link.bytes_per_second * 8 / 1000:.0f} kbit/s" if link.bytes_per_second else "unthrottled"
+    print(f"--- Serving '{AssetHandler.store.root}' at http://{args.host}:{args.port}/ "
+          f"({throttle}, +{link.latency * 1000:.0f} ms latency; encodings: {', '.join(AssetHandler.store.available_encodings())}) ---")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        AssetHandler.log.summary()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END OF FILE